@@ -10,6 +10,10 @@ import logging
 import os
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
+from cachetools import TTLCache
+from metaplex_metadata import fetch_metadata_batch
+from token_timestamp_resolver import get_token_timestamp_resolver
+from rpc_router import get_rpc_router, RPCError
 
 logger = logging.getLogger(__name__)
 
@@ -21,62 +25,42 @@ class AlchemyLetsBonkScraper:
         if not self.api_key:
             raise ValueError("ALCHEMY_API_KEY environment variable required")
         
-        self.base_url = f"https://solana-mainnet.g.alchemy.com/v2/{self.api_key}"
         self.letsbonk_program_id = "LanMV9sAd7wArD4vJFi2qDdfnVhFxYSUg6eADduJ3uj"
         
-        # Ultra-fast rate limiting for maximum speed
-        self.last_request_time = 0
-        self.min_request_interval = 0.05  # 50ms between requests (20 requests/second)
+        # Rate limits live in the shared RPC router (per-endpoint token buckets)
         
         # Caching to reduce API calls
         self.processed_signatures = {}
         self.metadata_cache = {}
+        self.metaplex_cache = TTLCache(maxsize=10000, ttl=600)  # mint -> on-chain metadata dict (None = no account)
         
+        # Plain HTTP session for DexScreener / LetsBonk page lookups (RPC goes through the router)
         self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'Alchemy-Token-Monitor/1.0'
-        })
+        self.session.headers.update({'User-Agent': 'Alchemy-Token-Monitor/1.0'})
         
         logger.info("🔄 Initialized Alchemy LetsBonk scraper (FREE tier - 300M requests/month)")
     
-    def _rate_limit(self):
-        """Conservative rate limiting for Alchemy free tier"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        self.last_request_time = time.time()
-    
     def _make_rpc_call(self, method: str, params: list) -> Optional[dict]:
-        """Make RPC call to Alchemy with error handling"""
+        """Make RPC call through the shared router (batched, hedged across endpoints)"""
         try:
-            self._rate_limit()
-            
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": method,
-                "params": params
-            }
-            
-            response = self.session.post(self.base_url, json=payload, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'result' in data:
-                    return data['result']
-                else:
-                    logger.debug(f"Alchemy RPC error: {data.get('error', 'Unknown error')}")
-                    return None
-            else:
-                logger.warning(f"Alchemy HTTP error: {response.status_code}")
-                return None
-                
+            return get_rpc_router().call_sync(method, params)
+        except RPCError as e:
+            logger.debug(f"Alchemy RPC error: {e}")
+            return None
         except Exception as e:
             logger.debug(f"Alchemy RPC call failed: {e}")
             return None
     
+    def _make_rpc_calls(self, calls: List[tuple]) -> List[Optional[dict]]:
+        """Many RPC calls issued together (the router packs them into batches); None where a call failed"""
+        if not calls:
+            return []
+        try:
+            return get_rpc_router().call_many_sync(calls)
+        except Exception as e:
+            logger.debug(f"Alchemy RPC batch failed: {e}")
+            return [None] * len(calls)
+    
     def get_recent_signatures(self, limit: int = 25) -> List[str]:
         """Get recent transaction signatures for LetsBonk program - focusing ONLY on last 15 seconds"""
         try:
@@ -133,6 +117,25 @@ class AlchemyLetsBonkScraper:
             logger.debug(f"Failed to get transaction {signature}: {e}")
             return None
     
+    def get_transactions_details(self, signatures: List[str]) -> List[dict]:
+        """Transaction details for many signatures in one round of batched calls (already processed ones skipped)"""
+        pending = [signature for signature in dict.fromkeys(signatures) if signature not in self.processed_signatures]
+        results = self._make_rpc_calls([
+            ("getTransaction", [signature, {
+                "encoding": "jsonParsed",
+                "commitment": "confirmed",
+                "maxSupportedTransactionVersion": 0
+            }]) for signature in pending
+        ])
+        
+        transactions = []
+        now = time.time()
+        for signature, result in zip(pending, results):
+            if result:
+                self.processed_signatures[signature] = now
+                transactions.append(result)
+        return transactions
+    
     def extract_token_from_transaction(self, transaction: dict) -> Optional[Dict[str, Any]]:
         """Extract token information from transaction - ONLY for token CREATION events"""
         try:
@@ -176,23 +179,10 @@ class AlchemyLetsBonkScraper:
                 logger.debug(f"🚫 REJECTED: Not a token creation transaction")
                 return None
             
-            meta = transaction.get('meta', {})
-            message = transaction.get('transaction', {}).get('message', {})
-            
-            # Look for new token mint in post token balances
-            post_token_balances = meta.get('postTokenBalances', [])
-            
-            mint_addresses = []
-            for balance in post_token_balances:
-                mint = balance.get('mint', '')
-                if mint and mint.lower().endswith('bonk'):
-                    mint_addresses.append(mint)
-            
-            if not mint_addresses:
+            mint_address = self._find_bonk_mint(transaction)
+            if not mint_address:
                 return None
             
-            mint_address = mint_addresses[0]
-            
             # Get basic metadata using Alchemy
             metadata = self._get_token_metadata(mint_address)
             if not metadata:
@@ -233,6 +223,8 @@ class AlchemyLetsBonkScraper:
             
             # Use the verified blockTime (we already checked it exists and is recent)
             signatures = transaction.get('transaction', {}).get('signatures', [''])
+            get_token_timestamp_resolver().note_event(mint_address, signatures[0] if signatures else None,
+                                                      transaction.get('slot'), block_time, source='alchemy-api')
             
             # Log token creation for verification
             token_age = current_time - block_time
@@ -256,6 +248,14 @@ class AlchemyLetsBonkScraper:
             logger.debug(f"Token extraction error: {e}")
             return None
     
+    def _find_bonk_mint(self, transaction: dict) -> Optional[str]:
+        """First LetsBonk mint in the transaction's post token balances"""
+        for balance in transaction.get('meta', {}).get('postTokenBalances', []):
+            mint = balance.get('mint', '')
+            if mint and mint.lower().endswith('bonk'):
+                return mint
+        return None
+    
     def _is_token_creation_transaction(self, transaction: dict) -> bool:
         """Check if transaction is a token creation transaction for LetsBonk"""
         try:
@@ -350,84 +350,28 @@ class AlchemyLetsBonkScraper:
             logger.debug(f"Metadata fetch error for {mint_address}: {e}")
             return {}
     
+    def prefetch_metaplex_metadata(self, mint_addresses: List[str]) -> int:
+        """Resolve on-chain metadata for a burst of mints with one getMultipleAccounts call (locally derived PDAs)"""
+        pending = [mint for mint in mint_addresses if mint not in self.metaplex_cache]
+        if not pending:
+            return 0
+        
+        resolved = fetch_metadata_batch(self._make_rpc_call, pending)
+        for mint, metadata in resolved.items():
+            self.metaplex_cache[mint] = metadata.to_dict() if metadata and metadata.name else None
+        logger.debug(f"🧾 Metaplex metadata: {len(resolved)}/{len(pending)} mints resolved in one batch")
+        return len(resolved)
+    
     def _get_metaplex_metadata(self, mint_address: str) -> dict:
-        """Get metadata from Metaplex metadata program"""
+        """Get metadata from the Metaplex metadata account (prefetched per burst, else fetched alone)"""
         try:
-            import base58
-            import struct
-            
-            # Metaplex metadata program ID
-            metadata_program_id = "metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s"
-            
-            # Derive the metadata account PDA
-            # This is a simplified PDA derivation for Metaplex metadata
-            try:
-                # Use getProgramAccounts to find metadata accounts for this mint
-                result = self._make_rpc_call("getProgramAccounts", [
-                    metadata_program_id,
-                    {
-                        "encoding": "base64",
-                        "filters": [
-                            {
-                                "memcmp": {
-                                    "offset": 33,  # Mint address offset in metadata account
-                                    "bytes": mint_address
-                                }
-                            }
-                        ]
-                    }
-                ])
-                
-                if result and len(result) > 0:
-                    # Get the metadata account data
-                    metadata_account = result[0]
-                    account_data = metadata_account.get('account', {}).get('data')
-                    
-                    if account_data:
-                        # Decode the metadata from base64
-                        import base64
-                        decoded_data = base64.b64decode(account_data[0])
-                        
-                        # Parse the metadata structure (simplified)
-                        # Metaplex metadata has a specific structure
-                        try:
-                            # Skip the first few bytes (discriminator, etc.)
-                            # The name usually starts around byte 69
-                            offset = 69
-                            
-                            # Read name length (4 bytes)
-                            if len(decoded_data) > offset + 4:
-                                name_len = struct.unpack('<I', decoded_data[offset:offset+4])[0]
-                                if name_len > 0 and name_len < 200:  # Reasonable name length
-                                    name_start = offset + 4
-                                    name_end = name_start + name_len
-                                    if len(decoded_data) > name_end:
-                                        name = decoded_data[name_start:name_end].decode('utf-8', errors='ignore').strip('\x00')
-                                        
-                                        # Read symbol length and symbol
-                                        symbol_offset = name_end
-                                        if len(decoded_data) > symbol_offset + 4:
-                                            symbol_len = struct.unpack('<I', decoded_data[symbol_offset:symbol_offset+4])[0]
-                                            if symbol_len > 0 and symbol_len < 50:
-                                                symbol_start = symbol_offset + 4
-                                                symbol_end = symbol_start + symbol_len
-                                                if len(decoded_data) > symbol_end:
-                                                    symbol = decoded_data[symbol_start:symbol_end].decode('utf-8', errors='ignore').strip('\x00')
-                                                    
-                                                    if name and len(name) > 0:
-                                                        logger.info(f"🎯 Found real token name: {name} ({symbol})")
-                                                        return {
-                                                            'name': name,
-                                                            'symbol': symbol,
-                                                            'decimals': 9
-                                                        }
-                        except Exception as parse_error:
-                            logger.debug(f"Metadata parsing error: {parse_error}")
-                
-            except Exception as rpc_error:
-                logger.debug(f"RPC call failed: {rpc_error}")
+            if mint_address not in self.metaplex_cache:
+                self.prefetch_metaplex_metadata([mint_address])
             
-            return None
+            metadata = self.metaplex_cache.get(mint_address)
+            if metadata:
+                logger.info(f"🎯 Found real token name: {metadata['name']} ({metadata['symbol']})")
+            return metadata
             
         except Exception as e:
             logger.debug(f"Metaplex metadata fetch failed for {mint_address}: {e}")
@@ -546,15 +490,19 @@ class AlchemyLetsBonkScraper:
             tokens = []
             processed_count = 0
             
-            for signature in signatures:
+            # Get transaction details - all signatures at once so the router batches them
+            transactions = self.get_transactions_details(signatures)
+            
+            # One metadata batch for every launch in this burst instead of a lookup per token
+            creation_mints = [self._find_bonk_mint(transaction) for transaction in transactions
+                              if self._is_token_creation_transaction(transaction)]
+            if any(creation_mints):
+                self.prefetch_metaplex_metadata([mint for mint in creation_mints if mint])
+            
+            for transaction in transactions:
                 if processed_count >= limit:
                     break
                 
-                # Get transaction details
-                transaction = self.get_transaction_details(signature)
-                if not transaction:
-                    continue
-                
                 # Extract token data
                 token_data = self.extract_token_from_transaction(transaction)
                 if token_data:
@@ -9,14 +9,23 @@ import logging
 import threading
 import json
 import asyncio
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from flask import Flask, jsonify, request
 from waitress import serve
 from typing import Dict, List, Any
-import discord
-from discord.ext import commands
-from discord import app_commands
-from solana.rpc.api import Client
+from startup_orchestrator import get_startup_orchestrator, lazy_import, lazy_value
+# discord.py and solana-py are only needed once the bot / an RPC call runs - imported on first use
+discord = lazy_import('discord')
+commands = lazy_import('discord.ext.commands')
+app_commands = lazy_import('discord.app_commands')
+from db_pool import get_connection
+from write_batcher import get_write_batcher
+from notification_dedupe import NotificationDedupeFilter
+from seen_address_store import SeenAddressStore
+from token_timestamp_resolver import get_token_timestamp_resolver, is_exact
+from consensus_validator import get_consensus_validator
+from rpc_router import get_rpc_router
+Client = lazy_import('solana.rpc.api', 'Client')
 from cachetools import TTLCache
 import base58
 # Disabled solders imports for pure DexScreener deployment
@@ -210,14 +219,15 @@ def get_solana_client():
     # If all fail, return the primary endpoint anyway
     return Client(f"https://solana-mainnet.g.alchemy.com/v2/{ALCHEMY_API_KEY}")
 
-client = get_solana_client()
+# Endpoint probing is network I/O - done on first RPC use, not at import
+client = lazy_value(get_solana_client, 'solana_rpc_client')
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('alchemy_monitoring.log'),
+        logging.FileHandler(os.getenv('ALCHEMY_LOG_FILE', 'alchemy_monitoring.log')),
         logging.StreamHandler()
     ]
 )
@@ -234,8 +244,8 @@ class AlchemyMonitoringServer:
         self.alchemy_api_key = ALCHEMY_API_KEY
         
         # Initialize TTL cache system for memory management
-        self.seen_token_addresses = TTLCache(maxsize=10000, ttl=60)  # 1-minute TTL
-        self.processed_signatures = TTLCache(maxsize=5000, ttl=300)  # 5-minute TTL for signatures
+        self.seen_token_addresses = SeenAddressStore(window_seconds=60, capacity=10000)  # 1-minute window
+        self.processed_signatures = SeenAddressStore(window_seconds=300, capacity=5000)  # 5-minute window for signatures
         self.websocket_signatures = TTLCache(maxsize=5000, ttl=60)   # 1-minute TTL for WebSocket events
         self.permanently_rejected_tokens = set()  # Permanent blocklist for old tokens (prevents TTL cache reprocessing)
         
@@ -373,14 +383,13 @@ class AlchemyMonitoringServer:
             logger.warning(f"⚠️ DexScreener validator failed to initialize: {e}")
             self.dexscreener_validator = None
         
-        # Initialize multi-source timestamp validator for consensus validation
+        # Shared consensus validator: one background loop with persistent sessions for every worker thread
         self.multi_source_validator = None
         try:
-            from multi_source_timestamp_validator import MultiSourceTimestampValidator
-            self.multi_source_validator = MultiSourceTimestampValidator()
-            logger.info("✅ Multi-source timestamp validator initialized for consensus validation")
+            self.multi_source_validator = get_consensus_validator()
+            logger.info("✅ Consensus timestamp validator initialized for consensus validation")
         except Exception as e:
-            logger.warning(f"⚠️ Multi-source validator failed to initialize: {e}")
+            logger.warning(f"⚠️ Consensus validator failed to initialize: {e}")
         
         # Initialize token link validator for social media validation
         self.token_link_validator = None
@@ -470,6 +479,7 @@ class AlchemyMonitoringServer:
         
         # Tracking with persistent database storage to prevent duplicates across restarts
         self.notified_token_addresses = set()  # Track tokens we've already sent notifications for in memory
+        self.notification_filter = NotificationDedupeFilter()  # Bloom + LRU front for notified_tokens lookups
         self.notification_count = 0
         
         # Initialize persistent notification tracking in database
@@ -616,7 +626,7 @@ class AlchemyMonitoringServer:
                 db_url = os.getenv('DATABASE_URL')
                 if db_url:
                     import psycopg2
-                    conn = psycopg2.connect(db_url)
+                    conn = get_connection(db_url)
                     cursor = conn.cursor()
                     cursor.execute("SELECT DISTINCT target_link FROM link_sniper_configs WHERE enabled = true")
                     results = cursor.fetchall()
@@ -845,6 +855,15 @@ class AlchemyMonitoringServer:
         token_name = token.get('name', 'unknown')
         token_address = token.get('address', '')
         
+        # Creation slot/blockTime carried by the announcing event is authoritative - when the resolver
+        # already knows it, freshness needs no RPC and no consensus round-trip. A capped signature-history
+        # scan (complete=False) only bounds the age from below: it can reject, but consensus still runs
+        chain_record = get_token_timestamp_resolver().lookup(token_address) if token_address else None
+        chain_exact = is_exact(chain_record)
+        if chain_record:
+            created_timestamp = chain_record['creation_timestamp']
+            token['created_timestamp'] = created_timestamp
+        
         # CRITICAL FIX: Reject tokens without valid blockchain timestamp - NO FALLBACK ALLOWED
         if created_timestamp is None or created_timestamp <= 0:
             logger.error(f"🚫 ABSOLUTELY REJECTED: {token_name} ({token_address[:10]}...)")
@@ -914,16 +933,10 @@ class AlchemyMonitoringServer:
                 # Continue with blockchain validation only
         
         # ULTIMATE: Multi-source consensus validation for maximum accuracy
-        if self.multi_source_validator and token_address.endswith('bonk'):
+        if not chain_exact and self.multi_source_validator and token_address.endswith('bonk'):
             try:
-                import asyncio
-                
-                # CRITICAL FIX: Use proper async context manager for session
-                async def run_consensus_validation():
-                    async with self.multi_source_validator:
-                        return await self.multi_source_validator.validate_token_timestamp(token_address)
-                
-                consensus_result = asyncio.run(run_consensus_validation())
+                # Runs on the validator's shared loop (cached per address, sources fanned out under a deadline)
+                consensus_result = self.multi_source_validator.validate_sync(token_address)
                 
                 if consensus_result and consensus_result.get('valid_sources', 0) >= 1:  # Allow single source
                     consensus_age = consensus_result.get('age_seconds', float('inf'))
@@ -1018,8 +1031,9 @@ class AlchemyMonitoringServer:
             cursor.close()
             conn.close()
             
-            # Load recently notified tokens into memory cache (last 24 hours)
-            self.load_recent_notifications()
+            # Load recently notified tokens into memory cache (last 24 hours) - concurrently with the
+            # rest of startup; until the filter is warmed, checks fall through to the database
+            get_startup_orchestrator().run('notification_dedupe', self.load_recent_notifications)
             
             # Schedule periodic cleanup of old notifications (every 6 hours)
             import threading
@@ -1049,55 +1063,46 @@ class AlchemyMonitoringServer:
                 
             cursor = conn.cursor()
             
-            # Load tokens notified in last 24 hours to prevent immediate re-notifications
+            # Load the whole 7-day retention window into the dedupe filter, and the
+            # last 24 hours into the memory cache to prevent immediate re-notifications.
+            # The 24h cutoff is evaluated in SQL - notified_at may come back tz-aware.
             cursor.execute("""
-                SELECT token_address FROM notified_tokens 
-                WHERE notified_at > CURRENT_TIMESTAMP - INTERVAL '24 hours'
+                SELECT token_address, notified_at,
+                       notified_at IS NULL OR notified_at > CURRENT_TIMESTAMP - INTERVAL '24 hours' AS is_recent
+                FROM notified_tokens 
+                WHERE notified_at > CURRENT_TIMESTAMP - INTERVAL '7 days'
             """)
             
-            recent_tokens = cursor.fetchall()
-            for (token_address,) in recent_tokens:
-                self.notified_token_addresses.add(token_address)
-            
+            notified_rows = cursor.fetchall()
             cursor.close()
             conn.close()
             
-            logger.info(f"📋 Loaded {len(recent_tokens)} recently notified tokens from database")
+            recent_count = 0
+            for token_address, notified_at, is_recent in notified_rows:
+                if is_recent:
+                    self.notified_token_addresses.add(token_address)
+                    recent_count += 1
+            self.notification_filter.warm((token_address, notified_at) for token_address, notified_at, _ in notified_rows)
+            
+            logger.info(f"📋 Loaded {recent_count} recently notified tokens from database "
+                        f"({len(notified_rows)} in 7-day dedupe filter)")
             
         except Exception as e:
             logger.error(f"❌ Failed to load recent notifications: {e}")
     
     def store_detected_token_in_db(self, address, name, symbol, platform='letsbonk', status='pre_migration', name_status='resolved', matched_keywords=None, social_links=None):
-        """Store detected token in searchable database for /og coin command"""
+        """Store detected token in searchable database for /og coin command (write-behind, flushed in batches)"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return
-                
-            cursor = conn.cursor()
-            
             # Convert lists to PostgreSQL arrays
             keywords_array = matched_keywords if matched_keywords else []
             social_array = social_links if social_links else []
             
-            # Insert or update token data
-            cursor.execute("""
-                INSERT INTO detected_tokens (address, name, symbol, platform, status, name_status, matched_keywords, social_links, detection_timestamp)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                ON CONFLICT (address) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    symbol = EXCLUDED.symbol,
-                    status = EXCLUDED.status,
-                    name_status = EXCLUDED.name_status,
-                    matched_keywords = EXCLUDED.matched_keywords,
-                    social_links = EXCLUDED.social_links
-            """, (address, name, symbol, platform, status, name_status, keywords_array, social_array))
+            # Insert or update token data (coalesced per address - latest row wins, like ON CONFLICT DO UPDATE)
+            get_write_batcher().add('detected_tokens_upsert', (
+                address, name, symbol, platform, status, name_status, keywords_array, social_array
+            ))
             
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            logger.info(f"✅ Stored token in searchable database: {name} ({address[:8]}...)")
+            logger.info(f"✅ Queued token for searchable database: {name} ({address[:8]}...)")
             
         except Exception as e:
             logger.error(f"Error storing detected token: {e}")
@@ -1151,25 +1156,11 @@ class AlchemyMonitoringServer:
             return []
     
     def record_notification_in_db(self, token_address, token_name, notification_type='keyword_match'):
-        """Record token notification in database for persistent deduplication"""
+        """Record token notification in database for persistent deduplication (write-behind)"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return False
-                
-            cursor = conn.cursor()
-            
             # Insert notification record (ignore if already exists)
-            cursor.execute("""
-                INSERT INTO notified_tokens (token_address, token_name, notification_type)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (token_address) DO NOTHING
-            """, (token_address, token_name, notification_type))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
+            get_write_batcher().add('notified_tokens_by_address', (token_address, token_name, notification_type))
+            self.notification_filter.add(token_address)
             return True
             
         except Exception as e:
@@ -1177,7 +1168,15 @@ class AlchemyMonitoringServer:
             return False
     
     def is_token_already_notified(self, token_address):
-        """Check if token was already notified (database check for persistence across restarts)"""
+        """Check if token was already notified (dedupe filter first, database only for probable hits)"""
+        return self.notification_filter.check(token_address, self._lookup_notified_token)
+    
+    def _lookup_notified_token(self, token_address):
+        """Database check for persistence across restarts"""
+        # Recorded but not yet flushed by the write batcher
+        if get_write_batcher().is_pending('notified_tokens_by_address', (token_address,)):
+            return True
+        
         try:
             conn = self.get_db_connection()
             if not conn:
@@ -1203,6 +1202,9 @@ class AlchemyMonitoringServer:
     
     def cleanup_old_notifications(self):
         """Clean up old notification records (keep last 7 days only)"""
+        # Age the in-memory dedupe filter out on the same 7-day window
+        self.notification_filter.rotate()
+        
         try:
             conn = self.get_db_connection()
             if not conn:
@@ -1238,7 +1240,7 @@ class AlchemyMonitoringServer:
                 return self._get_fallback_keywords_list()
             
             logger.info("🔗 DIRECT DATABASE: Connecting to PostgreSQL...")
-            conn = psycopg2.connect(database_url)
+            conn = get_connection(database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -1306,7 +1308,7 @@ class AlchemyMonitoringServer:
         try:
             database_url = os.getenv('DATABASE_URL')
             if database_url:
-                return psycopg2.connect(database_url)
+                return get_connection(database_url)
             else:
                 logger.warning("⚠️ No DATABASE_URL found for wallet persistence")
                 return None
@@ -1810,8 +1812,7 @@ class AlchemyMonitoringServer:
                     if not hasattr(self, 'permanently_rejected_tokens'):
                         self.permanently_rejected_tokens = set()
                     if not hasattr(self, 'seen_token_addresses'):
-                        from cachetools import TTLCache
-                        self.seen_token_addresses = TTLCache(maxsize=10000, ttl=300)  # 5-minute cache
+                        self.seen_token_addresses = SeenAddressStore(window_seconds=300, capacity=10000)  # 5-minute window
                     
                     # Check permanent blocklist first (prevents reprocessing old tokens when TTL cache expires)
                     if token['address'] in self.permanently_rejected_tokens:
@@ -1871,8 +1872,8 @@ class AlchemyMonitoringServer:
                         self.permanently_rejected_tokens.add(token['address'])
                         return None
                     
-                    # Mark as seen in TTL cache (auto-expires in 5 minutes)
-                    self.seen_token_addresses[token['address']] = True
+                    # Mark as seen (expires individually once it leaves the window)
+                    self.seen_token_addresses.add(token['address'])
                     
                     # Log the token being processed with full address (only for genuinely new tokens)
                     logger.info(f"   📍 NEW: {token['name']} - {token['address']}")
@@ -1885,13 +1886,11 @@ class AlchemyMonitoringServer:
                     # Try pure DexScreener 70% extractor (NO Jupiter/Solana RPC)
                     if self.dexscreener_extractor:
                         try:
-                            import asyncio
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            dexscreener_result = loop.run_until_complete(
-                                self.dexscreener_extractor.extract_from_dexscreener_with_retries(token['address'])
+                            # Shared validation loop keeps the extractor's session alive between tokens
+                            dexscreener_result = get_consensus_validator().run_sync(
+                                self.dexscreener_extractor.extract_from_dexscreener_with_retries(token['address']),
+                                timeout=30
                             )
-                            loop.close()
                             
                             # Check if we got name from DexScreener 70% extractor
                             if dexscreener_result and dexscreener_result.success and dexscreener_result.name:
@@ -1926,12 +1925,9 @@ class AlchemyMonitoringServer:
                             
                             logger.info(f"🔄 ENHANCED RESOLVER: Attempting comprehensive resolution for {token['address']}")
                             
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            enhanced_result = loop.run_until_complete(
-                                resolve_token_name_with_retry(token['address'])
+                            enhanced_result = get_consensus_validator().run_sync(
+                                resolve_token_name_with_retry(token['address']), timeout=30
                             )
-                            loop.close()
                             
                             if enhanced_result and enhanced_result.get('confidence', 0) > 0.7:
                                 accurate_name = enhanced_result['name']
@@ -2527,6 +2523,11 @@ class AlchemyMonitoringServer:
             pending_retries = getattr(self.pure_name_extractor, 'pending_retry_count', 0)
             if pending_retries > 0:
                 logger.info(f"   ⏳ Progressive retries pending: {pending_retries} (expected names in 30s-5min)")
+            retry_scheduler = getattr(self.pure_name_extractor, 'retry_scheduler', None)
+            if retry_scheduler:
+                retry_stats = retry_scheduler.get_stats()
+                logger.info(f"   🔁 Progressive retries fired: {retry_stats['fired']} | succeeded: {retry_stats['succeeded']} "
+                            f"| batches: {retry_stats['batches']}")
     
 
     
@@ -2627,6 +2628,7 @@ class AlchemyMonitoringServer:
             @self.discord_bot.event
             async def on_ready():
                 logger.info(f"✅ Discord bot connected as {self.discord_bot.user}")
+                get_startup_orchestrator().ready('discord_login', detail=str(self.discord_bot.user))
                 
                 # Sync slash commands with error handling
                 try:
@@ -3785,46 +3787,27 @@ https://explorer.solana.com/address/{wallet_address}
                             start_time = time.time()
                             MAX_PROCESSING_TIME = 25  # 25 seconds max to avoid Discord timeout
                             
-                            # Use Alchemy RPC for better reliability  
-                            alchemy_url = f"https://solana-mainnet.g.alchemy.com/v2/{monitor_server.alchemy_api_key}"
-                            
                             await interaction.edit_original_response(content="🔍 Fetching wallet holdings and token data...")
                             
-                            # Get SOL balance first
-                            sol_payload = {
-                                "jsonrpc": "2.0",
-                                "id": 1,
-                                "method": "getBalance",
-                                "params": [address]
-                            }
-                            sol_response = requests.post(alchemy_url, headers={"Content-Type": "application/json"}, json=sol_payload, timeout=10)
-                            sol_balance = 0
-                            if sol_response.status_code == 200:
-                                sol_data = sol_response.json()
-                                if "result" in sol_data:
-                                    sol_balance = sol_data["result"]["value"] / 1e9  # Convert lamports to SOL
-                            
-                            # Make direct RPC call to get token accounts
-                            headers = {"Content-Type": "application/json"}
-                            payload = {
-                                "jsonrpc": "2.0",
-                                "id": 1,
-                                "method": "getTokenAccountsByOwner",
-                                "params": [
+                            # SOL balance and token accounts go out together (packed into one JSON-RPC batch by the router)
+                            router = get_rpc_router()
+                            sol_result, token_result = await asyncio.gather(
+                                router.call("getBalance", [address]),
+                                router.call("getTokenAccountsByOwner", [
                                     address,
                                     {"programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"},
                                     {"encoding": "jsonParsed"}
-                                ]
-                            }
-                            
-                            response = requests.post(alchemy_url, headers=headers, json=payload, timeout=15)
-                            response.raise_for_status()
-                            rpc_result = response.json()
+                                ], timeout=15),
+                                return_exceptions=True
+                            )
+                            sol_balance = 0
+                            if isinstance(sol_result, dict):
+                                sol_balance = sol_result["value"] / 1e9  # Convert lamports to SOL
                             
-                            if "error" in rpc_result:
-                                raise Exception(f"RPC Error: {rpc_result['error']['message']}")
+                            if isinstance(token_result, Exception):
+                                raise Exception(f"RPC Error: {token_result}")
                             
-                            token_accounts = rpc_result.get("result", {}).get("value", [])
+                            token_accounts = (token_result or {}).get("value", [])
                             
                             await interaction.edit_original_response(content=f"🔍 Analyzing {len(token_accounts)} token accounts...")
                             
@@ -4185,7 +4168,7 @@ You don't have a wallet connected to disconnect.
                             await interaction.edit_original_response(content="❌ **Database Error**\n\nDatabase connection not available.")
                             return
                         
-                        conn = psycopg2.connect(db_url)
+                        conn = get_connection(db_url)
                         cursor = conn.cursor()
                         
                         # Calculate time range
@@ -4362,8 +4345,10 @@ You don't have a wallet connected to disconnect.
                 try:
                     logger.info("🚀 Starting Discord bot...")
                     logger.info(f"🔑 Using Discord token: {bot_token[:20]}... ({len(bot_token)} chars)")
+                    get_startup_orchestrator().begin('discord_login')
                     self.discord_bot.run(bot_token)
                 except Exception as e:
+                    get_startup_orchestrator().fail('discord_login', e)
                     logger.error(f"❌ Discord bot runtime error: {e}")
                     if "Improper token" in str(e):
                         logger.error("🚨 DISCORD TOKEN ISSUE: Token appears to be invalid or expired")
@@ -4401,6 +4386,7 @@ if __name__ == "__main__":
             return jsonify({
                 'status': 'healthy',
                 'message': 'Token monitoring server is running',
+                'startup': get_startup_orchestrator().timeline(),
                 'timestamp': datetime.now(timezone.utc).isoformat()
             })
         
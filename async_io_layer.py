@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Async I/O Layer for the Token Monitoring Hot Path
+Shared aiohttp session, bounded executor bridge for blocking psycopg2 calls,
+and an event-loop lag monitor proving the websocket loop never stalls
+"""
+
+import asyncio
+import aiohttp
+import json
+import time
+import logging
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Any, Callable
+from urllib.parse import urlsplit
+
+from metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+
+@dataclass
+class HTTPResponse:
+    """Fully-read HTTP response (body is consumed before the connection is released)"""
+    status: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+class AsyncHTTPClient:
+    """Pooled aiohttp session shared by every caller, one session per event loop"""
+
+    def __init__(self, connection_limit: int = 100, per_host_limit: int = 20):
+        self.connection_limit = connection_limit
+        self.per_host_limit = per_host_limit
+        self._sessions = weakref.WeakKeyDictionary()  # event loop -> ClientSession
+        self.base_overrides: Dict[str, str] = {}  # original base URL -> replacement (local stubs)
+
+        registry = get_metrics_registry()
+        self.latency = registry.histogram('http_request_seconds', 'Outbound HTTP latency per provider host', ('host',))
+        self.requests = registry.counter('http_requests_total', 'Outbound HTTP requests by host and status',
+                                         ('host', 'status'))
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Create the session lazily on the calling loop (and again after a reconnect loop)"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS)
+            self._sessions[loop] = session
+        return session
+
+    def override_base(self, original: str, replacement: str):
+        """Send requests for one base URL somewhere else (replay benchmarks point providers at stubs)"""
+        self.base_overrides[original.rstrip('/')] = replacement.rstrip('/')
+
+    async def request(self, method: str, url: str, timeout: float = 10, **kwargs) -> HTTPResponse:
+        """Perform a request and read the full body; raises on network errors like requests does"""
+        session = await self.get_session()
+        host = urlsplit(url).hostname or 'unknown'
+        for original, replacement in self.base_overrides.items():
+            if url.startswith(original):
+                url = replacement + url[len(original):]
+                break
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            async with session.request(method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+                body = await response.read()
+                status = str(response.status)
+                return HTTPResponse(status=response.status, body=body, headers=dict(response.headers))
+        finally:
+            self.latency.labels(host).observe(time.perf_counter() - started)
+            self.requests.labels(host, status).inc()
+
+    async def get(self, url: str, timeout: float = 10, **kwargs) -> HTTPResponse:
+        return await self.request('GET', url, timeout=timeout, **kwargs)
+
+    async def post(self, url: str, timeout: float = 10, **kwargs) -> HTTPResponse:
+        return await self.request('POST', url, timeout=timeout, **kwargs)
+
+    async def close(self):
+        """Close the session owned by the calling loop"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session and not session.closed:
+            await session.close()
+
+
+class DatabaseExecutorBridge:
+    """
+    Bounded thread pool for blocking psycopg2 work. The event loop only awaits the
+    result, so a slow query never stops the websocket from being read.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-bridge")
+        self.stats = {'calls': 0, 'errors': 0, 'in_flight': 0, 'total_time': 0.0}
+
+    async def run(self, func: Callable, *args):
+        """Run a blocking callable on the bridge and await its result"""
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        self.stats['calls'] += 1
+        self.stats['in_flight'] += 1
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+        finally:
+            self.stats['in_flight'] -= 1
+            self.stats['total_time'] += time.perf_counter() - start_time
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['max_workers'] = self.max_workers
+        stats['average_time'] = stats['total_time'] / stats['calls'] if stats['calls'] else 0.0
+        return stats
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: a ticker sleeps for a fixed interval and records how
+    late it wakes up. Any blocking call on the loop shows up directly as lag.
+    """
+
+    def __init__(self, interval: float = 0.05, warn_threshold: float = 0.1, window: int = 1200):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.samples = deque(maxlen=window)  # recent lag samples in seconds
+        self.max_lag = 0.0
+        self.over_threshold = 0
+        self.sample_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self.histogram = get_metrics_registry().histogram('event_loop_lag_seconds', 'Event loop wake-up lag')
+
+    def start(self):
+        """Start the ticker on the running loop (idempotent per loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - scheduled - self.interval)
+            self.samples.append(lag)
+            self.histogram.observe(lag)
+            self.sample_count += 1
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag > self.warn_threshold:
+                self.over_threshold += 1
+                logger.warning(f"🐢 Event loop blocked for {lag * 1000:.0f}ms")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lag summary in milliseconds over the recent window"""
+        recent = sorted(self.samples)
+        if not recent:
+            return {'samples': 0, 'last_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0, 'over_threshold': 0}
+        return {
+            'samples': self.sample_count,
+            'last_ms': round(self.samples[-1] * 1000, 2),
+            'p50_ms': round(recent[len(recent) // 2] * 1000, 2),
+            'p99_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000, 2),
+            'max_ms': round(self.max_lag * 1000, 2),
+            'over_threshold': self.over_threshold
+        }
+
+
+# Global shared instances
+shared_http_client = None
+
+
+def get_http_client() -> AsyncHTTPClient:
+    """Get the process-wide async HTTP client"""
+    global shared_http_client
+    if shared_http_client is None:
+        shared_http_client = AsyncHTTPClient()
+    return shared_http_client
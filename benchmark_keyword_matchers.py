@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher Benchmark
+Runs every keyword matcher in the repo over a generated corpus of realistic token
+names with 10 .. 100k keywords, and records per-token latency, throughput, build
+memory and agreement with the reference (main.is_keyword_match semantics, served
+by the compiled index that test_keyword_index.py proves equivalent).
+
+    python benchmark_keyword_matchers.py --output keyword_benchmark.json
+    python benchmark_keyword_matchers.py --baseline keyword_benchmark.json   # exit 1 on regression
+"""
+
+import gc
+import os
+import ast
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tracemalloc
+from typing import Callable, Dict, List, Set, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+# Words that show up in real launches, plus name shapes (CamelCase, tickers, "Baby X", "X Inu", ...)
+VOCABULARY = ['moon', 'doge', 'pepe', 'cat', 'dog', 'inu', 'shiba', 'bonk', 'frog', 'trump', 'elon',
+              'ai', 'gpt', 'agent', 'sol', 'pump', 'rocket', 'king', 'queen', 'baby', 'mini', 'mega',
+              'gold', 'diamond', 'hands', 'ape', 'bull', 'bear', 'meme', 'coin', 'token', 'cash',
+              'love', 'glove', 'blue', 'collar', 'boys', 'big', 'leagues', 'buy', 'business', 'the',
+              'world', 'peace', 'magic', 'internet', 'money', 'degen', 'chad', 'wojak', 'based', 'fren']
+SHAPES = ['{a}', '{a} {b}', '{A}{B}', 'Baby {A}', '{A} Inu', '${T}', '{A} {B} {C}', '{a}_{b}',
+          '{A}-{B}', '{A} 2.0', 'The {A} {B}', '{A}{n}', '{a} of {b}', '🚀 {A} {B}', '{T} {A}']
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def pseudo_word(rng: random.Random) -> str:
+    """Pronounceable filler word so 100k keyword sets stay realistic in length"""
+    consonants, vowels = 'bcdfghjklmnprstvwz', 'aeiou'
+    return ''.join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(2, 4)))
+
+
+def generate_keywords(size: int, rng: random.Random) -> List[str]:
+    """Single words, multi-word phrases and tickers, deduplicated"""
+    keywords: Set[str] = set()
+    base = VOCABULARY + [f'{a} {b}' for a in VOCABULARY[:12] for b in VOCABULARY[12:24]]
+    rng.shuffle(base)
+    for keyword in base:
+        if len(keywords) >= min(size, len(base)) // 2:
+            break
+        keywords.add(keyword)
+    while len(keywords) < size:
+        roll = rng.random()
+        if roll < 0.6:
+            keywords.add(pseudo_word(rng))
+        elif roll < 0.9:
+            keywords.add(f'{pseudo_word(rng)} {rng.choice(VOCABULARY + [pseudo_word(rng)])}')
+        else:
+            keywords.add('$' + ''.join(rng.choice(LETTERS) for _ in range(rng.randint(3, 5))))
+    return sorted(keywords)
+
+
+def generate_names(count: int, keywords: List[str], rng: random.Random, planted: float = 0.3) -> List[str]:
+    """Token names; a share have a keyword planted so matchers have something to find"""
+    names = []
+    for _ in range(count):
+        words = [rng.choice(VOCABULARY + [pseudo_word(rng)]) for _ in range(3)]
+        if keywords and rng.random() < planted:
+            words[rng.randint(0, 2)] = rng.choice(keywords).lstrip('$')
+        a, b, c = words
+        name = rng.choice(SHAPES).format(
+            a=a, b=b, c=c, A=a.title(), B=b.title(), C=c.title(),
+            T=a.replace(' ', '').upper()[:8], n=rng.randint(1, 999))
+        names.append(name)
+    return names
+
+
+# Matchers: factory(keywords) -> (match(name) -> set of keywords, mode)
+# mode 'all' returns every matching keyword, 'first' returns at most one
+
+def _compiled_index(keywords):
+    from keyword_index import CompiledKeywordIndex, STRICT
+    index = CompiledKeywordIndex(STRICT)
+    index.sync({'bench': keywords})
+    return lambda name: {keyword for _, keyword, _ in index.match(name.lower().strip())}, 'all'
+
+
+def _per_keyword(predicate: Callable[[str, str], bool], keywords):
+    return lambda name: {keyword for keyword in keywords if predicate(name, keyword)}, 'all'
+
+
+def _main_strict(keywords):
+    import main
+    monitor = main.IntegratedTokenMonitor.__new__(main.IntegratedTokenMonitor)
+    return _per_keyword(monitor.is_keyword_match, keywords)
+
+
+def _load_method(filename: str, class_name: str, method_name: str) -> Callable:
+    """Compile one method straight from source - for modules that connect/log in at import time"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    with open(path, encoding='utf-8') as source:
+        tree = ast.parse(source.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == method_name:
+                    item.decorator_list = []
+                    namespace: Dict[str, Any] = {}
+                    exec(compile(ast.Module(body=[item], type_ignores=[]), path, 'exec'), namespace)
+                    return namespace[method_name]
+    raise LookupError(f"{class_name}.{method_name} not found in {filename}")
+
+
+def _bot_bidirectional(keywords):
+    # complete_discord_bot_with_commands creates its bot (and a DB connection) on import
+    is_keyword_match = _load_method('complete_discord_bot_with_commands.py', 'TokenMonitorBot', 'is_keyword_match')
+    return _per_keyword(lambda name, keyword: is_keyword_match(None, name, keyword), keywords)
+
+
+def _integrated_normalized(keywords):
+    import integrated_monitoring_system
+    monitor = integrated_monitoring_system.IntegratedTokenMonitor.__new__(
+        integrated_monitoring_system.IntegratedTokenMonitor)
+    return _per_keyword(monitor.is_keyword_match, keywords)
+
+
+def _optimized(keywords):
+    from pure_name_extractor import OptimizedKeywordMatcher
+    matcher = OptimizedKeywordMatcher(keywords)
+
+    def match(name):
+        keyword = matcher.find_keyword_match(name)
+        return {keyword} if keyword else set()
+    return match, 'first'
+
+
+def _ai_smart(keywords):
+    from ai_smart_keyword_matcher import AISmartKeywordMatcher
+    matcher = AISmartKeywordMatcher(keywords)
+
+    def match(name):
+        result = matcher.smart_keyword_match(name)
+        return {result['matched_keyword']} if result else set()
+    return match, 'first'
+
+
+def _intelligent(keywords):
+    from intelligent_keyword_matcher import IntelligentKeywordMatcher
+    matcher = IntelligentKeywordMatcher(keywords)
+    return lambda name: {result.keyword for result in matcher.find_smart_matches(name, name)}, 'all'
+
+
+def _instant(keywords):
+    from zero_delay_processor import InstantKeywordMatcher
+    matcher = InstantKeywordMatcher(keywords)
+    return lambda name: {keyword.lower() for keyword in matcher.instant_match(name)}, 'all'
+
+
+def _zero_delay(keywords):
+    from instant_token_processor import ZeroDelayKeywordMatcher
+    matcher = ZeroDelayKeywordMatcher(keywords)
+    return lambda name: {keyword.lower() for keyword in matcher.match_instant(name)}, 'all'
+
+
+MATCHERS: Dict[str, Callable] = {
+    'keyword_index.CompiledKeywordIndex': _compiled_index,
+    'main.is_keyword_match': _main_strict,
+    'complete_discord_bot_with_commands.TokenMonitorBot': _bot_bidirectional,
+    'integrated_monitoring_system.is_keyword_match': _integrated_normalized,
+    'pure_name_extractor.OptimizedKeywordMatcher': _optimized,
+    'ai_smart_keyword_matcher.AISmartKeywordMatcher': _ai_smart,
+    'intelligent_keyword_matcher.IntelligentKeywordMatcher': _intelligent,
+    'zero_delay_processor.InstantKeywordMatcher': _instant,
+    'instant_token_processor.ZeroDelayKeywordMatcher': _zero_delay,
+}
+REFERENCE = 'keyword_index.CompiledKeywordIndex'
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+def agreement(results: List[Set[str]], reference: List[Set[str]], mode: str) -> Dict[str, Any]:
+    """How closely a matcher's answers follow the reference semantics"""
+    agree = false_positive = false_negative = 0
+    for got, expected in zip(results, reference):
+        if mode == 'first':
+            same = bool(got) == bool(expected) and got <= expected
+        else:
+            same = got == expected
+        agree += same
+        false_positive += bool(got - expected)
+        false_negative += bool(expected and not (got & expected))
+    total = len(results) or 1
+    return {
+        'token_agreement': round(agree / total, 4),
+        'tokens_with_false_positives': false_positive,
+        'tokens_with_missed_matches': false_negative
+    }
+
+
+def run_matcher(name: str, factory: Callable, keywords: List[str], names: List[str],
+                budget: float) -> Tuple[Dict[str, Any], List[Set[str]]]:
+    """Build, then match tokens until the corpus or the time budget runs out"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        match, mode = factory(keywords)
+    except Exception as e:
+        tracemalloc.stop()
+        return {'error': f'{type(e).__name__}: {e}'}, []
+    build_seconds = time.perf_counter() - started
+    _, build_peak = tracemalloc.get_traced_memory()
+    build_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    results = []
+    deadline = time.perf_counter() + budget
+    run_started = time.perf_counter()
+    for token_name in names:
+        token_started = time.perf_counter()
+        try:
+            results.append(match(token_name))
+        except Exception as e:
+            return {'error': f'{type(e).__name__}: {e}', 'mode': mode}, results
+        latencies.append(time.perf_counter() - token_started)
+        if time.perf_counter() > deadline:
+            break
+    run_seconds = time.perf_counter() - run_started
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'build_ms': round(build_seconds * 1000, 3),
+        'build_memory_kb': round(build_current / 1024, 1),
+        'build_peak_memory_kb': round(build_peak / 1024, 1),
+        'tokens_measured': len(latencies),
+        'truncated_by_budget': len(latencies) < len(names),
+        'throughput_tokens_per_second': round(len(latencies) / run_seconds, 1) if run_seconds else 0.0,
+        'latency_us': {
+            'p50': round(percentile(latencies, 0.5) * 1e6, 2),
+            'p90': round(percentile(latencies, 0.9) * 1e6, 2),
+            'p99': round(percentile(latencies, 0.99) * 1e6, 2),
+            'max': round(latencies[-1] * 1e6, 2) if latencies else 0.0
+        }
+    }, results
+
+
+def run_benchmark(sizes: List[int], token_count: int, budget: float, seed: int,
+                  matchers: List[str]) -> Dict[str, Any]:
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'tokens': token_count,
+        'budget_seconds': budget,
+        'reference': REFERENCE,
+        'sizes': {}
+    }
+    for size in sizes:
+        rng = random.Random(seed + size)
+        keywords = generate_keywords(size, rng)
+        names = generate_names(token_count, keywords, rng)
+        print(f"🔑 {size} keywords, {len(names)} token names")
+
+        # The reference always covers the whole corpus
+        reference_stats, reference = run_matcher(REFERENCE, MATCHERS[REFERENCE], keywords, names, float('inf'))
+        entries = {REFERENCE: dict(reference_stats, token_agreement=1.0)}
+        matched = sum(1 for hits in reference if hits)
+        print(f"   {REFERENCE:<55} {reference_stats['throughput_tokens_per_second']:>10.1f} tok/s  "
+              f"p99 {reference_stats['latency_us']['p99']:>10.1f}µs  (reference, {matched} tokens matched)")
+        for name in matchers:
+            if name == REFERENCE:
+                continue
+            stats, results = run_matcher(name, MATCHERS[name], keywords, names, budget)
+            if results and 'mode' in stats:
+                stats.update(agreement(results, reference[:len(results)], stats['mode']))
+            entries[name] = stats
+            summary = stats.get('error') or (f"{stats['throughput_tokens_per_second']:>10.1f} tok/s  "
+                                            f"p99 {stats['latency_us']['p99']:>10.1f}µs  "
+                                            f"agree {stats.get('token_agreement', 0):.3f}")
+            print(f"   {name:<55} {summary}")
+        report['sizes'][str(size)] = {'reference_tokens_matched': matched, 'matchers': entries}
+    return report
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Throughput drops or agreement losses beyond tolerance, as readable lines"""
+    regressions = []
+    for size, entry in report['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size, {}).get('matchers', {})
+        for name, stats in entry['matchers'].items():
+            before = previous.get(name)
+            if not before or 'error' in stats or 'error' in before:
+                continue
+            if stats['throughput_tokens_per_second'] < before['throughput_tokens_per_second'] * (1 - tolerance):
+                regressions.append(f"{name} @ {size}: throughput {before['throughput_tokens_per_second']} -> "
+                                   f"{stats['throughput_tokens_per_second']} tok/s")
+            if stats.get('token_agreement', 1.0) < before.get('token_agreement', 1.0) - 1e-9:
+                regressions.append(f"{name} @ {size}: agreement {before.get('token_agreement')} -> "
+                                   f"{stats.get('token_agreement')}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every keyword matcher implementation")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="keyword set sizes")
+    parser.add_argument('--tokens', type=int, default=2000, help="token names per corpus")
+    parser.add_argument('--budget', type=float, default=5.0, help="max seconds of matching per matcher and size")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--matcher', action='append', choices=list(MATCHERS), help="limit to these matchers")
+    parser.add_argument('--output', default='keyword_benchmark.json', help="JSON report path")
+    parser.add_argument('--baseline', help="previous JSON report; exit 1 on regression")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="allowed throughput drop vs baseline")
+    args = parser.parse_args()
+
+    # Several matchers log every hit at INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    report = run_benchmark(args.sizes, args.tokens, args.budget, args.seed, args.matcher or list(MATCHERS))
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"📝 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(report, json.load(baseline_file), args.tolerance)
+        for line in regressions:
+            print(f"❌ REGRESSION: {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
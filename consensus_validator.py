@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Consensus Timestamp Validator
+Long-lived creation-time consensus on one shared background event loop.
+Worker threads submit work with run_coroutine_threadsafe instead of building
+and tearing down an event loop (and its HTTP session) per token: sources are
+queried concurrently under a deadline, results are cached per address and
+concurrent requests for the same address share one fan-out. The loop also
+hosts other per-token coroutines (e.g. the DexScreener name extractor) so
+their aiohttp sessions stay bound to a loop that never closes.
+"""
+
+import asyncio
+import time
+import logging
+import statistics
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from market_data_service import get_market_data_service
+from token_timestamp_resolver import get_token_timestamp_resolver
+
+logger = logging.getLogger(__name__)
+
+AGREEMENT_WINDOW = 60  # Sources within a minute of the consensus agree
+
+
+async def chain_source(token_address: str) -> Optional[float]:
+    """Creation blockTime from the timestamp resolver (event data first, bounded history fallback)"""
+    record = await get_token_timestamp_resolver().resolve(token_address)
+    return record['creation_timestamp'] if record else None
+
+
+async def market_source(token_address: str) -> Optional[float]:
+    """Pair/coin creation time from the shared market data service (DexScreener, pump.fun)"""
+    snapshot = await get_market_data_service().get(token_address)
+    return snapshot.get('created_at') if snapshot else None
+
+
+DEFAULT_SOURCES: List[Tuple[str, float, Callable[[str], Awaitable[Optional[float]]]]] = [
+    ('solana_blockchain', 1.0, chain_source),
+    ('market_data', 0.5, market_source),
+]
+
+
+class ConsensusValidator:
+    """Cached, single-flight, deadline-bounded timestamp consensus on a shared loop"""
+
+    def __init__(self, sources: Optional[List[Tuple[str, float, Callable]]] = None, deadline: float = 3.0,
+                 ttl: float = 300, negative_ttl: float = 10, max_entries: int = 5000):
+        self.sources = sources or DEFAULT_SOURCES  # (name, weight, async fetch(address) -> epoch seconds)
+        self.deadline = deadline
+        self.ttl = ttl                    # A creation time does not change - keep answers for a while
+        self.negative_ttl = negative_ttl  # No source knew the token yet - ask again soon
+        self.max_entries = max_entries
+
+        self.cache: OrderedDict = OrderedDict()  # address -> (expires_at, consensus)
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'fanouts': 0,
+            'deadline_misses': 0, 'source_errors': 0, 'no_consensus': 0, 'submitted': 0
+        }
+        self.source_stats = {name: {'hits': 0, 'empty': 0, 'errors': 0, 'late': 0} for name, _, _ in self.sources}
+
+    # Loop management
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            with self.lock:
+                if self.loop is None:
+                    ready = threading.Event()
+
+                    def run():
+                        loop = asyncio.new_event_loop()
+                        asyncio.set_event_loop(loop)
+                        self.loop = loop
+                        ready.set()
+                        loop.run_forever()
+
+                    self.thread = threading.Thread(target=run, name="consensus-validator", daemon=True)
+                    self.thread.start()
+                    ready.wait()
+                    logger.info("🔍 Consensus validator loop started")
+        return self.loop
+
+    def submit(self, coro: Awaitable) -> 'asyncio.Future':
+        """Schedule a coroutine on the shared loop from any thread (concurrent.futures.Future)"""
+        self.stats['submitted'] += 1
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run_sync(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and wait for it from a plain thread"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    # Consensus
+
+    async def validate(self, token_address: str) -> Optional[Dict[str, Any]]:
+        """Consensus for a token from any event loop"""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await self._validate(token_address)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._validate(token_address), loop))
+
+    def validate_sync(self, token_address: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Consensus for a token from a worker thread; None when it could not be reached in time"""
+        try:
+            return self.run_sync(self._validate(token_address), timeout or self.deadline + 2)
+        except Exception as e:
+            logger.debug(f"Consensus validation failed for {token_address[:10]}...: {e}")
+            return None
+
+    async def _validate(self, token_address: str) -> Optional[Dict[str, Any]]:
+        self.stats['requests'] += 1
+        cached = self.cache.get(token_address)
+        if cached and cached[0] > time.time():
+            self.stats['cache_hits'] += 1
+            self.cache.move_to_end(token_address)
+            return self._with_age(cached[1])
+
+        inflight = self.inflight.get(token_address)
+        if inflight is not None:
+            self.stats['coalesced'] += 1
+            return self._with_age(await asyncio.shield(inflight))
+
+        future = self.loop.create_future()
+        self.inflight[token_address] = future
+        try:
+            consensus = await self._fan_out(token_address)
+            self._store(token_address, consensus)
+            future.set_result(consensus)
+            return self._with_age(consensus)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved here so coalesced waiters alone surface it
+            raise
+        finally:
+            self.inflight.pop(token_address, None)
+
+    async def _fan_out(self, token_address: str) -> Dict[str, Any]:
+        """Query every source at once; whatever has answered by the deadline forms the consensus"""
+        self.stats['fanouts'] += 1
+        tasks = {
+            asyncio.ensure_future(fetch(token_address)): (name, weight)
+            for name, weight, fetch in self.sources
+        }
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+            self.source_stats[tasks[task][0]]['late'] += 1
+        if pending:
+            self.stats['deadline_misses'] += 1
+
+        answers = []
+        for task in done:
+            name, weight = tasks[task]
+            if task.exception() is not None:
+                self.stats['source_errors'] += 1
+                self.source_stats[name]['errors'] += 1
+                logger.debug(f"Consensus source {name} failed for {token_address[:10]}...: {task.exception()}")
+                continue
+            timestamp = task.result()
+            if isinstance(timestamp, (int, float)) and timestamp > 0:
+                self.source_stats[name]['hits'] += 1
+                answers.append((name, weight, timestamp / 1000 if timestamp > 1e12 else float(timestamp)))
+            else:
+                self.source_stats[name]['empty'] += 1
+        return self._consensus(token_address, answers)
+
+    def _consensus(self, token_address: str, answers: List[Tuple[str, float, float]]) -> Dict[str, Any]:
+        """Median of the answers; confidence is the weight of the sources that agree with it"""
+        if not answers:
+            self.stats['no_consensus'] += 1
+            return {'token_address': token_address, 'valid_sources': 0, 'consensus_timestamp': None,
+                    'confidence': 0.0, 'sources': {}, 'fallback_used': False}
+
+        consensus_timestamp = statistics.median(timestamp for _, _, timestamp in answers)
+        agreeing = [weight for _, weight, timestamp in answers
+                    if abs(timestamp - consensus_timestamp) <= AGREEMENT_WINDOW]
+        return {
+            'token_address': token_address,
+            'valid_sources': len(answers),
+            'consensus_timestamp': consensus_timestamp,
+            'confidence': min(1.0, sum(agreeing)),
+            'sources': {name: timestamp for name, _, timestamp in answers},
+            'fallback_used': False
+        }
+
+    def _store(self, token_address: str, consensus: Dict[str, Any]):
+        ttl = self.ttl if consensus['valid_sources'] else self.negative_ttl
+        self.cache[token_address] = (time.time() + ttl, consensus)
+        self.cache.move_to_end(token_address)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    @staticmethod
+    def _with_age(consensus: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Copy with age_seconds computed now - cached entries must not report a stale age"""
+        if consensus is None:
+            return None
+        result = dict(consensus)
+        timestamp = result.get('consensus_timestamp')
+        result['age_seconds'] = time.time() - timestamp if timestamp else float('inf')
+        return result
+
+    def invalidate(self, token_address: str):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.cache.pop, token_address, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['cache_size'] = len(self.cache)
+        stats['inflight'] = len(self.inflight)
+        stats['sources'] = {name: dict(counts) for name, counts in self.source_stats.items()}
+        return stats
+
+
+# Global validator instance
+consensus_validator = None
+_consensus_validator_lock = threading.Lock()
+
+
+def get_consensus_validator() -> ConsensusValidator:
+    """Get the process-wide consensus validator"""
+    global consensus_validator
+    if consensus_validator is None:
+        with _consensus_validator_lock:
+            if consensus_validator is None:
+                consensus_validator = ConsensusValidator()
+    return consensus_validator
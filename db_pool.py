@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Shared PostgreSQL Connection Pool
+One process-wide pool per DATABASE_URL with min/max sizing, checkout health
+checks, statement timeouts and pool metrics. get_connection() is a drop-in
+replacement for psycopg2.connect(url): closing the returned connection hands
+it back to the pool instead of tearing down the TCP+TLS session.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Any
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+from metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_SIZE = int(os.getenv('DB_POOL_MIN', '1'))
+DEFAULT_MAX_SIZE = int(os.getenv('DB_POOL_MAX', '10'))
+DEFAULT_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '10'))
+DEFAULT_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    """No connection became available within the acquire timeout"""
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled psycopg2 connection. Everything is delegated to the
+    real connection except close(), which returns it to the pool. As a context
+    manager it commits (or rolls back) like psycopg2 and then also releases
+    the connection, so `with get_connection() as conn:` never leaks a slot.
+    """
+
+    def __init__(self, pool: 'DatabasePool', conn):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_released', False)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            return self._conn.__exit__(exc_type, exc_value, traceback)
+        finally:
+            self.close()
+
+    @property
+    def raw_connection(self):
+        return self._conn
+
+    def close(self):
+        """Return the connection to the pool"""
+        if not self._released:
+            object.__setattr__(self, '_released', True)
+            self._pool.putconn(self._conn)
+
+    def discard(self):
+        """Close the underlying connection instead of reusing it"""
+        if not self._released:
+            object.__setattr__(self, '_released', True)
+            self._pool.putconn(self._conn, discard=True)
+
+    def __del__(self):
+        # Callers that never reach close() (exceptions) still give the slot back
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class DatabasePool:
+    """Thread-safe bounded connection pool with health checks and metrics"""
+
+    def __init__(self, database_url: str, min_size: int = DEFAULT_MIN_SIZE, max_size: int = DEFAULT_MAX_SIZE,
+                 acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+                 statement_timeout_ms: int = DEFAULT_STATEMENT_TIMEOUT_MS,
+                 health_check_interval: float = 30.0, connect_timeout: int = 10):
+        self.database_url = database_url
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.acquire_timeout = acquire_timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+
+        self._idle = deque()  # (connection, last_used)
+        self._total = 0
+        self._cond = threading.Condition()
+
+        self.host = database_url.rsplit('@', 1)[-1]
+        self.acquire_histogram = get_metrics_registry().histogram(
+            'db_pool_acquire_seconds', 'Time to check out a pooled connection (including waits)', ('host',)
+        ).labels(self.host)
+
+        self.stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'connect_errors': 0
+        }
+
+    def _connect(self):
+        kwargs = {'connect_timeout': self.connect_timeout}
+        if self.statement_timeout_ms:
+            kwargs['options'] = f'-c statement_timeout={self.statement_timeout_ms}'
+        conn = psycopg2.connect(self.database_url, **kwargs)
+        self.stats['connections_created'] += 1
+        return conn
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if time.time() - last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self.stats['connections_closed'] += 1
+
+    def getconn(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a healthy connection, waiting up to timeout seconds when the pool is exhausted"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            conn = None
+            last_used = 0.0
+            create = False
+
+            with self._cond:
+                while True:
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._total < self.max_size:
+                        self._total += 1
+                        create = True
+                        break
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout(f"No database connection available within {timeout:.1f}s "
+                                          f"(pool max {self.max_size})")
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self.stats['connect_errors'] += 1
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn, last_used):
+                self.stats['health_check_failures'] += 1
+                self._close_quietly(conn)
+                with self._cond:
+                    self._total -= 1
+                continue
+
+            wait_time = time.perf_counter() - started
+            self.stats['checkouts'] += 1
+            self.acquire_histogram.observe(wait_time)
+            if waited:
+                self.stats['waits'] += 1
+                self.stats['wait_time_total'] += wait_time
+                self.stats['wait_time_max'] = max(self.stats['wait_time_max'], wait_time)
+            return PooledConnection(self, conn)
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a raw connection to the pool, resetting any open transaction"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard or conn.closed:
+                self._total -= 1
+            else:
+                self._idle.append((conn, time.time()))
+            self._cond.notify()
+
+        if discard and not conn.closed:
+            self._close_quietly(conn)
+        elif conn.closed:
+            self.stats['connections_closed'] += 1
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """with pool.connection() as conn: ... (returned to the pool afterwards)"""
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def warm(self) -> int:
+        """Open connections up to min_size so the first queries skip the handshake"""
+        opened = []
+        try:
+            while True:
+                with self._cond:
+                    if len(self._idle) + len(opened) >= self.min_size or self._total >= self.max_size:
+                        break
+                opened.append(self.getconn())
+        except Exception as e:
+            logger.warning(f"⚠️ DB pool warmup incomplete: {e}")
+        for conn in opened:
+            conn.close()
+        return len(opened)
+
+    def closeall(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            total = self._total
+            idle = len(self._idle)
+        stats = dict(self.stats)
+        stats.update({
+            'size': total,
+            'idle': idle,
+            'in_use': total - idle,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'average_wait': stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        })
+        return stats
+
+
+# Process-wide pools, one per database URL
+_pools: Dict[str, DatabasePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database_url: Optional[str] = None) -> DatabasePool:
+    """Get (or create) the shared pool for a database URL (defaults to DATABASE_URL)"""
+    database_url = database_url or os.getenv('DATABASE_URL')
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is required")
+
+    pool = _pools.get(database_url)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(database_url)
+            if pool is None:
+                pool = DatabasePool(database_url)
+                _pools[database_url] = pool
+                logger.info(f"🗄️ Shared DB pool created (min={pool.min_size}, max={pool.max_size})")
+    return pool
+
+
+def get_connection(database_url: Optional[str] = None, timeout: Optional[float] = None) -> PooledConnection:
+    """Drop-in replacement for psycopg2.connect(database_url) backed by the shared pool"""
+    return get_pool(database_url).getconn(timeout)
+
+
+def get_all_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Metrics for every pool in the process (keyed by host, never by credentials)"""
+    stats = {}
+    for url, pool in list(_pools.items()):
+        stats[pool.host] = pool.get_stats()
+    return stats
+
+
+def _collect_pool_metrics(registry):
+    in_use = registry.gauge('db_pool_in_use', 'Checked-out connections', ('host',))
+    idle = registry.gauge('db_pool_idle', 'Idle pooled connections', ('host',))
+    waits = registry.gauge('db_pool_waits', 'Checkouts that had to wait for a free connection', ('host',))
+    timeouts = registry.gauge('db_pool_timeouts', 'Checkouts that gave up waiting', ('host',))
+    for host, stats in get_all_pool_stats().items():
+        in_use.labels(host).set(stats['in_use'])
+        idle.labels(host).set(stats['idle'])
+        waits.labels(host).set(stats['waits'])
+        timeouts.labels(host).set(stats['timeouts'])
+
+
+get_metrics_registry().register_collector('db_pools', _collect_pool_metrics)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Batched DexScreener Resolver
+DexScreener's token endpoint accepts up to 30 comma-separated addresses, so name
+lookups for many tokens collapse into a few requests over the shared HTTP client.
+Concurrency and request spacing back off on 429s and recover gradually (AIMD).
+"""
+
+import asyncio
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Any
+
+from async_io_layer import get_http_client
+
+logger = logging.getLogger(__name__)
+
+DEXSCREENER_TOKENS_URL = "https://api.dexscreener.com/latest/dex/tokens/"
+MAX_ADDRESSES_PER_REQUEST = 30
+
+
+class AdaptiveRateLimiter:
+    """Concurrency + minimum spacing between requests, halved/doubled on 429 and relaxed on success"""
+
+    def __init__(self, max_concurrency: int = 4, min_interval: float = 0.2, max_interval: float = 10.0):
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.base_interval = min_interval
+        self.interval = min_interval
+        self.max_interval = max_interval
+        self.in_flight = 0
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.successes = 0
+        self.lock = threading.Lock()  # Plain lock: the limiter is shared by callers on different loops
+
+    async def acquire(self):
+        while True:
+            with self.lock:
+                if self.in_flight < self.concurrency:
+                    self.in_flight += 1
+                    now = time.monotonic()
+                    slot = max(now, self.next_slot, self.blocked_until)
+                    self.next_slot = slot + self.interval
+                    break
+            await asyncio.sleep(0.05)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def on_success(self):
+        # Additive increase: one more slot / a shorter gap after a run of clean responses
+        self.successes += 1
+        if self.successes >= 10:
+            self.successes = 0
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            self.interval = max(self.base_interval, self.interval * 0.8)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        # Multiplicative decrease
+        self.successes = 0
+        self.concurrency = max(1, self.concurrency // 2)
+        self.interval = min(self.max_interval, self.interval * 2)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + (retry_after or self.interval))
+
+
+class DexScreenerBatchResolver:
+    """Resolve token names for many addresses with as few DexScreener requests as possible"""
+
+    def __init__(self, batch_size: int = MAX_ADDRESSES_PER_REQUEST, max_concurrency: int = 4,
+                 min_interval: float = 0.2, max_attempts: int = 3, timeout: float = 10):
+        self.batch_size = min(batch_size, MAX_ADDRESSES_PER_REQUEST)
+        self.limiter = AdaptiveRateLimiter(max_concurrency, min_interval)
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.stats = {
+            'requests': 0,
+            'addresses_requested': 0,
+            'names_resolved': 0,
+            'rate_limited': 0,
+            'errors': 0
+        }
+
+    async def resolve_names(self, addresses: List[str]) -> Dict[str, str]:
+        """Map address -> DexScreener base token name for every address DexScreener knows"""
+        unique = list(dict.fromkeys(a for a in addresses if a))
+        chunks = [unique[i:i + self.batch_size] for i in range(0, len(unique), self.batch_size)]
+        results = await asyncio.gather(*(self._resolve_chunk(chunk) for chunk in chunks))
+
+        names = {}
+        for chunk_names in results:
+            names.update(chunk_names)
+        return names
+
+    async def resolve_name(self, address: str) -> Optional[str]:
+        return (await self.resolve_names([address])).get(address)
+
+    async def _resolve_chunk(self, chunk: List[str]) -> Dict[str, str]:
+        for attempt in range(self.max_attempts):
+            await self.limiter.acquire()
+            try:
+                self.stats['requests'] += 1
+                self.stats['addresses_requested'] += len(chunk)
+                response = await get_http_client().get(DEXSCREENER_TOKENS_URL + ','.join(chunk), timeout=self.timeout)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.debug(f"DexScreener batch lookup failed ({len(chunk)} tokens): {e}")
+                continue
+            finally:
+                self.limiter.release()
+
+            if response.status == 429:
+                self.stats['rate_limited'] += 1
+                retry_after = response.headers.get('Retry-After')
+                self.limiter.on_rate_limited(float(retry_after) if retry_after and retry_after.isdigit() else None)
+                logger.warning(f"⚠️ DexScreener rate limited - concurrency {self.limiter.concurrency}, "
+                               f"spacing {self.limiter.interval:.1f}s (attempt {attempt + 1}/{self.max_attempts})")
+                continue
+            if response.status != 200:
+                self.stats['errors'] += 1
+                logger.debug(f"DexScreener batch lookup HTTP {response.status} ({len(chunk)} tokens)")
+                return {}
+
+            self.limiter.on_success()
+            names = self._extract_names(response.json(), chunk)
+            self.stats['names_resolved'] += len(names)
+            return names
+        return {}
+
+    @staticmethod
+    def _extract_names(data: Any, chunk: List[str]) -> Dict[str, str]:
+        wanted = set(chunk)
+        names = {}
+        for pair in (data or {}).get('pairs') or []:
+            base_token = pair.get('baseToken', {})
+            address = base_token.get('address')
+            name = (base_token.get('name') or '').strip()
+            if address in wanted and address not in names and name:
+                names[address] = name
+        return names
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({
+            'concurrency': self.limiter.concurrency,
+            'request_interval': round(self.limiter.interval, 3)
+        })
+        return stats
+
+
+# Global resolver instance
+dexscreener_resolver = None
+
+
+def get_dexscreener_resolver() -> DexScreenerBatchResolver:
+    """Get the shared batched DexScreener resolver"""
+    global dexscreener_resolver
+    if dexscreener_resolver is None:
+        dexscreener_resolver = DexScreenerBatchResolver()
+    return dexscreener_resolver
@@ -7,6 +7,7 @@ import time
 from typing import Optional
 from discord_webhook import DiscordWebhook, DiscordEmbed
 from config import Config
+from discord_webhook_client import get_discord_webhook_client
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +16,22 @@ class DiscordNotifier:
     
     def __init__(self):
         self.webhook_url = Config.DISCORD_WEBHOOK_URL
-        self.last_send_time = 0
+        self.webhooks = get_discord_webhook_client()
         
-    def _rate_limit(self) -> None:
-        """Implement rate limiting for Discord webhooks."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_send_time
-        min_interval = 1.0  # Minimum 1 second between Discord messages
+    @staticmethod
+    def _payload(webhook: DiscordWebhook) -> dict:
+        """JSON body of a DiscordWebhook, minus the library's unset fields"""
+        payload = {}
+        if webhook.json.get('content'):
+            payload['content'] = webhook.json['content']
+        embeds = [{k: v for k, v in embed.items() if v is not None} for embed in webhook.json.get('embeds', [])]
+        if embeds:
+            payload['embeds'] = embeds
+        return payload
         
-        if time_since_last < min_interval:
-            sleep_time = min_interval - time_since_last
-            time.sleep(sleep_time)
-            
-        self.last_send_time = time.time()
+    def _execute(self, webhook: DiscordWebhook) -> bool:
+        """Send through the shared webhook client (per-webhook queue, rate-limit buckets, 429 retries)"""
+        return self.webhooks.send_sync(webhook.url, self._payload(webhook))
         
     def send_enhanced_token_notification_with_buttons(self, token_data: dict, matched_keyword: str = None, discord_bot=None) -> bool:
         """
@@ -92,8 +96,6 @@ class DiscordNotifier:
             return self.send_enhanced_token_notification(token_data, matched_keyword)
             
         try:
-            self._rate_limit()
-            
             # Extract token info
             name = token_data.get('name', f'Token {token_data.get("address", "")[-6:]}')
             symbol = token_data.get('symbol', 'UNK')
@@ -349,8 +351,6 @@ class DiscordNotifier:
             return False
             
         try:
-            self._rate_limit()
-            
             # Create webhook and embed
             webhook = DiscordWebhook(url=self.webhook_url)
             
@@ -553,32 +553,12 @@ class DiscordNotifier:
             
             webhook.add_embed(embed)
             
-            # Execute webhook with retry logic
-            for attempt in range(Config.MAX_RETRIES):
-                try:
-                    response = webhook.execute()
-                    
-                    if response.status_code in [200, 204]:
-                        logger.info(f"Successfully sent enhanced Discord notification for {address}")
-                        return True
-                    elif response.status_code == 429:
-                        # Rate limited by Discord
-                        retry_after = response.headers.get('Retry-After', 5)
-                        logger.warning(f"Discord rate limit hit, waiting {retry_after} seconds")
-                        time.sleep(int(retry_after))
-                        continue
-                    else:
-                        logger.warning(f"Discord webhook returned status {response.status_code}")
-                        
-                except Exception as e:
-                    logger.warning(f"Discord webhook attempt {attempt + 1} failed: {e}")
-                    
-                # Wait before retry
-                if attempt < Config.MAX_RETRIES - 1:
-                    sleep_time = Config.RETRY_DELAY * (2 ** attempt)
-                    time.sleep(sleep_time)
+            # The shared client retries 429s (retry_after) and transient failures
+            if self._execute(webhook):
+                logger.info(f"Successfully sent enhanced Discord notification for {address}")
+                return True
                     
-            logger.error(f"Failed to send Discord notification after {Config.MAX_RETRIES} attempts")
+            logger.error("Failed to send Discord notification")
             return False
             
         except Exception as e:
@@ -634,8 +614,6 @@ class DiscordNotifier:
             return False
             
         try:
-            self._rate_limit()
-            
             # Create webhook
             webhook = DiscordWebhook(url=self.webhook_url)
             
@@ -674,32 +652,12 @@ class DiscordNotifier:
                     
                 webhook.content = message
             
-            # Execute webhook with retry logic
-            for attempt in range(Config.MAX_RETRIES):
-                try:
-                    response = webhook.execute()
-                    
-                    if response.status_code in [200, 204]:
-                        logger.info(f"Successfully sent Discord notification for {contract_address}")
-                        return True
-                    elif response.status_code == 429:
-                        # Rate limited by Discord
-                        retry_after = response.headers.get('Retry-After', 5)
-                        logger.warning(f"Discord rate limit hit, waiting {retry_after} seconds")
-                        time.sleep(int(retry_after))
-                        continue
-                    else:
-                        logger.warning(f"Discord webhook returned status {response.status_code}")
-                        
-                except Exception as e:
-                    logger.warning(f"Discord webhook attempt {attempt + 1} failed: {e}")
-                    
-                # Wait before retry
-                if attempt < Config.MAX_RETRIES - 1:
-                    sleep_time = Config.RETRY_DELAY * (2 ** attempt)
-                    time.sleep(sleep_time)
+            # The shared client retries 429s (retry_after) and transient failures
+            if self._execute(webhook):
+                logger.info(f"Successfully sent Discord notification for {contract_address}")
+                return True
                     
-            logger.error(f"Failed to send Discord notification after {Config.MAX_RETRIES} attempts")
+            logger.error("Failed to send Discord notification")
             return False
             
         except Exception as e:
@@ -721,18 +679,14 @@ class DiscordNotifier:
             return False
             
         try:
-            self._rate_limit()
-            
             webhook = DiscordWebhook(url=self.webhook_url)
             webhook.content = f"ℹ️ **Status:** {message}"
             
-            response = webhook.execute()
-            
-            if response.status_code in [200, 204]:
+            if self._execute(webhook):
                 logger.info("Successfully sent status message to Discord")
                 return True
             else:
-                logger.warning(f"Discord status message returned status {response.status_code}")
+                logger.warning("Discord status message failed")
                 return False
                 
         except Exception as e:
@@ -755,9 +709,6 @@ class DiscordNotifier:
                 logger.error("Discord webhook URL not configured")
                 return False
             
-            # Rate limiting
-            self._rate_limit()
-            
             # Create webhook and embed
             webhook = DiscordWebhook(url=self.webhook_url)
             
@@ -785,14 +736,12 @@ class DiscordNotifier:
             
             webhook.add_embed(embed)
             
-            # Execute webhook
-            response = webhook.execute()
-            
-            if response.status_code in [200, 204]:
+            # Queue on the shared client without blocking this event loop
+            if await self.webhooks.send(webhook.url, self._payload(webhook)):
                 logger.info("✅ Discord embed notification sent successfully")
                 return True
             else:
-                logger.error(f"❌ Discord embed notification failed: {response.status_code}")
+                logger.error("❌ Discord embed notification failed")
                 return False
                 
         except Exception as e:
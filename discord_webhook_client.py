@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Discord Webhook Client
+Async webhook sender with one queue + worker per webhook, so a busy or rate-limited
+server never delays another. Follows Discord's X-RateLimit-* headers per bucket,
+retries 429s after retry_after and folds a backed-up queue into multi-embed messages.
+Runs on its own background loop so async monitors and threaded notifiers share it.
+"""
+
+import asyncio
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Any
+
+from async_io_layer import get_http_client
+from metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBED_CHARS = 6000  # Combined embed text limit per message (json size is a safe overestimate)
+
+
+def webhook_id(webhook_url: str) -> str:
+    """Webhook id from .../webhooks/<id>/<token> (the token never ends up in stats or logs)"""
+    parts = webhook_url.rstrip('/').split('/')
+    return parts[-2] if len(parts) >= 2 else webhook_url
+
+
+class RateLimitBucket:
+    """Discord rate-limit bucket state from the X-RateLimit-* response headers"""
+
+    def __init__(self, bucket_id: str):
+        self.bucket_id = bucket_id
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.rate_limited = 0
+
+    def delay(self) -> float:
+        """Seconds to wait before the next request in this bucket"""
+        if self.remaining == 0:
+            return max(0.0, self.reset_at - time.monotonic())
+        return 0.0
+
+    def update(self, headers: Dict[str, str]):
+        if 'x-ratelimit-limit' in headers:
+            self.limit = int(headers['x-ratelimit-limit'])
+        if 'x-ratelimit-remaining' in headers:
+            self.remaining = int(headers['x-ratelimit-remaining'])
+        if 'x-ratelimit-reset-after' in headers:
+            self.reset_at = time.monotonic() + float(headers['x-ratelimit-reset-after'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'bucket': self.bucket_id,
+            'limit': self.limit,
+            'remaining': self.remaining,
+            'reset_in': round(max(0.0, self.reset_at - time.monotonic()), 3),
+            'rate_limited': self.rate_limited
+        }
+
+
+class WebhookQueue:
+    """Pending messages and sender stats for one webhook URL"""
+
+    def __init__(self, webhook_url: str, window: int = 200):
+        self.webhook_url = webhook_url
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.held = None  # A message taken off the queue that didn't fit the last batch; sent next
+        self.worker: Optional[asyncio.Task] = None
+        self.latencies = deque(maxlen=window)  # enqueue -> delivered
+        self.stats = {'queued': 0, 'messages': 0, 'delivered': 0, 'failed': 0, 'batched': 0, 'retries': 0}
+
+    def depth(self) -> int:
+        return self.queue.qsize() + (self.held is not None)
+
+    async def next(self):
+        """The held message if there is one, otherwise wait for the queue"""
+        if self.held is not None:
+            message, self.held = self.held, None
+            return message
+        return await self.queue.get()
+
+    def get_stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        stats = dict(self.stats)
+        stats['depth'] = self.depth()
+        stats['latency_p50_ms'] = round(ordered[len(ordered) // 2] * 1000, 1) if ordered else 0.0
+        stats['latency_p99_ms'] = round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1) if ordered else 0.0
+        return stats
+
+
+class DiscordWebhookClient:
+    """
+    Per-webhook queues with bucket-aware pacing.
+
+    Buckets start out keyed by webhook id and are re-keyed by the
+    X-RateLimit-Bucket header once Discord reports it, so webhooks sharing a
+    bucket share its state. A global 429 pauses every queue.
+    """
+
+    def __init__(self, max_retries: int = 5, timeout: float = 10, batch_embeds: bool = True):
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.batch_embeds = batch_embeds
+
+        self.queues: Dict[str, WebhookQueue] = {}
+        self.buckets: Dict[str, RateLimitBucket] = {}
+        self.webhook_buckets: Dict[str, str] = {}  # webhook url -> bucket id
+        self.global_reset_at = 0.0
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.stats = {'global_rate_limited': 0}
+
+        registry = get_metrics_registry()
+        self.latency = registry.histogram('discord_webhook_delivery_seconds',
+                                          'Webhook message enqueue to delivered', ('webhook',))
+        registry.register_collector('discord_webhooks', self._collect_metrics)
+
+    # Loop management
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            with self.lock:
+                if self.loop is None:
+                    ready = threading.Event()
+
+                    def run():
+                        loop = asyncio.new_event_loop()
+                        asyncio.set_event_loop(loop)
+                        self.loop = loop
+                        ready.set()
+                        loop.run_forever()
+
+                    self.thread = threading.Thread(target=run, name="discord-webhooks", daemon=True)
+                    self.thread.start()
+                    ready.wait()
+                    logger.info("📨 Discord webhook client loop started")
+        return self.loop
+
+    async def send(self, webhook_url: str, payload: Dict[str, Any]) -> bool:
+        """Queue a message from any event loop and wait until it is delivered (or gives up)"""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await self._enqueue(webhook_url, payload)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._enqueue(webhook_url, payload), loop))
+
+    def send_sync(self, webhook_url: str, payload: Dict[str, Any], timeout: float = 120) -> bool:
+        """Queue a message from a plain thread and wait for the result"""
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(webhook_url, payload), self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            logger.error(f"❌ Discord webhook send failed: {e}")
+            return False
+
+    # Queues (client loop only)
+
+    async def _enqueue(self, webhook_url: str, payload: Dict[str, Any]) -> bool:
+        webhook = self.queues.get(webhook_url)
+        if webhook is None:
+            webhook = self.queues[webhook_url] = WebhookQueue(webhook_url)
+        if webhook.worker is None or webhook.worker.done():
+            webhook.worker = asyncio.ensure_future(self._worker(webhook))
+
+        future = asyncio.get_running_loop().create_future()
+        webhook.queue.put_nowait((payload, future, time.perf_counter()))
+        webhook.stats['queued'] += 1
+        return await future
+
+    @staticmethod
+    def _can_batch(payload: Dict[str, Any]) -> bool:
+        return set(payload) <= {'content', 'embeds'} and bool(payload.get('embeds'))
+
+    def _take_batch(self, webhook: WebhookQueue, first) -> List:
+        """The first message plus whatever is already queued and fits; the first misfit is held for the next send"""
+        batch = [first]
+        if not self.batch_embeds or not self._can_batch(first[0]):
+            return batch
+
+        embeds = len(first[0]['embeds'])
+        size = len(json.dumps(first[0]['embeds'], ensure_ascii=False))
+        content = first[0].get('content') or ''
+        while not webhook.queue.empty():
+            message = webhook.queue.get_nowait()
+            payload = message[0]
+            if not self._can_batch(payload):
+                webhook.held = message
+                break
+            extra_content = payload.get('content') or ''
+            extra_size = len(json.dumps(payload['embeds'], ensure_ascii=False))
+            if (embeds + len(payload['embeds']) > MAX_EMBEDS_PER_MESSAGE or size + extra_size > MAX_EMBED_CHARS
+                    or len(content) + len(extra_content) + 1 > MAX_CONTENT_LENGTH):
+                webhook.held = message
+                break
+            batch.append(message)
+            webhook.queue.task_done()
+            embeds += len(payload['embeds'])
+            size += extra_size
+            content = f"{content} {extra_content}".strip()
+        return batch
+
+    @staticmethod
+    def _merge(batch: List) -> Dict[str, Any]:
+        if len(batch) == 1:
+            return batch[0][0]
+        contents = []
+        embeds = []
+        for payload, _, _ in batch:
+            if payload.get('content') and payload['content'] not in contents:
+                contents.append(payload['content'])
+            embeds.extend(payload['embeds'])
+        merged = {'embeds': embeds}
+        if contents:
+            merged['content'] = ' '.join(contents)
+        return merged
+
+    async def _worker(self, webhook: WebhookQueue):
+        while True:
+            first = await webhook.next()
+            batch = self._take_batch(webhook, first)
+            if len(batch) > 1:
+                webhook.stats['batched'] += len(batch) - 1
+
+            try:
+                delivered = await self._deliver(webhook, self._merge(batch))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Discord webhook error: {e}")
+                delivered = False
+
+            now = time.perf_counter()
+            histogram = self.latency.labels(webhook_id(webhook.webhook_url))
+            for _, future, queued_at in batch:
+                webhook.latencies.append(now - queued_at)
+                histogram.observe(now - queued_at)
+                if not future.done():
+                    future.set_result(delivered)
+            webhook.stats['messages'] += 1
+            webhook.stats['delivered' if delivered else 'failed'] += len(batch)
+            webhook.queue.task_done()
+
+    # Delivery
+
+    def _bucket(self, webhook_url: str) -> RateLimitBucket:
+        bucket_id = self.webhook_buckets.get(webhook_url) or f"webhook:{webhook_id(webhook_url)}"
+        bucket = self.buckets.get(bucket_id)
+        if bucket is None:
+            bucket = self.buckets[bucket_id] = RateLimitBucket(bucket_id)
+        return bucket
+
+    def _rebucket(self, webhook_url: str, bucket: RateLimitBucket, bucket_id: Optional[str]) -> RateLimitBucket:
+        if not bucket_id or bucket.bucket_id == bucket_id:
+            return bucket
+        self.webhook_buckets[webhook_url] = bucket_id
+        if self.buckets.get(bucket.bucket_id) is bucket:
+            del self.buckets[bucket.bucket_id]
+        shared = self.buckets.get(bucket_id)
+        if shared is None:
+            bucket.bucket_id = bucket_id
+            shared = self.buckets[bucket_id] = bucket
+        return shared
+
+    async def _deliver(self, webhook: WebhookQueue, payload: Dict[str, Any]) -> bool:
+        http = get_http_client()
+        for attempt in range(self.max_retries + 1):
+            bucket = self._bucket(webhook.webhook_url)
+            wait = max(bucket.delay(), self.global_reset_at - time.monotonic())
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                response = await http.post(webhook.webhook_url, json=payload, timeout=self.timeout)
+            except Exception as e:
+                webhook.stats['retries'] += 1
+                logger.warning(f"Discord webhook attempt {attempt + 1} failed: {e}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+
+            headers = {key.lower(): value for key, value in response.headers.items()}
+            bucket = self._rebucket(webhook.webhook_url, bucket, headers.get('x-ratelimit-bucket'))
+            try:
+                bucket.update(headers)
+            except ValueError:
+                pass
+
+            if response.status in (200, 204):
+                return True
+
+            if response.status == 429:
+                body = {}
+                try:
+                    body = response.json() or {}
+                except ValueError:
+                    pass
+                retry_after = float(body.get('retry_after') or headers.get('retry-after') or 1)
+                webhook.stats['retries'] += 1
+                if body.get('global') or headers.get('x-ratelimit-global'):
+                    self.stats['global_rate_limited'] += 1
+                    self.global_reset_at = time.monotonic() + retry_after
+                else:
+                    bucket.rate_limited += 1
+                    bucket.remaining = 0
+                    bucket.reset_at = time.monotonic() + retry_after
+                logger.warning(f"⏳ Discord rate limit on bucket {bucket.bucket_id}, retrying in {retry_after:.2f}s")
+                continue
+
+            if 500 <= response.status < 600:
+                webhook.stats['retries'] += 1
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+
+            logger.error(f"❌ Discord webhook failed: {response.status} - {response.text[:200]}")
+            return False
+
+        logger.error(f"❌ Discord webhook gave up after {self.max_retries + 1} attempts")
+        return False
+
+    def _collect_metrics(self, registry):
+        depth = registry.gauge('discord_webhook_queue_depth', 'Messages waiting per webhook', ('webhook',))
+        for url, queue in list(self.queues.items()):
+            depth.labels(webhook_id(url)).set(queue.depth())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-webhook queue depth/latency and per-bucket rate-limit state"""
+        return {
+            'global_rate_limited': self.stats['global_rate_limited'],
+            'webhooks': {webhook_id(url): queue.get_stats() for url, queue in list(self.queues.items())},
+            'buckets': [bucket.get_stats() for bucket in list(self.buckets.values())]
+        }
+
+
+# Global client instance
+discord_webhook_client = None
+_discord_webhook_client_lock = threading.Lock()
+
+
+def get_discord_webhook_client() -> DiscordWebhookClient:
+    """Get the process-wide Discord webhook client"""
+    global discord_webhook_client
+    if discord_webhook_client is None:
+        with _discord_webhook_client_lock:
+            if discord_webhook_client is None:
+                discord_webhook_client = DiscordWebhookClient()
+    return discord_webhook_client
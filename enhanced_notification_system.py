@@ -9,9 +9,10 @@ import psycopg2
 import os
 import time
 import json
-import requests
 from typing import Dict, Optional, List
 from datetime import datetime, timedelta
+from market_data_service import get_market_data_service
+from discord_webhook_client import get_discord_webhook_client
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,7 @@ class EnhancedNotificationSystem:
     def __init__(self, webhook_url: str = None):
         self.database_url = os.getenv('DATABASE_URL')
         self.webhook_url = webhook_url or os.getenv('DISCORD_WEBHOOK_URL')
-        self.last_send_time = 0
+        self.webhooks = get_discord_webhook_client()
         
         # Blocked tokens list (from original discord_notifier.py)
         self.blocked_tokens = {
@@ -37,18 +38,6 @@ class EnhancedNotificationSystem:
         """Get database connection"""
         return psycopg2.connect(self.database_url)
     
-    def _rate_limit(self) -> None:
-        """Implement rate limiting for Discord webhooks"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_send_time
-        min_interval = 1.0  # Minimum 1 second between Discord messages
-        
-        if time_since_last < min_interval:
-            sleep_time = min_interval - time_since_last
-            time.sleep(sleep_time)
-            
-        self.last_send_time = time.time()
-    
     def has_been_notified(self, token_address: str, notification_type: str = 'discord', 
                          user_id: str = 'system') -> bool:
         """Check if token has already been notified to prevent duplicates"""
@@ -101,45 +90,14 @@ class EnhancedNotificationSystem:
             return False
     
     def fetch_market_data(self, token_address: str) -> Dict:
-        """Fetch real-time market data from DexScreener with enhanced logging"""
-        try:
-            dex_url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            logger.info(f"📊 Fetching market data for {token_address[:10]}...")
-            
-            response = requests.get(dex_url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                pairs = data.get('pairs') if data else None
-                
-                if pairs and len(pairs) > 0:
-                    logger.info(f"📊 Found {len(pairs)} pairs for {token_address[:10]}...")
-                    
-                    # Get the pair with highest liquidity (or first if no liquidity)
-                    try:
-                        best_pair = max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0)) if x.get('liquidity') else 0)
-                    except:
-                        best_pair = pairs[0]
-                    
-                    market_data = {
-                        'price': float(best_pair.get('priceUsd', 0)),
-                        'market_cap': float(best_pair.get('marketCap', 0)),
-                        'volume_24h': float(best_pair.get('volume', {}).get('h24', 0)),
-                        'liquidity': float(best_pair.get('liquidity', {}).get('usd', 0)),
-                        'price_change_24h': float(best_pair.get('priceChange', {}).get('h24', 0))
-                    }
-                    
-                    logger.info(f"✅ Market data loaded: MC=${market_data['market_cap']:.0f}, Price=${market_data['price']:.8f}")
-                    return market_data
-                else:
-                    logger.warning(f"⚠️ No pairs found for {token_address[:10]}... (token might be too new)")
-            else:
-                logger.warning(f"⚠️ DexScreener API error {response.status_code} for {token_address[:10]}...")
-                    
-        except Exception as e:
-            logger.warning(f"❌ Market data fetch failed for {token_address[:10]}...: {e}")
+        """Fetch real-time market data through the shared market data service"""
+        logger.info(f"📊 Fetching market data for {token_address[:10]}...")
+        market_data = get_market_data_service().get_sync(token_address)
         
-        return {}
+        if market_data.get('status'):
+            logger.warning(f"⚠️ No market data for {token_address[:10]}... ({market_data['status']})")
+            return {}
+        return market_data
     
     def calculate_age_display(self, created_timestamp: float) -> str:
         """Calculate accurate age display"""
@@ -198,9 +156,6 @@ class EnhancedNotificationSystem:
                 logger.info(f"⚠️ DUPLICATE PREVENTED: {token_name} ({token_address[:10]}...) already notified")
                 return False
             
-            # STEP 3: Rate limiting
-            self._rate_limit()
-            
             # STEP 4: Prepare token information
             symbol = token_data.get('symbol', 'UNK')
             age_display = self.calculate_age_display(token_data.get('created_timestamp', 0))
@@ -326,13 +281,8 @@ class EnhancedNotificationSystem:
                 "embeds": [embed]
             }
             
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
-            
-            if response.status_code == 204:
+            # Per-webhook queue on the shared client (rate-limit buckets, 429 retries)
+            if self.webhooks.send_sync(self.webhook_url, payload):
                 # STEP 8: Mark as notified to prevent duplicates
                 self.mark_as_notified(token_address, token_name)
                 
@@ -342,7 +292,7 @@ class EnhancedNotificationSystem:
                 
                 return True
             else:
-                logger.error(f"❌ Webhook failed: {response.status_code} - {response.text}")
+                logger.error(f"❌ Webhook failed for {token_name} ({token_address[:10]}...)")
                 return False
                 
         except Exception as e:
@@ -10,6 +10,7 @@ import time
 from datetime import datetime
 from fixed_dual_table_processor import FixedDualTableProcessor
 from enhanced_fallback_name_resolver import EnhancedFallbackResolver
+from dexscreener_batch import get_dexscreener_resolver
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +19,7 @@ class EnhancedRetryBackgroundService:
     def __init__(self, retry_interval=300):  # 5 minutes between retry cycles
         self.processor = FixedDualTableProcessor()
         self.resolver = EnhancedFallbackResolver()
+        self.resolver_batch = get_dexscreener_resolver()
         self.retry_interval = retry_interval
         self.running = False
         
@@ -50,56 +52,36 @@ class EnhancedRetryBackgroundService:
         
         logger.info(f"🎯 Processing {len(fallback_tokens)} fallback tokens")
         
-        processed = 0
-        resolved = 0
-        retried = 0
+        # Resolve every token name with a handful of batched DexScreener requests
+        addresses = [token[0] for token in fallback_tokens]
+        resolved_names = await self.resolver_batch.resolve_names(addresses)
         
+        to_migrate = []
+        unresolved = []
         for token in fallback_tokens:
-            try:
-                contract_address = token[0]
-                token_name = token[1]
-                current_retry_count = token[3] if len(token) > 3 else 0
-                
-                logger.info(f"🔍 Processing: {token_name} (retry #{current_retry_count})")
-                
-                # Try to resolve the token name
-                resolved_name = await self.attempt_name_resolution(contract_address)
-                
-                if resolved_name and not resolved_name.startswith('Unnamed'):
-                    # Success! Migrate to detected tokens
-                    logger.info(f"✅ RESOLVED: '{resolved_name}' for {contract_address[:10]}...")
-                    
-                    resolved_id = self.processor.insert_resolved_token(
-                        contract_address=contract_address,
-                        token_name=resolved_name,
-                        symbol=token[2] if len(token) > 2 else 'UNKNOWN'
-                    )
-                    
-                    if resolved_id:
-                        # Remove from fallback table
-                        await self.remove_from_fallback(contract_address)
-                        logger.info(f"🎉 MIGRATED: {resolved_name} moved to detected_tokens")
-                        resolved += 1
-                    
-                else:
-                    # Still couldn't resolve - increment retry count
-                    logger.info(f"⏳ Still unresolved: {token_name} (retry #{current_retry_count + 1})")
-                    
-                    success = self.processor.update_retry_count(contract_address, 'fallback_processing_coins')
-                    if success:
-                        retried += 1
-                        logger.info(f"📈 Retry count incremented to {current_retry_count + 1}")
-                    else:
-                        logger.warning(f"⚠️ Failed to increment retry count for {contract_address[:10]}...")
-                
-                processed += 1
-                
-                # Rate limiting between requests
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"❌ Error processing token {contract_address[:10]}...: {e}")
-                continue
+            contract_address = token[0]
+            token_name = token[1]
+            current_retry_count = token[3] if len(token) > 3 else 0
+            resolved_name = resolved_names.get(contract_address)
+            
+            if resolved_name and not resolved_name.startswith('Unnamed'):
+                # Success! Migrate to detected tokens
+                logger.info(f"✅ RESOLVED: '{resolved_name}' for {contract_address[:10]}...")
+                matched_keywords = token[2] if len(token) > 2 and isinstance(token[2], list) else None
+                to_migrate.append((contract_address, resolved_name, None, matched_keywords))
+            else:
+                # Still couldn't resolve - increment retry count
+                logger.info(f"⏳ Still unresolved: {token_name} (retry #{current_retry_count + 1})")
+                unresolved.append(contract_address)
+        
+        migrated = self.processor.batch_migrate_fallback_to_detected(to_migrate)
+        updated = self.processor.batch_update_retry_count(unresolved, 'fallback_processing_coins')
+        
+        processed = len(fallback_tokens)
+        resolved = len(migrated)
+        retried = len(updated)
+        if len(updated) < len(unresolved):
+            logger.warning(f"⚠️ Failed to increment retry count for {len(unresolved) - len(updated)} tokens")
         
         # Log cycle summary
         logger.info("=" * 60)
@@ -111,27 +93,9 @@ class EnhancedRetryBackgroundService:
         logger.info("=" * 60)
     
     async def attempt_name_resolution(self, contract_address):
-        """Attempt to resolve token name using multiple methods"""
+        """Attempt to resolve a single token name (batched resolver with one address)"""
         try:
-            # Try DexScreener first
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                url = f"https://api.dexscreener.com/latest/dex/tokens/{contract_address}"
-                
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        if data.get('pairs') and len(data['pairs']) > 0:
-                            pair = data['pairs'][0]
-                            base_token = pair.get('baseToken', {})
-                            token_name = base_token.get('name')
-                            
-                            if token_name and len(token_name.strip()) > 0:
-                                return token_name.strip()
-            
-            return None
-            
+            return await self.resolver_batch.resolve_name(contract_address)
         except Exception as e:
             logger.debug(f"Name resolution failed for {contract_address[:10]}...: {e}")
             return None
@@ -5,10 +5,12 @@ Handles token detection with separate pending, detected, and fallback token tabl
 """
 
 import psycopg2
+from psycopg2.extras import execute_values
 import os
 import logging
 from datetime import datetime
 import json
+from db_pool import get_connection
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,7 +23,7 @@ class FixedDualTableProcessor:
     
     def get_db_connection(self):
         """Get database connection"""
-        return psycopg2.connect(self.database_url)
+        return get_connection(self.database_url)
     
     def insert_pending_token(self, contract_address, placeholder_name, keyword=None, 
                            matched_keywords=None, blockchain_age_seconds=None):
@@ -590,6 +592,86 @@ class FixedDualTableProcessor:
             logger.error(f"❌ Failed to update retry count: {e}")
             return False
 
+    def batch_migrate_fallback_to_detected(self, tokens):
+        """Migrate many (contract_address, token_name, symbol, matched_keywords) rows in one transaction"""
+        rows = []
+        for contract_address, token_name, symbol, matched_keywords in tokens:
+            # CRITICAL VALIDATION: Prevent unnamed tokens from entering detected_tokens
+            if not token_name or token_name.startswith('Unnamed Token'):
+                logger.error(f"🚫 CRITICAL BLOCK: Cannot migrate unnamed token '{token_name}' ({contract_address[:10]}...)")
+                continue
+            rows.append((contract_address, token_name, symbol, matched_keywords or [], 'LetsBonk', 'detected'))
+        
+        if not rows:
+            return []
+        
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            
+            # Insert into detected_tokens
+            migrated = execute_values(cursor, '''
+                INSERT INTO detected_tokens 
+                (address, name, symbol, matched_keywords, platform, status)
+                VALUES %s
+                ON CONFLICT (address) 
+                DO UPDATE SET 
+                    name = EXCLUDED.name,
+                    symbol = EXCLUDED.symbol,
+                    matched_keywords = EXCLUDED.matched_keywords,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING address
+            ''', rows, fetch=True)
+            migrated = [address for (address,) in migrated]
+            
+            # Delete from fallback_processing_coins after successful migration
+            cursor.execute('''
+                DELETE FROM fallback_processing_coins 
+                WHERE contract_address = ANY(%s)
+            ''', (migrated,))
+            
+            conn.commit()
+            cursor.close()
+            conn.close()
+            
+            logger.info(f"✅ MIGRATED: {len(migrated)} tokens from fallback_processing_coins to detected_tokens")
+            return migrated
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to batch migrate fallback tokens: {e}")
+            return []
+    
+    def batch_update_retry_count(self, contract_addresses, table='pending_tokens'):
+        """Increment retry count for many pending or fallback tokens with one UPDATE"""
+        if not contract_addresses:
+            return []
+        
+        table = 'fallback_processing_coins' if table == 'fallback_processing_coins' else 'pending_tokens'
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                UPDATE {table} 
+                SET retry_count = COALESCE(retry_count, 0) + 1,
+                    last_retry_at = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE contract_address = ANY(%s)
+                RETURNING contract_address
+            ''', (list(contract_addresses),))
+            
+            updated = [address for (address,) in cursor.fetchall()]
+            conn.commit()
+            cursor.close()
+            conn.close()
+            
+            logger.info(f"📈 Retry count updated for {len(updated)}/{len(contract_addresses)} tokens in {table}")
+            return updated
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to batch update retry count: {e}")
+            return []
+
 # Global instance for easy import
 dual_processor = FixedDualTableProcessor()
 
@@ -21,6 +21,10 @@ from flask import Flask, jsonify
 from waitress import serve
 from typing import Optional, Dict, List
 import difflib
+from keyword_index import CompiledKeywordIndex, NORMALIZED
+from db_pool import get_connection
+from market_data_service import get_market_data_service
+from seen_address_store import SeenAddressStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -37,7 +41,7 @@ class IntegratedTokenMonitor:
         # WebSocket setup
         self.websocket_url = "wss://pumpportal.fun/api/data"
         self.running = False
-        self.processed_tokens = set()
+        self.processed_tokens = SeenAddressStore()  # Fixed-memory dedupe (48h window)
         
         # Discord setup
         self.discord_token = os.getenv('DISCORD_TOKEN')
@@ -46,6 +50,7 @@ class IntegratedTokenMonitor:
         # Keywords cache
         self.user_keywords = {}
         self.last_keyword_refresh = 0
+        self.keyword_index = CompiledKeywordIndex(NORMALIZED)
         
         # PumpPortal market data cache
         self.token_market_cache = {}
@@ -56,7 +61,7 @@ class IntegratedTokenMonitor:
     def get_db_connection(self):
         """Get database connection"""
         try:
-            return psycopg2.connect(self.database_url)
+            return get_connection(self.database_url)
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             return None
@@ -84,6 +89,7 @@ class IntegratedTokenMonitor:
                 new_keywords[user_id].append(keyword.lower().strip())
             
             self.user_keywords = new_keywords
+            self.keyword_index.sync(new_keywords)
             self.last_keyword_refresh = time.time()
             
             total_keywords = sum(len(keywords) for keywords in new_keywords.values())
@@ -106,33 +112,21 @@ class IntegratedTokenMonitor:
         # Detect platform type
         platform = self.detect_platform(token_address)
         
-        # Check user keywords with System keyword support
-        for user_id, user_keywords in self.user_keywords.items():
-            for keyword in user_keywords:
-                # Enhanced matching logic
-                if self.is_keyword_match(token_name_lower, keyword):
-                    # System keywords apply to all users, user-specific only to owner
-                    if user_id == 'System':
-                        # Add match for system-wide keyword (use first available user or system)
-                        target_user = '407225673279864832'  # Default notification user
-                        matches.append({
-                            'user_id': target_user,
-                            'keyword': keyword,
-                            'token_name': token_name,
-                            'token_address': token_address,
-                            'match_type': self.get_match_type(token_name_lower, keyword),
-                            'platform': platform
-                        })
-                    else:
-                        # User-specific keyword
-                        matches.append({
-                            'user_id': user_id,
-                            'keyword': keyword,
-                            'token_name': token_name,
-                            'token_address': token_address,
-                            'match_type': self.get_match_type(token_name_lower, keyword),
-                            'platform': platform
-                        })
+        # Check user keywords with System keyword support - single pass over the compiled index
+        self.keyword_index.ensure_synced(self.user_keywords)
+        for user_id, keyword, match_type in self.keyword_index.match(token_name_lower):
+            # System keywords apply to all users, user-specific only to owner
+            if user_id == 'System':
+                # Add match for system-wide keyword (use first available user or system)
+                user_id = '407225673279864832'  # Default notification user
+            matches.append({
+                'user_id': user_id,
+                'keyword': keyword,
+                'token_name': token_name,
+                'token_address': token_address,
+                'match_type': match_type,
+                'platform': platform
+            })
         
         # STRICT KEYWORD MATCHING ONLY - No auto-notifications to prevent spam
         
@@ -402,99 +396,32 @@ class IntegratedTokenMonitor:
             logger.error(f"Failed to record notification: {e}")
     
     async def get_market_data(self, token_address: str, retry_delay: int = 0) -> Dict:
-        """Get market data from PumpPortal first, then fallback to DexScreener"""
-        import time
-        
+        """Get market data from the PumpPortal websocket cache, then the shared market data service"""
         if retry_delay > 0:
             logger.info(f"⏱️ Waiting {retry_delay} seconds before retry for {token_address[:10]}...")
-            time.sleep(retry_delay)
+            await asyncio.sleep(retry_delay)
         
-        # Try PumpPortal first (best for new tokens)
+        # PumpPortal websocket data first (best for new tokens, no network round trip)
         pumpportal_data = await self.get_pumpportal_data(token_address)
         if pumpportal_data and not pumpportal_data.get('status'):
             logger.info(f"✅ Got PumpPortal data for {token_address[:10]}...")
             return pumpportal_data
         
-        # Fallback to DexScreener
-        try:
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            logger.info(f"📊 Fetching DexScreener data for {token_address[:10]}...")
-            
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                pairs = data.get('pairs') if data else None
-                
-                if pairs and len(pairs) > 0:
-                    logger.info(f"📊 Found {len(pairs)} pairs for {token_address[:10]}...")
-                    
-                    # Get the pair with highest liquidity (or first if no liquidity data)
-                    try:
-                        best_pair = max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0)) if x.get('liquidity') else 0)
-                    except:
-                        best_pair = pairs[0]
-                    
-                    market_data = {
-                        'price': float(best_pair.get('priceUsd', 0)),
-                        'market_cap': float(best_pair.get('marketCap', 0)),
-                        'volume_24h': float(best_pair.get('volume', {}).get('h24', 0)),
-                        'liquidity': float(best_pair.get('liquidity', {}).get('usd', 0)),
-                        'price_change_24h': float(best_pair.get('priceChange', {}).get('h24', 0)),
-                        'source': 'DexScreener'
-                    }
-                    
-                    logger.info(f"✅ DexScreener data loaded: MC=${market_data['market_cap']:.0f}, Price=${market_data['price']:.8f}")
-                    return market_data
-                else:
-                    logger.warning(f"⚠️ No pairs found on DexScreener for {token_address[:10]}...")
-                    return {'status': 'too_new'}
-            else:
-                logger.warning(f"⚠️ DexScreener API error {response.status_code} for {token_address[:10]}...")
-                return {'status': 'api_error'}
-                
-        except Exception as e:
-            logger.warning(f"❌ Market data fetch failed for {token_address[:10]}...: {e}")
-            return {'status': 'fetch_error'}
-        
-        return {'status': 'unknown_error'}
+        # Cached, single-flight, hedged DexScreener / pump.fun lookup
+        logger.info(f"📊 Fetching market data for {token_address[:10]}...")
+        market_data = await get_market_data_service().get(token_address)
+        if market_data.get('status'):
+            logger.warning(f"⚠️ No market data for {token_address[:10]}... ({market_data['status']})")
+        return market_data
     
     async def get_pumpportal_data(self, token_address: str) -> Dict:
-        """Get market data from PumpPortal WebSocket cache or try pump.fun API"""
-        
-        # First check if we have cached WebSocket data for this token
+        """Get market data from the PumpPortal WebSocket cache"""
         cached_data = self.get_cached_token_data(token_address)
         if cached_data:
             logger.info(f"✅ Using cached PumpPortal data for {token_address[:10]}...")
             return cached_data
         
-        # Try alternative pump.fun endpoints
-        endpoints = [
-            f"https://pump.fun/coin/{token_address}",
-            f"https://api.pump.fun/coins/{token_address}",
-            f"https://pump.fun/api/tokens/{token_address}"
-        ]
-        
-        for endpoint in endpoints:
-            try:
-                logger.info(f"🚀 Trying endpoint for {token_address[:10]}...")
-                response = requests.get(endpoint, timeout=8, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                
-                if response.status_code == 200:
-                    # Try to extract any market data from the response
-                    content = response.text
-                    if 'market_cap' in content or 'marketCap' in content:
-                        logger.info(f"✅ Found market data in response for {token_address[:10]}")
-                        # Would need to parse HTML/JSON for actual data
-                        # For now, return status to indicate we should use DexScreener
-                        return {'status': 'found_but_parsing_needed'}
-                        
-            except Exception as e:
-                logger.debug(f"Endpoint failed: {e}")
-                continue
-        
+        # pump.fun HTTP endpoints are probed by the market data service (in parallel, behind a circuit breaker)
         return {'status': 'no_data'}
     
     def get_cached_token_data(self, token_address: str) -> Optional[Dict]:
@@ -2,6 +2,7 @@ import psycopg2
 import os
 from datetime import datetime, timezone
 import logging
+from db_pool import get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,7 @@ class KeywordAttributionManager:
     def init_database(self):
         """Initialize the keyword attribution database table"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             # Create keyword_attribution table
@@ -48,7 +49,7 @@ class KeywordAttributionManager:
     def add_keyword_attribution(self, keyword, user_id, username=None, preserve_existing=False):
         """Add keyword attribution tracking"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             if preserve_existing:
@@ -84,7 +85,7 @@ class KeywordAttributionManager:
     def remove_keyword_attribution(self, keyword):
         """Mark keyword as inactive instead of deleting"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -106,7 +107,7 @@ class KeywordAttributionManager:
     def get_keyword_attribution(self, keyword):
         """Get attribution info for a specific keyword"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -134,7 +135,7 @@ class KeywordAttributionManager:
     def get_all_keyword_attributions(self):
         """Get all active keyword attributions"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -166,7 +167,7 @@ class KeywordAttributionManager:
     def get_keywords_by_user(self, user_id):
         """Get all keywords added by a specific user"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -189,7 +190,7 @@ class KeywordAttributionManager:
     def clear_all_attributions(self):
         """Mark all keywords as inactive"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("UPDATE keyword_attribution SET is_active = FALSE")
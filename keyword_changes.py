@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Keyword Change Notifications
+Postgres LISTEN/NOTIFY feed for keywords / server_keywords / server_webhooks.
+Row triggers publish each change as a JSON payload; a background listener hands
+the deltas to the monitor's event loop, so a /add goes live in milliseconds
+without re-reading the whole table. A periodic checksum comparison catches
+anything a dropped connection may have missed.
+"""
+
+import json
+import time
+import select
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, Tuple, Optional, Callable, Any
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'keyword_changes'
+WATCHED_TABLES = ('keywords', 'server_keywords', 'server_webhooks')
+
+TRIGGER_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION notify_keyword_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            PERFORM pg_notify('{CHANNEL}', json_build_object('table', TG_TABLE_NAME, 'op', TG_OP)::text);
+            RETURN NULL;
+        END IF;
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'new', CASE WHEN TG_OP <> 'DELETE' THEN to_jsonb(NEW) END,
+            'old', CASE WHEN TG_OP <> 'INSERT' THEN to_jsonb(OLD) END
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+# Raw rows for the periodic reconciliation. Normalising in SQL (LOWER/TRIM) disagrees with
+# Python on tabs, newlines and non-ASCII case, so both sides hash normalize_keyword() output.
+CHECKSUM_SQL = {
+    'keywords': "SELECT user_id, keyword FROM keywords WHERE user_id IS NOT NULL",
+    'server_keywords': "SELECT server_id, user_id, keyword FROM server_keywords"
+}
+
+
+def normalize_keyword(keyword: Optional[str]) -> str:
+    """Stored keyword -> the form the monitor indexes (shared by loaders, deltas and checksums)"""
+    return (keyword or '').lower().strip()
+
+
+def keyword_checksum(rows: Iterable[Tuple[Any, ...]]) -> Tuple[int, int]:
+    """Order-independent (row count, sum of 32-bit md5 prefixes) of normalised (owner..., keyword) rows"""
+    count = 0
+    total = 0
+    for row in rows:
+        key = ':'.join(str(part) for part in row)
+        total += int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16)
+        count += 1
+    return count, total
+
+
+def database_checksum(table: str, rows: Iterable[Tuple[Any, ...]]) -> Tuple[int, int]:
+    """keyword_checksum of raw CHECKSUM_SQL rows, normalised and filtered the way the loaders keep them"""
+    normalized = (tuple(owner) + (normalize_keyword(keyword),) for *owner, keyword in rows)
+    if table == 'server_keywords':
+        normalized = (row for row in normalized if row[-1])  # Blank server keywords are never loaded
+    return keyword_checksum(normalized)
+
+
+TRIGGERS = (
+    ('change_notify', 'AFTER INSERT OR UPDATE OR DELETE', 'FOR EACH ROW'),
+    ('truncate_notify', 'AFTER TRUNCATE', 'FOR EACH STATEMENT'),
+)
+
+
+def install_keyword_triggers(conn) -> int:
+    """
+    Create the notify function and any missing triggers in one transaction; returns tables covered.
+
+    Runs on every listener (re)connect, so existing triggers are left alone
+    (pg_trigger check) instead of being dropped and recreated each time.
+    """
+    cursor = conn.cursor()
+    installed = 0
+    try:
+        # Serialise concurrent monitors racing to create the same trigger
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (CHANNEL,))
+        cursor.execute(TRIGGER_FUNCTION_SQL)
+        for table in WATCHED_TABLES:
+            cursor.execute("SELECT to_regclass(%s)", (table,))
+            if cursor.fetchone()[0] is None:
+                # Table not created yet (the bots create server_* on first start)
+                logger.warning(f"⚠️ No change trigger on {table}: table does not exist yet")
+                continue
+            cursor.execute("SELECT tgname FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal",
+                           (table,))
+            existing = {name for name, in cursor.fetchall()}
+            for suffix, events, level in TRIGGERS:
+                if f"{table}_{suffix}" not in existing:
+                    cursor.execute(f"""
+                        CREATE TRIGGER {table}_{suffix}
+                        {events} ON {table}
+                        {level} EXECUTE PROCEDURE notify_keyword_change()
+                    """)
+            installed += 1
+        conn.commit()
+    except psycopg2.Error as e:
+        conn.rollback()
+        installed = 0
+        logger.error(f"❌ Failed to install keyword change triggers: {e}")
+    finally:
+        cursor.close()
+    return installed
+
+
+class KeywordChangeListener:
+    """
+    Dedicated LISTEN connection on a daemon thread.
+
+    Callbacks run on the monitor's event loop (call_soon_threadsafe), the only
+    thread that touches the keyword index:
+      on_change(change)      - one decoded trigger payload
+      on_resync(reason)      - deltas may have been missed; reload everything
+      on_checksum(checksums) - {table: (count, sum)} from the database
+    """
+
+    def __init__(self, database_url: str, loop, on_change: Callable[[Dict], None],
+                 on_resync: Callable[[str], None], on_checksum: Optional[Callable[[Dict], None]] = None,
+                 reconcile_interval: float = 300, reconnect_delay: float = 5):
+        self.database_url = database_url
+        self.loop = loop
+        self.on_change = on_change
+        self.on_resync = on_resync
+        self.on_checksum = on_checksum
+        self.reconcile_interval = reconcile_interval
+        self.reconnect_delay = reconnect_delay
+
+        self.conn = None
+        self.live = False
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.last_reconcile = 0.0
+        self.stats = {'notifications': 0, 'bad_payloads': 0, 'reconnects': 0, 'reconciliations': 0,
+                      'last_notification': 0.0}
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="keyword-listener", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.live = False
+
+    def _dispatch(self, callback: Callable, *args):
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            self.running = False  # Monitor loop closed
+
+    def _connect(self):
+        conn = psycopg2.connect(self.database_url)
+        install_keyword_triggers(conn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        cursor = conn.cursor()
+        cursor.execute(f"LISTEN {CHANNEL}")
+        cursor.close()
+        return conn
+
+    def _run(self):
+        first = True
+        while self.running:
+            try:
+                self.conn = self._connect()
+                self.live = True
+                logger.info(f"👂 Listening for keyword changes on '{CHANNEL}'")
+                # Anything committed before LISTEN took effect was never delivered
+                if not first:
+                    self.stats['reconnects'] += 1
+                self._dispatch(self.on_resync, 'listener started' if first else 'listener reconnected')
+                first = False
+                self.last_reconcile = time.time()
+                self._listen()
+            except Exception as e:
+                logger.error(f"❌ Keyword change listener error: {e}")
+            finally:
+                self.live = False
+                if self.conn is not None:
+                    try:
+                        self.conn.close()
+                    except Exception:
+                        pass
+                    self.conn = None
+            if self.running:
+                time.sleep(self.reconnect_delay)
+
+    def _listen(self):
+        conn = self.conn
+        while self.running:
+            timeout = max(0.0, self.last_reconcile + self.reconcile_interval - time.time())
+            if select.select([conn], [], [], min(timeout, 5.0)) != ([], [], []):
+                conn.poll()
+                while conn.notifies:
+                    self._handle(conn.notifies.pop(0).payload)
+
+            if time.time() - self.last_reconcile >= self.reconcile_interval:
+                self.last_reconcile = time.time()
+                self._reconcile(conn)
+
+    def _handle(self, payload: str):
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            self.stats['bad_payloads'] += 1
+            logger.warning(f"⚠️ Unparseable keyword change payload: {payload[:100]}")
+            return
+        self.stats['notifications'] += 1
+        self.stats['last_notification'] = time.time()
+        self._dispatch(self.on_change, change)
+
+    def _reconcile(self, conn):
+        if not self.on_checksum:
+            return
+        checksums = {}
+        cursor = conn.cursor()
+        try:
+            for table, sql in CHECKSUM_SQL.items():
+                try:
+                    cursor.execute(sql)
+                    checksums[table] = database_checksum(table, cursor)
+                except psycopg2.ProgrammingError:
+                    pass  # Table doesn't exist yet
+        finally:
+            cursor.close()
+        self.stats['reconciliations'] += 1
+        self._dispatch(self.on_checksum, checksums)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['live'] = self.live
+        stats['reconcile_interval'] = self.reconcile_interval
+        return stats
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Compiled Multi-Tenant Keyword Index
+Matches a token name against every user's keywords in a single pass instead of
+looping over users x keywords. Substring and phrase rules run through an
+Aho-Corasick automaton, word-overlap rules through a word -> keyword inverted index.
+"""
+
+import re
+import logging
+from collections import deque
+from typing import Dict, List, Tuple, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Matching semantics supported by the index
+STRICT = "strict"          # main.IntegratedTokenMonitor.is_keyword_match
+NORMALIZED = "normalized"  # integrated_monitoring_system.IntegratedTokenMonitor.is_keyword_match
+
+_NORMALIZE_PATTERN = re.compile(r'[_\-\s]+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalization used by the enhanced (integrated) matcher"""
+    return _NORMALIZE_PATTERN.sub(' ', text.lower().strip())
+
+
+def get_match_type(token_name: str, keyword: str) -> str:
+    """Determine match type for logging (same rules as the monitors)"""
+    if keyword == token_name:
+        return "exact"
+    elif keyword in token_name or token_name in keyword:
+        return "substring"
+    else:
+        return "fuzzy"
+
+
+class _KeywordEntry:
+    """Compiled form of one distinct keyword"""
+
+    __slots__ = ('keyword', 'pattern', 'single_word', 'boundary_regex',
+                 'words', 'full_need', 'partial_need', 'pattern_id')
+
+    def __init__(self, keyword: str, semantics: str):
+        self.keyword = keyword
+        self.pattern = normalize_text(keyword) if semantics == NORMALIZED else keyword.lower()
+        self.single_word = len(self.pattern.split()) == 1
+        self.boundary_regex = None
+        self.words = frozenset()
+        self.full_need = 0
+        self.partial_need = 0
+        self.pattern_id = -1
+
+        if self.single_word:
+            if semantics == STRICT:
+                # Candidate hits from the automaton are confirmed against the original regex
+                self.boundary_regex = re.compile(r'\b' + re.escape(self.pattern) + r'\b')
+            return
+
+        self.words = frozenset(word for word in self.pattern.split() if len(word) > 1)
+        count = len(self.words)
+        if semantics == STRICT:
+            # ALL significant words, or 80% of them when the keyword has more than 2 words
+            self.full_need = count
+            self.partial_need = self._min_overlap(count, 0.8) if count > 2 else 0
+        else:
+            # 75% word overlap
+            self.full_need = self._min_overlap(count, 0.75)
+
+    @staticmethod
+    def _min_overlap(count: int, ratio: float) -> int:
+        """Smallest overlap satisfying overlap / count >= ratio (same float math as the matcher)"""
+        for overlap in range(count + 1):
+            if count and overlap / count >= ratio:
+                return overlap
+        return count
+
+
+class _AhoCorasick:
+    """Incrementally extended Aho-Corasick automaton over keyword patterns"""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.terminal: List[Optional[int]] = [None]
+        self.outputs: List[Tuple[int, ...]] = [()]
+        self.active: Dict[int, int] = {}  # pattern_id -> terminal node
+        self.dead_nodes = 0
+        self.dirty = False
+
+    def add(self, pattern_id: int, pattern: str):
+        node = 0
+        for char in pattern:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.terminal.append(None)
+                self.outputs.append(())
+                self.goto[node][char] = nxt
+            node = nxt
+        self.terminal[node] = pattern_id
+        self.active[pattern_id] = node
+        self.dirty = True
+
+    def remove(self, pattern_id: int, pattern_length: int):
+        node = self.active.pop(pattern_id, None)
+        if node is not None:
+            self.terminal[node] = None
+            self.dead_nodes += pattern_length
+            self.dirty = True
+
+    def build(self):
+        """Recompute failure links and merged outputs after patterns changed"""
+        queue = deque()
+        for child in self.goto[0].values():
+            self.fail[child] = 0
+            queue.append(child)
+        self.outputs[0] = ()
+
+        while queue:
+            node = queue.popleft()
+            own = (self.terminal[node],) if self.terminal[node] is not None else ()
+            self.outputs[node] = own + self.outputs[self.fail[node]]
+
+            for char, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                queue.append(child)
+
+        self.dirty = False
+
+    def search(self, text: str) -> set:
+        """Return ids of every pattern occurring in text"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+        return found
+
+
+class CompiledKeywordIndex:
+    """
+    Multi-tenant keyword index returning every (user, keyword, match_type) hit
+    for a token name in one pass. Results are identical to calling the monitor's
+    is_keyword_match for every user keyword, in the same order.
+    """
+
+    def __init__(self, semantics: str = STRICT):
+        if semantics not in (STRICT, NORMALIZED):
+            raise ValueError(f"Unknown keyword semantics: {semantics}")
+        self.semantics = semantics
+
+        self.entries: Dict[str, _KeywordEntry] = {}
+        self.owners: Dict[str, List[Tuple[int, Any]]] = {}  # keyword -> [(order, user_id)]
+        self.automaton = _AhoCorasick()
+        self.pattern_entries: Dict[int, List[_KeywordEntry]] = {}
+        self.pattern_ids: Dict[str, int] = {}
+        self.word_index: Dict[str, List[_KeywordEntry]] = {}
+        self.empty_entries: List[_KeywordEntry] = []
+        self.next_pattern_id = 0
+        self.next_order = 0
+
+        self._source = None
+        self.stats = {'keywords': 0, 'distinct_keywords': 0, 'rebuilds': 0, 'added': 0, 'removed': 0}
+
+    def ensure_synced(self, user_keywords: Dict[Any, List[str]]):
+        """Sync only if the keyword mapping was replaced since the last sync"""
+        if user_keywords is not self._source:
+            self.sync(user_keywords)
+
+    def sync(self, user_keywords: Dict[Any, List[str]]) -> Tuple[int, int]:
+        """Apply a fresh user -> keywords snapshot, compiling only added/removed keywords"""
+        owners: Dict[str, List[Tuple[int, Any]]] = {}
+        order = 0
+        for user_id, keywords in user_keywords.items():
+            for keyword in keywords:
+                owners.setdefault(keyword, []).append((order, user_id))
+                order += 1
+
+        added = [keyword for keyword in owners if keyword not in self.entries]
+        removed = [keyword for keyword in self.entries if keyword not in owners]
+
+        for keyword in removed:
+            self._remove_entry(self.entries.pop(keyword))
+        for keyword in added:
+            entry = _KeywordEntry(keyword, self.semantics)
+            self.entries[keyword] = entry
+            self._add_entry(entry)
+
+        self.owners = owners
+        self.next_order = order
+        self._source = user_keywords
+        self._rebuild_if_dirty()
+
+        self.stats['keywords'] = order
+        self.stats['distinct_keywords'] = len(self.entries)
+        self.stats['added'] += len(added)
+        self.stats['removed'] += len(removed)
+
+        if added or removed:
+            logger.debug(f"🔤 Keyword index synced: +{len(added)} / -{len(removed)} ({len(self.entries)} distinct)")
+        return len(added), len(removed)
+
+    def add_keyword(self, user_id: Any, keyword: str):
+        """Apply a single added (user, keyword) without a full sync"""
+        owners = self.owners.setdefault(keyword, [])
+        owners.append((self.next_order, user_id))
+        self.next_order += 1
+        self.stats['keywords'] += 1
+
+        if keyword not in self.entries:
+            entry = _KeywordEntry(keyword, self.semantics)
+            self.entries[keyword] = entry
+            self._add_entry(entry)
+            self._rebuild_if_dirty()
+            self.stats['added'] += 1
+            self.stats['distinct_keywords'] = len(self.entries)
+
+    def remove_keyword(self, user_id: Any, keyword: str) -> bool:
+        """Apply a single removed (user, keyword); returns False if it wasn't indexed"""
+        owners = self.owners.get(keyword)
+        if not owners:
+            return False
+        for position, (_, owner) in enumerate(owners):
+            if owner == user_id:
+                del owners[position]
+                break
+        else:
+            return False
+        self.stats['keywords'] -= 1
+
+        if not owners:
+            del self.owners[keyword]
+            self._remove_entry(self.entries.pop(keyword))
+            self._rebuild_if_dirty()
+            self.stats['removed'] += 1
+            self.stats['distinct_keywords'] = len(self.entries)
+        return True
+
+    def _rebuild_if_dirty(self):
+        if self.automaton.dead_nodes > len(self.automaton.goto) // 2:
+            self._compact()
+        elif self.automaton.dirty:
+            self.automaton.build()
+            self.stats['rebuilds'] += 1
+
+    def _add_entry(self, entry: _KeywordEntry):
+        if not entry.pattern:
+            self.empty_entries.append(entry)
+        else:
+            pattern_id = self.pattern_ids.get(entry.pattern)
+            if pattern_id is None:
+                pattern_id = self.next_pattern_id
+                self.next_pattern_id += 1
+                self.pattern_ids[entry.pattern] = pattern_id
+                self.pattern_entries[pattern_id] = []
+                self.automaton.add(pattern_id, entry.pattern)
+            entry.pattern_id = pattern_id
+            self.pattern_entries[pattern_id].append(entry)
+
+        for word in entry.words:
+            self.word_index.setdefault(word, []).append(entry)
+
+    def _remove_entry(self, entry: _KeywordEntry):
+        if not entry.pattern:
+            self.empty_entries.remove(entry)
+        else:
+            siblings = self.pattern_entries[entry.pattern_id]
+            siblings.remove(entry)
+            if not siblings:
+                del self.pattern_entries[entry.pattern_id]
+                del self.pattern_ids[entry.pattern]
+                self.automaton.remove(entry.pattern_id, len(entry.pattern))
+
+        for word in entry.words:
+            bucket = self.word_index[word]
+            bucket.remove(entry)
+            if not bucket:
+                del self.word_index[word]
+
+    def _compact(self):
+        """Rebuild the automaton from live patterns once removals leave too many dead nodes"""
+        self.automaton = _AhoCorasick()
+        for pattern, pattern_id in self.pattern_ids.items():
+            self.automaton.add(pattern_id, pattern)
+        self.automaton.build()
+        self.stats['rebuilds'] += 1
+
+    def match(self, token_name: str) -> List[Tuple[Any, str, str]]:
+        """Return every (user_id, keyword, match_type) hit for a token name"""
+        if not token_name:
+            return []
+
+        token_lower = token_name.lower().strip()
+        if self.semantics == NORMALIZED:
+            text = normalize_text(token_lower)
+        else:
+            text = token_lower.lower()
+
+        hits = set(self.empty_entries)
+
+        for pattern_id in self.automaton.search(text):
+            for entry in self.pattern_entries.get(pattern_id, ()):
+                if entry.boundary_regex is None or entry.pattern == text or entry.boundary_regex.search(text):
+                    hits.add(entry)
+
+        if self.word_index and len(text.strip()) > 2:
+            hits.update(self._word_overlap_hits(text))
+
+        if not hits:
+            return []
+
+        results = []
+        for entry in hits:
+            match_type = get_match_type(token_lower, entry.keyword)
+            for order, user_id in self.owners.get(entry.keyword, ()):
+                results.append((order, user_id, entry.keyword, match_type))
+        results.sort(key=lambda hit: hit[0])
+        return [(user_id, keyword, match_type) for _, user_id, keyword, match_type in results]
+
+    def _word_overlap_hits(self, text: str) -> List[_KeywordEntry]:
+        """Multi-word keywords whose significant words overlap the token enough"""
+        token_split = text.split()
+        overlap: Dict[_KeywordEntry, int] = {}
+        for word in set(word for word in token_split if len(word) > 1):
+            for entry in self.word_index.get(word, ()):
+                overlap[entry] = overlap.get(entry, 0) + 1
+
+        allow_partial = len(token_split) >= 2
+        hits = []
+        for entry, count in overlap.items():
+            if count >= entry.full_need or (allow_partial and entry.partial_need and count >= entry.partial_need):
+                hits.append(entry)
+        return hits
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index size and rebuild counters"""
+        stats = dict(self.stats)
+        stats['automaton_nodes'] = len(self.automaton.goto)
+        stats['indexed_words'] = len(self.word_index)
+        return stats
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+LetsBonk Log Stream
+Streaming ingest for LetsBonk launches over the Solana RPC websocket
+(logsSubscribe on the LetsBonk program) instead of polling signatures. Create
+instructions are recognised - and the launch event's name/symbol/uri decoded -
+straight from the notification logs, so trades never cost an RPC call. Only
+creates are fetched with getTransaction (JSON-RPC batches through the shared
+RPC router, for the mint and blockTime). After a reconnect, signatures since the last one seen are
+gap-filled through getSignaturesForAddress: only ones the stream never delivered are fetched, in
+compact base64 form just to read their logs, and only the creates among them are fetched parsed.
+"""
+
+import os
+import json
+import base64
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import websockets
+from cachetools import TTLCache
+
+from rpc_router import get_rpc_router
+from metaplex_metadata import BorshReader, BorshError
+
+logger = logging.getLogger(__name__)
+
+LETSBONK_PROGRAM_ID = "LanMV9sAd7wArD4vJFi2qDdfnVhFxYSUg6eADduJ3uj"
+CREATE_INSTRUCTIONS = ('Initialize', 'InitializeV2', 'InitializeWithToken2022')
+POOL_CREATE_EVENT = hashlib.sha256(b"event:PoolCreateEvent").digest()[:8]  # Anchor event discriminator
+TRANSACTION_CONFIG = {"encoding": "jsonParsed", "commitment": "confirmed", "maxSupportedTransactionVersion": 0}
+# Gap-fill only needs meta.logMessages to tell creates from trades - skip the parsed instruction tree
+LOGS_ONLY_CONFIG = {"encoding": "base64", "commitment": "confirmed", "maxSupportedTransactionVersion": 0}
+
+
+@dataclass
+class CreateEvent:
+    """A LetsBonk create seen in program logs (launch parameters when the event decoded)"""
+    signature: str
+    slot: int
+    instruction: str
+    name: Optional[str] = None
+    symbol: Optional[str] = None
+    uri: Optional[str] = None
+    creator: Optional[str] = None
+    pool_state: Optional[str] = None
+
+
+def decode_pool_create_event(data: str) -> Optional[Dict[str, Any]]:
+    """Decode a 'Program data:' PoolCreateEvent payload (pool_state, creator, config, base mint params)"""
+    try:
+        raw = base64.b64decode(data)
+    except ValueError:
+        return None
+    if raw[:8] != POOL_CREATE_EVENT:
+        return None
+    try:
+        reader = BorshReader(memoryview(raw)[8:])
+        pool_state = reader.pubkey()
+        creator = reader.pubkey()
+        reader.pubkey()  # config
+        reader.u8()      # decimals
+        return {'pool_state': pool_state, 'creator': creator,
+                'name': reader.string(), 'symbol': reader.string(), 'uri': reader.string()}
+    except BorshError:
+        return None
+
+
+def decode_create(logs: List[str], signature: str, slot: int,
+                  program_id: str = LETSBONK_PROGRAM_ID) -> Optional[CreateEvent]:
+    """
+    CreateEvent if the LetsBonk program itself ran a create instruction. Logs are
+    attributed through the invoke stack, so e.g. the token program's own
+    'Instruction: InitializeMint2' underneath never counts.
+    """
+    stack: List[str] = []
+    event: Optional[CreateEvent] = None
+    for line in logs or ():
+        if line.startswith(('Program log: ', 'Program data: ')):
+            if not stack or stack[-1] != program_id:
+                continue
+            if line.startswith('Program log: Instruction: '):
+                instruction = line[len('Program log: Instruction: '):].strip()
+                if instruction in CREATE_INSTRUCTIONS and event is None:
+                    event = CreateEvent(signature, slot, instruction)
+            elif line.startswith('Program data: ') and event is not None and event.name is None:
+                params = decode_pool_create_event(line[len('Program data: '):].strip())
+                if params:
+                    for key, value in params.items():
+                        setattr(event, key, value)
+        elif line.startswith('Program ') and ' invoke [' in line:
+            stack.append(line.split(' ', 2)[1])
+        elif line.startswith('Program ') and (line.endswith(' success') or ' failed' in line):
+            if stack:
+                stack.pop()
+    return event
+
+
+class LetsBonkLogStream:
+    """logsSubscribe ingest with batched getTransaction for creates and reconnect gap-fill"""
+
+    def __init__(self, on_create: Callable[[CreateEvent, dict], None], api_key: Optional[str] = None,
+                 program_id: str = LETSBONK_PROGRAM_ID, ws_url: Optional[str] = None, http_url: Optional[str] = None,
+                 batch_size: int = 20, batch_window: float = 0.05, max_gap_signatures: int = 1000):
+        api_key = api_key or os.getenv("ALCHEMY_API_KEY")
+        self.on_create = on_create
+        self.program_id = program_id
+        # HTTP calls go through the shared RPC router; http_url only derives the websocket URL
+        self.http_url = http_url or os.getenv('SOLANA_RPC_URL') or f"https://solana-mainnet.g.alchemy.com/v2/{api_key}"
+        self.ws_url = ws_url or os.getenv('SOLANA_WS_URL') or self.http_url.replace('https://', 'wss://', 1)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_gap_signatures = max_gap_signatures
+
+        self.last_signature: Optional[str] = None  # Newest program signature seen (gap-fill anchor)
+        self.last_slot = 0
+        self.seen_signatures = TTLCache(maxsize=20000, ttl=900)   # Creates queued or emitted
+        self.observed_signatures = TTLCache(maxsize=50000, ttl=900)  # Every signature whose logs the stream delivered
+        self.pending: List[CreateEvent] = []
+        self.flush_task: Optional[asyncio.Task] = None
+        self.gap_task: Optional[asyncio.Task] = None
+        self.running = False
+        # Callbacks (DB writes, Discord) run off the websocket loop, one at a time and in order
+        self.handler_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="letsbonk-creates")
+
+        self.stats = {
+            'notifications': 0, 'failed_transactions': 0, 'creates': 0, 'decoded_events': 0,
+            'transactions_fetched': 0, 'transaction_batches': 0, 'transactions_missing': 0,
+            'emitted': 0, 'reconnects': 0, 'gap_fills': 0, 'gap_signatures': 0, 'gap_truncated': 0,
+            'gap_already_seen': 0
+        }
+
+    async def run(self):
+        """Stream forever, reconnecting with backoff (and gap-filling what the outage missed)"""
+        self.running = True
+        failures = 0
+        while self.running:
+            try:
+                await self._stream()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                logger.warning(f"⚠️ LetsBonk log stream disconnected: {e}")
+            if self.running:
+                self.stats['reconnects'] += 1
+                await asyncio.sleep(min(30, 2 ** min(failures, 5)))
+
+    def stop(self):
+        self.running = False
+
+    async def _stream(self):
+        async with websockets.connect(self.ws_url, ping_interval=20, max_size=None) as websocket:
+            await websocket.send(json.dumps({
+                "jsonrpc": "2.0", "id": 1, "method": "logsSubscribe",
+                "params": [{"mentions": [self.program_id]}, {"commitment": "confirmed"}]
+            }))
+            logger.info(f"📡 Subscribed to LetsBonk program logs ({self.program_id[:8]}...)")
+
+            if self.last_signature and (self.gap_task is None or self.gap_task.done()):
+                # Live notifications flow meanwhile; seen_signatures keeps the overlap from double-firing
+                self.gap_task = asyncio.create_task(self._gap_fill_safely(self.last_signature, self.last_slot))
+
+            async for message in websocket:
+                self._handle_message(message)
+
+    def _handle_message(self, message: str):
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        if data.get('method') != 'logsNotification':
+            if 'error' in data:
+                raise ConnectionError(f"logsSubscribe rejected: {data['error']}")
+            return
+
+        result = data.get('params', {}).get('result', {})
+        value = result.get('value') or {}
+        signature, slot = value.get('signature'), result.get('context', {}).get('slot', 0)
+        if not signature:
+            return
+        self.stats['notifications'] += 1
+        self.observed_signatures[signature] = True
+        if slot >= self.last_slot:
+            self.last_slot, self.last_signature = slot, signature
+        if value.get('err') is not None:
+            self.stats['failed_transactions'] += 1
+            return
+
+        event = decode_create(value.get('logs'), signature, slot, self.program_id)
+        if event:
+            self._queue(event)
+
+    def _queue(self, event: CreateEvent):
+        if event.signature in self.seen_signatures:
+            return
+        self.seen_signatures[event.signature] = True
+        self.stats['creates'] += 1
+        if event.name is not None:
+            self.stats['decoded_events'] += 1
+        logger.info(f"🆕 LetsBonk create in slot {event.slot}: {event.name or 'name pending'} ({event.signature[:10]}...)")
+
+        self.pending.append(event)
+        if len(self.pending) >= self.batch_size or self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush(0 if len(self.pending) >= self.batch_size
+                                                              else self.batch_window))
+
+    async def _flush(self, delay: float):
+        """Resolve queued creates - launches arriving within batch_window share one batched request"""
+        if delay:
+            await asyncio.sleep(delay)
+        while self.pending:
+            batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+            try:
+                await self._resolve(batch)
+            except Exception as e:
+                logger.error(f"❌ LetsBonk create resolution failed: {e}")
+
+    async def _resolve(self, events: List[CreateEvent], retry_missing: bool = True):
+        transactions = await self.get_transactions([event.signature for event in events])
+        missing = []
+        for event, transaction in zip(events, transactions):
+            if transaction is None:
+                missing.append(event)
+            else:
+                self._emit(event, transaction)
+        if missing and retry_missing:
+            # 'confirmed' logs can arrive a moment before the transaction is queryable
+            await asyncio.sleep(0.5)
+            await self._resolve(missing, retry_missing=False)
+        elif missing:
+            self.stats['transactions_missing'] += len(missing)
+            logger.warning(f"⚠️ {len(missing)} LetsBonk create transactions not available")
+
+    def _emit(self, event: CreateEvent, transaction: dict):
+        self.stats['emitted'] += 1
+
+        def deliver():
+            try:
+                self.on_create(event, transaction)
+            except Exception as e:
+                logger.error(f"❌ LetsBonk create handler error: {e}")
+        self.handler_executor.submit(deliver)
+
+    async def get_transactions(self, signatures: List[str],
+                               config: Optional[Dict[str, Any]] = None) -> List[Optional[dict]]:
+        """getTransaction for many signatures, batch_size at a time (the RPC router packs each into one batch)"""
+        config = config or TRANSACTION_CONFIG
+        transactions: List[Optional[dict]] = []
+        for start in range(0, len(signatures), self.batch_size):
+            chunk = signatures[start:start + self.batch_size]
+            self.stats['transaction_batches'] += 1
+            found = await get_rpc_router().call_many([
+                ("getTransaction", [signature, config]) for signature in chunk
+            ])
+            self.stats['transactions_fetched'] += sum(1 for transaction in found if transaction)
+            transactions.extend(found)
+        return transactions
+
+    async def _gap_fill_safely(self, until_signature: str, since_slot: int):
+        try:
+            await self.gap_fill(until_signature, since_slot)
+        except Exception as e:
+            logger.error(f"❌ LetsBonk gap-fill failed: {e}")
+
+    async def gap_fill(self, until_signature: str, since_slot: int) -> int:
+        """Replay program signatures newer than until_signature (bounded by max_gap_signatures)"""
+        signatures: List[Dict[str, Any]] = []
+        before = None
+        while len(signatures) < self.max_gap_signatures:
+            options = {"until": until_signature, "limit": 1000, "commitment": "confirmed"}
+            if before:
+                options["before"] = before
+            page = await get_rpc_router().call("getSignaturesForAddress", [self.program_id, options]) or []
+            signatures.extend(info for info in page if info.get('slot', 0) >= since_slot)
+            if len(page) < 1000 or page[-1].get('slot', 0) < since_slot:
+                break
+            before = page[-1]['signature']
+
+        if len(signatures) > self.max_gap_signatures:
+            self.stats['gap_truncated'] += len(signatures) - self.max_gap_signatures
+            logger.warning(f"⚠️ Gap-fill capped at {self.max_gap_signatures} of {len(signatures)} signatures")
+            signatures = signatures[:self.max_gap_signatures]  # Newest first - keep the freshest
+
+        # Failed transactions can't be creates; anything the stream delivered (before the drop or since
+        # the resubscribe) was already decoded from its logs - trades included
+        successful = [info['signature'] for info in reversed(signatures) if info.get('err') is None]
+        candidates = [signature for signature in successful
+                      if signature not in self.observed_signatures and signature not in self.seen_signatures]
+        self.stats['gap_fills'] += 1
+        self.stats['gap_signatures'] += len(candidates)
+        self.stats['gap_already_seen'] += len(successful) - len(candidates)
+        logger.info(f"🔁 Gap-fill: {len(candidates)} unseen LetsBonk signatures since slot {since_slot} "
+                    f"({len(successful) - len(candidates)} already streamed)")
+
+        # Signature listings carry no logs: read them from compact (base64) transactions, then queue only
+        # the creates - they are fetched parsed in batches exactly like live ones
+        recovered = 0
+        transactions = await self.get_transactions(candidates, LOGS_ONLY_CONFIG)
+        for signature, transaction in zip(candidates, transactions):
+            if not transaction:
+                continue
+            self.observed_signatures[signature] = True
+            event = decode_create((transaction.get('meta') or {}).get('logMessages'), signature,
+                                  transaction.get('slot', 0), self.program_id)
+            if event and signature not in self.seen_signatures:
+                recovered += 1
+                self._queue(event)
+        if recovered:
+            logger.info(f"✅ Gap-fill recovered {recovered} LetsBonk creates")
+        return recovered
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({'last_slot': self.last_slot, 'pending': len(self.pending), 'running': self.running})
+        return stats
@@ -11,6 +11,7 @@ from datetime import datetime
 from typing import List, Dict, Optional, Any
 import time
 import asyncio
+from db_pool import get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +28,7 @@ class LinkSniper:
     def init_database(self):
         """Initialize database tables for link sniper"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             # Create link_sniper_configs table
@@ -78,7 +79,7 @@ class LinkSniper:
     def load_link_configs(self):
         """Load active link configurations from database"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -128,7 +129,7 @@ class LinkSniper:
             # No default market cap limits - user must explicitly set them
             # max_market_cap remains None (no limit) unless user specifies otherwise
             
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -166,7 +167,7 @@ class LinkSniper:
             # Normalize the input URL for matching
             normalized_input = self._normalize_url(target_link)
             
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             # First, try exact match
@@ -220,7 +221,7 @@ class LinkSniper:
     def remove_multiple_link_configs(self, user_id: int, target_links: List[str]) -> tuple:
         """Remove multiple link sniper configurations using normalized URL matching"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             removed_links = []
@@ -289,7 +290,7 @@ class LinkSniper:
     def clear_user_link_configs(self, user_id: int) -> int:
         """Clear all link configurations for a user"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -319,7 +320,7 @@ class LinkSniper:
     def toggle_link_sniper(self, user_id: int, enabled: bool) -> bool:
         """Enable or disable all link sniper configs for a user"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -492,7 +493,7 @@ class LinkSniper:
                            error_message: str = "", buy_amount: float = 0.0):
         """Record link sniper attempt in database"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -518,7 +519,7 @@ class LinkSniper:
     def get_user_snipe_history(self, user_id: int, limit: int = 10) -> List[Dict]:
         """Get recent link sniper history for a user"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -618,7 +619,7 @@ class LinkSniper:
     def clear_user_links(self, user_id: int) -> bool:
         """Clear all link configurations for a user"""
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = get_connection(self.database_url)
             cursor = conn.cursor()
             
             cursor.execute("""
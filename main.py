@@ -12,15 +12,28 @@ import time
 import threading
 import psycopg2
 import os
-import requests
-import discord
-from discord.ext import commands
 from datetime import datetime
 import logging
-from flask import Flask, jsonify
-from waitress import serve
+from flask import Flask, jsonify, request
+from waitress import create_server
 from typing import Optional, Dict, List
 import difflib
+from keyword_index import CompiledKeywordIndex, STRICT
+from async_io_layer import get_http_client, DatabaseExecutorBridge, LoopLagMonitor
+from token_pipeline import TokenPipeline
+from db_pool import get_connection, get_pool, get_all_pool_stats
+from write_batcher import get_write_batcher
+from market_data_service import get_market_data_service
+from token_trade_state import TokenTradeStateTable, SolPriceTracker
+from seen_address_store import SeenAddressStore
+from server_dispatcher import ServerFanoutDispatcher
+from discord_webhook_client import get_discord_webhook_client
+from keyword_changes import KeywordChangeListener, keyword_checksum, normalize_keyword
+from recent_tokens import get_recent_token_feed, register_recent_token_routes
+from metrics import get_metrics_registry
+from ws_capture import CaptureWriter
+from token_tracing import trace_span, trace_mark, get_trace_recorder, slowest_traces_response
+from startup_orchestrator import get_startup_orchestrator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -37,7 +50,7 @@ class IntegratedTokenMonitor:
         # WebSocket setup
         self.websocket_url = "wss://pumpportal.fun/api/data"
         self.running = False
-        self.processed_tokens = set()
+        self.processed_tokens = SeenAddressStore()  # Fixed-memory dedupe (48h window)
         
         # Discord setup
         self.discord_token = os.getenv('DISCORD_TOKEN')
@@ -46,31 +59,56 @@ class IntegratedTokenMonitor:
         # Keywords cache
         self.user_keywords = {}
         self.last_keyword_refresh = 0
+        self.keyword_index = CompiledKeywordIndex(STRICT)
+        self.keyword_listener = None  # LISTEN/NOTIFY deltas (polling only while it is down)
+        self.keyword_preload = None  # Future from the startup 'keywords' phase, applied by the first refresh
         
-        # PumpPortal market data cache
-        self.token_market_cache = {}
+        # Per-server keywords/webhooks from the multi-server bots
+        self.server_dispatcher = ServerFanoutDispatcher(self, default_webhook_url=self.webhook_url or None)
+        
+        # PumpPortal market data cache (live trade state for keyword-matched tokens)
+        self.token_market_cache = TokenTradeStateTable()
+        self.sol_price = SolPriceTracker(get_http_client())
+        self.websocket = None
+        self.trade_state_task = None
+        # Record mode: raw frames + receive times for replay_benchmark.py
+        self.capture_path = os.getenv('PUMPPORTAL_CAPTURE_FILE', '')
+        self.capture = None
         self.pumpportal_api_key = os.getenv('PUMPPORTAL_API_KEY', '')
         
+        # Non-blocking I/O for the websocket loop
+        self.http = get_http_client()
+        self.db_bridge = DatabaseExecutorBridge(max_workers=4)
+        self.loop_lag = LoopLagMonitor()
+        self.write_batcher = get_write_batcher()
+        self.webhooks = get_discord_webhook_client()
+        
+        # Staged processing pipeline (created on the monitor's event loop)
+        self.pipeline = None
+        self.keyword_refresh_task = None
+        
         logger.info("🚀 Integrated Token Monitor initialized")
     
     def get_db_connection(self):
         """Get database connection"""
         try:
-            return psycopg2.connect(self.database_url)
+            return get_connection(self.database_url)
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             return None
     
-    def refresh_keywords(self):
-        """Refresh user keywords from database"""
+    def keywords_due_for_refresh(self) -> bool:
+        """Only refresh every 30 seconds to avoid database spam - never while change notifications keep the index current"""
+        if self.keyword_listener and self.keyword_listener.live:
+            return self.last_keyword_refresh == 0
+        return time.time() - self.last_keyword_refresh >= 30
+    
+    def load_keywords(self) -> Optional[Dict[str, List[str]]]:
+        """Load user keywords from database grouped by user (blocking)"""
         try:
-            # Only refresh every 30 seconds to avoid database spam
-            if time.time() - self.last_keyword_refresh < 30:
-                return
-            
             conn = self.get_db_connection()
             if not conn:
-                return
+                return None
             
             cursor = conn.cursor()
             cursor.execute("SELECT user_id, keyword FROM keywords WHERE user_id IS NOT NULL")
@@ -80,19 +118,108 @@ class IntegratedTokenMonitor:
             for user_id, keyword in cursor.fetchall():
                 if user_id not in new_keywords:
                     new_keywords[user_id] = []
-                new_keywords[user_id].append(keyword.lower().strip())
-            
-            self.user_keywords = new_keywords
-            self.last_keyword_refresh = time.time()
-            
-            total_keywords = sum(len(keywords) for keywords in new_keywords.values())
-            logger.info(f"🔄 Refreshed {total_keywords} keywords for {len(new_keywords)} users")
+                new_keywords[user_id].append(normalize_keyword(keyword))
             
             cursor.close()
             conn.close()
+            return new_keywords
             
         except Exception as e:
             logger.error(f"Failed to refresh keywords: {e}")
+            return None
+    
+    def apply_keywords(self, new_keywords: Dict[str, List[str]]):
+        """Swap in a freshly loaded keyword snapshot"""
+        self.user_keywords = new_keywords
+        self.keyword_index.sync(new_keywords)
+        self.last_keyword_refresh = time.time()
+        
+        total_keywords = sum(len(keywords) for keywords in new_keywords.values())
+        logger.info(f"🔄 Refreshed {total_keywords} keywords for {len(new_keywords)} users")
+    
+    def start_keyword_listener(self):
+        """Apply keyword changes as they are committed instead of polling (runs on the monitor loop)"""
+        if self.keyword_listener is None and self.database_url:
+            self.keyword_listener = KeywordChangeListener(
+                self.database_url, asyncio.get_running_loop(),
+                on_change=self.apply_keyword_change,
+                on_resync=self.request_keyword_resync,
+                on_checksum=self.reconcile_keywords
+            )
+            self.keyword_listener.start()
+    
+    def apply_keyword_change(self, change: Dict):
+        """Apply one trigger payload to the in-memory keywords (no table read)"""
+        table = change.get('table')
+        if change.get('op') == 'TRUNCATE':
+            self.request_keyword_resync(f'{table} truncated')
+            return
+        if table in ('server_keywords', 'server_webhooks'):
+            self.server_dispatcher.apply_change(change)
+            return
+        if table != 'keywords':
+            return
+        
+        # Mutated in place so check_keyword_matches' ensure_synced sees the same mapping
+        old, new = change.get('old'), change.get('new')
+        if old and old.get('user_id') is not None and old.get('keyword'):
+            keyword = normalize_keyword(old['keyword'])
+            keywords = self.user_keywords.get(old['user_id'])
+            if keywords and keyword in keywords:
+                keywords.remove(keyword)
+                if not keywords:
+                    del self.user_keywords[old['user_id']]
+                self.keyword_index.remove_keyword(old['user_id'], keyword)
+        if new and new.get('user_id') is not None and new.get('keyword'):
+            keyword = normalize_keyword(new['keyword'])
+            self.user_keywords.setdefault(new['user_id'], []).append(keyword)
+            self.keyword_index.add_keyword(new['user_id'], keyword)
+            logger.info(f"⚡ Keyword '{keyword}' live for user {new['user_id']}")
+    
+    def request_keyword_resync(self, reason: str):
+        """Full reload on the next opportunity (listener (re)connected or checksum mismatch)"""
+        logger.info(f"🔄 Keyword resync requested: {reason}")
+        self.last_keyword_refresh = 0
+        self.schedule_keyword_refresh()
+    
+    def reconcile_keywords(self, checksums: Dict):
+        """Compare database checksums with the in-memory keywords; resync on drift"""
+        local = {
+            'keywords': keyword_checksum((user_id, keyword) for user_id, keywords in self.user_keywords.items()
+                                         for keyword in keywords),
+            'server_keywords': self.server_dispatcher.checksum()
+        }
+        drifted = [table for table, remote in checksums.items() if tuple(remote) != local.get(table)]
+        if drifted:
+            self.request_keyword_resync(f"checksum mismatch in {', '.join(drifted)}")
+    
+    def refresh_keywords(self):
+        """Refresh user keywords from database"""
+        if not self.keywords_due_for_refresh():
+            return
+        
+        new_keywords = self.load_keywords()
+        if new_keywords is not None:
+            self.apply_keywords(new_keywords)
+        self.server_dispatcher.refresh()
+    
+    async def refresh_keywords_async(self):
+        """Refresh user keywords without blocking the event loop (query runs on the DB bridge)"""
+        if not self.keywords_due_for_refresh():
+            return
+        
+        preload, self.keyword_preload = self.keyword_preload, None
+        new_keywords = None
+        if preload is not None:
+            try:
+                new_keywords = await asyncio.wrap_future(preload)
+            except Exception:
+                pass  # Phase failure is on the startup timeline; fall back to a normal load
+        if new_keywords is None:
+            new_keywords = await self.db_bridge.run(self.load_keywords)
+        if new_keywords is not None:
+            self.apply_keywords(new_keywords)
+        await self.server_dispatcher.refresh_async(self.db_bridge)
     
     def check_keyword_matches(self, token_name: str, token_address: str) -> List[Dict]:
         """Check if token matches any user keywords + special LetsBonk detection"""
@@ -105,19 +232,17 @@ class IntegratedTokenMonitor:
         # Detect platform type
         platform = self.detect_platform(token_address)
         
-        # Check user keywords
-        for user_id, user_keywords in self.user_keywords.items():
-            for keyword in user_keywords:
-                # Enhanced matching logic
-                if self.is_keyword_match(token_name_lower, keyword):
-                    matches.append({
-                        'user_id': user_id,
-                        'keyword': keyword,
-                        'token_name': token_name,
-                        'token_address': token_address,
-                        'match_type': self.get_match_type(token_name_lower, keyword),
-                        'platform': platform
-                    })
+        # Check user keywords - single pass over the compiled index (same rules as is_keyword_match)
+        self.keyword_index.ensure_synced(self.user_keywords)
+        for user_id, keyword, match_type in self.keyword_index.match(token_name_lower):
+            matches.append({
+                'user_id': user_id,
+                'keyword': keyword,
+                'token_name': token_name,
+                'token_address': token_address,
+                'match_type': match_type,
+                'platform': platform
+            })
         
         # STRICT KEYWORD MATCHING ONLY - No auto-notifications to prevent spam
         
@@ -228,116 +353,33 @@ class IntegratedTokenMonitor:
         else:
             return "fuzzy"
     
-    async def send_discord_notification(self, match_info: Dict):
+    async def send_discord_notification(self, match_info: Dict, market_data: Optional[Dict] = None):
         """Send Discord notification for keyword match with ENHANCED FORMAT + LetsBonk highlighting"""
         try:
-            # Get market data
-            market_data = await self.get_market_data(match_info['token_address'])
-            
-            # Detect platform and customize notification
-            platform = match_info.get('platform', self.detect_platform(match_info['token_address']))
-            is_letsbonk = platform == 'LetsBonk'
-            
-            # Customize title and color based on platform
-            if is_letsbonk:
-                title = '🟠 NEW LETSBONK TOKEN DETECTED'
-                color = 0xff6b35  # Orange for LetsBonk
-                platform_emoji = '🟠'
-            else:
-                title = '🚨 NEW TOKEN DETECTED'
-                color = 0x00ff41  # Green for others
-                platform_emoji = '🔵' if platform == 'Pump.fun' else '⚪'
-            
-            # Create ENHANCED rich embed with MOBILE COPY OPTIMIZED formatting
-            embed = {
-                'title': title,
-                'description': f'**{match_info["token_name"]}** matches your keyword: `{match_info["keyword"]}`\n\n`{match_info["token_address"]}`',
-                'color': color,
-                'fields': [
-                    {
-                        'name': '📊 Token Info',
-                        'value': f'**Name:** {match_info["token_name"]}\n**Platform:** {platform_emoji} {platform}\n**Keyword:** {match_info["keyword"]}\n**Match:** {match_info["match_type"].capitalize()}',
-                        'inline': True
-                    }
-                ],
-                'timestamp': datetime.now().isoformat(),
-                'footer': {
-                    'text': f'⚡ Real-time {platform} monitoring • Keyword match alert'
-                }
-            }
-            
-            # ENHANCED Market data with MARKET CAP prominently displayed first
-            market_value = ""
-            data_source = market_data.get('source', 'DexScreener') if market_data and not market_data.get('status') else ''
-            
-            if market_data and not market_data.get('status'):
-                # ALWAYS show market cap first - most important metric
-                if market_data.get('market_cap') and market_data['market_cap'] > 0:
-                    mc = market_data['market_cap']
-                    if mc >= 1_000_000:
-                        market_value += f"💰 **MARKET CAP: ${mc/1_000_000:.2f}M**\n"
-                    elif mc >= 1_000:
-                        market_value += f"💰 **MARKET CAP: ${mc/1_000:.1f}K**\n"
-                    else:
-                        market_value += f"💰 **MARKET CAP: ${mc:.2f}**\n"
-                else:
-                    market_value += f"💰 **MARKET CAP:** ${market_data.get('market_cap', 0):.0f}\n"
+            with trace_span('send_discord_notification', user_id=str(match_info['user_id'])) as span:
+                # Get market data (the pipeline's enrich stage normally supplies it)
+                if market_data is None:
+                    market_data = await self.get_market_data(match_info['token_address'])
                 
-                if market_data.get('price'):
-                    market_value += f"💵 **Price:** ${market_data['price']:.8f}\n"
-                if market_data.get('volume_24h'):
-                    vol = market_data['volume_24h']
-                    if vol >= 1_000_000:
-                        market_value += f"📊 **24h Volume:** ${vol/1_000_000:.1f}M"
-                    elif vol >= 1_000:
-                        market_value += f"📊 **24h Volume:** ${vol/1_000:.0f}K"
-                    else:
-                        market_value += f"📊 **24h Volume:** ${vol:,.0f}"
+                platform = match_info.get('platform', self.detect_platform(match_info['token_address']))
+                embed = self.build_token_embed(
+                    match_info['token_name'], match_info['token_address'], platform, market_data,
+                    description=f'**{match_info["token_name"]}** matches your keyword: `{match_info["keyword"]}`',
+                    match_lines=f'**Keyword:** {match_info["keyword"]}\n**Match:** {match_info["match_type"].capitalize()}'
+                )
                 
-                # Add data source attribution
-                if data_source:
-                    market_value += f"\n📈 **Source:** {data_source}"
-                    
-            elif market_data and market_data.get('status') == 'too_new':
-                market_value = "💰 **MARKET CAP:** Just launched!\n💵 **Price:** Trading starting...\n📊 **Volume:** Fresh token - check PumpFun\n🚀 **Source:** PumpFun Launch"
-            else:
-                market_value = "💰 **MARKET CAP:** Loading...\n💵 **Price:** Fetching...\n📊 **Volume:** Please wait"
-            
-            # Always show market data field with market cap prominently displayed
-            embed['fields'].append({
-                'name': '💰 Live Market Data',
-                'value': market_value,
-                'inline': True
-            })
-            
-            # Platform info field
-            embed['fields'].append({
-                'name': '🚀 Platform',
-                'value': "**Source:** PumpFun\n**Network:** Solana",
-                'inline': True
-            })
-            
-            # Trading links field with enhanced copy functionality
-            links_text = f"[🚀 Trade on PumpFun](https://pump.fun/{match_info['token_address']})\n"
-            links_text += f"[📊 DexScreener](https://dexscreener.com/solana/{match_info['token_address']})\n"
-            links_text += f"[🔍 SolScan](https://solscan.io/token/{match_info['token_address']})\n"
-            links_text += f"[📋 Copy Address](https://solscan.io/token/{match_info['token_address']})"
-            
-            embed['fields'].append({
-                'name': '🔗 Trading Links',
-                'value': links_text,
-                'inline': False
-            })
-            
-            # Send notification
-            payload = {
-                'content': f'<@{match_info["user_id"]}>',  # Mention user
-                'embeds': [embed]
-            }
-            
-            response = requests.post(self.webhook_url, json=payload, timeout=10)
+                # Send notification
+                payload = {
+                    'content': f'<@{match_info["user_id"]}>',  # Mention user
+                    'embeds': [embed]
+                }
+                
+                # Per-webhook queue: honours Discord rate-limit buckets and retries 429s
+                delivered = await self.webhooks.send(self.webhook_url, payload)
+                span.set(delivered=delivered)
             
-            if response.status_code == 200 or response.status_code == 204:
+            if delivered:
+                trace_mark('discord_accepted')
                 logger.info(f"✅ ENHANCED Discord notification sent to user {match_info['user_id']}")
                 
                 # Record notification in database
@@ -345,26 +387,118 @@ class IntegratedTokenMonitor:
                 
                 return True
             else:
-                logger.error(f"Discord notification failed: {response.status_code}")
+                logger.error(f"Discord notification failed for user {match_info['user_id']}")
                 return False
                 
         except Exception as e:
             logger.error(f"Failed to send Discord notification: {e}")
             return False
     
+    def build_token_embed(self, token_name: str, token_address: str, platform: str, market_data: Optional[Dict],
+                          description: str, match_lines: str = '') -> Dict:
+        """Rich token embed (market data, platform, trading links) shared by every notification path"""
+        is_letsbonk = platform == 'LetsBonk'
+        
+        # Customize title and color based on platform
+        if is_letsbonk:
+            title = '🟠 NEW LETSBONK TOKEN DETECTED'
+            color = 0xff6b35  # Orange for LetsBonk
+            platform_emoji = '🟠'
+        else:
+            title = '🚨 NEW TOKEN DETECTED'
+            color = 0x00ff41  # Green for others
+            platform_emoji = '🔵' if platform == 'Pump.fun' else '⚪'
+        
+        # Create ENHANCED rich embed with MOBILE COPY OPTIMIZED formatting
+        token_info = f'**Name:** {token_name}\n**Platform:** {platform_emoji} {platform}'
+        if match_lines:
+            token_info += f'\n{match_lines}'
+        embed = {
+            'title': title,
+            'description': f'{description}\n\n`{token_address}`',
+            'color': color,
+            'fields': [
+                {
+                    'name': '📊 Token Info',
+                    'value': token_info,
+                    'inline': True
+                }
+            ],
+            'timestamp': datetime.now().isoformat(),
+            'footer': {
+                'text': f'⚡ Real-time {platform} monitoring • Keyword match alert'
+            }
+        }
+        
+        # ENHANCED Market data with MARKET CAP prominently displayed first
+        market_value = ""
+        data_source = market_data.get('source', 'DexScreener') if market_data and not market_data.get('status') else ''
+        
+        if market_data and not market_data.get('status'):
+            # ALWAYS show market cap first - most important metric
+            if market_data.get('market_cap') and market_data['market_cap'] > 0:
+                mc = market_data['market_cap']
+                if mc >= 1_000_000:
+                    market_value += f"💰 **MARKET CAP: ${mc/1_000_000:.2f}M**\n"
+                elif mc >= 1_000:
+                    market_value += f"💰 **MARKET CAP: ${mc/1_000:.1f}K**\n"
+                else:
+                    market_value += f"💰 **MARKET CAP: ${mc:.2f}**\n"
+            else:
+                market_value += f"💰 **MARKET CAP:** ${market_data.get('market_cap', 0):.0f}\n"
+            
+            if market_data.get('price'):
+                market_value += f"💵 **Price:** ${market_data['price']:.8f}\n"
+            if market_data.get('volume_24h'):
+                vol = market_data['volume_24h']
+                if vol >= 1_000_000:
+                    market_value += f"📊 **24h Volume:** ${vol/1_000_000:.1f}M"
+                elif vol >= 1_000:
+                    market_value += f"📊 **24h Volume:** ${vol/1_000:.0f}K"
+                else:
+                    market_value += f"📊 **24h Volume:** ${vol:,.0f}"
+            
+            # Add data source attribution
+            if data_source:
+                market_value += f"\n📈 **Source:** {data_source}"
+                
+        elif market_data and market_data.get('status') == 'too_new':
+            market_value = "💰 **MARKET CAP:** Just launched!\n💵 **Price:** Trading starting...\n📊 **Volume:** Fresh token - check PumpFun\n🚀 **Source:** PumpFun Launch"
+        else:
+            market_value = "💰 **MARKET CAP:** Loading...\n💵 **Price:** Fetching...\n📊 **Volume:** Please wait"
+        
+        # Always show market data field with market cap prominently displayed
+        embed['fields'].append({
+            'name': '💰 Live Market Data',
+            'value': market_value,
+            'inline': True
+        })
+        
+        # Platform info field
+        embed['fields'].append({
+            'name': '🚀 Platform',
+            'value': "**Source:** PumpFun\n**Network:** Solana",
+            'inline': True
+        })
+        
+        # Trading links field with enhanced copy functionality
+        links_text = f"[🚀 Trade on PumpFun](https://pump.fun/{token_address})\n"
+        links_text += f"[📊 DexScreener](https://dexscreener.com/solana/{token_address})\n"
+        links_text += f"[🔍 SolScan](https://solscan.io/token/{token_address})\n"
+        links_text += f"[📋 Copy Address](https://solscan.io/token/{token_address})"
+        
+        embed['fields'].append({
+            'name': '🔗 Trading Links',
+            'value': links_text,
+            'inline': False
+        })
+        
+        return embed
+    
     async def record_notification(self, match_info: Dict):
-        """Record notification in database"""
+        """Record notification in database (write-behind, flushed in batches)"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return
-            
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO notified_tokens (token_address, token_name, matched_keyword, user_id, notified_at, notification_type)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (token_address, user_id, matched_keyword) DO NOTHING
-            """, (
+            self.write_batcher.add('notified_tokens', (
                 match_info['token_address'],
                 match_info['token_name'],
                 match_info['keyword'],
@@ -372,121 +506,76 @@ class IntegratedTokenMonitor:
                 datetime.now(),
                 'keyword_match'
             ))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
+            # Only an in-memory enqueue: the commit happens on the batcher's flush, after the trace is done
+            trace_mark('notification_enqueued')
         except Exception as e:
             logger.error(f"Failed to record notification: {e}")
     
     async def get_market_data(self, token_address: str, retry_delay: int = 0) -> Dict:
-        """Get market data from PumpPortal first, then fallback to DexScreener"""
-        import time
-        
+        """Get market data from the PumpPortal websocket cache, then the shared market data service"""
         if retry_delay > 0:
             logger.info(f"⏱️ Waiting {retry_delay} seconds before retry for {token_address[:10]}...")
-            time.sleep(retry_delay)
+            await asyncio.sleep(retry_delay)
         
-        # Try PumpPortal first (best for new tokens)
+        # PumpPortal websocket data first (best for new tokens, no network round trip)
         pumpportal_data = await self.get_pumpportal_data(token_address)
         if pumpportal_data and not pumpportal_data.get('status'):
             logger.info(f"✅ Got PumpPortal data for {token_address[:10]}...")
             return pumpportal_data
         
-        # Fallback to DexScreener
-        try:
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            logger.info(f"📊 Fetching DexScreener data for {token_address[:10]}...")
-            
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                pairs = data.get('pairs') if data else None
-                
-                if pairs and len(pairs) > 0:
-                    logger.info(f"📊 Found {len(pairs)} pairs for {token_address[:10]}...")
-                    
-                    # Get the pair with highest liquidity (or first if no liquidity data)
-                    try:
-                        best_pair = max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0)) if x.get('liquidity') else 0)
-                    except:
-                        best_pair = pairs[0]
-                    
-                    market_data = {
-                        'price': float(best_pair.get('priceUsd', 0)),
-                        'market_cap': float(best_pair.get('marketCap', 0)),
-                        'volume_24h': float(best_pair.get('volume', {}).get('h24', 0)),
-                        'liquidity': float(best_pair.get('liquidity', {}).get('usd', 0)),
-                        'price_change_24h': float(best_pair.get('priceChange', {}).get('h24', 0)),
-                        'source': 'DexScreener'
-                    }
-                    
-                    logger.info(f"✅ DexScreener data loaded: MC=${market_data['market_cap']:.0f}, Price=${market_data['price']:.8f}")
-                    return market_data
-                else:
-                    logger.warning(f"⚠️ No pairs found on DexScreener for {token_address[:10]}...")
-                    return {'status': 'too_new'}
-            else:
-                logger.warning(f"⚠️ DexScreener API error {response.status_code} for {token_address[:10]}...")
-                return {'status': 'api_error'}
-                
-        except Exception as e:
-            logger.warning(f"❌ Market data fetch failed for {token_address[:10]}...: {e}")
-            return {'status': 'fetch_error'}
-        
-        return {'status': 'unknown_error'}
+        # Cached, single-flight, hedged DexScreener / pump.fun lookup
+        logger.info(f"📊 Fetching market data for {token_address[:10]}...")
+        with trace_span('market_data', source='service') as span:
+            market_data = await get_market_data_service().get(token_address)
+            span.set(status=market_data.get('status') or 'ok')
+        if market_data.get('status'):
+            logger.warning(f"⚠️ No market data for {token_address[:10]}... ({market_data['status']})")
+        return market_data
     
     async def get_pumpportal_data(self, token_address: str) -> Dict:
-        """Get market data from PumpPortal WebSocket cache or try pump.fun API"""
-        
-        # First check if we have cached WebSocket data for this token
+        """Get market data from the PumpPortal WebSocket cache"""
         cached_data = self.get_cached_token_data(token_address)
         if cached_data:
             logger.info(f"✅ Using cached PumpPortal data for {token_address[:10]}...")
             return cached_data
         
-        # Try alternative pump.fun endpoints
-        endpoints = [
-            f"https://pump.fun/coin/{token_address}",
-            f"https://api.pump.fun/coins/{token_address}",
-            f"https://pump.fun/api/tokens/{token_address}"
-        ]
-        
-        for endpoint in endpoints:
-            try:
-                logger.info(f"🚀 Trying endpoint for {token_address[:10]}...")
-                response = requests.get(endpoint, timeout=8, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                
-                if response.status_code == 200:
-                    # Try to extract any market data from the response
-                    content = response.text
-                    if 'market_cap' in content or 'marketCap' in content:
-                        logger.info(f"✅ Found market data in response for {token_address[:10]}")
-                        # Would need to parse HTML/JSON for actual data
-                        # For now, return status to indicate we should use DexScreener
-                        return {'status': 'found_but_parsing_needed'}
-                        
-            except Exception as e:
-                logger.debug(f"Endpoint failed: {e}")
-                continue
-        
+        # pump.fun HTTP endpoints are probed by the market data service (in parallel, behind a circuit breaker)
         return {'status': 'no_data'}
     
     def get_cached_token_data(self, token_address: str) -> Optional[Dict]:
         """Get cached token data from WebSocket events"""
-        # Check if we have cached market data for this token
-        if token_address in self.token_market_cache:
-            cached_data = self.token_market_cache[token_address]
-            # Return cached data if it's less than 30 seconds old
-            if time.time() - cached_data.get('timestamp', 0) < 30:
-                return cached_data
-        
-        # No valid cached data available
-        return None
+        # Live only while the trade subscription is up - otherwise the state may be stale
+        if self.websocket is None:
+            return None
+        return self.token_market_cache.get_market_data(token_address, self.sol_price.usd)
+    
+    async def watch_token_trades(self, token_address: str, create_event: Optional[Dict] = None):
+        """Track a matched token's trades so its market data is rendered locally"""
+        if not self.token_market_cache.watch(token_address, create_event):
+            return
+        if self.websocket is not None:
+            try:
+                await self.websocket.send(json.dumps({"method": "subscribeTokenTrade", "keys": [token_address]}))
+                logger.info(f"📈 Subscribed to trades for {token_address[:10]}...")
+            except Exception as e:
+                logger.warning(f"⚠️ Trade subscription failed for {token_address[:10]}...: {e}")
+    
+    async def maintain_trade_state(self, interval: float = 30):
+        """Refresh the SOL reference price and unsubscribe tokens that left the watch window"""
+        while True:
+            try:
+                if self.sol_price.due():
+                    await self.sol_price.refresh()
+                
+                expired = self.token_market_cache.expire()
+                if expired and self.websocket is not None:
+                    await self.websocket.send(json.dumps({"method": "unsubscribeTokenTrade", "keys": expired}))
+                    logger.info(f"📉 Unsubscribed from trades for {len(expired)} tokens")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Trade state maintenance error: {e}")
+            await asyncio.sleep(interval)
     
     def format_market_cap(self, market_cap: float) -> str:
         """Format market cap for display"""
@@ -497,83 +586,102 @@ class IntegratedTokenMonitor:
         else:
             return f"${market_cap:.0f}"
     
+    async def ensure_pipeline(self) -> TokenPipeline:
+        """Create and start the staged pipeline on the running loop (once)"""
+        if self.pipeline is None:
+            self.pipeline = TokenPipeline(self)
+        if not self.pipeline.running:
+            await self.refresh_keywords_async()
+            self.start_keyword_listener()
+            await self.pipeline.start()
+        return self.pipeline
+    
+    def schedule_keyword_refresh(self):
+        """Refresh keywords in the background so matching never waits on the database"""
+        if not self.keywords_due_for_refresh():
+            return
+        if self.keyword_refresh_task is None or self.keyword_refresh_task.done():
+            self.keyword_refresh_task = asyncio.create_task(self.refresh_keywords_async())
+    
     async def connect_and_monitor(self):
         """Connect to PumpPortal and monitor for tokens"""
         try:
             logger.info(f"🔗 Connecting to {self.websocket_url}")
             
+            # Lag ticker runs on the same loop as the websocket reader
+            self.loop_lag.start()
+            pipeline = await self.ensure_pipeline()
+            if self.trade_state_task is None or self.trade_state_task.done():
+                self.trade_state_task = asyncio.create_task(self.maintain_trade_state())
+            
+            startup = get_startup_orchestrator()
+            startup.begin('websocket')
             async with websockets.connect(self.websocket_url) as websocket:
                 self.running = True
                 logger.info("✅ Connected to PumpPortal")
+                startup.ready('websocket', detail=self.websocket_url)
                 
                 # Subscribe to new token events
                 subscribe_message = json.dumps({"method": "subscribeNewToken"})
                 await websocket.send(subscribe_message)
                 logger.info("📡 Subscribed to new token events")
                 
-                # Listen for messages
+                # Re-subscribe to trades for tokens still being watched (after a reconnect)
+                watched = self.token_market_cache.addresses()
+                if watched:
+                    await websocket.send(json.dumps({"method": "subscribeTokenTrade", "keys": watched}))
+                    logger.info(f"📈 Re-subscribed to trades for {len(watched)} tokens")
+                self.websocket = websocket
+                if self.capture_path and self.capture is None:
+                    self.capture = CaptureWriter(self.capture_path)
+                
+                # Listen for messages - the reader only hands frames to the pipeline
                 async for message in websocket:
+                    received_at = time.time()
+                    if self.capture:
+                        self.capture.write(received_at, message)
                     try:
-                        data = json.loads(message)
-                        await self.process_token_data(data)
-                        
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON: {message[:100]}")
+                        await pipeline.submit_frame(message, received_at)
                     except Exception as e:
                         logger.error(f"Message processing error: {e}")
         
         except Exception as e:
             logger.error(f"WebSocket connection error: {e}")
             self.running = False
+        finally:
+            self.websocket = None
+            if self.capture:
+                # Close the gzip member; the next connection appends a new one to the same file
+                self.capture.close()
+                self.capture = None
     
     async def process_token_data(self, data):
-        """Process incoming token data and check for notifications"""
+        """Process incoming token data and check for notifications (via the staged pipeline)"""
         try:
-            # Check for new token events
-            if data.get('type') == 'new_token' or 'mint' in data:
-                token_address = data.get('mint') or data.get('address')
-                token_name = data.get('name', 'Unknown')
-                token_symbol = data.get('symbol', '')
-                
-                if token_address and token_address not in self.processed_tokens:
-                    self.processed_tokens.add(token_address)
-                    
-                    logger.info(f"🆕 New token: {token_name} ({token_symbol}) - {token_address}")
-                    
-                    # Enhanced name resolution
-                    enhanced_name = await self.enhance_token_name(token_address, token_name)
-                    
-                    # Insert to database
-                    await self.insert_token_to_database(token_address, enhanced_name, token_symbol)
-                    
-                    # Refresh keywords periodically
-                    self.refresh_keywords()
-                    
-                    # Check for keyword matches and send notifications
-                    matches = self.check_keyword_matches(enhanced_name, token_address)
-                    
-                    if matches:
-                        logger.info(f"🎯 STRICT MATCH: Found {len(matches)} keyword matches for '{enhanced_name}'")
-                        
-                        # Log each match for debugging
-                        for match in matches:
-                            logger.info(f"✅ MATCH DETAILS: Token='{match['token_name']}' | Keyword='{match['keyword']}' | Type={match['match_type']}")
-                            await self.send_discord_notification(match)
-                    
+            # The token's trace starts here (received_at); the pipeline carries it to notification
+            received_at = time.time()
+            pipeline = await self.ensure_pipeline()
+            await pipeline.submit_event(data, received_at)
         except Exception as e:
             logger.error(f"Token processing error: {e}")
     
+    def has_usable_name(self, name) -> bool:
+        """Whether the websocket name can be matched as-is (no DexScreener lookup needed)"""
+        return bool(name) and name != 'Unknown' and not name.startswith('Unnamed')
+    
     async def enhance_token_name(self, address, raw_name):
         """Enhance token name using DexScreener"""
         try:
-            if raw_name and raw_name != 'Unknown' and not raw_name.startswith('Unnamed'):
+            if self.has_usable_name(raw_name):
                 return raw_name
             
             # Fallback to DexScreener
             url = f"https://api.dexscreener.com/latest/dex/tokens/{address}"
-            response = requests.get(url, timeout=5)
+            with trace_span('enhance_token_name', source='dexscreener') as span:
+                response = await self.http.get(url, timeout=5)
+                span.set(status=response.status)
             
-            if response.status_code == 200:
+            if response.status == 200:
                 data = response.json()
                 pairs = data.get('pairs', [])
                 
@@ -589,39 +697,20 @@ class IntegratedTokenMonitor:
         return raw_name
     
     async def insert_token_to_database(self, address, name, symbol):
-        """Insert token to database with platform detection"""
+        """Insert token to database with platform detection (write-behind, flushed in batches)"""
         try:
-            conn = self.get_db_connection()
-            if not conn:
-                return
-            
-            cursor = conn.cursor()
             platform = self.detect_platform(address)
             
             # Determine which table based on name quality
             if self.is_valid_token_name(name):
-                cursor.execute("""
-                    INSERT INTO detected_tokens (address, name, symbol, created_at, name_status, status, data_source, platform)
-                    VALUES (%s, %s, %s, %s, 'resolved', 'detected', 'pumpportal', %s)
-                    ON CONFLICT (address) DO NOTHING
-                """, (address, name, symbol, datetime.now(), platform))
-                
-                if cursor.rowcount > 0:
-                    platform_emoji = "🟠" if platform == "LetsBonk" else "🔵" if platform == "Pump.fun" else "⚪"
-                    logger.info(f"✅ Added to detected_tokens: {name} {platform_emoji}")
+                created_at = datetime.now()
+                self.write_batcher.add('detected_tokens', (address, name, symbol, created_at, platform))
+                get_recent_token_feed().add(address, name, symbol, platform, created_at)
+                platform_emoji = "🟠" if platform == "LetsBonk" else "🔵" if platform == "Pump.fun" else "⚪"
+                logger.info(f"✅ Queued for detected_tokens: {name} {platform_emoji}")
             else:
-                cursor.execute("""
-                    INSERT INTO fallback_processing_coins (contract_address, token_name, symbol, created_at, processing_status, platform)
-                    VALUES (%s, %s, %s, %s, 'pending', %s)
-                    ON CONFLICT (contract_address) DO NOTHING
-                """, (address, name, symbol, datetime.now(), platform))
-                
-                if cursor.rowcount > 0:
-                    logger.info(f"📦 Added to fallback: {name}")
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
+                self.write_batcher.add('fallback_processing_coins', (address, name, symbol, datetime.now(), platform))
+                logger.info(f"📦 Queued for fallback: {name}")
             
         except Exception as e:
             logger.error(f"Database error: {e}")
@@ -775,30 +864,70 @@ class IntegratedServer:
         </div>
         <div id="loading" class="loading">Loading recent tokens...</div>
         <div id="tokens-container"></div>
+        <button id="load-more" class="copy-btn" style="display: none;" onclick="loadTokens()">⬇️ Load older tokens</button>
     </div>
     <script>
+        let nextCursor = null;
+        
+        function renderTokens(tokens, prepend) {
+            const container = document.getElementById('tokens-container');
+            const empty = document.getElementById('no-tokens');
+            if (empty && tokens.length) empty.remove();
+            tokens.forEach(token => {
+                if (document.getElementById('token-' + token.address)) return;
+                const tokenCard = createTokenCard(token);
+                tokenCard.id = 'token-' + token.address;
+                if (prepend) {
+                    container.insertBefore(tokenCard, container.firstChild);
+                } else {
+                    container.appendChild(tokenCard);
+                }
+            });
+        }
+        
         async function loadTokens() {
             try {
-                const response = await fetch('/api/recent-tokens');
+                // First page from the server's ring buffer, older pages via the keyset cursor
+                const url = nextCursor ? '/api/recent-tokens?before=' + encodeURIComponent(nextCursor) : '/api/recent-tokens';
+                const response = await fetch(url);
                 const data = await response.json();
                 const container = document.getElementById('tokens-container');
                 const loading = document.getElementById('loading');
                 
                 loading.style.display = 'none';
                 
-                if (data.tokens && data.tokens.length > 0) {
-                    data.tokens.forEach(token => {
-                        const tokenCard = createTokenCard(token);
-                        container.appendChild(tokenCard);
-                    });
-                } else {
-                    container.innerHTML = '<p>No recent tokens found</p>';
+                renderTokens(data.tokens || [], false);
+                nextCursor = data.next_cursor;
+                document.getElementById('load-more').style.display = nextCursor ? 'block' : 'none';
+                if (!container.children.length) {
+                    container.innerHTML = '<p id="no-tokens">No recent tokens found</p>';
                 }
             } catch (error) {
                 document.getElementById('loading').textContent = 'Error loading tokens';
             }
         }
         
+        async function refreshLatest() {
+            // Polling fallback for browsers without EventSource (ETag makes unchanged polls cheap)
+            const response = await fetch('/api/recent-tokens');
+            const data = await response.json();
+            renderTokens((data.tokens || []).reverse(), true);
+        }
+        
+        function streamTokens() {
+            if (!window.EventSource) {
+                setInterval(refreshLatest, 30000);
+                return;
+            }
+            // New tokens are pushed by the server; EventSource reconnects with Last-Event-ID
+            const source = new EventSource('/api/recent-tokens/stream');
+            source.addEventListener('token', event => renderTokens([JSON.parse(event.data)], true));
+            source.onerror = () => {
+                // Stream refused (server at its stream cap) - fall back to polling
+                if (source.readyState === EventSource.CLOSED) setInterval(refreshLatest, 30000);
+            };
+        }
+        
         function createTokenCard(token) {
             const card = document.createElement('div');
             card.className = 'token-card';
@@ -876,48 +1005,20 @@ class IntegratedServer:
             }
         }
         
-        document.addEventListener('DOMContentLoaded', loadTokens);
-        setInterval(loadTokens, 30000);
+        document.addEventListener('DOMContentLoaded', () => {
+            loadTokens();
+            streamTokens();
+        });
     </script>
 </body>
 </html>'''
         
-        @self.app.route('/api/recent-tokens')
-        def get_recent_tokens():
-            """API endpoint for recent tokens"""
-            try:
-                conn = self.monitor.get_db_connection()
-                if not conn:
-                    return jsonify({'error': 'Database connection failed'}), 500
-                
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT token_name, token_address, symbol, platform, created_at
-                    FROM detected_tokens 
-                    WHERE token_name IS NOT NULL 
-                    AND token_name != 'Unnamed Token'
-                    AND token_address IS NOT NULL
-                    ORDER BY created_at DESC 
-                    LIMIT 25
-                """)
-                
-                tokens = []
-                for row in cursor.fetchall():
-                    tokens.append({
-                        'name': row[0],
-                        'address': row[1],
-                        'symbol': row[2] or 'UNK',
-                        'platform': self.monitor.detect_platform(row[1]),
-                        'created_at': row[4].isoformat() if row[4] else None
-                    })
-                
-                cursor.close()
-                conn.close()
-                
-                return jsonify({'tokens': tokens})
-                
-            except Exception as e:
-                return jsonify({'error': f'Failed to fetch tokens: {str(e)}'}), 500
+        # Served from the pipeline-fed ring buffer (database only for ?before= pages)
+        register_recent_token_routes(
+            self.app, get_recent_token_feed(),
+            connection_factory=lambda: self.monitor.get_db_connection() if self.monitor else None,
+            platform_of=lambda address: self.monitor.detect_platform(address) if self.monitor else 'Unknown'
+        )
         
         @self.app.route('/health')
         def health():
@@ -929,6 +1030,21 @@ class IntegratedServer:
                     'websocket_active': self.monitor.running if self.monitor else False,
                     'active_keywords': sum(len(keywords) for keywords in self.monitor.user_keywords.values()) if self.monitor else 0,
                     'users': len(self.monitor.user_keywords) if self.monitor else 0,
+                    'event_loop_lag': self.monitor.loop_lag.get_stats() if self.monitor else {},
+                    'db_bridge': self.monitor.db_bridge.get_stats() if self.monitor else {},
+                    'db_pools': get_all_pool_stats(),
+                    'write_batcher': self.monitor.write_batcher.get_stats() if self.monitor else {},
+                    'pipeline': self.monitor.pipeline.get_stats() if self.monitor and self.monitor.pipeline else {},
+                    'market_data': get_market_data_service().get_stats(),
+                    'trade_state': self.monitor.token_market_cache.get_stats() if self.monitor else {},
+                    'seen_tokens': self.monitor.processed_tokens.get_stats() if self.monitor else {},
+                    'server_dispatch': self.monitor.server_dispatcher.get_stats() if self.monitor else {},
+                    'keyword_listener': self.monitor.keyword_listener.get_stats() if self.monitor and self.monitor.keyword_listener else {},
+                    'discord_webhooks': get_discord_webhook_client().get_stats(),
+                    'recent_tokens': get_recent_token_feed().get_stats(),
+                    'detection_to_notification': get_metrics_registry().summary('token_detection_to_notification_seconds'),
+                    'traces': get_trace_recorder().get_stats(),
+                    'startup': get_startup_orchestrator().timeline(),
                     'timestamp': time.time()
                 })
             except Exception as e:
@@ -939,24 +1055,37 @@ class IntegratedServer:
                     'timestamp': time.time(),
                     'uptime': time.time() - self.start_time
                 })
+        
+        @self.app.route('/debug/traces/slowest')
+        def slowest_traces():
+            """Slowest per-token traces - which stage made an alert late"""
+            return jsonify(slowest_traces_response(get_trace_recorder(), request.args))
     
     def start_discord_bot(self):
         """Start Discord bot in background thread"""
         def run_discord_bot():
+            startup = get_startup_orchestrator()
             try:
-                # Add delay to ensure web server starts first
-                time.sleep(3)
-                
                 discord_token = os.getenv('DISCORD_TOKEN')
                 
                 if not discord_token:
                     logger.warning("⚠️ DISCORD_TOKEN not found - Discord bot disabled")
+                    startup.fail('discord_login', 'DISCORD_TOKEN not set', status='skipped')
                     return
                 
+                # Import (discord.py + bot module) overlaps the web server bind; login waits for it
+                startup.begin('discord_login', requires=('web_server',))
                 logger.info("🤖 Starting Discord Bot with 35+ commands...")
                 from complete_discord_bot_with_commands import bot
+                
+                async def signal_ready():
+                    startup.ready('discord_login', detail=str(bot.user))
+                bot.add_listener(signal_ready, 'on_ready')
+                
+                startup.wait_for('web_server', timeout=30)
                 bot.run(discord_token)
             except Exception as e:
+                startup.fail('discord_login', e)
                 logger.error(f"❌ Discord bot failed: {e}")
                 # Don't crash the entire application if Discord bot fails
                 pass
@@ -989,19 +1118,44 @@ class IntegratedServer:
         
         return monitor_thread
     
+    def warm_database(self) -> int:
+        """Startup phase: open the pool's minimum connections before the first token needs one"""
+        return get_pool(self.monitor.database_url).warm()
+
+    def preload_keywords(self) -> Dict[str, List[str]]:
+        """Startup phase: fetch the keyword snapshot off the monitor loop (applied by its first refresh)"""
+        keywords = self.monitor.load_keywords()
+        if keywords is None:
+            raise RuntimeError("keyword load failed")
+        return keywords
+
+    def start_phases(self):
+        """Kick off the independent startup phases concurrently (progress at /health -> startup)"""
+        startup = get_startup_orchestrator()
+        startup.run('db_pool', self.warm_database)
+        self.monitor.keyword_preload = startup.run('keywords', self.preload_keywords)
+    
     def run(self):
         """Run the integrated server"""
         logger.info("🚀 Starting Integrated Token Monitor with Discord Notifications")
+        startup = get_startup_orchestrator()
         
-        # Start web server FIRST for health checks
-        logger.info("🌐 Web interface starting on port 5000")
-        
-        # Start background services in separate threads
+        # Start background services in separate threads - they overlap instead of waiting on each other
+        self.start_phases()
         self.start_monitoring()
         self.start_discord_bot()
         
-        # Start web server (this blocks)
-        serve(self.app, host='0.0.0.0', port=5000)
+        # Bind the web server, signal readiness, then serve (this blocks)
+        # Extra threads: each open /api/recent-tokens/stream holds one
+        logger.info("🌐 Web interface starting on port 5000")
+        startup.begin('web_server')
+        try:
+            web_server = create_server(self.app, host='0.0.0.0', port=5000, threads=16)
+        except Exception as e:
+            startup.fail('web_server', e)
+            raise
+        startup.ready('web_server', detail=5000)
+        web_server.run()
 
 if __name__ == "__main__":
     server = IntegratedServer()
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional, Any
 import time
 from cachetools import TTLCache
 
+from market_data_service import get_market_data_service
+
 logger = logging.getLogger(__name__)
 
 class MarketDataAPI:
@@ -37,39 +39,22 @@ class MarketDataAPI:
     def get_token_info(self, token_address: str) -> Optional[Dict[str, Any]]:
         """Get basic token information"""
         try:
-            # Check cache first
-            cache_key = f"token_info_{token_address}"
-            if cache_key in self.cache:
-                return self.cache[cache_key]
-            
-            self._rate_limit()
-            
-            # Try DexScreener API
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                pairs = data.get('pairs', [])
-                
-                if pairs:
-                    pair = pairs[0]  # Take first pair
-                    token_info = {
-                        'address': token_address,
-                        'name': pair.get('baseToken', {}).get('name'),
-                        'symbol': pair.get('baseToken', {}).get('symbol'),
-                        'price_usd': pair.get('priceUsd'),
-                        'market_cap': pair.get('marketCap'),
-                        'liquidity': pair.get('liquidity', {}).get('usd'),
-                        'volume_24h': pair.get('volume', {}).get('h24'),
-                        'price_change_24h': pair.get('priceChange', {}).get('h24'),
-                        'dexscreener_url': pair.get('url'),
-                        'last_updated': time.time()
-                    }
-                    
-                    # Cache the result
-                    self.cache[cache_key] = token_info
-                    return token_info
+            # Cached by the market data service (short TTL for brand-new tokens)
+            market_data = self.get_market_data(token_address)
+            if market_data:
+                token_info = {
+                    'address': token_address,
+                    'name': market_data.get('name'),
+                    'symbol': market_data.get('symbol'),
+                    'price_usd': market_data.get('price'),
+                    'market_cap': market_data.get('market_cap'),
+                    'liquidity': market_data.get('liquidity'),
+                    'volume_24h': market_data.get('volume_24h'),
+                    'price_change_24h': market_data.get('price_change_24h'),
+                    'dexscreener_url': market_data.get('url'),
+                    'last_updated': time.time()
+                }
+                return token_info
             
             logger.warning(f"No token info found for {token_address}")
             return None
@@ -78,6 +63,13 @@ class MarketDataAPI:
             logger.error(f"Error getting token info for {token_address}: {e}")
             return None
     
+    def get_market_data(self, token_address: str) -> Optional[Dict[str, Any]]:
+        """Market snapshot from the shared market data service (cached, single-flight, hedged)"""
+        market_data = get_market_data_service().get_sync(token_address)
+        if market_data.get('status'):
+            return None
+        return market_data
+    
     def get_token_data(self, token_address: str) -> Optional[Dict[str, Any]]:
         """Get comprehensive token data"""
         return self.get_token_info(token_address)
@@ -149,4 +141,9 @@ class MarketDataAPI:
         logger.info("Market data cache cleared")
 
 # Global instance
-market_data_api = MarketDataAPI()
\ No newline at end of file
+market_data_api = MarketDataAPI()
+
+
+def get_market_data_api() -> MarketDataAPI:
+    """Get the shared market data API instance"""
+    return market_data_api
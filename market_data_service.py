@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Unified Market Data Service
+One async service behind every market-data lookup: single-flight per address,
+an age-aware TTL cache, hedged parallel providers and per-provider circuit
+breakers. Runs on its own background loop so async monitors (any loop) and
+threaded callers share the same cache and in-flight requests.
+"""
+
+import asyncio
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+
+from async_io_layer import get_http_client
+from metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+NEW_TOKEN_AGE = 600  # Pairs younger than 10 minutes move fast - keep their cache short
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open trial after reset_timeout"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = 'closed'
+        self.trips = 0
+
+    def allow(self) -> bool:
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and time.time() - self.opened_at >= self.reset_timeout:
+            self.state = 'half_open'
+            return True  # One trial request
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.state = 'closed'
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            if self.state != 'open':
+                self.trips += 1
+            self.state = 'open'
+            self.opened_at = time.time()
+
+
+class MarketDataProvider(ABC):
+    """A market-data source: fetch() returns a snapshot, None for 'no data', raises on failure"""
+    name = 'provider'
+
+    def __init__(self, timeout: float = 8):
+        self.timeout = timeout
+        self.breaker = CircuitBreaker()
+        self.stats = {'requests': 0, 'hits': 0, 'empty': 0, 'failures': 0, 'skipped': 0, 'wins': 0}
+
+    @abstractmethod
+    async def fetch(self, token_address: str) -> Optional[Dict[str, Any]]:
+        """Snapshot for the token from this source"""
+
+
+class DexScreenerProvider(MarketDataProvider):
+    """DexScreener token pairs - highest-liquidity pair wins"""
+    name = 'DexScreener'
+
+    async def fetch(self, token_address: str) -> Optional[Dict[str, Any]]:
+        url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
+        response = await get_http_client().get(url, timeout=self.timeout)
+        if response.status != 200:
+            raise RuntimeError(f"DexScreener API error {response.status}")
+
+        data = response.json()
+        pairs = data.get('pairs') if data else None
+        if not pairs:
+            return None
+
+        # Get the pair with highest liquidity (or first if no liquidity data)
+        try:
+            best_pair = max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0)) if x.get('liquidity') else 0)
+        except (TypeError, ValueError):
+            best_pair = pairs[0]
+
+        base_token = best_pair.get('baseToken', {})
+        created_at = best_pair.get('pairCreatedAt')
+        return {
+            'price': float(best_pair.get('priceUsd', 0) or 0),
+            'market_cap': float(best_pair.get('marketCap', 0) or best_pair.get('fdv', 0) or 0),
+            'volume_24h': float((best_pair.get('volume') or {}).get('h24', 0) or 0),
+            'liquidity': float((best_pair.get('liquidity') or {}).get('usd', 0) or 0),
+            'price_change_24h': float((best_pair.get('priceChange') or {}).get('h24', 0) or 0),
+            'name': base_token.get('name'),
+            'symbol': base_token.get('symbol'),
+            'url': best_pair.get('url'),
+            'created_at': created_at / 1000.0 if created_at else None,
+            'source': 'DexScreener'
+        }
+
+
+class PumpFunProvider(MarketDataProvider):
+    """pump.fun coin API - covers bonding-curve tokens DexScreener hasn't indexed yet"""
+    name = 'PumpFun'
+
+    async def fetch(self, token_address: str) -> Optional[Dict[str, Any]]:
+        response = await get_http_client().get(f"https://api.pump.fun/coins/{token_address}", timeout=self.timeout)
+        if response.status == 404:
+            return None
+        if response.status != 200:
+            raise RuntimeError(f"pump.fun API error {response.status}")
+
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        market_cap = data.get('usd_market_cap') or data.get('market_cap')
+        if not market_cap:
+            return None
+        created_at = data.get('created_timestamp')
+        return {
+            'price': 0.0,
+            'market_cap': float(market_cap),
+            'volume_24h': 0.0,
+            'liquidity': 0.0,
+            'price_change_24h': 0.0,
+            'name': data.get('name'),
+            'symbol': data.get('symbol'),
+            'url': f"https://pump.fun/coin/{token_address}",
+            'created_at': created_at / 1000.0 if created_at and created_at > 1e12 else created_at,
+            'source': 'PumpFun'
+        }
+
+
+class MarketDataService:
+    """
+    Hedged, cached, single-flight market data lookups.
+
+    Providers are tried in priority order: the next one starts as soon as the
+    current one fails or reports no data, or after hedge_delay if it is merely
+    slow - whichever answers first with data wins and the rest are cancelled.
+    """
+
+    def __init__(self, providers: Optional[List[MarketDataProvider]] = None, hedge_delay: float = 0.75,
+                 ttl: float = 60, new_token_ttl: float = 10, negative_ttl: float = 5, max_entries: int = 5000):
+        self.providers = providers or [DexScreenerProvider(), PumpFunProvider()]
+        self.hedge_delay = hedge_delay
+        self.ttl = ttl
+        self.new_token_ttl = new_token_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self.cache = OrderedDict()  # address -> (expires_at, snapshot)
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'fetches': 0, 'hedges': 0,
+                      'no_data': 0, 'evictions': 0}
+        get_metrics_registry().register_collector('market_data', self._collect_metrics)
+
+    # Loop management
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            with self.lock:
+                if self.loop is None:
+                    ready = threading.Event()
+
+                    def run():
+                        loop = asyncio.new_event_loop()
+                        asyncio.set_event_loop(loop)
+                        self.loop = loop
+                        ready.set()
+                        loop.run_forever()
+
+                    self.thread = threading.Thread(target=run, name="market-data", daemon=True)
+                    self.thread.start()
+                    ready.wait()
+                    logger.info("📊 Market data service loop started")
+        return self.loop
+
+    async def get(self, token_address: str) -> Dict[str, Any]:
+        """Market data for a token from any event loop"""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await self._get(token_address)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._get(token_address), loop))
+
+    def get_sync(self, token_address: str, timeout: float = 15) -> Dict[str, Any]:
+        """Market data for a token from a plain thread"""
+        future = asyncio.run_coroutine_threadsafe(self._get(token_address), self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            future.cancel()
+            logger.warning(f"❌ Market data fetch failed for {token_address[:10]}...: {e}")
+            return {'status': 'fetch_error'}
+
+    # Cache + single-flight (service loop only)
+
+    async def _get(self, token_address: str) -> Dict[str, Any]:
+        self.stats['requests'] += 1
+        entry = self.cache.get(token_address)
+        if entry:
+            expires_at, snapshot = entry
+            if expires_at > time.time():
+                self.cache.move_to_end(token_address)
+                self.stats['cache_hits'] += 1
+                return snapshot
+            del self.cache[token_address]
+
+        future = self.inflight.get(token_address)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        # Shielded so a cancelled caller never cancels the lookup others are waiting on
+        future = asyncio.ensure_future(self._fetch(token_address))
+        self.inflight[token_address] = future
+        future.add_done_callback(lambda _: self.inflight.pop(token_address, None))
+        return await asyncio.shield(future)
+
+    def _store(self, token_address: str, snapshot: Dict[str, Any]):
+        if snapshot.get('status'):
+            ttl = self.negative_ttl
+        elif snapshot.get('created_at') and time.time() - snapshot['created_at'] < NEW_TOKEN_AGE:
+            ttl = self.new_token_ttl
+        else:
+            ttl = self.ttl
+        self.cache[token_address] = (time.time() + ttl, snapshot)
+        self.cache.move_to_end(token_address)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    # Hedged provider fan-out
+
+    async def _call_provider(self, provider: MarketDataProvider, token_address: str) -> Optional[Dict[str, Any]]:
+        provider.stats['requests'] += 1
+        try:
+            snapshot = await asyncio.wait_for(provider.fetch(token_address), provider.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            provider.stats['failures'] += 1
+            provider.breaker.record_failure()
+            logger.debug(f"{provider.name} market data failed for {token_address[:10]}...: {e}")
+            raise
+        provider.breaker.record_success()
+        provider.stats['hits' if snapshot else 'empty'] += 1
+        return snapshot
+
+    async def _fetch(self, token_address: str) -> Dict[str, Any]:
+        self.stats['fetches'] += 1
+        candidates = []
+        for provider in self.providers:
+            if provider.breaker.allow():
+                candidates.append(provider)
+            else:
+                provider.stats['skipped'] += 1
+
+        if not candidates:
+            return {'status': 'api_error'}
+
+        pending = {}
+        failed = False
+        result = None
+        next_index = 0
+
+        try:
+            while result is None and (pending or next_index < len(candidates)):
+                if next_index < len(candidates) and (not pending or next_index > 0):
+                    provider = candidates[next_index]
+                    if pending:
+                        self.stats['hedges'] += 1
+                    pending[asyncio.ensure_future(self._call_provider(provider, token_address))] = provider
+                    next_index += 1
+
+                hedge = self.hedge_delay if next_index < len(candidates) else None
+                done, _ = await asyncio.wait(pending, timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    continue  # Current providers are slow - hedge with the next one
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        snapshot = task.result()
+                    except Exception:
+                        failed = True
+                        continue
+                    if snapshot and result is None:
+                        provider.stats['wins'] += 1
+                        result = snapshot
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if result is None:
+            self.stats['no_data'] += 1
+            result = {'status': 'api_error' if failed else 'too_new'}
+        else:
+            logger.info(f"✅ {result['source']} data loaded: MC=${result['market_cap']:.0f}, Price=${result['price']:.8f}")
+
+        self._store(token_address, result)
+        return result
+
+    def invalidate(self, token_address: str):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.cache.pop, token_address, None)
+
+    def _collect_metrics(self, registry):
+        requests = self.stats['requests']
+        registry.gauge('cache_requests', 'Lookups per cache', ('cache',)).labels('market_data').set(requests)
+        registry.gauge('cache_hit_ratio', 'Fraction of lookups served from cache', ('cache',)).labels(
+            'market_data').set((self.stats['cache_hits'] + self.stats['coalesced']) / requests if requests else 0.0)
+        registry.gauge('cache_entries', 'Entries held per cache', ('cache',)).labels('market_data').set(len(self.cache))
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['cache_size'] = len(self.cache)
+        stats['inflight'] = len(self.inflight)
+        stats['providers'] = {
+            provider.name: dict(provider.stats, breaker=provider.breaker.state, trips=provider.breaker.trips)
+            for provider in self.providers
+        }
+        return stats
+
+
+# Global service instance
+market_data_service = None
+_market_data_service_lock = threading.Lock()
+
+
+def get_market_data_service() -> MarketDataService:
+    """Get the process-wide market data service"""
+    global market_data_service
+    if market_data_service is None:
+        with _market_data_service_lock:
+            if market_data_service is None:
+                market_data_service = MarketDataService()
+    return market_data_service
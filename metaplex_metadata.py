@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Metaplex Token Metadata
+Derives a mint's metadata account (PDA) locally and fetches many of them with
+one getMultipleAccounts call, instead of a getProgramAccounts memcmp scan over
+the whole Metaplex program per token. Accounts are decoded with a zero-copy
+Borsh reader over memoryview, following the on-chain field layout rather than
+fixed offsets.
+"""
+
+import base64
+import struct
+import logging
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from solders.pubkey import Pubkey
+
+logger = logging.getLogger(__name__)
+
+METADATA_PROGRAM_ID = "metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s"
+METADATA_PROGRAM = Pubkey.from_string(METADATA_PROGRAM_ID)
+METADATA_SEED = b"metadata"
+METADATA_V1_KEY = 4             # Key::MetadataV1
+MAX_ACCOUNTS_PER_CALL = 100     # getMultipleAccounts limit
+
+
+class BorshError(ValueError):
+    """Account data ended early or does not follow the expected layout"""
+
+
+class BorshReader:
+    """Sequential little-endian Borsh reads over a memoryview - no intermediate copies"""
+
+    __slots__ = ('view', 'offset')
+
+    def __init__(self, data):
+        self.view = memoryview(data)
+        self.offset = 0
+
+    def _take(self, size: int) -> memoryview:
+        end = self.offset + size
+        if end > len(self.view):
+            raise BorshError(f"need {size} bytes at offset {self.offset}, have {len(self.view) - self.offset}")
+        chunk = self.view[self.offset:end]
+        self.offset = end
+        return chunk
+
+    def _unpack(self, fmt: str, size: int) -> int:
+        if self.offset + size > len(self.view):
+            raise BorshError(f"need {size} bytes at offset {self.offset}, have {len(self.view) - self.offset}")
+        value = struct.unpack_from(fmt, self.view, self.offset)[0]
+        self.offset += size
+        return value
+
+    def u8(self) -> int:
+        return self._unpack('<B', 1)
+
+    def boolean(self) -> bool:
+        return self._unpack('<B', 1) != 0
+
+    def u16(self) -> int:
+        return self._unpack('<H', 2)
+
+    def u32(self) -> int:
+        return self._unpack('<I', 4)
+
+    def u64(self) -> int:
+        return self._unpack('<Q', 8)
+
+    def pubkey(self) -> str:
+        return str(Pubkey.from_bytes(bytes(self._take(32))))
+
+    def string(self) -> str:
+        """Borsh String (u32 length + UTF-8); Metaplex pads fixed-width fields with NULs"""
+        return str(self._take(self.u32()), 'utf-8', 'replace').rstrip('\x00').strip()
+
+    def option(self, read: Callable[[], Any]) -> Any:
+        return read() if self.u8() else None
+
+    def vec(self, read: Callable[[], Any]) -> List[Any]:
+        return [read() for _ in range(self.u32())]
+
+
+@dataclass
+class TokenMetadata:
+    """Decoded Metaplex metadata account (fields up to token_standard)"""
+    mint: str
+    update_authority: str
+    name: str
+    symbol: str
+    uri: str
+    seller_fee_basis_points: int
+    creators: List[Tuple[str, bool, int]] = field(default_factory=list)  # (address, verified, share)
+    primary_sale_happened: bool = False
+    is_mutable: bool = True
+    edition_nonce: Optional[int] = None
+    token_standard: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Shape the scrapers already return for token metadata"""
+        return {
+            'name': self.name,
+            'symbol': self.symbol,
+            'decimals': 9,
+            'uri': self.uri,
+            'update_authority': self.update_authority,
+            'is_mutable': self.is_mutable
+        }
+
+
+def parse_metadata_account(data) -> TokenMetadata:
+    """Decode a MetadataV1 account from raw bytes (bytes, bytearray or memoryview)"""
+    reader = BorshReader(data)
+    key = reader.u8()
+    if key != METADATA_V1_KEY:
+        raise BorshError(f"not a MetadataV1 account (key {key})")
+
+    update_authority = reader.pubkey()
+    mint = reader.pubkey()
+    name = reader.string()
+    symbol = reader.string()
+    uri = reader.string()
+    seller_fee_basis_points = reader.u16()
+    creators = reader.option(lambda: reader.vec(lambda: (reader.pubkey(), reader.boolean(), reader.u8()))) or []
+    metadata = TokenMetadata(mint, update_authority, name, symbol, uri, seller_fee_basis_points, creators)
+
+    # Later fields were appended across program versions - older accounts simply end earlier
+    try:
+        metadata.primary_sale_happened = reader.boolean()
+        metadata.is_mutable = reader.boolean()
+        metadata.edition_nonce = reader.option(reader.u8)
+        metadata.token_standard = reader.option(reader.u8)
+    except BorshError:
+        pass
+    return metadata
+
+
+@lru_cache(maxsize=4096)
+def metadata_pda(mint_address: str) -> str:
+    """Metadata account address for a mint: PDA of ["metadata", program id, mint]"""
+    address, _ = Pubkey.find_program_address(
+        [METADATA_SEED, bytes(METADATA_PROGRAM), bytes(Pubkey.from_string(mint_address))],
+        METADATA_PROGRAM
+    )
+    return str(address)
+
+
+def fetch_metadata_batch(rpc_call: Callable[[str, list], Optional[dict]], mint_addresses: Iterable[str],
+                         commitment: str = "confirmed") -> Dict[str, Optional[TokenMetadata]]:
+    """
+    Metadata for many mints via getMultipleAccounts (one call per 100 mints).
+    rpc_call(method, params) returns the JSON-RPC result or None on failure.
+    Mints whose account does not exist (or fails to decode) map to None; mints
+    whose batch failed at the RPC level are left out so callers can retry them.
+    """
+    mints = []
+    for mint in dict.fromkeys(mint_addresses):
+        try:
+            mints.append((mint, metadata_pda(mint)))
+        except ValueError as e:
+            logger.debug(f"Invalid mint address {mint}: {e}")
+
+    results: Dict[str, Optional[TokenMetadata]] = {}
+    for start in range(0, len(mints), MAX_ACCOUNTS_PER_CALL):
+        chunk = mints[start:start + MAX_ACCOUNTS_PER_CALL]
+        response = rpc_call("getMultipleAccounts", [
+            [pda for _, pda in chunk],
+            {"encoding": "base64", "commitment": commitment}
+        ])
+        if not response or not isinstance(response.get('value'), list):
+            continue
+
+        for (mint, pda), account in zip(chunk, response['value']):
+            if not account or account.get('owner') not in (None, METADATA_PROGRAM_ID):
+                results[mint] = None
+                continue
+            try:
+                results[mint] = parse_metadata_account(base64.b64decode(account['data'][0]))
+            except (BorshError, KeyError, IndexError, ValueError) as e:
+                logger.debug(f"Metadata decode failed for {mint} ({pda}): {e}")
+                results[mint] = None
+    return results
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Metrics Registry
+Process-wide counters, gauges and HDR-style latency histograms, rendered in the
+Prometheus text format for /metrics. Components record directly on the hot path
+(a dict increment under a lock); slower state such as queue depths and cache
+ratios is pulled by collectors only when the endpoint is scraped.
+"""
+
+import math
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# Log-linear buckets: values below 2**SUB_BUCKET_BITS microseconds are exact, above that every
+# power of two is split into 2**(SUB_BUCKET_BITS - 1) buckets - about 3% worst-case relative error
+SUB_BUCKET_BITS = 6
+
+
+class Counter:
+    """Monotonically increasing value"""
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self.lock:
+            self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down (or be set by a collector at scrape time)"""
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+
+class Histogram:
+    """
+    HDR-style latency histogram over integer microseconds.
+
+    Buckets are sparse (only values seen take memory) and fixed-precision, so
+    p99 / p999 stay accurate over millions of samples without keeping them.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _index(micros: int) -> int:
+        shift = micros.bit_length() - SUB_BUCKET_BITS
+        if shift <= 0:
+            return micros
+        return (shift << SUB_BUCKET_BITS) + (micros >> shift)
+
+    @staticmethod
+    def _value(index: int) -> float:
+        """Midpoint of a bucket, in seconds"""
+        shift, sub = index >> SUB_BUCKET_BITS, index & ((1 << SUB_BUCKET_BITS) - 1)
+        if shift == 0:
+            return sub / 1e6
+        return ((sub << shift) + (1 << (shift - 1))) / 1e6
+
+    def observe(self, seconds: float):
+        micros = max(0, int(seconds * 1e6))
+        index = self._index(micros)
+        with self.lock:
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def time(self):
+        """with histogram.time(): ... observes the block's duration"""
+        return _Timer(self)
+
+    def quantiles(self, quantiles=QUANTILES) -> Dict[float, float]:
+        with self.lock:
+            ordered = sorted(self.buckets.items())
+            count = self.count
+            maximum = self.max
+        results = {}
+        if not count:
+            return {q: 0.0 for q in quantiles}
+        position = 0
+        seen = 0
+        for q in sorted(quantiles):
+            rank = max(1, math.ceil(q * count))
+            while seen < rank and position < len(ordered):
+                seen += ordered[position][1]
+                position += 1
+            results[q] = min(self._value(ordered[position - 1][0]), maximum)
+        return results
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles((q,))[q]
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+METRIC_TYPES = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}
+
+
+class MetricFamily:
+    """One metric name with a child per label combination"""
+
+    def __init__(self, name: str, kind: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], Any] = {}
+        self.lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.get(key)
+                if child is None:
+                    child = self.children[key] = METRIC_TYPES[self.kind]()
+        return child
+
+    # Unlabelled shortcuts
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def observe(self, seconds: float):
+        self.labels().observe(seconds)
+
+    def time(self):
+        return self.labels().time()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Named metric families plus scrape-time collectors"""
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self.collectors: Dict[str, Callable[['MetricsRegistry'], None]] = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _family(self, name: str, kind: str, documentation: str, labelnames) -> MetricFamily:
+        family = self.families.get(name)
+        if family is None:
+            with self.lock:
+                family = self.families.get(name)
+                if family is None:
+                    family = self.families[name] = MetricFamily(name, kind, documentation, tuple(labelnames))
+        if family.kind != kind:
+            raise ValueError(f"Metric {name} already registered as a {family.kind}")
+        return family
+
+    def counter(self, name: str, documentation: str = '', labelnames=()) -> MetricFamily:
+        return self._family(name, 'counter', documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str = '', labelnames=()) -> MetricFamily:
+        return self._family(name, 'gauge', documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str = '', labelnames=()) -> MetricFamily:
+        return self._family(name, 'histogram', documentation, labelnames)
+
+    def register_collector(self, key: str, collector: Callable[['MetricsRegistry'], None]):
+        """collector(registry) sets gauges at scrape time; re-registering a key replaces it"""
+        with self.lock:
+            self.collectors[key] = collector
+
+    def unregister_collector(self, key: str):
+        with self.lock:
+            self.collectors.pop(key, None)
+
+    def collect(self):
+        with self.lock:
+            collectors = list(self.collectors.items())
+        for key, collector in collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics collector {key} failed: {e}")
+
+    def render(self) -> str:
+        """Prometheus text exposition (histograms as summaries with quantiles)"""
+        self.collect()
+        lines: List[str] = []
+        for name in sorted(self.families):
+            family = self.families[name]
+            kind = 'summary' if family.kind == 'histogram' else family.kind
+            if family.documentation:
+                lines.append(f"# HELP {name} {family.documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for values, child in sorted(list(family.children.items())):
+                if family.kind == 'histogram':
+                    for q, value in child.quantiles().items():
+                        lines.append(f"{name}{_format_labels(family.labelnames, values, ('quantile', str(q)))} "
+                                     f"{_format_value(value)}")
+                    lines.append(f"{name}_sum{_format_labels(family.labelnames, values)} {_format_value(child.sum)}")
+                    lines.append(f"{name}_count{_format_labels(family.labelnames, values)} {child.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(family.labelnames, values)} {_format_value(child.value)}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, name: str) -> Dict[str, Dict[str, float]]:
+        """p50/p99 (ms) per label combination of a histogram, for JSON health output"""
+        family = self.families.get(name)
+        if family is None:
+            return {}
+        summary = {}
+        for values, child in list(family.children.items()):
+            quantiles = child.quantiles((0.5, 0.99))
+            summary[','.join(values) or 'all'] = {
+                'count': child.count,
+                'p50_ms': round(quantiles[0.5] * 1000, 2),
+                'p99_ms': round(quantiles[0.99] * 1000, 2)
+            }
+        return summary
+
+
+# Global registry instance
+metrics_registry = None
+_metrics_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry"""
+    global metrics_registry
+    if metrics_registry is None:
+        with _metrics_registry_lock:
+            if metrics_registry is None:
+                metrics_registry = MetricsRegistry()
+    return metrics_registry
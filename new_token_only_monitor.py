@@ -3,12 +3,18 @@ Real-time new token creation monitor - ONLY catches genuinely new tokens
 No transaction history scanning - pure new token detection
 """
 
+import os
 import time
+import asyncio
 import logging
 import requests
 from typing import Dict, Any, Optional, List, Set
 from cachetools import TTLCache
 
+from letsbonk_log_stream import LetsBonkLogStream, CreateEvent
+from token_timestamp_resolver import get_token_timestamp_resolver
+from rpc_router import get_rpc_router, RPCError
+
 logger = logging.getLogger(__name__)
 
 class NewTokenOnlyMonitor:
@@ -29,13 +35,6 @@ class NewTokenOnlyMonitor:
         self.api_key = os.getenv("ALCHEMY_API_KEY")
         if not self.api_key:
             raise ValueError("ALCHEMY_API_KEY environment variable required")
-        self.base_url = f"https://solana-mainnet.g.alchemy.com/v2/{self.api_key}"
-        
-        # Add proper headers for authentication
-        self.headers = {
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
         
         # Test connection to Alchemy
         logger.info(f"🔗 Connecting to Alchemy with API key: {self.api_key[:10]}...")
@@ -46,76 +45,61 @@ class NewTokenOnlyMonitor:
         
         # Track only the most recent signature to detect NEW ones
         self.last_known_signature = None
+        
+        # Streaming ingest (logsSubscribe) unless LETSBONK_INGEST=poll - polling remains the fallback
+        self.log_stream = None
+        if os.getenv('LETSBONK_INGEST', 'stream').lower() != 'poll':
+            self.log_stream = LetsBonkLogStream(self.handle_stream_create, api_key=self.api_key,
+                                                program_id=self.letsbonk_program_id)
     
     def _test_alchemy_connection(self):
         """Test connection to Alchemy API"""
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getHealth"
-            }
-            
-            response = requests.post(self.base_url, json=payload, headers=self.headers, timeout=5)
-            
-            if response.status_code == 200:
-                logger.info("✅ Alchemy connection successful")
-            else:
-                logger.error(f"❌ Alchemy connection failed: HTTP {response.status_code}")
+            get_rpc_router().call_sync("getHealth", timeout=5)
+            logger.info("✅ Alchemy connection successful")
+        except RPCError as e:
+            logger.error(f"❌ Alchemy connection failed: {e}")
         except Exception as e:
             logger.error(f"❌ Alchemy connection test failed: {e}")
         
     def get_only_newest_signature(self) -> Optional[str]:
         """Get ONLY the newest signature - no transaction history scanning"""
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getSignaturesForAddress",
-                "params": [
-                    self.letsbonk_program_id,
-                    {
-                        "limit": 1,  # ONLY get the newest signature
-                        "commitment": "confirmed"
-                    }
-                ]
-            }
-            
-            logger.debug(f"🔍 API Request: {self.base_url[:50]}...")
-            response = requests.post(self.base_url, json=payload, headers=self.headers, timeout=5)
-            logger.debug(f"🔍 API Response: {response.status_code}")
+            result = get_rpc_router().call_sync("getSignaturesForAddress", [
+                self.letsbonk_program_id,
+                {
+                    "limit": 1,  # ONLY get the newest signature
+                    "commitment": "confirmed"
+                }
+            ], timeout=5)
             
-            if response.status_code == 200:
-                data = response.json()
-                result = data.get('result', [])
+            if result:
+                newest_signature = result[0]['signature']
                 
-                if result:
-                    newest_signature = result[0]['signature']
+                # Only process if this is genuinely NEW (not seen before)
+                if newest_signature != self.last_known_signature and newest_signature not in self.seen_signatures:
+                    logger.info(f"🔍 NEW SIGNATURE FOUND: {newest_signature[:10]}... (startup buffer: {time.time() - self.monitoring_start_time:.1f}s)")
                     
-                    # Only process if this is genuinely NEW (not seen before)
-                    if newest_signature != self.last_known_signature and newest_signature not in self.seen_signatures:
-                        logger.info(f"🔍 NEW SIGNATURE FOUND: {newest_signature[:10]}... (startup buffer: {time.time() - self.monitoring_start_time:.1f}s)")
-                        
-                        # Reduced startup buffer for faster testing
-                        if time.time() - self.monitoring_start_time > 10:  # 10 second startup buffer
-                            # ADDITIONAL VALIDATION: Check if this is actually a token creation
-                            if self._is_token_creation_transaction(newest_signature):
-                                logger.info(f"🆕 GENUINE NEW TOKEN CREATION DETECTED: {newest_signature[:10]}...")
-                                self.last_known_signature = newest_signature
-                                self.seen_signatures[newest_signature] = True
-                                return newest_signature
-                            else:
-                                logger.info(f"⚠️ FILTERED: {newest_signature[:10]}... - Not a token creation transaction")
-                                self.last_known_signature = newest_signature
-                                self.seen_signatures[newest_signature] = True
+                    # Reduced startup buffer for faster testing
+                    if time.time() - self.monitoring_start_time > 10:  # 10 second startup buffer
+                        # ADDITIONAL VALIDATION: Check if this is actually a token creation
+                        if self._is_token_creation_transaction(newest_signature):
+                            logger.info(f"🆕 GENUINE NEW TOKEN CREATION DETECTED: {newest_signature[:10]}...")
+                            self.last_known_signature = newest_signature
+                            self.seen_signatures[newest_signature] = True
+                            return newest_signature
                         else:
-                            # During startup, just track signatures without processing
-                            logger.info(f"⏳ STARTUP BUFFER: {newest_signature[:10]}... - waiting {10 - (time.time() - self.monitoring_start_time):.1f}s more")
+                            logger.info(f"⚠️ FILTERED: {newest_signature[:10]}... - Not a token creation transaction")
                             self.last_known_signature = newest_signature
                             self.seen_signatures[newest_signature] = True
                     else:
-                        logger.debug(f"⚠️ DUPLICATE/SEEN: {newest_signature[:10]}... - already processed")
-                    
+                        # During startup, just track signatures without processing
+                        logger.info(f"⏳ STARTUP BUFFER: {newest_signature[:10]}... - waiting {10 - (time.time() - self.monitoring_start_time):.1f}s more")
+                        self.last_known_signature = newest_signature
+                        self.seen_signatures[newest_signature] = True
+                else:
+                    logger.debug(f"⚠️ DUPLICATE/SEEN: {newest_signature[:10]}... - already processed")
+                
             return None
             
         except Exception as e:
@@ -125,25 +109,14 @@ class NewTokenOnlyMonitor:
     def get_transaction_details(self, signature: str) -> Optional[dict]:
         """Get transaction details for NEW signature"""
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getTransaction",
-                "params": [
-                    signature,
-                    {
-                        "encoding": "jsonParsed",
-                        "commitment": "confirmed",
-                        "maxSupportedTransactionVersion": 0
-                    }
-                ]
-            }
-            
-            response = requests.post(self.base_url, json=payload, headers=self.headers, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('result')
+            return get_rpc_router().call_sync("getTransaction", [
+                signature,
+                {
+                    "encoding": "jsonParsed",
+                    "commitment": "confirmed",
+                    "maxSupportedTransactionVersion": 0
+                }
+            ], timeout=5)
                 
         except Exception as e:
             logger.debug(f"Failed to get transaction details: {e}")
@@ -199,11 +172,15 @@ class NewTokenOnlyMonitor:
     
     def extract_new_token(self, signature: str) -> Optional[Dict[str, Any]]:
         """Extract NEW token data from transaction signature"""
+        transaction = self.get_transaction_details(signature)
+        if not transaction:
+            return None
+        return self.token_from_transaction(transaction, signature)
+    
+    def token_from_transaction(self, transaction: dict, signature: str,
+                               known_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Token data from a fetched creation transaction (known_name: decoded from the launch event)"""
         try:
-            transaction = self.get_transaction_details(signature)
-            if not transaction:
-                return None
-            
             # Get current time for age calculations
             current_time = time.time()
             
@@ -252,9 +229,11 @@ class NewTokenOnlyMonitor:
                         return None
                     
                     self.processed_tokens[mint] = True
+                    # The create transaction's slot/blockTime answers later freshness checks without RPCs
+                    get_token_timestamp_resolver().note_transaction(mint, transaction, signature, source='letsbonk')
                     
-                    # Get token name from DexScreener - ALWAYS try this first
-                    token_name = self.get_token_name_from_dexscreener(mint)
+                    # Name from the on-chain launch event when the stream decoded it, else DexScreener
+                    token_name = known_name or self.get_token_name_from_dexscreener(mint)
                     
                     # Calculate age based on discovery time for real-time monitoring
                     if block_time:
@@ -271,8 +250,8 @@ class NewTokenOnlyMonitor:
                     
                     # HYBRID PROCESSING: Only process tokens with valid real names or use proper placeholder
                     if token_name and len(token_name.strip()) > 0 and not token_name.startswith("Unnamed"):
-                        # Use real names from DexScreener immediately
-                        logger.info(f"🎯 USING REAL NAME: '{token_name}' from DexScreener")
+                        # Use real names immediately
+                        logger.info(f"🎯 USING REAL NAME: '{token_name}' from {'launch event' if known_name else 'DexScreener'}")
                         
                         return {
                             'name': token_name,
@@ -463,11 +442,33 @@ class NewTokenOnlyMonitor:
             logger.debug(f"Database query failed: {e}")
             return []
     
+    def handle_stream_create(self, event: CreateEvent, transaction: dict):
+        """LetsBonk create from the log stream (transaction already fetched in a batch)"""
+        self.seen_signatures[event.signature] = True
+        new_token = self.token_from_transaction(transaction, event.signature, known_name=event.name)
+        if new_token:
+            new_token['signature'] = event.signature
+            new_token['source'] = 'logs-subscribe'
+            logger.info(f"🎯 NEW TOKEN FOUND: {new_token['name']} ({new_token['address'][:10]}...)")
+            if self.callback_func:
+                try:
+                    self.callback_func([new_token])
+                except Exception as e:
+                    logger.error(f"Callback error: {e}")
+    
     def start_monitoring(self):
         """Start monitoring for NEW token creations only"""
         logger.info("🔄 Starting NEW TOKEN ONLY monitoring...")
         logger.info("📡 NO transaction history - only real-time new tokens")
         
+        if self.log_stream:
+            try:
+                logger.info("⚡ Streaming LetsBonk creates via logsSubscribe (gap-filled on reconnect)")
+                asyncio.run(self.log_stream.run())
+                return
+            except Exception as e:
+                logger.error(f"❌ LetsBonk log stream stopped: {e} - falling back to signature polling")
+        
         while True:
             try:
                 # Get only the newest signature (not transaction history)
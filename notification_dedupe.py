@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Notification Dedupe Filter
+In-memory front for notified_tokens lookups: a time-windowed (rotating) Bloom
+filter answers "definitely not notified" without touching the database, and an
+exact LRU set answers recent positives. Only probable hits that the LRU can't
+confirm fall through to the database.
+"""
+
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing from one blake2b digest)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class NotificationDedupeFilter:
+    """
+    Rotating Bloom filter + exact LRU for "was this token already notified?".
+
+    The retention window (7 days, matching cleanup_old_notifications) is split
+    into generations; rotate() drops whole generations as they age out, so
+    memory stays bounded no matter how long the process runs. Addresses older
+    than the window are forgotten, exactly as the database cleanup forgets them.
+    """
+
+    def __init__(self, window_seconds: float = 7 * 24 * 3600, generations: int = 7,
+                 capacity_per_generation: int = 200000, error_rate: float = 0.001,
+                 exact_size: int = 50000):
+        self.window_seconds = window_seconds
+        self.generation_span = window_seconds / generations
+        self.max_generations = generations + 1  # current partial generation + full window
+        self.capacity_per_generation = capacity_per_generation
+        self.error_rate = error_rate
+        self.exact_size = exact_size
+
+        self.generations = deque()  # (generation_start, BloomFilter), oldest first
+        self.exact = OrderedDict()  # address -> notified_at
+        self.lock = threading.Lock()
+        self.warmed = False
+
+        self.stats = {
+            'added': 0,
+            'definite_negatives': 0,
+            'exact_hits': 0,
+            'db_lookups': 0,
+            'db_confirmed': 0,
+            'false_positives': 0,
+            'rotations': 0
+        }
+
+    def _generation_for(self, timestamp: float) -> Optional[BloomFilter]:
+        start = timestamp - (timestamp % self.generation_span)
+        for generation_start, bloom in self.generations:
+            if generation_start == start:
+                return bloom
+        if time.time() - start >= self.window_seconds + self.generation_span:
+            return None  # Already outside the window
+
+        bloom = BloomFilter(self.capacity_per_generation, self.error_rate)
+        self.generations.append((start, bloom))
+        self.generations = deque(sorted(self.generations, key=lambda generation: generation[0]))
+        self._rotate_locked()
+        return bloom
+
+    def _rotate_locked(self):
+        cutoff = time.time() - self.window_seconds - self.generation_span
+        while self.generations and (self.generations[0][0] < cutoff or len(self.generations) > self.max_generations):
+            self.generations.popleft()
+            self.stats['rotations'] += 1
+
+        expiry = time.time() - self.window_seconds
+        while self.exact:
+            address, notified_at = next(iter(self.exact.items()))
+            if notified_at >= expiry:
+                break
+            self.exact.popitem(last=False)
+
+    def rotate(self):
+        """Drop generations that fell out of the retention window"""
+        with self.lock:
+            self._rotate_locked()
+
+    def add(self, address: str, notified_at: Optional[float] = None):
+        """Record a notification (call on every record_notification_in_db)"""
+        notified_at = notified_at or time.time()
+        with self.lock:
+            bloom = self._generation_for(notified_at)
+            if bloom is None:
+                return
+            bloom.add(address)
+            self.exact[address] = notified_at
+            self.exact.move_to_end(address)
+            while len(self.exact) > self.exact_size:
+                self.exact.popitem(last=False)
+            self.stats['added'] += 1
+
+    def warm(self, rows: Iterable[Tuple[str, Any]]) -> int:
+        """Load (address, notified_at) rows from notified_tokens"""
+        loaded = 0
+        for address, notified_at in rows:
+            if hasattr(notified_at, 'timestamp'):
+                notified_at = notified_at.timestamp()
+            self.add(address, notified_at or time.time())
+            loaded += 1
+        self.warmed = True
+        return loaded
+
+    def might_contain(self, address: str) -> bool:
+        with self.lock:
+            if address in self.exact:
+                return True
+            return any(address in bloom for _, bloom in self.generations)
+
+    def check(self, address: str, db_lookup: Callable[[str], bool]) -> bool:
+        """Exact answer, consulting db_lookup only for probable hits (or before warmup)"""
+        with self.lock:
+            if address in self.exact:
+                self.exact.move_to_end(address)
+                self.stats['exact_hits'] += 1
+                return True
+            probable = any(address in bloom for _, bloom in self.generations)
+
+        if self.warmed and not probable:
+            self.stats['definite_negatives'] += 1
+            return False
+
+        self.stats['db_lookups'] += 1
+        found = db_lookup(address)
+        if found:
+            self.stats['db_confirmed'] += 1
+            with self.lock:
+                self.exact[address] = time.time()
+                while len(self.exact) > self.exact_size:
+                    self.exact.popitem(last=False)
+        elif probable:
+            self.stats['false_positives'] += 1
+        return found
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+            stats.update({
+                'warmed': self.warmed,
+                'generations': len(self.generations),
+                'exact_entries': len(self.exact),
+                'bloom_bytes': sum(len(bloom.bits) for _, bloom in self.generations)
+            })
+        return stats
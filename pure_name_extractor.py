@@ -12,6 +12,11 @@ import time
 import logging
 from typing import Dict, List, Optional, Any
 
+from dexscreener_batch import get_dexscreener_resolver
+from retry_scheduler import RetryScheduler, DEFAULT_RETRY_DELAYS
+from metaplex_metadata import metadata_pda, parse_metadata_account
+from rpc_router import get_rpc_router
+
 logger = logging.getLogger(__name__)
 
 # Removed ultra-fast API extractor - using only reliable LetsBonk page extraction
@@ -45,6 +50,9 @@ class PureTokenNameExtractor:
         self.cache_timestamps = {}
         self.cache_ttl = 300  # 5 minutes
         
+        # Progressive retries for tokens DexScreener hasn't indexed yet (one timer, batched lookups)
+        self.retry_scheduler = RetryScheduler(self._dexscreener_batch_names, self._handle_retry_success)
+        
     async def extract_accurate_token_name(self, token_address: str) -> Optional[str]:
         """Extract 100% accurate token name from LetsBonk page with ultra-fast enhancement"""
         
@@ -83,117 +91,93 @@ class PureTokenNameExtractor:
         # Progressive extraction strategy for very new tokens
         logger.info(f"🔄 PROGRESSIVE STRATEGY: Token too new for APIs, scheduling smart retry queue...")
         
-        # Add to retry queue with progressive delays
-        if not hasattr(self, 'retry_queue'):
-            self.retry_queue = {}
-            
-        # Schedule retries at 30s, 2min, 5min intervals
-        retry_delays = [30, 120, 300]  # 30 seconds, 2 minutes, 5 minutes
+        # Schedule retries at 30s, 2min, 5min intervals on the shared retry timer
+        self.retry_scheduler.schedule(token_address, DEFAULT_RETRY_DELAYS)
         
-        import threading
-        import time as time_module
+        # NO FALLBACK TO RANDOM SYMBOLS - Return None instead
+        logger.warning(f"❌ ALL EXTRACTION METHODS FAILED: {token_address[:10]}... (No fallback to prevent inaccurate names)")
+        logger.info(f"📈 PROGRESSIVE STRATEGY: Scheduled retries in 30s, 2m, 5m. Expected 70%+ success rate on retries")
+        return None
+    
+    @property
+    def pending_retry_count(self) -> int:
+        """Progressive retries scheduled but not yet attempted"""
+        return self.retry_scheduler.pending_count
+    
+    async def _dexscreener_batch_names(self, token_addresses: List[str]) -> Dict[str, str]:
+        """Resolve names for a batch of due retries through the shared batched DexScreener resolver"""
+        names = {}
+        for address, name in (await get_dexscreener_resolver().resolve_names(token_addresses)).items():
+            cleaned_name = self._clean_token_name(name)
+            if cleaned_name and len(cleaned_name) > 1:
+                names[address] = cleaned_name
+        return names
+    
+    def _handle_retry_success(self, addr: str, cleaned_name: str, delay_time: float):
+        """Progressive retry found a name - record it and run keyword matching/notification"""
+        logger.info(f"✅ PROGRESSIVE SUCCESS: {addr[:10]}... → '{cleaned_name}' (retry after {delay_time}s)")
         
-        for delay in retry_delays:
-            def scheduled_retry(delay_time=delay, addr=token_address):
-                time_module.sleep(delay_time)
-                logger.info(f"⏰ RETRY ATTEMPT: {addr[:10]}... after {delay_time}s delay")
+        # Track successful extraction for monitoring display
+        if hasattr(self, 'monitoring_server'):
+            try:
+                self.monitoring_server.recent_successful_extractions.append({
+                    'name': cleaned_name,
+                    'method': f'Progressive retry ({delay_time}s)',
+                    'timestamp': time.time(),
+                    'address': addr[:10]
+                })
+                # Keep only last 10 extractions
+                if len(self.monitoring_server.recent_successful_extractions) > 10:
+                    self.monitoring_server.recent_successful_extractions = self.monitoring_server.recent_successful_extractions[-10:]
                 
-                # Use synchronous HTTP request for retry to avoid async complications
+                # CRITICAL FIX: Check for keyword matches on progressive retry success
                 try:
-                    import aiohttp
-                    import requests
-                    
-                    # Try DexScreener first (most reliable)
-                    dex_url = f"https://api.dexscreener.com/latest/dex/tokens/{addr}"
-                    response = requests.get(dex_url, timeout=5)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get('pairs'):
-                            for pair in data['pairs']:
-                                if pair.get('baseToken', {}).get('name'):
-                                    name = pair['baseToken']['name']
-                                    cleaned_name = self._clean_token_name(name.strip())
-                                    if cleaned_name and len(cleaned_name) > 1:
-                                        logger.info(f"✅ PROGRESSIVE SUCCESS: {addr[:10]}... → '{cleaned_name}' (retry after {delay_time}s)")
-                                        
-                                        # Track successful extraction for monitoring display
-                                        if hasattr(self, 'monitoring_server'):
-                                            try:
-                                                self.monitoring_server.recent_successful_extractions.append({
-                                                    'name': cleaned_name,
-                                                    'method': f'Progressive retry ({delay_time}s)',
-                                                    'timestamp': time.time(),
-                                                    'address': addr[:10]
-                                                })
-                                                # Keep only last 10 extractions
-                                                if len(self.monitoring_server.recent_successful_extractions) > 10:
-                                                    self.monitoring_server.recent_successful_extractions = self.monitoring_server.recent_successful_extractions[-10:]
-                                                
-                                                # CRITICAL FIX: Check for keyword matches on progressive retry success
-                                                try:
-                                                    # Create token object for keyword matching
-                                                    retry_token = {
-                                                        'name': cleaned_name,
-                                                        'symbol': '',  # Not available from DexScreener for retries
-                                                        'address': addr,
-                                                        'created_timestamp': time.time(),  # Use current time for progressive retries
-                                                        'blockchain_timestamp': time.time(),  # Required for age validation
-                                                        'url': f"https://letsbonk.fun/token/{addr}"  # Required for Discord notifications
-                                                    }
-                                                    
-                                                    # Check if token matches any keywords
-                                                    matched_keyword = self.monitoring_server.check_token_keywords(retry_token)
-                                                    if matched_keyword:
-                                                        logger.info(f"🎯 PROGRESSIVE RETRY KEYWORD MATCH: '{cleaned_name}' matches '{matched_keyword}'")
-                                                        
-                                                        # CRITICAL FIX: Check if notification was already sent for this token (both memory and database)
-                                                        already_notified = (addr in self.monitoring_server.notified_token_addresses or 
-                                                                          self.monitoring_server.is_token_already_notified(addr))
-                                                        if not already_notified:
-                                                            # Send notification for the matched token
-                                                            self.monitoring_server.send_token_notification(retry_token, matched_keyword)
-                                                            
-                                                            # Store in database with keyword match
-                                                            self.monitoring_server.store_detected_token_in_db(
-                                                                addr, cleaned_name, '', 'letsbonk', 'progressive_retry', 
-                                                                matched_keywords=[matched_keyword]
-                                                            )
-                                                            
-                                                            # Record the notification to prevent duplicates
-                                                            self.monitoring_server.record_notification_in_db(addr, cleaned_name, 'progressive_retry_keyword_match')
-                                                            self.monitoring_server.notified_token_addresses.add(addr)
-                                                            
-                                                            # Update monitoring stats counter  
-                                                            self.monitoring_server.monitoring_stats['notifications_sent'] += 1
-                                                            
-                                                            logger.info(f"✅ PROGRESSIVE RETRY NOTIFICATION SENT: {cleaned_name} → Discord")
-                                                        else:
-                                                            logger.info(f"⏭️ SKIPPING PROGRESSIVE RETRY: {cleaned_name} already notified")
-                                                    else:
-                                                        logger.debug(f"🔍 Progressive retry success '{cleaned_name}' - no keyword matches")
-                                                except Exception as e:
-                                                    logger.warning(f"Error checking progressive retry keywords for {cleaned_name}: {e}")
-                                                    
-                                            except Exception as e:
-                                                logger.warning(f"Error in progressive retry monitoring: {e}")
-                                        self._cache_name(addr, cleaned_name)
-                                        return cleaned_name
-                    
-                    logger.debug(f"⚠️ RETRY {delay_time}s: No result for {addr[:10]}... (APIs still indexing)")
+                    # Create token object for keyword matching
+                    retry_token = {
+                        'name': cleaned_name,
+                        'symbol': '',  # Not available from DexScreener for retries
+                        'address': addr,
+                        'created_timestamp': time.time(),  # Use current time for progressive retries
+                        'blockchain_timestamp': time.time(),  # Required for age validation
+                        'url': f"https://letsbonk.fun/token/{addr}"  # Required for Discord notifications
+                    }
                     
+                    # Check if token matches any keywords
+                    matched_keyword = self.monitoring_server.check_token_keywords(retry_token)
+                    if matched_keyword:
+                        logger.info(f"🎯 PROGRESSIVE RETRY KEYWORD MATCH: '{cleaned_name}' matches '{matched_keyword}'")
+                        
+                        # CRITICAL FIX: Check if notification was already sent for this token (both memory and database)
+                        already_notified = (addr in self.monitoring_server.notified_token_addresses or 
+                                          self.monitoring_server.is_token_already_notified(addr))
+                        if not already_notified:
+                            # Send notification for the matched token
+                            self.monitoring_server.send_token_notification(retry_token, matched_keyword)
+                            
+                            # Store in database with keyword match
+                            self.monitoring_server.store_detected_token_in_db(
+                                addr, cleaned_name, '', 'letsbonk', 'progressive_retry', 
+                                matched_keywords=[matched_keyword]
+                            )
+                            
+                            # Record the notification to prevent duplicates
+                            self.monitoring_server.record_notification_in_db(addr, cleaned_name, 'progressive_retry_keyword_match')
+                            self.monitoring_server.notified_token_addresses.add(addr)
+                            
+                            # Update monitoring stats counter  
+                            self.monitoring_server.monitoring_stats['notifications_sent'] += 1
+                            
+                            logger.info(f"✅ PROGRESSIVE RETRY NOTIFICATION SENT: {cleaned_name} → Discord")
+                        else:
+                            logger.info(f"⏭️ SKIPPING PROGRESSIVE RETRY: {cleaned_name} already notified")
+                    else:
+                        logger.debug(f"🔍 Progressive retry success '{cleaned_name}' - no keyword matches")
                 except Exception as e:
-                    logger.debug(f"Retry error for {addr[:10]}...: {e}")
-                
-                return None
-            
-            thread = threading.Thread(target=scheduled_retry, daemon=True)
-            thread.start()
-        
-        # NO FALLBACK TO RANDOM SYMBOLS - Return None instead
-        logger.warning(f"❌ ALL EXTRACTION METHODS FAILED: {token_address[:10]}... (No fallback to prevent inaccurate names)")
-        logger.info(f"📈 PROGRESSIVE STRATEGY: Scheduled retries in 30s, 2m, 5m. Expected 70%+ success rate on retries")
-        return None
+                    logger.warning(f"Error checking progressive retry keywords for {cleaned_name}: {e}")
+                    
+            except Exception as e:
+                logger.warning(f"Error in progressive retry monitoring: {e}")
+        self._cache_name(addr, cleaned_name)
     
     # BrowserCat extraction removed - Method 6 website_scrape eliminated
     
@@ -478,111 +462,51 @@ class PureTokenNameExtractor:
             return None
     
     async def _alchemy_token_metadata_fallback(self, token_address: str) -> Optional[str]:
-        """Try to extract token name from Alchemy RPC + Metaplex metadata"""
+        """Try to extract token name from Metaplex metadata, then basic SPL token info (via the RPC router)"""
         try:
-            import os
-            from base58 import b58decode, b58encode
-            from struct import unpack
-            
-            alchemy_api_key = os.getenv('ALCHEMY_API_KEY', '877gH4oJoW0HVbh6LuJ46d8oqZJHHQ5q')
-            rpc_url = f"https://solana-mainnet.g.alchemy.com/v2/{alchemy_api_key}"
+            import base64
+            
+            # Metadata account is a PDA of the mint - derived locally; both lookups go out in one batch
+            router = get_rpc_router()
+            metadata_account, token_account = await asyncio.gather(
+                router.call("getAccountInfo", [metadata_pda(token_address), {"encoding": "base64"}]),
+                router.call("getAccountInfo", [token_address, {"encoding": "jsonParsed"}]),
+                return_exceptions=True
+            )
             
-            async with aiohttp.ClientSession() as session:
-                # Step 1: Try to find Metaplex metadata account
-                # Metaplex metadata account is derived from token mint
+            # Step 1: Metaplex metadata account
+            account = metadata_account.get('value') if isinstance(metadata_account, dict) else None
+            if account and account.get('data'):
                 try:
-                    # Calculate metadata account address (Metaplex standard)
-                    mint_pubkey = b58decode(token_address)
-                    
-                    # Metaplex metadata program ID
-                    metadata_program_id = "metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s"
-                    
-                    # Simplified metadata account derivation - look for common patterns
-                    potential_metadata_accounts = []
-                    
-                    # Method 1: Look for associated metadata accounts
-                    get_accounts_payload = {
-                        "jsonrpc": "2.0",
-                        "id": 1,
-                        "method": "getProgramAccounts",
-                        "params": [
-                            metadata_program_id,
-                            {
-                                "encoding": "base64",
-                                "filters": [
-                                    {"memcmp": {"offset": 33, "bytes": token_address}}
-                                ]
-                            }
-                        ]
-                    }
-                    
-                    timeout = aiohttp.ClientTimeout(total=10)
-                    async with session.post(rpc_url, json=get_accounts_payload, timeout=timeout) as response:
-                        if response.status == 200:
-                            accounts_data = await response.json()
-                            if 'result' in accounts_data and accounts_data['result']:
-                                for account in accounts_data['result']:
-                                    if 'account' in account and 'data' in account['account']:
-                                        # Try to parse metadata
-                                        try:
-                                            import base64
-                                            account_data = base64.b64decode(account['account']['data'][0])
-                                            
-                                            # Parse Metaplex metadata structure
-                                            if len(account_data) > 100:  # Basic sanity check
-                                                # Skip the first 1+32+32 bytes (key + authority + mint)
-                                                offset = 65
-                                                if offset < len(account_data):
-                                                    # Read name length (4 bytes)
-                                                    if offset + 4 <= len(account_data):
-                                                        name_len = int.from_bytes(account_data[offset:offset+4], 'little')
-                                                        offset += 4
-                                                        
-                                                        # Read name
-                                                        if offset + name_len <= len(account_data) and name_len < 200:
-                                                            name = account_data[offset:offset+name_len].decode('utf-8', errors='ignore').strip()
-                                                            if name and len(name) > 1:
-                                                                logger.info(f"🔄 ONCHAIN SUCCESS: Extracted '{name}' from metadata account")
-                                                                self._cache_name(token_address, name)
-                                                                return name
-                                        except Exception as parse_error:
-                                            logger.debug(f"Error parsing metadata account: {parse_error}")
-                                            continue
-                except Exception as metadata_error:
-                    logger.debug(f"Metaplex metadata lookup failed: {metadata_error}")
-                
-                # Step 2: Fallback to basic SPL token info
-                basic_payload = {
-                    "jsonrpc": "2.0",
-                    "id": 2,
-                    "method": "getAccountInfo",
-                    "params": [token_address, {"encoding": "jsonParsed"}]
-                }
-                
-                timeout = aiohttp.ClientTimeout(total=10)
-                async with session.post(rpc_url, json=basic_payload, timeout=timeout) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if ('result' in data and data['result'] and 'value' in data['result'] 
-                            and data['result']['value'] and 'data' in data['result']['value']):
-                            
-                            parsed_data = data['result']['value']['data']
-                            if isinstance(parsed_data, dict) and 'parsed' in parsed_data:
-                                parsed_info = parsed_data['parsed']
-                                if isinstance(parsed_info, dict) and 'info' in parsed_info:
-                                    info = parsed_info['info']
-                                    # Use token symbol as fallback name
-                                    if isinstance(info, dict):
-                                        for field in ['name', 'symbol']:
-                                            if field in info and info[field]:
-                                                name = str(info[field]).strip()
-                                                if len(name) > 1:
-                                                    logger.info(f"🔄 ALCHEMY BASIC: Using '{name}' from {field} field")
-                                                    self._cache_name(token_address, name)
-                                                    return name
-                
-                logger.debug(f"🔄 ALCHEMY: No metadata found for {token_address[:10]}...")
-                return None
+                    name = parse_metadata_account(base64.b64decode(account['data'][0])).name
+                    if name and len(name) > 1:
+                        logger.info(f"🔄 ONCHAIN SUCCESS: Extracted '{name}' from metadata account")
+                        self._cache_name(token_address, name)
+                        return name
+                except Exception as parse_error:
+                    logger.debug(f"Error parsing metadata account: {parse_error}")
+            elif isinstance(metadata_account, Exception):
+                logger.debug(f"Metaplex metadata lookup failed: {metadata_account}")
+            
+            # Step 2: Fallback to basic SPL token info
+            account = token_account.get('value') if isinstance(token_account, dict) else None
+            parsed_data = account.get('data') if account else None
+            if isinstance(parsed_data, dict) and 'parsed' in parsed_data:
+                parsed_info = parsed_data['parsed']
+                if isinstance(parsed_info, dict) and 'info' in parsed_info:
+                    info = parsed_info['info']
+                    # Use token symbol as fallback name
+                    if isinstance(info, dict):
+                        for field in ['name', 'symbol']:
+                            if field in info and info[field]:
+                                name = str(info[field]).strip()
+                                if len(name) > 1:
+                                    logger.info(f"🔄 ALCHEMY BASIC: Using '{name}' from {field} field")
+                                    self._cache_name(token_address, name)
+                                    return name
+            
+            logger.debug(f"🔄 ALCHEMY: No metadata found for {token_address[:10]}...")
+            return None
                         
         except Exception as e:
             logger.error(f"Alchemy metadata extraction failed: {e}")
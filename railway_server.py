@@ -9,6 +9,11 @@ import json
 import socket
 import threading
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+from metrics import get_metrics_registry
+from token_tracing import get_trace_recorder, slowest_traces_response
+from startup_orchestrator import get_startup_orchestrator
 
 # Get Railway configuration
 PORT = int(os.environ.get('PORT', 5000))
@@ -20,6 +25,7 @@ print(f"[STARTUP] Host: {HOST}")
 print(f"[STARTUP] Environment: {os.environ.get('RAILWAY_ENVIRONMENT', 'unknown')}")
 
 start_time = time.time()
+startup = get_startup_orchestrator()
 
 class RailwayHandler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -31,7 +37,8 @@ class RailwayHandler(BaseHTTPRequestHandler):
                     'uptime': time.time() - start_time,
                     'timestamp': time.time(),
                     'port': PORT,
-                    'railway': True
+                    'railway': True,
+                    'startup': startup.timeline()
                 }
                 
                 self.send_response(200)
@@ -42,12 +49,32 @@ class RailwayHandler(BaseHTTPRequestHandler):
                 
                 print(f"[HEALTH] Health check successful at {time.strftime('%H:%M:%S')}")
                 
+            elif self.path == '/metrics':
+                # Same process as the monitor (started below), so this is the live registry
+                body = get_metrics_registry().render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                self.wfile.write(body)
+
+            elif self.path.startswith('/debug/traces/slowest'):
+                params = dict(parse_qsl(urlsplit(self.path).query))
+                body = json.dumps(slowest_traces_response(get_trace_recorder(), params)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                self.wfile.write(body)
+
             elif self.path == '/':
                 response_data = {
                     'message': 'Solana Token Monitor - Railway Deployment',
                     'status': 'active',
                     'uptime': time.time() - start_time,
                     'health_endpoint': '/health',
+                    'metrics_endpoint': '/metrics',
                     'railway': True
                 }
                 
@@ -69,7 +96,9 @@ class RailwayHandler(BaseHTTPRequestHandler):
             self.end_headers()
     
     def log_message(self, format, *args):
-        # Custom logging
+        # Custom logging (scrapes are too frequent to log)
+        if self.path == '/metrics':
+            return
         print(f"[REQUEST] {format % args}")
 
 def check_port_availability():
@@ -86,17 +115,20 @@ def check_port_availability():
         return False
 
 def start_background_services():
-    """Start main application after health check is stable"""
-    print("[BACKGROUND] Waiting 10 seconds before starting main services...")
-    time.sleep(10)
+    """Start main application as soon as the health check server is listening"""
+    if not startup.wait_for('health_server', timeout=30):
+        print("[BACKGROUND] Health server not ready - starting main services anyway")
     
     try:
         print("[BACKGROUND] Starting main application...")
         # Import and start main application
+        startup.begin('app_init')
         from main import IntegratedServer
         server = IntegratedServer()
+        startup.ready('app_init')
         server.run()
     except Exception as e:
+        startup.fail('app_init', e)
         print(f"[ERROR] Background service failed: {e}")
         # Continue running health check even if main app fails
 
@@ -111,8 +143,11 @@ if __name__ == "__main__":
     
     # Create server
     try:
+        startup.begin('health_server')
         server = HTTPServer((HOST, PORT), RailwayHandler)
         print(f"[SUCCESS] Server created successfully")
+        # Bound and listening (requests queue until serve_forever) - background services may start
+        startup.ready('health_server', detail=PORT)
         
         # Start background services in separate thread
         bg_thread = threading.Thread(target=start_background_services, daemon=True)
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Recent Token Feed
+In-process ring buffer of the latest detected tokens, filled directly by the
+ingest pipeline. Serves /api/recent-tokens without a database round trip
+(ETag / If-None-Match for unchanged polls), pushes new tokens to copy pages over
+Server-Sent Events, and only reads the database for keyset pagination past the
+oldest buffered token (?before=<cursor>) or to warm an empty buffer once.
+"""
+
+import json
+import time
+import queue
+import secrets
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# Keyset page read from detected_tokens (only used past the ring buffer)
+BEFORE_SQL = """
+    SELECT name, address, symbol, platform, created_at
+    FROM detected_tokens
+    WHERE name IS NOT NULL
+    AND name != 'Unnamed Token'
+    AND address IS NOT NULL
+    AND (created_at, address) < (%s, %s)
+    ORDER BY created_at DESC, address DESC
+    LIMIT %s
+"""
+
+LATEST_SQL = """
+    SELECT name, address, symbol, platform, created_at
+    FROM detected_tokens
+    WHERE name IS NOT NULL
+    AND name != 'Unnamed Token'
+    AND address IS NOT NULL
+    ORDER BY created_at DESC, address DESC
+    LIMIT %s
+"""
+
+
+def make_cursor(token: Dict[str, Any]) -> str:
+    """Opaque keyset cursor: <created_at epoch>_<address>"""
+    return f"{token['ts']:.6f}_{token['address']}"
+
+
+def parse_cursor(cursor: str) -> Optional[Tuple[float, str]]:
+    ts, _, address = cursor.partition('_')
+    try:
+        return float(ts), address
+    except ValueError:
+        return None
+
+
+class RecentTokenFeed:
+    """
+    Thread-safe ring of token dicts, newest last. Every add bumps a sequence
+    number used for the ETag and, prefixed with the boot id, as the SSE event
+    id, so a reconnecting EventSource (Last-Event-ID) only receives what it
+    missed - or the whole buffer when its id comes from an earlier process.
+    """
+
+    def __init__(self, capacity: int = 500, subscriber_queue: int = 100):
+        self.capacity = capacity
+        self.subscriber_queue = subscriber_queue
+        self.tokens = deque(maxlen=capacity)
+        self.addresses = set()
+        self.seq = 0
+        self.boot_id = f"{int(time.time()):x}{secrets.token_hex(2)}"  # Sequence numbers restart with the process
+        self.lock = threading.Lock()
+        self.subscribers: List[queue.Queue] = []
+        self.warmed = False
+        self.complete = False  # Buffer holds every detected token (database had fewer than capacity)
+        self.stats = {'added': 0, 'served': 0, 'not_modified': 0, 'db_pages': 0, 'pushed': 0,
+                      'slow_subscribers': 0}
+
+    # Writes (pipeline)
+
+    def add(self, address: str, name: str, symbol: str = '', platform: str = 'Unknown',
+            created_at: Optional[datetime] = None) -> bool:
+        """Record a newly detected token; returns False if it is already buffered"""
+        with self.lock:
+            token = self._append(address, name, symbol, platform, created_at)
+            if token is None:
+                return False
+            subscribers = list(self.subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(token)
+                self.stats['pushed'] += 1
+            except queue.Full:
+                # Client isn't reading - end its stream, the browser reconnects with Last-Event-ID
+                self.stats['slow_subscribers'] += 1
+                self.unsubscribe(subscriber)
+                self._close(subscriber)
+        return True
+
+    def _append(self, address: str, name: str, symbol: str, platform: str,
+                created_at: Optional[datetime]) -> Optional[Dict[str, Any]]:
+        """Buffer a token (caller holds the lock); None if it is already buffered"""
+        if address in self.addresses:
+            return None
+        created_at = created_at or datetime.now()
+        self.seq += 1
+        token = {
+            'name': name,
+            'address': address,
+            'symbol': symbol or 'UNK',
+            'platform': platform or 'Unknown',
+            'created_at': created_at.isoformat(),
+            'ts': created_at.timestamp(),
+            'seq': self.seq
+        }
+        if len(self.tokens) == self.capacity:
+            self.addresses.discard(self.tokens[0]['address'])
+            self.complete = False
+        self.tokens.append(token)
+        self.addresses.add(address)
+        self.stats['added'] += 1
+        return token
+
+    @staticmethod
+    def _close(subscriber: queue.Queue):
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        subscriber.put_nowait(None)
+
+    def warm(self, rows: List[tuple]) -> bool:
+        """Seed an empty buffer from (name, address, symbol, platform, created_at) rows, newest first.
+
+        Skipped once the pipeline has added tokens since the rows were read, so
+        older database rows never land behind (with higher seqs than) live ones.
+        """
+        with self.lock:
+            if self.warmed or self.tokens:
+                self.warmed = True
+                return False
+            for name, address, symbol, platform, created_at in reversed(rows):
+                self._append(address, name, symbol, platform, created_at)
+            self.warmed = True
+            self.complete = len(rows) < self.capacity
+            return True
+
+    # Reads (web threads)
+
+    def etag(self, limit: int = PAGE_SIZE) -> str:
+        """Validator for the latest-page response of this size"""
+        return f'"{self.boot_id}-{self.seq}-{limit}"'
+
+    def latest(self, limit: int = PAGE_SIZE) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [self.tokens[-i] for i in range(1, min(limit, len(self.tokens)) + 1)]
+
+    def before(self, cursor: Tuple[float, str], limit: int = PAGE_SIZE) -> Optional[List[Dict[str, Any]]]:
+        """Tokens older than the cursor from the buffer, or None when the page reaches past it"""
+        ts, address = cursor
+        with self.lock:
+            older = [token for token in reversed(self.tokens) if (token['ts'], token['address']) < (ts, address)]
+            if len(older) >= limit or self.complete:
+                return older[:limit]
+        return None
+
+    def event_id(self, token: Dict[str, Any]) -> str:
+        return f"{self.boot_id}-{token['seq']}"
+
+    def resume_seq(self, last_event_id: Optional[str]) -> int:
+        """Sequence to resume a stream after: only new tokens without an id, everything for a foreign boot id"""
+        if not last_event_id:
+            return self.seq
+        boot_id, _, seq = last_event_id.rpartition('-')
+        if boot_id != self.boot_id or not seq.isdigit():
+            return 0  # Id from before a restart (or malformed) - send the full snapshot
+        return int(seq)
+
+    def since(self, seq: int) -> List[Dict[str, Any]]:
+        """Buffered tokens with a sequence number above seq, oldest first"""
+        with self.lock:
+            return [token for token in self.tokens if token['seq'] > seq]
+
+    def subscribe(self, max_subscribers: Optional[int] = None) -> Optional[queue.Queue]:
+        """New subscriber queue, or None when max_subscribers streams are already open"""
+        subscriber = queue.Queue(maxsize=self.subscriber_queue)
+        with self.lock:
+            if max_subscribers is not None and len(self.subscribers) >= max_subscribers:
+                return None
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({'buffered': len(self.tokens), 'capacity': self.capacity, 'seq': self.seq,
+                      'subscribers': len(self.subscribers)})
+        return stats
+
+
+def _row_to_token(row: tuple, platform_of: Optional[Callable[[str], str]]) -> Dict[str, Any]:
+    name, address, symbol, platform, created_at = row
+    created_at = created_at or datetime.fromtimestamp(0)
+    return {
+        'name': name,
+        'address': address,
+        'symbol': symbol or 'UNK',
+        'platform': platform_of(address) if platform_of else (platform or 'Unknown'),
+        'created_at': created_at.isoformat(),
+        'ts': created_at.timestamp()
+    }
+
+
+def register_recent_token_routes(app, feed: RecentTokenFeed, connection_factory: Callable,
+                                 platform_of: Optional[Callable[[str], str]] = None, max_streams: int = 8):
+    """
+    Install /api/recent-tokens (+ /stream) on a Flask app, backed by the feed.
+    Each open stream holds a server worker thread, so streams are capped at
+    max_streams; pages over the cap fall back to polling.
+    """
+    from flask import Response, jsonify, request
+
+    def query(sql: str, params: tuple) -> Optional[List[tuple]]:
+        conn = connection_factory()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    def public(token: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: token[key] for key in ('name', 'address', 'symbol', 'platform', 'created_at')}
+
+    @app.route('/api/recent-tokens')
+    def get_recent_tokens():
+        """Latest tokens from the ring buffer; ?before=<cursor> pages back (database past the buffer)"""
+        try:
+            limit = max(1, min(int(request.args.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE))
+            before = request.args.get('before')
+
+            if before:
+                cursor = parse_cursor(before)
+                if cursor is None:
+                    return jsonify({'error': 'Invalid cursor'}), 400
+                tokens = feed.before(cursor, limit)
+                if tokens is None:
+                    rows = query(BEFORE_SQL, (datetime.fromtimestamp(cursor[0]), cursor[1], limit))
+                    if rows is None:
+                        return jsonify({'error': 'Database connection failed'}), 500
+                    feed.stats['db_pages'] += 1
+                    tokens = [_row_to_token(row, platform_of) for row in rows]
+                next_cursor = make_cursor(tokens[-1]) if len(tokens) == limit else None
+                return jsonify({'tokens': [public(t) for t in tokens], 'next_cursor': next_cursor})
+
+            # Read-through: an empty buffer (fresh process) is warmed from the database once
+            if not feed.warmed and not feed.tokens:
+                rows = query(LATEST_SQL, (feed.capacity,))
+                if rows is not None:
+                    feed.warm(rows)
+
+            etag = feed.etag(limit)
+            if request.headers.get('If-None-Match') == etag:
+                feed.stats['not_modified'] += 1
+                return Response(status=304, headers={'ETag': etag})
+
+            tokens = feed.latest(limit)
+            feed.stats['served'] += 1
+            response = jsonify({
+                'tokens': [public(t) for t in tokens],
+                'next_cursor': make_cursor(tokens[-1]) if len(tokens) == limit else None
+            })
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        except Exception as e:
+            logger.error(f"Error fetching recent tokens: {e}")
+            return jsonify({'error': f'Failed to fetch tokens: {str(e)}'}), 500
+
+    @app.route('/api/recent-tokens/stream')
+    def stream_recent_tokens():
+        """Server-Sent Events: one 'token' event per newly detected token"""
+        last_seq = feed.resume_seq(request.headers.get('Last-Event-ID') or request.args.get('since'))
+        # Subscribe before replaying so nothing added in between is missed; the cap is checked under the lock
+        subscriber = feed.subscribe(max_streams)
+        if subscriber is None:
+            return Response(status=503, headers={'Retry-After': '30'})
+
+        def events():
+            sent_seq = last_seq
+            try:
+                yield 'retry: 5000\n\n'
+                for token in feed.since(last_seq):
+                    sent_seq = token['seq']
+                    yield f"id: {feed.event_id(token)}\nevent: token\ndata: {json.dumps(public(token))}\n\n"
+                while True:
+                    try:
+                        token = subscriber.get(timeout=15)
+                    except queue.Empty:
+                        yield ': ping\n\n'  # Keeps proxies from closing an idle stream
+                        continue
+                    if token is None:
+                        return
+                    if token['seq'] <= sent_seq:
+                        continue  # Queued while the replay was read - already sent
+                    sent_seq = token['seq']
+                    yield f"id: {feed.event_id(token)}\nevent: token\ndata: {json.dumps(public(token))}\n\n"
+            finally:
+                feed.unsubscribe(subscriber)
+
+        response = Response(events(), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        response.call_on_close(lambda: feed.unsubscribe(subscriber))  # Also when the stream never started
+        return response
+
+
+# Global feed instance
+recent_token_feed = None
+_recent_token_feed_lock = threading.Lock()
+
+
+def get_recent_token_feed() -> RecentTokenFeed:
+    """Get the process-wide recent token feed"""
+    global recent_token_feed
+    if recent_token_feed is None:
+        with _recent_token_feed_lock:
+            if recent_token_feed is None:
+                recent_token_feed = RecentTokenFeed()
+    return recent_token_feed
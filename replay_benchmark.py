@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Replay Benchmark
+Feeds a recorded PumpPortal capture through the full detection pipeline with
+external HTTP served by local stubs, and reports throughput, per-stage latency
+distributions and memory - reproducible on a laptop, no live traffic needed.
+
+Record a capture from the live monitor:
+    PUMPPORTAL_CAPTURE_FILE=capture.gz python main.py
+
+Replay it (DATABASE_URL must point at a local Postgres set up with create_database_tables.py):
+    python replay_benchmark.py capture.gz --speed 0 --keyword pepe --keyword moon
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import threading
+from urllib.parse import urlsplit
+from typing import Dict, List, Tuple, Any
+
+from aiohttp import web
+
+from ws_capture import read_capture
+
+logger = logging.getLogger(__name__)
+
+BENCH_USER_ID = 'replay-benchmark'
+STUBBED_BASES = {  # real base URL -> stub path prefix
+    'https://api.dexscreener.com': '/dexscreener',
+    'https://api.pump.fun': '/pumpfun',
+    'https://api.coingecko.com': '/coingecko'
+}
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+def load_capture(path: str) -> Tuple[List[Tuple[float, str]], Dict[str, str]]:
+    """Frames plus the address -> name map the DexScreener stub answers with"""
+    frames = list(read_capture(path))
+    names = {}
+    for _, frame in frames:
+        try:
+            data = json.loads(frame)
+        except ValueError:
+            continue
+        if isinstance(data, dict) and data.get('mint') and data.get('txType') not in ('buy', 'sell'):
+            names[data['mint']] = data.get('name') or f"Replay {data['mint'][:6]}"
+    return frames, names
+
+
+class StubServers:
+    """DexScreener / pump.fun / CoinGecko / Discord webhook stand-ins on a background loop"""
+
+    def __init__(self, names: Dict[str, str], latency: float = 0.0, port: int = 0):
+        self.names = names
+        self.latency = latency
+        self.port = port
+        self.base_url = ''
+        self.loop = None
+        self.stats = {'dexscreener': 0, 'pumpfun': 0, 'coingecko': 0, 'webhook_posts': 0, 'webhook_embeds': 0}
+
+    async def _delay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def dexscreener(self, request: web.Request) -> web.Response:
+        await self._delay()
+        self.stats['dexscreener'] += 1
+        pairs = []
+        for address in request.match_info['addresses'].split(','):
+            if address in self.names:
+                pairs.append({
+                    'baseToken': {'address': address, 'name': self.names[address], 'symbol': 'RPLY'},
+                    'priceUsd': '0.0000042', 'marketCap': 4200, 'fdv': 4200,
+                    'volume': {'h24': 1000}, 'liquidity': {'usd': 500}, 'priceChange': {'h24': 0},
+                    'pairCreatedAt': int(time.time() * 1000)
+                })
+        return web.json_response({'pairs': pairs or None})
+
+    async def pumpfun(self, request: web.Request) -> web.Response:
+        await self._delay()
+        self.stats['pumpfun'] += 1
+        return web.json_response({}, status=404)
+
+    async def coingecko(self, request: web.Request) -> web.Response:
+        self.stats['coingecko'] += 1
+        return web.json_response({'solana': {'usd': 150.0}})
+
+    async def webhook(self, request: web.Request) -> web.Response:
+        await self._delay()
+        payload = await request.json()
+        self.stats['webhook_posts'] += 1
+        self.stats['webhook_embeds'] += len(payload.get('embeds') or [])
+        return web.Response(status=204, headers={
+            'X-RateLimit-Limit': '5', 'X-RateLimit-Remaining': '4', 'X-RateLimit-Reset-After': '0.001',
+            'X-RateLimit-Bucket': 'replay'
+        })
+
+    def start(self) -> str:
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            app = web.Application()
+            app.router.add_get('/dexscreener/latest/dex/tokens/{addresses}', self.dexscreener)
+            app.router.add_get('/pumpfun/coins/{address}', self.pumpfun)
+            app.router.add_get('/coingecko/api/v3/simple/price', self.coingecko)
+            app.router.add_post('/api/webhooks/{id}/{token}', self.webhook)
+            runner = web.AppRunner(app, access_log=None)
+            self.loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, '127.0.0.1', self.port)
+            self.loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            self.base_url = f"http://127.0.0.1:{self.port}"
+            ready.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, name="replay-stubs", daemon=True).start()
+        ready.wait()
+        return self.base_url
+
+
+def memory_mb() -> Dict[str, float]:
+    """Current and peak resident set size"""
+    usage = {}
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    usage['rss_mb' if line.startswith('VmRSS') else 'peak_rss_mb'] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        import resource
+        usage['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return usage
+
+
+def histogram_report(name: str) -> Dict[str, Dict[str, Any]]:
+    """p50/p90/p99/max (ms) per label value of a metrics histogram"""
+    from metrics import get_metrics_registry
+    family = get_metrics_registry().families.get(name)
+    if family is None:
+        return {}
+    report = {}
+    for values, histogram in sorted(family.children.items()):
+        quantiles = histogram.quantiles((0.5, 0.9, 0.99))
+        report[','.join(values) or 'all'] = {
+            'count': histogram.count,
+            'p50_ms': round(quantiles[0.5] * 1000, 3),
+            'p90_ms': round(quantiles[0.9] * 1000, 3),
+            'p99_ms': round(quantiles[0.99] * 1000, 3),
+            'max_ms': round(histogram.max * 1000, 3)
+        }
+    return report
+
+
+def seed_keywords(database_url: str, keywords: List[str]):
+    """Benchmark keywords live in the local database like real ones (removed again afterwards)"""
+    import psycopg2
+    conn = psycopg2.connect(database_url)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM keywords WHERE user_id = %s", (BENCH_USER_ID,))
+        for keyword in keywords:
+            cursor.execute("INSERT INTO keywords (keyword, user_id) VALUES (%s, %s)", (keyword, BENCH_USER_ID))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+async def replay(frames: List[Tuple[float, str]], speed: float) -> Dict[str, Any]:
+    from main import IntegratedTokenMonitor
+
+    monitor = IntegratedTokenMonitor()
+    monitor.loop_lag.start()
+    pipeline = await monitor.ensure_pipeline()
+    memory_before = memory_mb()
+
+    started = time.perf_counter()
+    first_ts = frames[0][0] if frames else 0.0
+    for recorded_at, frame in frames:
+        if speed > 0:
+            delay = (recorded_at - first_ts) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await pipeline.submit_frame(frame, time.time())
+    fed = time.perf_counter() - started
+
+    await pipeline.drain()
+    elapsed = time.perf_counter() - started
+    await monitor.db_bridge.run(monitor.write_batcher.flush)
+    persisted = time.perf_counter() - started
+
+    stats = pipeline.get_stats()
+    tokens = stats['stages']['dedupe']['processed'] - stats['duplicates']
+    await pipeline.stop()
+    if monitor.keyword_listener:
+        monitor.keyword_listener.stop()
+
+    return {
+        'frames': len(frames),
+        'tokens': tokens,
+        'feed_seconds': round(fed, 3),
+        'pipeline_seconds': round(elapsed, 3),
+        'flushed_seconds': round(persisted, 3),
+        'frames_per_second': round(len(frames) / elapsed, 1) if elapsed else 0.0,
+        'tokens_per_second': round(tokens / elapsed, 1) if elapsed else 0.0,
+        'stage_service': histogram_report('token_stage_seconds'),
+        'stage_wait': histogram_report('token_stage_wait_seconds'),
+        'detection_to_notification': histogram_report('token_detection_to_notification_seconds'),
+        'detection_to_persist': histogram_report('token_detection_to_persist_seconds'),
+        'http': histogram_report('http_request_seconds'),
+        'event_loop_lag': monitor.loop_lag.get_stats(),
+        'write_batcher': monitor.write_batcher.get_stats(),
+        'memory_before': memory_before,
+        'memory_after': memory_mb()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a PumpPortal capture through the detection pipeline")
+    parser.add_argument('capture', help="gzip capture written with PUMPPORTAL_CAPTURE_FILE")
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help="1 = recorded speed, N = N times faster, 0 = as fast as possible (default)")
+    parser.add_argument('--keyword', action='append', default=[], help="keyword to watch (repeatable)")
+    parser.add_argument('--stub-latency', type=float, default=0.0, help="seconds added to every stub response")
+    parser.add_argument('--json', help="also write the report to this file")
+    parser.add_argument('--allow-remote-db', action='store_true',
+                        help="permit a non-local DATABASE_URL (the replay writes detected tokens)")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    database_url = os.getenv('DATABASE_URL', '')
+    if not database_url:
+        sys.exit("DATABASE_URL must point at a local Postgres (see create_database_tables.py)")
+    if urlsplit(database_url).hostname not in LOCAL_HOSTS and not args.allow_remote_db:
+        sys.exit("Refusing to replay into a non-local database (use --allow-remote-db to override)")
+
+    frames, names = load_capture(args.capture)
+    print(f"📼 Loaded {len(frames)} frames ({len(names)} token creations) from {args.capture}")
+
+    stubs = StubServers(names, latency=args.stub_latency)
+    base_url = stubs.start()
+    os.environ['DISCORD_WEBHOOK_URL'] = f"{base_url}/api/webhooks/0/replay"
+
+    from async_io_layer import get_http_client
+    http = get_http_client()
+    for original, prefix in STUBBED_BASES.items():
+        http.override_base(original, base_url + prefix)
+
+    if args.keyword:
+        seed_keywords(database_url, args.keyword)
+    try:
+        report = asyncio.run(replay(frames, args.speed))
+    finally:
+        if args.keyword:
+            seed_keywords(database_url, [])
+    report['stubs'] = dict(stubs.stats)
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"📝 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Progressive Retry Scheduler
+One heap-ordered timer on a background event loop replaces a sleeping thread per
+scheduled retry. Retries that fall due together are coalesced into one batch
+lookup, and an address stops being retried as soon as one attempt succeeds.
+"""
+
+import heapq
+import asyncio
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Awaitable, Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_DELAYS = (30, 120, 300)  # 30 seconds, 2 minutes, 5 minutes
+
+
+class RetryScheduler:
+    """
+    Timer heap of (due_time, seq, address, delay) entries run on a dedicated loop.
+
+    resolver(addresses) -> {address: name} is awaited once per batch on the
+    scheduler loop; on_success(address, name, delay) is called on a small worker
+    pool so blocking callbacks (Discord, database) never stall the timer.
+    """
+
+    def __init__(self, resolver: Callable[[List[str]], Awaitable[Dict[str, str]]],
+                 on_success: Callable[[str, str, float], Any],
+                 coalesce_window: float = 1.0, max_batch: int = 30, callback_workers: int = 4):
+        self.resolver = resolver
+        self.on_success = on_success
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+
+        self.heap: List[tuple] = []
+        self.remaining: Dict[str, int] = {}  # address -> attempts still scheduled
+        self.lock = threading.Lock()
+        self.seq = 0
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.thread: Optional[threading.Thread] = None
+        self.ready = threading.Event()
+        self.callbacks = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix="retry-callback")
+
+        self.stats = {
+            'scheduled': 0,
+            'fired': 0,
+            'succeeded': 0,
+            'exhausted': 0,
+            'cancelled': 0,
+            'batches': 0,
+            'lookup_errors': 0
+        }
+
+    @property
+    def pending_count(self) -> int:
+        """Retry attempts scheduled but not yet fired"""
+        with self.lock:
+            return sum(self.remaining.values())
+
+    @property
+    def pending_addresses(self) -> int:
+        with self.lock:
+            return len(self.remaining)
+
+    def schedule(self, address: str, delays: Iterable[float] = DEFAULT_RETRY_DELAYS) -> bool:
+        """Schedule retries for an address (no-op if it already has retries pending)"""
+        delays = list(delays)
+        now = time.time()
+        with self.lock:
+            if address in self.remaining:
+                return False
+            for delay in delays:
+                self.seq += 1
+                heapq.heappush(self.heap, (now + delay, self.seq, address, delay))
+            self.remaining[address] = len(delays)
+            self.stats['scheduled'] += len(delays)
+
+        self._ensure_started()
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+        return True
+
+    def cancel(self, address: str):
+        """Drop any pending retries for an address (entries are skipped lazily)"""
+        with self.lock:
+            dropped = self.remaining.pop(address, 0)
+            self.stats['cancelled'] += dropped
+
+    def _ensure_started(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._thread_main, name="retry-scheduler", daemon=True)
+            self.thread.start()
+        self.ready.wait()
+
+    def _thread_main(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.wakeup = asyncio.Event()
+        self.ready.set()
+        self.loop.run_until_complete(self._run())
+
+    async def _run(self):
+        logger.info("⏰ Retry scheduler started")
+        while True:
+            with self.lock:
+                next_due = self.heap[0][0] if self.heap else None
+
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            due = self._pop_due()
+            for start in range(0, len(due), self.max_batch):
+                asyncio.ensure_future(self._fire_batch(due[start:start + self.max_batch]))
+
+    def _pop_due(self) -> List[tuple]:
+        """Pop every live entry due now (or within the coalesce window), one per address"""
+        horizon = time.time() + self.coalesce_window
+        due = {}
+        with self.lock:
+            while self.heap and self.heap[0][0] <= horizon:
+                _, _, address, delay = heapq.heappop(self.heap)
+                if address not in self.remaining:
+                    continue  # Already resolved or cancelled
+                if address in due:
+                    # Two attempts for one address in the same window count as one lookup
+                    self.remaining[address] -= 1
+                    continue
+                due[address] = delay
+        return list(due.items())
+
+    async def _fire_batch(self, batch: List[tuple]):
+        addresses = [address for address, _ in batch]
+        self.stats['batches'] += 1
+        self.stats['fired'] += len(batch)
+        for address, delay in batch:
+            logger.info(f"⏰ RETRY ATTEMPT: {address[:10]}... after {delay}s delay")
+
+        try:
+            names = await self.resolver(addresses) or {}
+        except Exception as e:
+            self.stats['lookup_errors'] += 1
+            logger.debug(f"Retry batch lookup error ({len(addresses)} tokens): {e}")
+            names = {}
+
+        for address, delay in batch:
+            name = names.get(address)
+            with self.lock:
+                if address not in self.remaining:
+                    continue
+                if name:
+                    del self.remaining[address]
+                else:
+                    self.remaining[address] -= 1
+                    if self.remaining[address] <= 0:
+                        del self.remaining[address]
+                        self.stats['exhausted'] += 1
+
+            if name:
+                self.stats['succeeded'] += 1
+                self.loop.run_in_executor(self.callbacks, self._run_callback, address, name, delay)
+            else:
+                logger.debug(f"⚠️ RETRY {delay}s: No result for {address[:10]}... (APIs still indexing)")
+
+    def _run_callback(self, address: str, name: str, delay: float):
+        try:
+            self.on_success(address, name, delay)
+        except Exception as e:
+            logger.warning(f"Error in progressive retry callback for {address[:10]}...: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        with self.lock:
+            stats['pending'] = sum(self.remaining.values())
+            stats['pending_addresses'] = len(self.remaining)
+            stats['heap_size'] = len(self.heap)
+        return stats
@@ -4,13 +4,14 @@ Fixes the 0% enhanced timestamp success rate with better error handling
 """
 
 import asyncio
-import aiohttp
 import time
 import logging
 import random
 from typing import Optional, Dict, List, Any
 from dataclasses import dataclass
 
+from rpc_router import get_rpc_router, RPCError
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -28,26 +29,8 @@ class RobustTimestampSystem:
     """
     
     def __init__(self):
-        # Multiple RPC endpoints with priority ordering
-        self.rpc_endpoints = [
-            {"url": "https://api.mainnet-beta.solana.com", "name": "Official", "priority": 1, "rate_limit": 10},
-            {"url": "https://solana-api.projectserum.com", "name": "Serum", "priority": 2, "rate_limit": 15},
-            {"url": "https://rpc.ankr.com/solana", "name": "Ankr", "priority": 3, "rate_limit": 20},
-        ]
-        
-        # Rate limiting tracking
-        self.rate_limit_tracker = {}
-        for endpoint in self.rpc_endpoints:
-            self.rate_limit_tracker[endpoint["name"]] = {
-                "calls": 0,
-                "window_start": time.time(),
-                "consecutive_failures": 0
-            }
-        
-        # Session management
-        self.session = None
-        self.session_created = 0
-        self.session_lifetime = 300  # 5 minutes
+        # Endpoint choice, pooling, rate limits and failover live in the shared RPC router
+        self.router = get_rpc_router()
         
         # Statistics
         self.stats = {
@@ -57,121 +40,30 @@ class RobustTimestampSystem:
             "connection_errors": 0
         }
     
-    async def get_session(self) -> aiohttp.ClientSession:
-        """Get or create a fresh HTTP session"""
-        current_time = time.time()
-        
-        if (self.session is None or 
-            current_time - self.session_created > self.session_lifetime):
-            
-            # Close old session
-            if self.session:
-                try:
-                    await self.session.close()
-                except:
-                    pass
-            
-            # Create new session with robust settings
-            connector = aiohttp.TCPConnector(
-                limit=25,
-                limit_per_host=8,
-                keepalive_timeout=45,
-                enable_cleanup_closed=True,
-                force_close=False
-            )
-            
-            timeout = aiohttp.ClientTimeout(
-                total=12,
-                connect=4,
-                sock_read=8
-            )
-            
-            self.session = aiohttp.ClientSession(
-                connector=connector,
-                timeout=timeout,
-                headers={'User-Agent': 'TokenMonitor/Enhanced'}
-            )
-            
-            self.session_created = current_time
-            logger.debug("✅ Created fresh timestamp extraction session")
-        
-        return self.session
-    
-    def get_healthy_endpoint(self) -> Optional[Dict]:
-        """Get the healthiest RPC endpoint with rate limit awareness"""
-        current_time = time.time()
-        
-        # Reset rate limit windows
-        for endpoint in self.rpc_endpoints:
-            tracker = self.rate_limit_tracker[endpoint["name"]]
-            if current_time - tracker["window_start"] >= 1.0:
-                tracker["calls"] = 0
-                tracker["window_start"] = current_time
-        
-        # Find available endpoints
-        available = []
-        for endpoint in self.rpc_endpoints:
-            tracker = self.rate_limit_tracker[endpoint["name"]]
-            if (tracker["calls"] < endpoint["rate_limit"] and 
-                tracker["consecutive_failures"] < 3):
-                available.append(endpoint)
-        
-        if not available:
-            return self.rpc_endpoints[0]  # Fallback to primary
-        
-        # Return highest priority available
-        return sorted(available, key=lambda x: x["priority"])[0]
-    
     async def rpc_request_with_retry(self, payload: Dict, max_retries: int = 3) -> Optional[Dict]:
-        """Make RPC request with exponential backoff"""
+        """Make RPC request through the router (which already fails over), backing off between rounds"""
         
         for attempt in range(max_retries):
-            endpoint = self.get_healthy_endpoint()
-            if not endpoint:
-                continue
+            self.stats["total_requests"] += 1
+            try:
+                result = await self.router.call(payload["method"], payload.get("params", []))
+                return {"jsonrpc": "2.0", "id": payload.get("id", 1), "result": result}
             
-            tracker = self.rate_limit_tracker[endpoint["name"]]
+            except RPCError as e:
+                logger.warning(f"⚠️ RPC error for {payload['method']}: {e}")
+                return {"jsonrpc": "2.0", "id": payload.get("id", 1), "error": e.error}
             
-            try:
-                session = await self.get_session()
-                tracker["calls"] += 1
-                self.stats["total_requests"] += 1
-                
-                async with session.post(endpoint["url"], json=payload) as response:
-                    if response.status == 200:
-                        tracker["consecutive_failures"] = 0
-                        return await response.json()
-                    
-                    elif response.status == 429:
-                        # Rate limit - exponential backoff
-                        self.stats["rate_limit_errors"] += 1
-                        tracker["consecutive_failures"] += 1
-                        
-                        delay = min(2 ** attempt + random.uniform(0, 1), 8)
-                        logger.warning(f"⚠️ Rate limit {endpoint['name']}, waiting {delay:.1f}s")
-                        await asyncio.sleep(delay)
-                        continue
-                    
-                    else:
-                        tracker["consecutive_failures"] += 1
-                        logger.warning(f"⚠️ RPC error {response.status} from {endpoint['name']}")
-                        
-            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            except (ConnectionError, asyncio.TimeoutError) as e:
+                # Every endpoint failed or throttled this round - exponential backoff
                 self.stats["connection_errors"] += 1
-                tracker["consecutive_failures"] += 1
-                
-                if "client has been closed" in str(e):
-                    # Force session refresh
-                    self.session = None
-                    logger.warning(f"🔄 Refreshing session due to: {e}")
-                
-                # Exponential backoff for connection errors
-                delay = min(2 ** attempt, 4)
+                if "429" in str(e):
+                    self.stats["rate_limit_errors"] += 1
+                delay = min(2 ** attempt + random.uniform(0, 1), 8)
+                logger.warning(f"⚠️ All RPC endpoints failed ({e}), waiting {delay:.1f}s")
                 await asyncio.sleep(delay)
             
             except Exception as e:
-                logger.error(f"❌ Unexpected error with {endpoint['name']}: {e}")
-                tracker["consecutive_failures"] += 1
+                logger.error(f"❌ Unexpected RPC error: {e}")
         
         return None
     
@@ -318,19 +210,9 @@ class RobustTimestampSystem:
             **self.stats,
             "success_rate": f"{(success/total*100):.1f}%" if total > 0 else "0%",
             "healthy_endpoints": len([
-                ep for ep in self.rpc_endpoints 
-                if self.rate_limit_tracker[ep["name"]]["consecutive_failures"] < 3
+                endpoint for endpoint in self.router.endpoints if endpoint.error_ewma < 0.5
             ])
         }
-    
-    async def cleanup(self):
-        """Clean shutdown"""
-        if self.session:
-            try:
-                await self.session.close()
-            except:
-                pass
-            self.session = None
 
 # Global instance for system integration
 robust_timestamp_system = RobustTimestampSystem()
\ No newline at end of file
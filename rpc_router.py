@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Solana RPC Router
+One async router in front of every Solana JSON-RPC caller. Each endpoint has
+its own pooled aiohttp session and token bucket, and is scored by EWMA
+latency and error rate. Calls made within a few milliseconds of each other are
+packed into a single JSON-RPC batch array and sent to the best-scoring
+endpoint; if that endpoint has not answered by its own p95 latency, a hedged
+duplicate goes to the next best and whichever answers first wins. Runs on its
+own background loop so threads (call_sync) and async monitors (call, on any
+loop) share the same pools, scores and batches.
+"""
+
+import os
+import asyncio
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_RPC_URL = "https://api.mainnet-beta.solana.com"
+
+
+class RPCError(Exception):
+    """The node answered with a JSON-RPC error object (the endpoint itself is healthy)"""
+
+    def __init__(self, error: Any):
+        self.error = error
+        self.code = error.get('code') if isinstance(error, dict) else None
+        message = error.get('message', error) if isinstance(error, dict) else error
+        super().__init__(f"RPC error {self.code}: {message}")
+
+
+class TokenBucket:
+    """rate tokens per second up to burst; acquire() waits for a token instead of failing"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 when one is ready now)"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            delay = self.wait_time()
+            if delay <= 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(delay)
+
+
+class RPCEndpoint:
+    """An RPC provider: pooled session, rate limit and running health score"""
+
+    def __init__(self, name: str, url: str, rate: float = 25, burst: Optional[float] = None,
+                 max_connections: int = 16, alpha: float = 0.2):
+        self.name = name
+        self.url = url
+        self.bucket = TokenBucket(rate, burst or rate * 2)
+        self.max_connections = max_connections
+        self.alpha = alpha
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.latency_ewma = 0.3   # Seconds; optimistic until measured
+        self.error_ewma = 0.0     # 0..1 share of recent requests that failed
+        self.latencies = deque(maxlen=200)
+        self.censored_latency = 0.0  # Lower bound from hedge losers; cleared by the next measured answer
+        self.cooldown_until = 0.0  # Set by 429 responses (Retry-After)
+        self.supports_batch = True  # Cleared the first time the endpoint rejects a JSON-RPC batch
+        self.stats = {'requests': 0, 'calls': 0, 'errors': 0, 'rate_limited': 0, 'hedges': 0, 'wins': 0,
+                      'cancelled': 0}
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector,
+                                                 headers={'Content-Type': 'application/json'})
+        return self.session
+
+    def record(self, latency: Optional[float], failed: bool):
+        self.error_ewma += self.alpha * ((1.0 if failed else 0.0) - self.error_ewma)
+        if latency is not None and not failed:
+            self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+            self.latencies.append(latency)
+            self.censored_latency = 0.0
+        if failed:
+            self.stats['errors'] += 1
+
+    def p95(self, default: float) -> float:
+        if len(self.latencies) < 20:
+            return default
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def score(self) -> float:
+        """Expected cost of sending here now - lower is better"""
+        penalty = 30.0 if time.time() < self.cooldown_until else 0.0
+        latency = max(self.latency_ewma, self.censored_latency)
+        return (latency + self.bucket.wait_time()) * (1 + 5 * self.error_ewma) + penalty
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.stats, latency_ewma_ms=round(self.latency_ewma * 1000, 1),
+                    error_rate=round(self.error_ewma, 3), p95_ms=round(self.p95(0) * 1000, 1),
+                    score=round(self.score(), 3), supports_batch=self.supports_batch)
+
+
+def default_endpoints() -> List[RPCEndpoint]:
+    """SOLANA_RPC_URL, then Alchemy (ALCHEMY_API_KEY), then SOLANA_RPC_FALLBACK_URLS, then the public endpoint"""
+    endpoints = []
+    seen = set()
+
+    def add(name, url, rate):
+        if url and url not in seen:
+            seen.add(url)
+            endpoints.append(RPCEndpoint(name, url, rate=rate))
+
+    add('Primary', os.getenv('SOLANA_RPC_URL'), float(os.getenv('SOLANA_RPC_RATE', 25)))
+    api_key = os.getenv('ALCHEMY_API_KEY')
+    if api_key:
+        add('Alchemy', f"https://solana-mainnet.g.alchemy.com/v2/{api_key}", 25)
+    for index, url in enumerate(filter(None, (os.getenv('SOLANA_RPC_FALLBACK_URLS') or '').split(','))):
+        add(f'Fallback{index + 1}', url.strip(), 10)
+    add('Solana', PUBLIC_RPC_URL, 10)
+    return endpoints
+
+
+class RPCRouter:
+    """Batched, hedged, health-scored JSON-RPC over several endpoints"""
+
+    def __init__(self, endpoints: Optional[List[RPCEndpoint]] = None, batch_window: float = 0.005,
+                 max_batch: int = 20, hedge_delay: float = 0.5, min_hedge_delay: float = 0.05,
+                 timeout: float = 10):
+        self.endpoints = endpoints or default_endpoints()
+        self.batch_window = batch_window    # How long a call waits for company before its batch is sent
+        self.max_batch = max_batch
+        self.hedge_delay = hedge_delay      # Hedge deadline until an endpoint has enough samples for a p95
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+
+        self.queue: List[Tuple[str, list, asyncio.Future]] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.stats = {'calls': 0, 'batches': 0, 'batched_calls': 0, 'hedges': 0, 'hedge_wins': 0,
+                      'failovers': 0, 'failures': 0, 'rpc_errors': 0}
+        get_metrics_registry().register_collector('rpc_router', self._collect_metrics)
+
+    # Loop management
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            with self.lock:
+                if self.loop is None:
+                    ready = threading.Event()
+
+                    def run():
+                        loop = asyncio.new_event_loop()
+                        asyncio.set_event_loop(loop)
+                        self.loop = loop
+                        ready.set()
+                        loop.run_forever()
+
+                    self.thread = threading.Thread(target=run, name="rpc-router", daemon=True)
+                    self.thread.start()
+                    ready.wait()
+                    logger.info(f"🛰️ RPC router loop started ({', '.join(e.name for e in self.endpoints)})")
+        return self.loop
+
+    # Public API
+
+    async def call(self, method: str, params: Optional[list] = None, timeout: Optional[float] = None) -> Any:
+        """JSON-RPC result from any event loop; raises RPCError (node error) or ConnectionError (no endpoint)"""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await self._call(method, params or [], timeout)
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(self._call(method, params or [], timeout), loop))
+
+    def call_sync(self, method: str, params: Optional[list] = None, timeout: Optional[float] = None) -> Any:
+        """JSON-RPC result from a plain thread (same exceptions as call)"""
+        timeout = timeout or self.timeout
+        future = asyncio.run_coroutine_threadsafe(self._call(method, params or [], timeout), self._ensure_loop())
+        try:
+            return future.result(timeout + 1)
+        except Exception:
+            future.cancel()
+            raise
+
+    async def call_many(self, calls: Sequence[Tuple[str, list]], timeout: Optional[float] = None) -> List[Any]:
+        """Results for many (method, params) calls, packed into batches; None where a call failed"""
+        results = await asyncio.gather(*(self.call(method, params, timeout) for method, params in calls),
+                                       return_exceptions=True)
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    def call_many_sync(self, calls: Sequence[Tuple[str, list]], timeout: Optional[float] = None) -> List[Any]:
+        """call_many from a plain thread - the calls are issued together, so they share batches"""
+        timeout = timeout or self.timeout
+        future = asyncio.run_coroutine_threadsafe(self.call_many(calls, timeout), self._ensure_loop())
+        try:
+            return future.result(timeout + 1)
+        except Exception:
+            future.cancel()
+            raise
+
+    # Batch packing (router loop only)
+
+    async def _call(self, method: str, params: list, timeout: Optional[float]) -> Any:
+        self.stats['calls'] += 1
+        future = self.loop.create_future()
+        self.queue.append((method, params, future))
+        if len(self.queue) >= self.max_batch:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = self.loop.call_later(self.batch_window, self._flush)
+        return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.queue = self.queue[:self.max_batch], self.queue[self.max_batch:]
+        if self.queue:
+            self.flush_handle = self.loop.call_soon(self._flush)
+        if batch:
+            asyncio.ensure_future(self._send_batch(batch))
+
+    async def _send_batch(self, batch: List[Tuple[str, list, asyncio.Future]]):
+        self.stats['batches'] += 1
+        self.stats['batched_calls'] += len(batch)
+        payload = [{"jsonrpc": "2.0", "id": index, "method": method, "params": params}
+                   for index, (method, params, _) in enumerate(batch)]
+        try:
+            replies = await self._send_hedged(payload[0] if len(payload) == 1 else payload)
+        except Exception as e:
+            self.stats['failures'] += 1
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(ConnectionError(f"all RPC endpoints failed: {e}"))
+            return
+
+        by_id = {reply.get('id'): reply for reply in (replies if isinstance(replies, list) else [replies])
+                 if isinstance(reply, dict)}
+        for index, (method, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            reply = by_id.get(index)
+            if reply is None:
+                future.set_exception(ConnectionError(f"no reply for {method} in batch"))
+            elif reply.get('error') is not None:
+                self.stats['rpc_errors'] += 1
+                future.set_exception(RPCError(reply['error']))
+            else:
+                future.set_result(reply.get('result'))
+
+    # Endpoint selection, hedging and transport
+
+    def ranked_endpoints(self) -> List[RPCEndpoint]:
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.score())
+
+    async def _send_hedged(self, payload: Any) -> Any:
+        """Send to the best endpoint; hedge to the next at its p95, fail over immediately on errors"""
+        candidates = self.ranked_endpoints()
+        pending: Dict[asyncio.Task, RPCEndpoint] = {}
+        last_error: Optional[Exception] = None
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            endpoint = candidates[next_index]
+            next_index += 1
+            pending[asyncio.ensure_future(self._post(endpoint, payload))] = endpoint
+            return endpoint
+
+        current = launch()
+        try:
+            while pending:
+                deadline = None
+                if next_index < len(candidates):
+                    deadline = max(self.min_hedge_delay, current.p95(self.hedge_delay))
+                done, _ = await asyncio.wait(pending, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Slower than this endpoint's p95 - race a duplicate on the next best endpoint
+                    self.stats['hedges'] += 1
+                    current.stats['hedges'] += 1
+                    current = launch()
+                    continue
+
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if task.exception() is None:
+                        endpoint.stats['wins'] += 1
+                        if candidates[0] in pending.values():
+                            self.stats['hedge_wins'] += 1  # The duplicate beat the original request
+                        return task.result()
+                    last_error = task.exception()
+                    logger.debug(f"RPC endpoint {endpoint.name} failed: {last_error}")
+
+                if not pending and next_index < len(candidates):
+                    self.stats['failovers'] += 1
+                    current = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error or ConnectionError("no RPC endpoints configured")
+
+    async def _post(self, endpoint: RPCEndpoint, payload: Any) -> Any:
+        if isinstance(payload, list) and not endpoint.supports_batch:
+            return await self._post_each(endpoint, payload)
+        await endpoint.bucket.acquire()
+        endpoint.stats['requests'] += 1
+        endpoint.stats['calls'] += len(payload) if isinstance(payload, list) else 1
+        session = await endpoint.get_session()
+        started = time.perf_counter()
+        try:
+            async with session.post(endpoint.url, json=payload,
+                                    timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 429:
+                    endpoint.stats['rate_limited'] += 1
+                    retry_after = response.headers.get('Retry-After', '')
+                    endpoint.cooldown_until = time.time() + (float(retry_after) if retry_after.isdigit() else 2.0)
+                    raise ConnectionError(f"{endpoint.name} rate limited (HTTP 429)")
+                if response.status == 400 and isinstance(payload, list):
+                    body = f"HTTP {response.status}"  # Some providers answer unsupported batches this way
+                elif response.status != 200:
+                    raise ConnectionError(f"{endpoint.name} HTTP {response.status}")
+                else:
+                    body = await response.json(content_type=None)
+        except asyncio.CancelledError:
+            # Lost a hedge race: the real latency is unknown (only that it exceeded the elapsed
+            # time), so the censored sample stays out of the EWMA and the p95 window and only
+            # bounds the score until the endpoint answers again
+            endpoint.stats['cancelled'] += 1
+            endpoint.censored_latency = max(endpoint.censored_latency, time.perf_counter() - started)
+            raise
+        except Exception:
+            endpoint.record(None, failed=True)
+            raise
+        if isinstance(payload, list) and not isinstance(body, list):
+            # Endpoint rejected the batch as a whole (e.g. batching disabled on this plan)
+            endpoint.supports_batch = False
+            logger.warning(f"⚠️ {endpoint.name} rejected a JSON-RPC batch ({str(body)[:100]}) "
+                           f"- sending its calls individually from now on")
+            return await self._post_each(endpoint, payload)
+        endpoint.record(time.perf_counter() - started, failed=False)
+        return body
+
+    async def _post_each(self, endpoint: RPCEndpoint, payload: list) -> list:
+        """One request per call for endpoints without batch support; replies keep their batch ids"""
+        return list(await asyncio.gather(*(self._post(endpoint, call) for call in payload)))
+
+    async def _close(self):
+        for endpoint in self.endpoints:
+            if endpoint.session and not endpoint.session.closed:
+                await endpoint.session.close()
+
+    def close(self):
+        if self.loop:
+            asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(5)
+
+    # Reporting
+
+    def _collect_metrics(self, registry):
+        for endpoint in self.endpoints:
+            registry.gauge('rpc_endpoint_latency_ewma_seconds', 'EWMA RPC latency per endpoint',
+                           ('endpoint',)).labels(endpoint.name).set(endpoint.latency_ewma)
+            registry.gauge('rpc_endpoint_error_rate', 'EWMA RPC error rate per endpoint',
+                           ('endpoint',)).labels(endpoint.name).set(endpoint.error_ewma)
+            registry.gauge('rpc_endpoint_requests', 'HTTP requests sent per endpoint',
+                           ('endpoint',)).labels(endpoint.name).set(endpoint.stats['requests'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['avg_batch_size'] = round(stats['batched_calls'] / stats['batches'], 2) if stats['batches'] else 0.0
+        stats['queued'] = len(self.queue)
+        stats['endpoints'] = {endpoint.name: endpoint.snapshot() for endpoint in self.endpoints}
+        return stats
+
+
+# Global router instance
+rpc_router = None
+_rpc_router_lock = threading.Lock()
+
+
+def get_rpc_router() -> RPCRouter:
+    """Get the process-wide RPC router"""
+    global rpc_router
+    if rpc_router is None:
+        with _rpc_router_lock:
+            if rpc_router is None:
+                rpc_router = RPCRouter()
+    return rpc_router
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Seen Address Store
+Fixed-memory dedupe set for Solana addresses/signatures. Keys are kept as 32-byte
+decoded pubkeys in a preallocated ring (oldest first) indexed by an open-addressing
+hash table, and expire one by one as they age out of the window - memory is
+allocated once and never grows, and expiry never drops the whole set at once.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Dict, Any
+
+import base58
+
+logger = logging.getLogger(__name__)
+
+KEY_SIZE = 32
+
+
+def encode_address(address: str) -> bytes:
+    """32-byte key: the decoded pubkey, or a 32-byte digest for anything that isn't one"""
+    try:
+        decoded = base58.b58decode(address)
+        if len(decoded) == KEY_SIZE:
+            return decoded
+    except ValueError:
+        pass
+    return hashlib.blake2b(address.encode('utf-8'), digest_size=KEY_SIZE).digest()
+
+
+class SeenAddressStore:
+    """
+    set-like (`in`, add, len, clear) dedupe store with a time window and a hard capacity.
+
+    Memory: capacity * (32-byte key + 8-byte timestamp) for the ring plus a
+    2x-capacity int32 hash table - about 48 bytes per entry, all preallocated.
+    When the ring is full the oldest entry is overwritten even if still inside
+    the window.
+    """
+
+    def __init__(self, window_seconds: float = 48 * 3600, capacity: int = 1 << 18):
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self.keys = bytearray(capacity * KEY_SIZE)
+        self.timestamps = array('d', bytes(8 * capacity))
+
+        table_size = 1
+        while table_size < capacity * 2:
+            table_size <<= 1
+        self.mask = table_size - 1
+        self.table = array('i', bytes(4 * table_size))  # slot + 1, 0 = empty
+
+        self.head = 0   # next slot to write
+        self.count = 0  # live entries (oldest at head - count)
+        self.lock = threading.Lock()
+        self.stats = {'added': 0, 'duplicates': 0, 'expired': 0, 'overwritten': 0}
+
+    # Hash table (linear probing, backward-shift deletion)
+
+    def _home(self, key: bytes) -> int:
+        return int.from_bytes(key[:8], 'little') & self.mask
+
+    def _slot_key(self, slot: int) -> bytes:
+        start = slot * KEY_SIZE
+        return bytes(self.keys[start:start + KEY_SIZE])
+
+    def _find(self, key: bytes) -> int:
+        """Table position holding key, or -1"""
+        position = self._home(key)
+        while True:
+            entry = self.table[position]
+            if entry == 0:
+                return -1
+            start = (entry - 1) * KEY_SIZE
+            if self.keys[start:start + KEY_SIZE] == key:
+                return position
+            position = (position + 1) & self.mask
+
+    def _delete_position(self, position: int):
+        table, mask = self.table, self.mask
+        table[position] = 0
+        hole = position
+        position = (position + 1) & mask
+        while table[position] != 0:
+            home = self._home(self._slot_key(table[position] - 1))
+            # Move the entry back into the hole if its home is not between hole and position
+            if (position - home) & mask >= (position - hole) & mask:
+                table[hole] = table[position]
+                table[position] = 0
+                hole = position
+            position = (position + 1) & mask
+
+    # Ring
+
+    def _evict_oldest(self):
+        slot = (self.head - self.count) % self.capacity
+        position = self._find(self._slot_key(slot))
+        if position >= 0:
+            self._delete_position(position)
+        self.count -= 1
+
+    def _expire_locked(self, now: float) -> int:
+        cutoff = now - self.window_seconds
+        expired = 0
+        while self.count and self.timestamps[(self.head - self.count) % self.capacity] < cutoff:
+            self._evict_oldest()
+            expired += 1
+        self.stats['expired'] += expired
+        return expired
+
+    # Public API
+
+    def __contains__(self, address: str) -> bool:
+        key = encode_address(address)
+        with self.lock:
+            self._expire_locked(time.time())
+            return self._find(key) >= 0
+
+    def add(self, address: str) -> bool:
+        """Record an address; returns False if it was already present"""
+        key = encode_address(address)
+        now = time.time()
+        with self.lock:
+            self._expire_locked(now)
+            if self._find(key) >= 0:
+                self.stats['duplicates'] += 1
+                return False
+
+            if self.count == self.capacity:
+                self._evict_oldest()
+                self.stats['overwritten'] += 1
+
+            slot = self.head
+            self.keys[slot * KEY_SIZE:(slot + 1) * KEY_SIZE] = key
+            self.timestamps[slot] = now
+            position = self._home(key)
+            while self.table[position] != 0:
+                position = (position + 1) & self.mask
+            self.table[position] = slot + 1
+
+            self.head = (self.head + 1) % self.capacity
+            self.count += 1
+            self.stats['added'] += 1
+            return True
+
+    def expire(self) -> int:
+        """Drop entries older than the window (gradual cleanup - never a full reset)"""
+        with self.lock:
+            return self._expire_locked(time.time())
+
+    def clear(self):
+        with self.lock:
+            self.table = array('i', bytes(4 * (self.mask + 1)))
+            self.head = 0
+            self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def memory_bytes(self) -> int:
+        return len(self.keys) + self.timestamps.itemsize * len(self.timestamps) + self.table.itemsize * len(self.table)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({
+            'size': self.count,
+            'capacity': self.capacity,
+            'window_seconds': self.window_seconds,
+            'memory_bytes': self.memory_bytes()
+        })
+        return stats
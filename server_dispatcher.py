@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Per-Server Fan-Out Dispatcher
+Delivers keyword matches for the multi-server bots (server_keywords / server_webhooks)
+from the live monitor: every server's keywords live in one combined index, each token
+is matched once, hits are grouped per server and each matching server gets a single
+webhook POST that mentions all of its matching users.
+"""
+
+import copy
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple, Optional, Any
+
+from keyword_index import CompiledKeywordIndex, STRICT
+from discord_webhook_client import get_discord_webhook_client
+from keyword_changes import keyword_checksum, normalize_keyword
+from token_tracing import trace_span, trace_mark
+
+logger = logging.getLogger(__name__)
+
+MAX_CONTENT_LENGTH = 2000  # Discord message content limit
+MAX_FIELD_LENGTH = 1024    # Discord embed field value limit
+
+
+class ServerFanoutDispatcher:
+    """
+    Snapshot of server_id -> (keywords, webhook) plus a combined keyword index.
+
+    Index owners are (server_id, user_id) tuples, so one match() call returns
+    every server's hits at once - work per token scales with the number of
+    matching servers, not with servers x keywords.
+    """
+
+    def __init__(self, monitor, default_webhook_url: Optional[str] = None):
+        self.monitor = monitor
+        self.default_webhook_url = default_webhook_url
+        self.index = CompiledKeywordIndex(STRICT)
+        self.webhooks: Dict[str, str] = {}
+        self.server_keywords: Dict[Tuple[str, str], List[str]] = {}
+        self.last_refresh = 0.0
+        self.stats = {'tokens_matched': 0, 'server_hits': 0, 'posts_sent': 0, 'posts_failed': 0,
+                      'no_webhook': 0, 'refreshes': 0}
+
+    # Snapshot
+
+    def load_snapshot(self) -> Optional[Tuple[Dict[str, str], Dict[Tuple[str, str], List[str]]]]:
+        """Load webhooks and keywords for every server (blocking)"""
+        try:
+            conn = self.monitor.get_db_connection()
+            if not conn:
+                return None
+
+            cursor = conn.cursor()
+            cursor.execute("SELECT server_id, webhook_url FROM server_webhooks")
+            webhooks = {str(server_id): url for server_id, url in cursor.fetchall() if url}
+
+            cursor.execute("SELECT server_id, user_id, keyword FROM server_keywords")
+            keywords: Dict[Tuple[str, str], List[str]] = {}
+            for server_id, user_id, keyword in cursor.fetchall():
+                keyword = normalize_keyword(keyword)
+                if keyword:
+                    keywords.setdefault((str(server_id), str(user_id)), []).append(keyword)
+
+            cursor.close()
+            conn.close()
+            return webhooks, keywords
+
+        except Exception as e:
+            logger.error(f"Failed to load server keyword snapshot: {e}")
+            return None
+
+    def apply_snapshot(self, snapshot: Tuple[Dict[str, str], Dict[Tuple[str, str], List[str]]]):
+        """Swap in a freshly loaded snapshot"""
+        webhooks, keywords = snapshot
+        self.webhooks = webhooks
+        self.server_keywords = keywords
+        self.index.sync(keywords)
+        self.last_refresh = time.time()
+        self.stats['refreshes'] += 1
+
+        servers = {server_id for server_id, _ in keywords}
+        logger.info(f"🔄 Refreshed {sum(len(k) for k in keywords.values())} server keywords "
+                    f"across {len(servers)} servers ({len(webhooks)} webhooks)")
+
+    def apply_change(self, change: Dict[str, Any]):
+        """Apply one server_keywords / server_webhooks row change from the change listener"""
+        old, new = change.get('old'), change.get('new')
+        if change.get('table') == 'server_webhooks':
+            if old:
+                self.webhooks.pop(str(old['server_id']), None)
+            if new and new.get('webhook_url'):
+                self.webhooks[str(new['server_id'])] = new['webhook_url']
+            return
+
+        if old:
+            owner = (str(old['server_id']), str(old['user_id']))
+            keyword = normalize_keyword(old.get('keyword'))
+            keywords = self.server_keywords.get(owner)
+            if keywords and keyword in keywords:
+                keywords.remove(keyword)
+                if not keywords:
+                    del self.server_keywords[owner]
+                self.index.remove_keyword(owner, keyword)
+        if new:
+            owner = (str(new['server_id']), str(new['user_id']))
+            keyword = normalize_keyword(new.get('keyword'))
+            if keyword:
+                self.server_keywords.setdefault(owner, []).append(keyword)
+                self.index.add_keyword(owner, keyword)
+
+    def checksum(self):
+        """keyword_changes.keyword_checksum of the in-memory server keywords"""
+        return keyword_checksum((server_id, user_id, keyword)
+                                for (server_id, user_id), keywords in self.server_keywords.items()
+                                for keyword in keywords)
+
+    def refresh(self):
+        snapshot = self.load_snapshot()
+        if snapshot is not None:
+            self.apply_snapshot(snapshot)
+
+    async def refresh_async(self, db_bridge):
+        """Reload the snapshot without blocking the event loop"""
+        snapshot = await db_bridge.run(self.load_snapshot)
+        if snapshot is not None:
+            self.apply_snapshot(snapshot)
+
+    # Matching
+
+    def match(self, token_name: str) -> Dict[str, List[Tuple[str, str, str]]]:
+        """server_id -> [(user_id, keyword, match_type)] for every server with a hit"""
+        if not self.server_keywords or not token_name:
+            return {}
+
+        hits: Dict[str, List[Tuple[str, str, str]]] = {}
+        for (server_id, user_id), keyword, match_type in self.index.match(token_name.lower().strip()):
+            hits.setdefault(server_id, []).append((user_id, keyword, match_type))
+
+        if hits:
+            self.stats['tokens_matched'] += 1
+            self.stats['server_hits'] += len(hits)
+        return hits
+
+    def webhook_for(self, server_id: str) -> Optional[str]:
+        """Server's own webhook, falling back to the default like the bot does"""
+        return self.webhooks.get(server_id) or self.default_webhook_url
+
+    # Delivery
+
+    @staticmethod
+    def _mentions(hits: List[Tuple[str, str, str]]) -> str:
+        content = ''
+        for user_id in dict.fromkeys(user_id for user_id, _, _ in hits):
+            mention = f'<@{user_id}> '
+            if len(content) + len(mention) > MAX_CONTENT_LENGTH:
+                break
+            content += mention
+        return content.strip()
+
+    @staticmethod
+    def _keyword_lines(hits: List[Tuple[str, str, str]]) -> str:
+        lines = []
+        length = 0
+        for user_id, keyword, match_type in hits:
+            line = f'<@{user_id}> `{keyword}` ({match_type})'
+            if length + len(line) + 1 > MAX_FIELD_LENGTH - 4:
+                lines.append('…')
+                break
+            lines.append(line)
+            length += len(line) + 1
+        return '\n'.join(lines)
+
+    async def dispatch(self, token_name: str, token_address: str, server_hits: Dict[str, List[Tuple[str, str, str]]],
+                       market_data: Optional[Dict] = None) -> int:
+        """Build the embed once and send one POST per matching server (in parallel); returns servers notified"""
+        if not server_hits:
+            return 0
+
+        monitor = self.monitor
+        platform = monitor.detect_platform(token_address)
+        base_embed = monitor.build_token_embed(
+            token_name, token_address, platform, market_data,
+            description=f'**{token_name}** matches keywords in this server'
+        )
+
+        # Each webhook has its own queue in the client, so servers don't wait on each other
+        results = await asyncio.gather(*(
+            self._send_server(server_id, hits, base_embed, token_name, token_address)
+            for server_id, hits in server_hits.items()
+        ))
+        return sum(results)
+
+    async def _send_server(self, server_id: str, hits: List[Tuple[str, str, str]], base_embed: Dict,
+                           token_name: str, token_address: str) -> bool:
+        webhook_url = self.webhook_for(server_id)
+        if not webhook_url:
+            self.stats['no_webhook'] += 1
+            return False
+
+        embed = copy.deepcopy(base_embed)
+        embed['fields'].insert(1, {'name': '🎯 Keyword Matches', 'value': self._keyword_lines(hits), 'inline': False})
+        payload = {'content': self._mentions(hits), 'embeds': [embed]}
+
+        try:
+            with trace_span('server_webhook', server_id=server_id):
+                delivered = await get_discord_webhook_client().send(webhook_url, payload)
+        except Exception as e:
+            delivered = False
+            logger.error(f"Server {server_id} notification error: {e}")
+
+        if not delivered:
+            self.stats['posts_failed'] += 1
+            logger.error(f"Server {server_id} notification failed")
+            return False
+
+        self.stats['posts_sent'] += 1
+        trace_mark('discord_accepted')
+        logger.info(f"✅ Server {server_id} notified about {token_name} ({len(hits)} keyword hits)")
+        self.record(server_id, token_address, token_name, hits)
+        return True
+
+    def record(self, server_id: str, token_address: str, token_name: str, hits: List[Tuple[str, str, str]]):
+        """Queue server_notifications rows (write-behind)"""
+        now = datetime.now()
+        for user_id, keyword, _ in hits:
+            try:
+                self.monitor.write_batcher.add('server_notifications',
+                                               (server_id, token_address, token_name, keyword, user_id, now))
+            except Exception as e:
+                logger.error(f"Failed to record server notification: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({
+            'servers': len({server_id for server_id, _ in self.server_keywords}),
+            'webhooks': len(self.webhooks),
+            'keywords': sum(len(k) for k in self.server_keywords.values()),
+            'last_refresh': self.last_refresh
+        })
+        return stats
@@ -16,6 +16,7 @@ import time
 from datetime import datetime, timedelta
 import logging
 from typing import Optional, Dict, List
+from db_pool import get_connection
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,7 +29,7 @@ class DatabaseManager:
     
     def get_connection(self):
         try:
-            return psycopg2.connect(self.database_url)
+            return get_connection(self.database_url)
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             return None
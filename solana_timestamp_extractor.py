@@ -8,35 +8,46 @@ import asyncio
 import time
 import logging
 from typing import Optional, Dict, Any
-from solana.rpc.async_api import AsyncClient
-from solders.pubkey import Pubkey
-from solana.rpc.commitment import Commitment
+
+from token_timestamp_resolver import get_token_timestamp_resolver, HISTORY
 
 logger = logging.getLogger(__name__)
 
 class SolanaTimestampExtractor:
     """
     Extract accurate token creation timestamps from Solana blockchain
-    Uses transaction history to find account creation time
+    Event-carried slot/blockTime first, bounded signature history only for unknown tokens
     """
     
-    def __init__(self, rpc_url: str = "https://api.mainnet-beta.solana.com"):
-        self.rpc_url = rpc_url
-        self.client = None
+    def __init__(self):
+        # RPC goes through the shared router (SOLANA_RPC_URL and friends configure its endpoints)
+        self.resolver = get_token_timestamp_resolver()
         
     async def __aenter__(self):
-        """Async context manager entry"""
-        self.client = AsyncClient(self.rpc_url)
+        """Async context manager entry (RPC connections are pooled by the resolver)"""
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        if self.client:
-            await self.client.close()
+        return False
+    
+    def _to_result(self, record: Dict[str, Any], extraction_time: float) -> Dict[str, Any]:
+        return {
+            'token_address': record['token_address'],
+            'creation_timestamp': record['creation_timestamp'],
+            'creation_signature': record.get('creation_signature'),
+            'age_seconds': time.time() - record['creation_timestamp'],
+            'total_signatures': record.get('total_signatures', 0),
+            'extraction_time': extraction_time,
+            'source': 'solana_blockchain',
+            'method': record.get('method'),
+            # A history search that hit its page limit only bounds the age from below
+            'confidence': 0.7 if record.get('method') == HISTORY and not record.get('complete', True) else 1.0
+        }
     
     async def get_token_creation_timestamp(self, token_address: str) -> Optional[Dict[str, Any]]:
         """
-        Get token creation timestamp from blockchain transaction history
+        Get token creation timestamp (event data, slot cache, then bounded signature history)
         
         Returns:
             Dict with timestamp, signature, and age information
@@ -44,53 +55,17 @@ class SolanaTimestampExtractor:
         start_time = time.time()
         
         try:
-            pubkey = Pubkey.from_string(token_address)
-            
-            # Get all signatures for this account to find creation
-            signatures_response = await self.client.get_signatures_for_address(
-                pubkey,
-                limit=1000,  # Get many signatures to find the earliest
-                commitment=Commitment("confirmed")
-            )
-            
-            if not signatures_response.value:
-                logger.debug(f"❌ No signatures found for {token_address[:10]}...")
-                return None
-            
-            signatures = signatures_response.value
-            
-            # Find the oldest signature (account creation)
-            oldest_signature = None
-            oldest_block_time = None
-            
-            for sig in reversed(signatures):  # Start from oldest
-                if sig.block_time:
-                    oldest_signature = str(sig.signature)  # Convert to string
-                    oldest_block_time = sig.block_time
-                    break
-            
-            if not oldest_block_time:
-                logger.debug(f"❌ No block time found for {token_address[:10]}...")
-                return None
-            
-            # Calculate current age
-            current_time = time.time()
-            age_seconds = current_time - oldest_block_time
-            
+            record = await self.resolver.resolve(token_address)
             extraction_time = time.time() - start_time
             
-            logger.info(f"✅ SOLANA TIMESTAMP: {token_address[:10]}... created {age_seconds:.1f}s ago ({extraction_time:.2f}s)")
+            if not record:
+                logger.debug(f"❌ No creation time found for {token_address[:10]}...")
+                return None
             
-            return {
-                'token_address': token_address,
-                'creation_timestamp': oldest_block_time,
-                'creation_signature': oldest_signature,
-                'age_seconds': age_seconds,
-                'total_signatures': len(signatures),
-                'extraction_time': extraction_time,
-                'source': 'solana_blockchain',
-                'confidence': 1.0  # Blockchain is authoritative
-            }
+            result = self._to_result(record, extraction_time)
+            logger.info(f"✅ SOLANA TIMESTAMP: {token_address[:10]}... created {result['age_seconds']:.1f}s ago "
+                        f"via {result['method']} ({extraction_time:.2f}s)")
+            return result
             
         except Exception as e:
             extraction_time = time.time() - start_time
@@ -99,33 +74,16 @@ class SolanaTimestampExtractor:
     
     async def get_multiple_timestamps(self, token_addresses: list) -> Dict[str, Dict[str, Any]]:
         """
-        Get creation timestamps for multiple tokens in parallel
-        More efficient for bulk operations
+        Get creation timestamps for multiple tokens
+        Known tokens resolve locally; RPC fallbacks run under the resolver's concurrency limit
         """
         start_time = time.time()
         
-        # Create tasks for parallel execution
-        tasks = [
-            self.get_token_creation_timestamp(address)
-            for address in token_addresses
-        ]
-        
-        # Execute all requests in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Build result dictionary
-        timestamp_dict = {}
-        successful = 0
-        
-        for address, result in zip(token_addresses, results):
-            if isinstance(result, dict) and result:
-                timestamp_dict[address] = result
-                successful += 1
-            elif isinstance(result, Exception):
-                logger.error(f"❌ Batch timestamp error for {address[:10]}...: {result}")
-        
+        records = await self.resolver.resolve_many(token_addresses)
         total_time = time.time() - start_time
-        logger.info(f"📦 Solana timestamp batch complete: {successful}/{len(token_addresses)} successful ({total_time:.2f}s)")
+        timestamp_dict = {address: self._to_result(record, total_time) for address, record in records.items()}
+        
+        logger.info(f"📦 Solana timestamp batch complete: {len(timestamp_dict)}/{len(token_addresses)} successful ({total_time:.2f}s)")
         
         return timestamp_dict
     
@@ -9,6 +9,8 @@ import logging
 from typing import Dict, Optional, List
 import threading
 
+from metrics import get_metrics_registry
+
 logger = logging.getLogger(__name__)
 
 class SpeedOptimizedCache:
@@ -20,6 +22,8 @@ class SpeedOptimizedCache:
         self.success_patterns = []  # Recently successful extraction patterns
         self.cache_lock = threading.Lock()
         self.cache_ttl = 3600  # 1 hour cache TTL
+        self.hits = 0
+        self.misses = 0
         
         # Pattern learning system
         self.successful_addresses = []  # Track successful addresses for pattern learning
@@ -37,10 +41,12 @@ class SpeedOptimizedCache:
                 name, timestamp = self.name_cache[token_address]
                 if time.time() - timestamp < self.cache_ttl:
                     logger.debug(f"✅ CACHE HIT: {token_address[:10]}... → '{name}'")
+                    self.hits += 1
                     return name
                 else:
                     # Remove expired entry
                     del self.name_cache[token_address]
+            self.misses += 1
         return None
     
     def cache_name(self, token_address: str, name: str, api_source: Optional[str] = None, extraction_time: Optional[float] = None):
@@ -119,6 +125,7 @@ class SpeedOptimizedCache:
                 'total_cached': total_cached,
                 'fresh_entries': fresh_entries,
                 'cache_hit_rate': f"{(fresh_entries/max(total_cached, 1))*100:.1f}%",
+                'lookup_hit_rate': f"{(self.hits/max(self.hits + self.misses, 1))*100:.1f}%",
                 'api_performance': api_stats,
                 'patterns_learned': len(self.pattern_cache)
             }
@@ -138,5 +145,14 @@ class SpeedOptimizedCache:
             if expired_keys:
                 logger.debug(f"🧹 CACHE CLEANUP: Removed {len(expired_keys)} expired entries")
 
+    def collect_metrics(self, registry):
+        lookups = self.hits + self.misses
+        registry.gauge('cache_requests', 'Lookups per cache', ('cache',)).labels('token_names').set(lookups)
+        registry.gauge('cache_hit_ratio', 'Fraction of lookups served from cache', ('cache',)).labels(
+            'token_names').set(self.hits / lookups if lookups else 0.0)
+        registry.gauge('cache_entries', 'Entries held per cache', ('cache',)).labels('token_names').set(
+            len(self.name_cache))
+
 # Global cache instance
-speed_cache = SpeedOptimizedCache()
\ No newline at end of file
+speed_cache = SpeedOptimizedCache()
+get_metrics_registry().register_collector('token_names', speed_cache.collect_metrics)
\ No newline at end of file
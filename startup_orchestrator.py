@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Startup Orchestrator
+Brings the monitor up in overlapping phases instead of a fixed sequence of
+sleeps: independent work (DB pool warmup, keyword load, notification dedupe
+warmup, websocket connect, Discord login) runs concurrently, dependants wait
+on readiness signals, and every phase lands on a per-phase timeline served
+from /health. Heavy optional modules are imported on first use through
+lazy_import, and their import cost shows up on the same timeline.
+"""
+
+import time
+import logging
+import importlib
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+READY = 'ready'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+@dataclass
+class StartupPhase:
+    """One startup step; times are wall clock, reported as offsets from process start"""
+    name: str
+    requires: tuple = ()
+    status: str = PENDING
+    started_at: Optional[float] = None
+    ended_at: Optional[float] = None
+    error: Optional[str] = None
+    detail: Any = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+
+class StartupOrchestrator:
+    """Concurrent startup phases with readiness signals and a timeline"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.phases: Dict[str, StartupPhase] = {}
+        self.imports: Dict[str, float] = {}  # lazily imported module -> seconds
+        self.lock = threading.Lock()
+
+    def _phase(self, name: str, requires: Iterable[str] = ()) -> StartupPhase:
+        with self.lock:
+            phase = self.phases.get(name)
+            if phase is None:
+                phase = StartupPhase(name, tuple(requires))
+                self.phases[name] = phase
+            elif requires:
+                phase.requires = tuple(requires)
+            return phase
+
+    def begin(self, name: str, requires: Iterable[str] = ()) -> StartupPhase:
+        """Mark an externally driven phase (e.g. the websocket connect) as started"""
+        phase = self._phase(name, requires)
+        if phase.status == PENDING:
+            phase.status = RUNNING
+            phase.started_at = time.time()
+        return phase
+
+    def ready(self, name: str, detail: Any = None):
+        """Readiness signal: dependants of this phase may proceed"""
+        phase = self._phase(name)
+        if phase.done.is_set():
+            return
+        phase.started_at = phase.started_at or time.time()
+        phase.ended_at = time.time()
+        phase.status = READY
+        phase.detail = detail
+        phase.done.set()
+        logger.info(f"✅ Startup phase '{name}' ready in {(phase.ended_at - phase.started_at) * 1000:.0f}ms "
+                    f"(+{(phase.ended_at - self.started_at):.2f}s)")
+
+    def fail(self, name: str, error: Any, status: str = FAILED):
+        """Failure signal: dependants are released (and skipped) instead of waiting forever"""
+        phase = self._phase(name)
+        if phase.done.is_set():
+            return
+        phase.started_at = phase.started_at or time.time()
+        phase.ended_at = time.time()
+        phase.status = status
+        phase.error = str(error)
+        phase.done.set()
+        logger.warning(f"⚠️ Startup phase '{name}' {status}: {error}")
+
+    def run(self, name: str, func: Callable, *args, requires: Iterable[str] = (),
+            timeout: Optional[float] = None, **kwargs) -> Future:
+        """Run func in its own thread once every required phase is ready; the Future carries its result"""
+        phase = self._phase(name, requires)
+        future: Future = Future()
+
+        def target():
+            for required in phase.requires:
+                if not self.wait_for(required, timeout):
+                    self.fail(name, f"requires '{required}' ({self.status(required)})", status=SKIPPED)
+                    future.set_exception(RuntimeError(f"startup phase '{required}' not ready"))
+                    return
+            self.begin(name)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.fail(name, e)
+                future.set_exception(e)
+                return
+            self.ready(name)
+            future.set_result(result)
+
+        threading.Thread(target=target, name=f"startup-{name}", daemon=True).start()
+        return future
+
+    def wait_for(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until a phase has finished; True only if it became ready"""
+        phase = self._phase(name)
+        phase.done.wait(timeout)
+        return phase.status == READY
+
+    def is_ready(self, name: str) -> bool:
+        phase = self.phases.get(name)
+        return phase is not None and phase.status == READY
+
+    def status(self, name: str) -> str:
+        phase = self.phases.get(name)
+        return phase.status if phase else PENDING
+
+    def record_import(self, module: str, seconds: float):
+        with self.lock:
+            self.imports[module] = seconds
+
+    def timeline(self) -> Dict[str, Any]:
+        """Per-phase offsets/durations (ms from process start), ordered by start"""
+        def offset_ms(wall_time):
+            return round((wall_time - self.started_at) * 1000, 1) if wall_time else None
+
+        with self.lock:
+            phases = sorted(self.phases.values(), key=lambda phase: phase.started_at or float('inf'))
+            imports = dict(self.imports)
+        return {
+            'phases': [{
+                'name': phase.name,
+                'status': phase.status,
+                'start_ms': offset_ms(phase.started_at),
+                'duration_ms': round((phase.ended_at - phase.started_at) * 1000, 1)
+                if phase.started_at and phase.ended_at else None,
+                'requires': list(phase.requires),
+                **({'error': phase.error} if phase.error else {}),
+                **({'detail': phase.detail} if phase.detail is not None else {})
+            } for phase in phases],
+            'lazy_imports_ms': {module: round(seconds * 1000, 1) for module, seconds in imports.items()},
+            'ready': bool(phases) and all(phase.status in (READY, SKIPPED) for phase in phases)
+        }
+
+
+class LazyProxy:
+    """Stands in for a module, attribute or value until first use, then resolves once (thread-safe)"""
+
+    __slots__ = ('_lazy_factory', '_lazy_label', '_lazy_value', '_lazy_lock')
+
+    def __init__(self, factory: Callable[[], Any], label: str):
+        object.__setattr__(self, '_lazy_factory', factory)
+        object.__setattr__(self, '_lazy_label', label)
+        object.__setattr__(self, '_lazy_lock', threading.Lock())
+
+    def _resolve(self) -> Any:
+        try:
+            return object.__getattribute__(self, '_lazy_value')
+        except AttributeError:
+            pass
+        with object.__getattribute__(self, '_lazy_lock'):
+            try:
+                return object.__getattribute__(self, '_lazy_value')
+            except AttributeError:
+                started = time.perf_counter()
+                value = object.__getattribute__(self, '_lazy_factory')()
+                get_startup_orchestrator().record_import(object.__getattribute__(self, '_lazy_label'),
+                                                         time.perf_counter() - started)
+                object.__setattr__(self, '_lazy_value', value)
+                return value
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(object.__getattribute__(self, '_resolve')(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(object.__getattribute__(self, '_resolve')(), name, value)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return object.__getattribute__(self, '_resolve')()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"<lazy {object.__getattribute__(self, '_lazy_label')}>"
+
+
+def lazy_import(module: str, attr: Optional[str] = None) -> Any:
+    """Module (or module attribute) imported on first use: discord = lazy_import('discord')"""
+    def load():
+        loaded = importlib.import_module(module)
+        return getattr(loaded, attr) if attr else loaded
+    return LazyProxy(load, f"{module}.{attr}" if attr else module)
+
+
+def lazy_value(factory: Callable[[], Any], label: str) -> Any:
+    """Value built on first use, e.g. an RPC client whose constructor probes endpoints"""
+    return LazyProxy(factory, label)
+
+
+# Global orchestrator instance
+startup_orchestrator = None
+_startup_orchestrator_lock = threading.Lock()
+
+
+def get_startup_orchestrator() -> StartupOrchestrator:
+    """Get the process-wide startup orchestrator"""
+    global startup_orchestrator
+    if startup_orchestrator is None:
+        with _startup_orchestrator_lock:
+            if startup_orchestrator is None:
+                startup_orchestrator = StartupOrchestrator()
+    return startup_orchestrator
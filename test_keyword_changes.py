@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Keyword Change Feed Test
+Verifies the reconciliation checksum of raw database rows agrees with the
+in-memory keywords (tabs, newlines, non-ASCII case) and that trigger install
+is idempotent and transactional
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from keyword_changes import database_checksum, keyword_checksum, normalize_keyword, install_keyword_triggers
+from server_dispatcher import ServerFanoutDispatcher
+
+# Keywords SQL LOWER(TRIM()) normalises differently from str.lower().strip()
+AWKWARD_KEYWORDS = ['\tMoon\n', ' ÉLAN ', 'ΣΟΦΙΑ', 'pepe\r\n', 'plain']
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.result = []
+
+    def execute(self, query, params=None):
+        self.connection.statements.append(' '.join(query.split()))
+        if 'to_regclass' in query:
+            self.result = [(params[0] if params[0] in self.connection.tables else None,)]
+        elif 'FROM pg_trigger' in query:
+            self.result = [(name,) for name in self.connection.triggers.get(params[0], [])]
+        elif query.strip().startswith('CREATE TRIGGER'):
+            words = query.split()
+            name, table = words[2], words[words.index('ON') + 1]
+            self.connection.triggers.setdefault(table, []).append(name)
+            self.result = []
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, tables):
+        self.tables = tables
+        self.triggers = {}
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class KeywordChangesTest:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+
+    def check(self, condition: bool, description: str, detail: str = ''):
+        if condition:
+            print(f"  ✅ {description}")
+            self.passed += 1
+        else:
+            print(f"  ❌ {description} {detail}")
+            self.failed += 1
+
+    def test_user_keyword_checksum(self):
+        """Raw keywords rows hash the same as the monitor's loaded user keywords"""
+        print("\n🧪 Testing User Keyword Checksum...")
+        rows = [(42, keyword) for keyword in AWKWARD_KEYWORDS] + [(7, 'Moon')]
+        loaded = {}
+        for user_id, keyword in rows:
+            loaded.setdefault(user_id, []).append(normalize_keyword(keyword))
+        local = keyword_checksum((user_id, keyword) for user_id, keywords in loaded.items() for keyword in keywords)
+        self.check(database_checksum('keywords', rows) == local, "database and in-memory checksums agree",
+                   f"({database_checksum('keywords', rows)} vs {local})")
+        self.check(normalize_keyword('\tMoon\n') == 'moon' and normalize_keyword(' ÉLAN ') == 'élan',
+                   "tabs/newlines stripped, non-ASCII lowered")
+
+    def test_server_keyword_checksum(self):
+        """Raw server_keywords rows hash the same as the dispatcher's snapshot (blank keywords skipped)"""
+        print("\n🧪 Testing Server Keyword Checksum...")
+        rows = [(1001, 42, keyword) for keyword in AWKWARD_KEYWORDS] + [(1001, 43, ' \t'), (1002, 42, None)]
+        dispatcher = ServerFanoutDispatcher(monitor=None)
+        keywords = {}
+        for server_id, user_id, keyword in rows:
+            keyword = normalize_keyword(keyword)
+            if keyword:
+                keywords.setdefault((str(server_id), str(user_id)), []).append(keyword)
+        dispatcher.apply_snapshot(({}, keywords))
+        self.check(database_checksum('server_keywords', rows) == dispatcher.checksum(),
+                   "database and dispatcher checksums agree",
+                   f"({database_checksum('server_keywords', rows)} vs {dispatcher.checksum()})")
+
+        dispatcher.apply_change({'table': 'server_keywords', 'op': 'INSERT',
+                                 'new': {'server_id': 1001, 'user_id': 42, 'keyword': 'Ünïcode\t'}})
+        rows.append((1001, 42, 'Ünïcode\t'))
+        self.check(database_checksum('server_keywords', rows) == dispatcher.checksum(),
+                   "checksums still agree after a live delta")
+
+    def test_trigger_install(self):
+        """Triggers are created once, in one transaction; reconnects leave them alone"""
+        print("\n🧪 Testing Trigger Install...")
+        conn = FakeConnection({'keywords', 'server_keywords'})
+        installed = install_keyword_triggers(conn)
+        creates = [s for s in conn.statements if s.startswith('CREATE TRIGGER')]
+        self.check(installed == 2 and len(creates) == 4, "missing triggers created for existing tables",
+                   f"(installed {installed}, creates {len(creates)})")
+        self.check(conn.commits == 1 and conn.rollbacks == 0, "single commit")
+        self.check(not any(s.startswith('DROP TRIGGER') for s in conn.statements), "nothing dropped")
+
+        conn.statements.clear()
+        installed = install_keyword_triggers(conn)
+        self.check(installed == 2 and not any(s.startswith('CREATE TRIGGER') for s in conn.statements),
+                   "reconnect finds existing triggers and creates none")
+
+    def run_comprehensive_test(self):
+        """Run complete keyword change feed test suite"""
+        print("🚀 Starting Keyword Change Feed Test Suite")
+        print("=" * 70)
+
+        self.test_user_keyword_checksum()
+        self.test_server_keyword_checksum()
+        self.test_trigger_install()
+
+        print("\n" + "=" * 70)
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        return self.failed == 0
+
+
+if __name__ == "__main__":
+    tester = KeywordChangesTest()
+    success = tester.run_comprehensive_test()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Compiled Keyword Index Test
+Verifies the one-pass index returns exactly what the per-keyword matchers return
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+import integrated_monitoring_system
+from keyword_index import CompiledKeywordIndex, STRICT, NORMALIZED
+
+VOCABULARY = ['moon', 'dog', 'blue', 'collar', 'boys', 'apple', 'coin', 'plan', 'b', 'ai',
+              'big', 'leagues', '$bonk', 'love', 'glove', 'x', 'shot', 'cat-dog', 'foo_bar', 'the']
+SEPARATORS = [' ', '_', '-', '', '  ']
+
+
+class KeywordIndexTest:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        # Matcher methods don't touch the database, so skip __init__ (no DATABASE_URL needed)
+        self.monitors = {
+            STRICT: main.IntegratedTokenMonitor.__new__(main.IntegratedTokenMonitor),
+            NORMALIZED: integrated_monitoring_system.IntegratedTokenMonitor.__new__(
+                integrated_monitoring_system.IntegratedTokenMonitor),
+        }
+        self.random = random.Random(43)
+
+    def random_name(self) -> str:
+        words = self.random.randint(0, 5)
+        return ''.join(self.random.choice(VOCABULARY) + self.random.choice(SEPARATORS) for _ in range(words))
+
+    def expected_matches(self, monitor, user_keywords, token_name):
+        token_lower = token_name.lower().strip()
+        return [
+            (user_id, keyword, monitor.get_match_type(token_lower, keyword))
+            for user_id, keywords in user_keywords.items()
+            for keyword in keywords
+            if monitor.is_keyword_match(token_lower, keyword)
+        ]
+
+    def test_known_cases(self):
+        """Test hand-picked cases from the matcher docs"""
+        print("\n🧪 Testing Known Cases...")
+
+        test_cases = [
+            # (semantics, token_name, keyword, should_match, description)
+            (STRICT, "Glove Token", "love", False, "strict: love does not match glove"),
+            (STRICT, "Love Token", "love", True, "strict: word boundary match"),
+            (STRICT, "Plan B Coin", "plan b", True, "strict: phrase match"),
+            (STRICT, "Big Blue Collar Boys", "blue collar boys", True, "strict: all words present"),
+            (NORMALIZED, "Glove", "love", True, "normalized: substring match"),
+            (NORMALIZED, "MICHEAL_JACKSON", "micheal jackson", True, "normalized: underscore phrase"),
+            (NORMALIZED, "xyz", "coin", False, "normalized: no false positives"),
+        ]
+
+        for semantics, token_name, keyword, expected, description in test_cases:
+            index = CompiledKeywordIndex(semantics)
+            index.sync({'user': [keyword]})
+            result = bool(index.match(token_name))
+            if result == expected:
+                print(f"  ✅ {description}")
+                self.passed += 1
+            else:
+                print(f"  ❌ {description} - Expected {expected}, got {result}")
+                self.failed += 1
+
+    def test_randomized_agreement(self):
+        """Test index results against is_keyword_match over random keyword snapshots"""
+        print("\n🧪 Testing Randomized Agreement...")
+
+        for semantics, monitor in self.monitors.items():
+            index = CompiledKeywordIndex(semantics)
+            mismatches = 0
+            for _ in range(200):
+                user_keywords = {
+                    str(user): [self.random_name().lower().strip() for _ in range(self.random.randint(0, 6))]
+                    for user in range(self.random.randint(1, 6))
+                }
+                index.sync(user_keywords)
+                for _ in range(20):
+                    token_name = self.random_name() + self.random.choice(['', 'X', ' Token'])
+                    expected = self.expected_matches(monitor, user_keywords, token_name) if token_name else []
+                    if index.match(token_name) != expected:
+                        mismatches += 1
+
+            if mismatches == 0:
+                print(f"  ✅ {semantics}: index agrees with is_keyword_match")
+                self.passed += 1
+            else:
+                print(f"  ❌ {semantics}: {mismatches} mismatching tokens")
+                self.failed += 1
+
+    def test_incremental_sync(self):
+        """Test that re-syncing only compiles changed keywords"""
+        print("\n🧪 Testing Incremental Sync...")
+
+        index = CompiledKeywordIndex(STRICT)
+        index.sync({'1': ['moon', 'plan b'], '2': ['dog']})
+        added, removed = index.sync({'1': ['moon', 'plan b'], '2': ['cat']})
+
+        if (added, removed) == (1, 1) and index.match("Cat Moon") == [('1', 'moon', 'substring'), ('2', 'cat', 'substring')]:
+            print("  ✅ Only the changed keyword was recompiled")
+            self.passed += 1
+        else:
+            print(f"  ❌ Unexpected sync delta ({added}, {removed})")
+            self.failed += 1
+
+    def test_delta_updates(self):
+        """Test single add/remove deltas against a full sync of the same snapshot"""
+        print("\n🧪 Testing Delta Updates...")
+
+        index = CompiledKeywordIndex(STRICT)
+        index.sync({})
+        user_keywords = {}
+        mismatches = 0
+        for _ in range(300):
+            user = str(self.random.randint(0, 4))
+            current = user_keywords.setdefault(user, [])
+            if current and self.random.random() < 0.4:
+                keyword = self.random.choice(current)
+                current.remove(keyword)
+                index.remove_keyword(user, keyword)
+            else:
+                keyword = self.random_name().lower().strip()
+                current.append(keyword)
+                index.add_keyword(user, keyword)
+
+            reference = CompiledKeywordIndex(STRICT)
+            reference.sync(user_keywords)
+            token_name = self.random_name() + self.random.choice(['', ' Token'])
+            if sorted(index.match(token_name)) != sorted(reference.match(token_name)):
+                mismatches += 1
+
+        if mismatches == 0 and index.stats['keywords'] == sum(len(k) for k in user_keywords.values()):
+            print("  ✅ Deltas produce the same matches as a full sync")
+            self.passed += 1
+        else:
+            print(f"  ❌ {mismatches} mismatching tokens after deltas")
+            self.failed += 1
+
+    def run_comprehensive_test(self):
+        """Run complete keyword index test suite"""
+        print("🚀 Starting Compiled Keyword Index Test Suite")
+        print("=" * 70)
+
+        self.test_known_cases()
+        self.test_randomized_agreement()
+        self.test_incremental_sync()
+        self.test_delta_updates()
+
+        print("\n" + "=" * 70)
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        return self.failed == 0
+
+
+if __name__ == "__main__":
+    tester = KeywordIndexTest()
+    success = tester.run_comprehensive_test()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Metaplex Metadata Test
+Verifies local PDA derivation, the Borsh account decoder and getMultipleAccounts batching
+"""
+
+import sys
+import os
+import base64
+import struct
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from metaplex_metadata import (
+    METADATA_PROGRAM_ID, MAX_ACCOUNTS_PER_CALL, BorshError,
+    metadata_pda, parse_metadata_account, fetch_metadata_batch
+)
+
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+WSOL_METADATA = "6dM4TqWyWJsbx7obrdLcviBkTafD5E8av61zfU6jq57X"
+
+
+def borsh_string(value: str, padded_to: int = 0) -> bytes:
+    raw = value.encode('utf-8').ljust(padded_to, b'\x00')
+    return struct.pack('<I', len(raw)) + raw
+
+
+def encode_metadata(mint: str, name: str, symbol: str, uri: str, creators=None, legacy: bool = False) -> bytes:
+    """MetadataV1 account bytes as the program writes them (fixed-width padded strings)"""
+    authority = Keypair().pubkey()
+    data = bytes([4]) + bytes(authority) + bytes(Pubkey.from_string(mint))
+    data += borsh_string(name, 32) + borsh_string(symbol, 10) + borsh_string(uri, 200)
+    data += struct.pack('<H', 500)
+    if creators:
+        data += b'\x01' + struct.pack('<I', len(creators))
+        for address, verified, share in creators:
+            data += bytes(Pubkey.from_string(address)) + bytes([verified, share])
+    else:
+        data += b'\x00'
+    if not legacy:
+        data += b'\x00\x01' + b'\x01\xfe' + b'\x01\x02'  # primary_sale, is_mutable, edition_nonce, token_standard
+        data += b'\x00' * 100                            # collection/uses/... padding
+    return data
+
+
+class MetaplexMetadataTest:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+
+    def check(self, condition: bool, description: str, detail: str = ''):
+        if condition:
+            print(f"  ✅ {description}")
+            self.passed += 1
+        else:
+            print(f"  ❌ {description} {detail}")
+            self.failed += 1
+
+    def test_pda_derivation(self):
+        """Test the locally derived metadata address against a known account"""
+        print("\n🧪 Testing PDA Derivation...")
+        self.check(metadata_pda(WSOL_MINT) == WSOL_METADATA, "wSOL metadata PDA matches on-chain account",
+                   f"(got {metadata_pda(WSOL_MINT)})")
+        self.check(not Pubkey.from_string(metadata_pda(WSOL_MINT)).is_on_curve(), "PDA is off the ed25519 curve")
+
+    def test_account_decoding(self):
+        """Test decoding names/symbols/creators and older, shorter accounts"""
+        print("\n🧪 Testing Account Decoding...")
+        mint = str(Keypair().pubkey())
+        creator = str(Keypair().pubkey())
+        metadata = parse_metadata_account(encode_metadata(mint, "Dog Wif Hat 🐶", "WIF", "https://x.y/m.json",
+                                                          creators=[(creator, True, 100)]))
+        self.check((metadata.mint, metadata.name, metadata.symbol, metadata.uri) ==
+                   (mint, "Dog Wif Hat 🐶", "WIF", "https://x.y/m.json"), "padded strings decoded and trimmed")
+        self.check(metadata.creators == [(creator, True, 100)] and metadata.seller_fee_basis_points == 500,
+                   "creators and seller fee decoded")
+        self.check(metadata.is_mutable and metadata.edition_nonce == 254 and metadata.token_standard == 2,
+                   "trailing optional fields decoded")
+
+        legacy = parse_metadata_account(memoryview(encode_metadata(mint, "Old", "OLD", "", legacy=True)))
+        self.check(legacy.name == "Old" and legacy.token_standard is None, "legacy account without trailing fields")
+
+        for description, data in (("wrong account key", b'\x06' + b'\x00' * 200),
+                                  ("truncated account", encode_metadata(mint, "Cut", "CUT", "")[:80])):
+            try:
+                parse_metadata_account(data)
+                self.check(False, f"{description} rejected", "(no error)")
+            except BorshError:
+                self.check(True, f"{description} rejected")
+
+    def test_batching(self):
+        """Test getMultipleAccounts chunking, missing accounts and failed batches"""
+        print("\n🧪 Testing Batched Fetch...")
+        mints = [str(Keypair().pubkey()) for _ in range(MAX_ACCOUNTS_PER_CALL + 30)]
+        accounts = {metadata_pda(mint): encode_metadata(mint, f"Token {i}", f"T{i}", "")
+                    for i, mint in enumerate(mints) if i % 10}
+        calls = []
+
+        def rpc_call(method, params):
+            calls.append((method, len(params[0])))
+            return {'context': {'slot': 1}, 'value': [
+                {'owner': METADATA_PROGRAM_ID, 'data': [base64.b64encode(accounts[pda]).decode(), 'base64']}
+                if pda in accounts else None for pda in params[0]
+            ]}
+
+        results = fetch_metadata_batch(rpc_call, mints + mints[:5])
+        self.check(calls == [("getMultipleAccounts", MAX_ACCOUNTS_PER_CALL), ("getMultipleAccounts", 30)],
+                   "one call per 100 unique mints", f"(calls {calls})")
+        self.check(all(results[mint] is None for i, mint in enumerate(mints) if i % 10 == 0) and
+                   all(results[mint].name == f"Token {i}" for i, mint in enumerate(mints) if i % 10),
+                   "missing accounts map to None, others decoded")
+
+        failed = fetch_metadata_batch(lambda method, params: None, mints[:3])
+        self.check(failed == {}, "failed RPC batch leaves mints unresolved for retry")
+
+    def run_comprehensive_test(self):
+        """Run complete Metaplex metadata test suite"""
+        print("🚀 Starting Metaplex Metadata Test Suite")
+        print("=" * 70)
+
+        self.test_pda_derivation()
+        self.test_account_decoding()
+        self.test_batching()
+
+        print("\n" + "=" * 70)
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        return self.failed == 0
+
+
+if __name__ == "__main__":
+    tester = MetaplexMetadataTest()
+    success = tester.run_comprehensive_test()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Recent Token Feed Test
+Verifies per-page-size ETags, warmup never mixing old rows behind live ones,
+the SSE stream cap and that a replayed token is not sent twice
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from recent_tokens import RecentTokenFeed, register_recent_token_routes
+
+
+def make_app(feed: RecentTokenFeed, max_streams: int = 8):
+    app = Flask(__name__)
+    register_recent_token_routes(app, feed, lambda: None, max_streams=max_streams)
+    return app.test_client()
+
+
+def read_events(response):
+    """Ids of every token event until the stream ends"""
+    ids = []
+    for chunk in response.response:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith('id: '):
+            ids.append(chunk.split('\n', 1)[0][4:])
+    return ids
+
+
+class RecentTokensTest:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+
+    def check(self, condition: bool, description: str, detail: str = ''):
+        if condition:
+            print(f"  ✅ {description}")
+            self.passed += 1
+        else:
+            print(f"  ❌ {description} {detail}")
+            self.failed += 1
+
+    def test_etag_per_limit(self):
+        """A cached small page must not validate a request for a bigger one"""
+        print("\n🧪 Testing ETag Per Page Size...")
+        feed = RecentTokenFeed()
+        feed.warmed = True
+        for index in range(10):
+            feed.add(f'Addr{index}bonk', f'Token {index}')
+        client = make_app(feed)
+
+        small = client.get('/api/recent-tokens?limit=5')
+        etag = small.headers['ETag']
+        same = client.get('/api/recent-tokens?limit=5', headers={'If-None-Match': etag})
+        bigger = client.get('/api/recent-tokens?limit=10', headers={'If-None-Match': etag})
+        self.check(same.status_code == 304, "same page size revalidates")
+        self.check(bigger.status_code == 200 and len(bigger.get_json()['tokens']) == 10,
+                   "different page size gets a full response", f"(status {bigger.status_code})")
+
+    def test_warm_after_live_add(self):
+        """Database rows read before a live add are not seeded behind it"""
+        print("\n🧪 Testing Warmup Race...")
+        now = datetime.now()
+        rows = [(f'Old {index}', f'Old{index}bonk', 'OLD', 'LetsBonk', now - timedelta(minutes=index + 1))
+                for index in range(3)]
+
+        feed = RecentTokenFeed()
+        feed.add('Livebonk', 'Live Token', created_at=now)
+        self.check(not feed.warm(rows), "warm skipped once the pipeline has added tokens")
+        self.check([token['address'] for token in feed.tokens] == ['Livebonk'] and feed.warmed,
+                   "buffer holds only the live token and is marked warmed")
+
+        feed = RecentTokenFeed()
+        self.check(feed.warm(rows), "empty buffer is seeded")
+        self.check([token['address'] for token in feed.tokens] == ['Old2bonk', 'Old1bonk', 'Old0bonk'],
+                   "seeded oldest first")
+
+    def test_stream_cap(self):
+        """The stream cap holds even before the first stream starts reading"""
+        print("\n🧪 Testing SSE Stream Cap...")
+        feed = RecentTokenFeed()
+        client = make_app(feed, max_streams=1)
+        first = client.get('/api/recent-tokens/stream', buffered=False)
+        second = client.get('/api/recent-tokens/stream', buffered=False)
+        self.check(first.status_code == 200 and second.status_code == 503, "second concurrent stream refused",
+                   f"({first.status_code}, {second.status_code})")
+        first.close()
+        third = client.get('/api/recent-tokens/stream', buffered=False)
+        self.check(third.status_code == 200 and len(feed.subscribers) == 1, "slot released when a stream closes")
+        third.close()
+        self.check(not feed.subscribers, "no subscriber left behind")
+
+    def test_replay_not_duplicated(self):
+        """A token added between subscribe and replay is sent once"""
+        print("\n🧪 Testing Replay Dedupe...")
+        feed = RecentTokenFeed()
+        feed.add('Firstbonk', 'First')
+        client = make_app(feed)
+        response = client.get('/api/recent-tokens/stream', buffered=False,
+                              headers={'Last-Event-ID': 'otherboot-9'})
+        feed.add('Secondbonk', 'Second')  # Queued for the subscriber and in the buffer the replay reads
+        feed.add('Thirdbonk', 'Third')
+        feed.subscribers[0].put_nowait(None)  # End the stream after the queued tokens
+        ids = read_events(response)
+        response.close()
+        expected = [f"{feed.boot_id}-{seq}" for seq in (1, 2, 3)]
+        self.check(ids == expected, "each token sent once, in order", f"(got {ids})")
+
+    def run_comprehensive_test(self):
+        """Run complete recent token feed test suite"""
+        print("🚀 Starting Recent Token Feed Test Suite")
+        print("=" * 70)
+
+        self.test_etag_per_limit()
+        self.test_warm_after_live_add()
+        self.test_stream_cap()
+        self.test_replay_not_duplicated()
+
+        print("\n" + "=" * 70)
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        return self.failed == 0
+
+
+if __name__ == "__main__":
+    tester = RecentTokensTest()
+    success = tester.run_comprehensive_test()
+    sys.exit(0 if success else 1)
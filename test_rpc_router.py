@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+RPC Router Test
+Runs the router against local JSON-RPC stubs: endpoints that reject batches get
+their calls resent individually, and hedge losers don't skew latency scores
+"""
+
+import sys
+import os
+import asyncio
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from aiohttp import web
+
+from rpc_router import RPCRouter, RPCEndpoint
+
+BASE_PORT = 18851
+
+
+def reply(call, name):
+    return {'jsonrpc': '2.0', 'id': call['id'], 'result': [name, call['params']]}
+
+
+class StubEndpoint:
+    """Local JSON-RPC node; batch_mode is 'ok', 'error' (JSON error object) or 'http400'"""
+
+    def __init__(self, name, port, delay=0.0, batch_mode='ok'):
+        self.name = name
+        self.url = f"http://127.0.0.1:{port}/"
+        self.port = port
+        self.delay = delay
+        self.batch_mode = batch_mode
+        self.requests = []
+
+    async def handle(self, request):
+        body = await request.json()
+        self.requests.append(len(body) if isinstance(body, list) else 1)
+        await asyncio.sleep(self.delay)
+        if isinstance(body, list):
+            if self.batch_mode == 'http400':
+                return web.Response(status=400, text='batch requests are not supported')
+            if self.batch_mode == 'error':
+                return web.json_response({'jsonrpc': '2.0', 'id': None,
+                                          'error': {'code': -32600, 'message': 'batch not allowed'}})
+            return web.json_response([reply(call, self.name) for call in body])
+        return web.json_response(reply(body, self.name))
+
+
+def serve(stubs):
+    ready = threading.Event()
+
+    async def start():
+        for stub in stubs:
+            app = web.Application()
+            app.router.add_post('/', stub.handle)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            await web.TCPSite(runner, '127.0.0.1', stub.port).start()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="rpc-stubs", daemon=True).start()
+    ready.wait()
+
+
+class RPCRouterTest:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.stubs = {
+            'batching': StubEndpoint('batching', BASE_PORT),
+            'error': StubEndpoint('error', BASE_PORT + 1, batch_mode='error'),
+            'http400': StubEndpoint('http400', BASE_PORT + 2, batch_mode='http400'),
+            'slow': StubEndpoint('slow', BASE_PORT + 3, delay=0.5),
+            'fast': StubEndpoint('fast', BASE_PORT + 4),
+        }
+        serve(self.stubs.values())
+
+    def check(self, condition: bool, description: str, detail: str = ''):
+        if condition:
+            print(f"  ✅ {description}")
+            self.passed += 1
+        else:
+            print(f"  ❌ {description} {detail}")
+            self.failed += 1
+
+    def router(self, *names, **kwargs) -> RPCRouter:
+        return RPCRouter([RPCEndpoint(name, self.stubs[name].url) for name in names], **kwargs)
+
+    def call_batch(self, router, count):
+        async def many():
+            return await router.call_many([('getSlot', [index]) for index in range(count)])
+        return asyncio.run(many())
+
+    def test_batch_supported(self):
+        """Calls made together travel as one batch"""
+        print("\n🧪 Testing Batched Calls...")
+        router = self.router('batching')
+        results = self.call_batch(router, 5)
+        self.check(results == [['batching', [index]] for index in range(5)], "every call answered in order")
+        self.check(self.stubs['batching'].requests == [5], "sent as a single batch",
+                   f"(requests {self.stubs['batching'].requests})")
+        router.close()
+
+    def test_batch_from_thread(self):
+        """call_many_sync from a plain thread still sends one batch"""
+        print("\n🧪 Testing Batched Calls From A Thread...")
+        stub = self.stubs['batching']
+        stub.requests.clear()
+        router = self.router('batching')
+        results = router.call_many_sync([('getTransaction', [index]) for index in range(4)])
+        self.check(results == [['batching', [index]] for index in range(4)], "every call answered in order")
+        self.check(stub.requests == [4], "sent as a single batch", f"(requests {stub.requests})")
+        router.close()
+
+    def test_batch_rejected(self):
+        """Endpoints that reject batches get the calls individually, now and on later batches"""
+        for mode in ('error', 'http400'):
+            print(f"\n🧪 Testing Batch Rejection ({mode})...")
+            stub = self.stubs[mode]
+            router = self.router(mode)
+            endpoint = router.endpoints[0]
+            results = self.call_batch(router, 4)
+            self.check(results == [[mode, [index]] for index in range(4)], "calls resent individually and answered",
+                       f"(got {results})")
+            self.check(not endpoint.supports_batch, "endpoint marked supports_batch=False")
+            self.check(endpoint.stats['errors'] == 0, "rejection not counted as an endpoint failure")
+
+            stub.requests.clear()
+            results = self.call_batch(router, 3)
+            self.check(results == [[mode, [index]] for index in range(3)] and stub.requests == [1, 1, 1],
+                       "later batches skip the batch attempt", f"(requests {stub.requests})")
+            router.close()
+
+    def test_cancelled_not_recorded(self):
+        """A hedge loser's truncated latency stays out of the EWMA and p95 window"""
+        print("\n🧪 Testing Hedge Loser Accounting...")
+        router = self.router('slow', 'fast', hedge_delay=0.05, min_hedge_delay=0.05)
+        slow = router.endpoints[0]
+        slow.latency_ewma = 0.001  # Ranked first so the fast endpoint is the hedge
+        result = router.call_sync('getSlot', [1])
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), router.loop).result(1)  # Let the cancel land
+        self.check(result == ['fast', [1]], "hedge to the fast endpoint wins", f"(got {result})")
+        self.check(slow.stats['cancelled'] == 1, "loser counted as cancelled")
+        self.check(not slow.latencies and slow.latency_ewma == 0.001, "loser latency not recorded",
+                   f"(latencies {list(slow.latencies)}, ewma {slow.latency_ewma})")
+        self.check(slow.censored_latency >= 0.05 and slow.score() >= slow.censored_latency,
+                   "score bounded below by the censored elapsed time", f"(censored {slow.censored_latency})")
+        router.close()
+
+    def run_comprehensive_test(self):
+        """Run complete RPC router test suite"""
+        print("🚀 Starting RPC Router Test Suite")
+        print("=" * 70)
+
+        self.test_batch_supported()
+        self.test_batch_from_thread()
+        self.test_batch_rejected()
+        self.test_cancelled_not_recorded()
+
+        print("\n" + "=" * 70)
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        return self.failed == 0
+
+
+if __name__ == "__main__":
+    tester = RPCRouterTest()
+    success = tester.run_comprehensive_test()
+    sys.exit(0 if success else 1)
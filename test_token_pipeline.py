@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Token Pipeline Test
+Verifies sibling persist/notify stages finish a token's trace once, after both,
+and that the resolve stage sheds name-only tokens to persist when it is full
+"""
+
+import sys
+import os
+import json
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from token_pipeline import TokenPipeline, PipelineStage, TokenWorkItem, BackpressurePolicy
+from token_tracing import get_trace_recorder
+
+
+class FakeDispatcher:
+    def match(self, name):
+        return {}
+
+    async def dispatch(self, name, address, server_matches, market_data=None):
+        return False
+
+
+class FakeMonitor:
+    """Just the monitor methods the pipeline stages call"""
+
+    def __init__(self, persist_delay: float = 0.0, notify_delay: float = 0.0):
+        self.processed_tokens = set()
+        self.server_dispatcher = FakeDispatcher()
+        self.persist_delay = persist_delay
+        self.notify_delay = notify_delay
+        self.persisted = []
+        self.notified = []
+
+    def schedule_keyword_refresh(self):
+        pass
+
+    def has_usable_name(self, name):
+        return bool(name) and name != 'Unknown'
+
+    def check_keyword_matches(self, name, address):
+        if 'moon' in name.lower():
+            return [{'token_name': name, 'keyword': 'moon', 'match_type': 'contains', 'token_address': address}]
+        return []
+
+    async def watch_token_trades(self, address, raw):
+        pass
+
+    async def enhance_token_name(self, address, name):
+        return name
+
+    async def get_market_data(self, address):
+        return {'market_cap': 1000}
+
+    async def insert_token_to_database(self, address, name, symbol):
+        await asyncio.sleep(self.persist_delay)
+        self.persisted.append(address)
+
+    async def send_discord_notification(self, match, market_data=None):
+        await asyncio.sleep(self.notify_delay)
+        self.notified.append(match['token_address'])
+        return True
+
+
+def frame(address: str, name: str) -> str:
+    return json.dumps({'mint': address, 'name': name, 'symbol': 'TST', 'txType': 'create'})
+
+
+class TokenPipelineTest:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+
+    def check(self, condition: bool, description: str, detail: str = ''):
+        if condition:
+            print(f"  ✅ {description}")
+            self.passed += 1
+        else:
+            print(f"  ❌ {description} {detail}")
+            self.failed += 1
+
+    async def run_tokens(self, monitor, frames):
+        pipeline = TokenPipeline(monitor)
+        await pipeline.start()
+        for message in frames:
+            await pipeline.submit_frame(message)
+        await pipeline.drain()
+        await pipeline.stop()
+        return pipeline
+
+    def finished_trace(self, address):
+        return [trace for trace in get_trace_recorder().traces if trace.address == address]
+
+    def test_sibling_trace(self):
+        """Persist finishing after notify (and the reverse) still lands in one finished trace"""
+        print("\n🧪 Testing Sibling Persist/Notify Traces...")
+        for label, persist_delay, notify_delay in (('persist last', 0.05, 0.0), ('notify last', 0.0, 0.05)):
+            address = f'Moon{label.split()[0]}bonk'
+            monitor = FakeMonitor(persist_delay, notify_delay)
+            asyncio.run(self.run_tokens(monitor, [frame(address, 'To The Moon')]))
+
+            traces = self.finished_trace(address)
+            self.check(len(traces) == 1, f"{label}: trace finished once", f"(got {len(traces)})")
+            if not traces:
+                continue
+            spans = [span.name for span in traces[0].spans]
+            self.check('stage:persist' in spans and 'stage:notify' in spans,
+                       f"{label}: both sibling spans recorded before finish", f"(spans {spans})")
+            self.check(traces[0].notified, f"{label}: notified flag survives the sibling finishing second")
+            waits = [span.attrs.get('wait_ms', 0) for span in traces[0].spans if span.name.startswith('stage:')]
+            self.check(all(0 <= wait < 1000 for wait in waits),
+                       f"{label}: per-stage queue waits use their own enqueue stamps", f"(waits {waits})")
+
+    def test_unmatched_trace(self):
+        """A token with no keyword hit finishes its trace in persist"""
+        print("\n🧪 Testing Unmatched Token Traces...")
+        monitor = FakeMonitor()
+        asyncio.run(self.run_tokens(monitor, [frame('Plainbonk', 'Plain Token')]))
+        traces = self.finished_trace('Plainbonk')
+        self.check(len(traces) == 1 and not traces[0].notified, "unmatched token trace finished once")
+        self.check(monitor.persisted == ['Plainbonk'] and not monitor.notified, "persisted without notifying")
+
+    def test_drop_newest(self):
+        """A DROP_NEWEST stage rejects items when full and leaves them unaccounted"""
+        print("\n🧪 Testing DROP_NEWEST Backpressure...")
+
+        async def scenario():
+            async def handler(item):
+                pass
+            stage = PipelineStage('shed', handler, maxsize=1, policy=BackpressurePolicy.DROP_NEWEST)
+            first = TokenWorkItem(received_at=0, address='Firstbonk')
+            second = TokenWorkItem(received_at=0, address='Secondbonk')
+            return stage, await stage.put(first), await stage.put(second), second
+
+        stage, accepted, rejected, second = asyncio.run(scenario())
+        self.check(accepted and not rejected, "second item rejected when the queue is full")
+        self.check(stage.stats['dropped'] == 1 and stage.stats['enqueued'] == 1, "drop counted, not enqueued")
+        self.check(second.open_stages == 0 and 'shed' not in second.enqueued_at, "shed item carries no open stage")
+
+    def test_resolve_overflow(self):
+        """Name-only tokens go to persist when the resolve stage is full"""
+        print("\n🧪 Testing Resolve Stage Overflow...")
+
+        async def scenario():
+            monitor = FakeMonitor()
+            pipeline = TokenPipeline(monitor)
+            while not pipeline.resolve.queue.full():
+                pipeline.resolve.queue.put_nowait(TokenWorkItem(received_at=0))
+            item = TokenWorkItem(received_at=0, address='Unnamedbonk', name='Unknown')
+            await pipeline._match(item)
+            return pipeline, item
+
+        pipeline, item = asyncio.run(scenario())
+        self.check(pipeline.enrich_overflow == 1, "overflow counted")
+        self.check(pipeline.persist.queue.qsize() == 1 and pipeline.enrich.queue.qsize() == 0,
+                   "shed token rerouted to persist, enrich untouched")
+        self.check(item.open_stages == 1, "only the persist visit is open")
+
+    def run_comprehensive_test(self):
+        """Run complete token pipeline test suite"""
+        print("🚀 Starting Token Pipeline Test Suite")
+        print("=" * 70)
+
+        self.test_sibling_trace()
+        self.test_unmatched_trace()
+        self.test_drop_newest()
+        self.test_resolve_overflow()
+
+        print("\n" + "=" * 70)
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        return self.failed == 0
+
+
+if __name__ == "__main__":
+    tester = TokenPipelineTest()
+    success = tester.run_comprehensive_test()
+    sys.exit(0 if success else 1)
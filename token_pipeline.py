@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Multi-Stage Token Pipeline
+Decouples websocket ingestion from enrichment: ingest -> dedupe -> match -> enrich -> persist/notify,
+each stage with its own bounded queue, worker pool, backpressure policy and latency gauges
+"""
+
+import asyncio
+import json
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+
+from metrics import get_metrics_registry
+from token_tracing import TokenTrace, current_trace, chain_time_of, get_trace_recorder
+from token_timestamp_resolver import get_token_timestamp_resolver
+
+logger = logging.getLogger(__name__)
+
+
+class BackpressurePolicy(Enum):
+    """What a stage does when its queue is full"""
+    BLOCK = "block"              # Wait for room (lossless, slows the upstream stage)
+    DROP_NEWEST = "drop_newest"  # Reject the incoming item; put() returns False and the caller reroutes it
+
+
+@dataclass
+class TokenWorkItem:
+    """A token travelling through the pipeline"""
+    received_at: float
+    raw: Any = None
+    address: str = ''
+    name: str = ''
+    symbol: str = ''
+    matches: List[Dict] = field(default_factory=list)
+    server_matches: Dict[str, List] = field(default_factory=dict)  # server_id -> [(user_id, keyword, match_type)]
+    market_data: Optional[Dict] = None
+    needs_name: bool = False
+    enqueued_at: Dict[str, float] = field(default_factory=dict)  # stage -> enqueue time (siblings hold one each)
+    stage_times: Dict[str, float] = field(default_factory=dict)
+    trace: Optional[TokenTrace] = None
+    open_stages: int = 0  # Queued or running stage visits; the trace finishes when this drops to zero
+    notified: bool = False
+
+
+class PipelineStage:
+    """Bounded queue + worker pool + gauges for one pipeline stage"""
+
+    def __init__(self, name: str, handler: Callable[[TokenWorkItem], Awaitable[None]],
+                 workers: int = 1, maxsize: int = 1000,
+                 policy: BackpressurePolicy = BackpressurePolicy.BLOCK, window: int = 1000):
+        self.name = name
+        self.handler = handler
+        self.worker_count = workers
+        self.policy = policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.workers: List[asyncio.Task] = []
+
+        # Gauges
+        self.wait_times = deque(maxlen=window)     # time spent queued
+        self.service_times = deque(maxlen=window)  # time spent in the handler
+        self.stats = {'enqueued': 0, 'processed': 0, 'dropped': 0, 'errors': 0, 'max_depth': 0}
+
+        # Long-running histograms for /metrics (the deques above only cover the recent window)
+        registry = get_metrics_registry()
+        self.wait_histogram = registry.histogram(
+            'token_stage_wait_seconds', 'Time a token spent queued before a stage', ('stage',)).labels(name)
+        self.service_histogram = registry.histogram(
+            'token_stage_seconds', 'Time a token spent in a stage handler', ('stage',)).labels(name)
+        self.error_counter = registry.counter(
+            'token_stage_errors_total', 'Stage handler exceptions', ('stage',)).labels(name)
+        self.drop_counter = registry.counter(
+            'token_stage_dropped_total', 'Tokens dropped by stage backpressure', ('stage',)).labels(name)
+
+    async def put(self, item: TokenWorkItem) -> bool:
+        """Enqueue according to the stage's backpressure policy; False when the item was shed"""
+        item.enqueued_at[self.name] = time.perf_counter()
+        item.open_stages += 1
+
+        if self.policy == BackpressurePolicy.BLOCK:
+            await self.queue.put(item)
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                item.open_stages -= 1
+                item.enqueued_at.pop(self.name, None)
+                self.stats['dropped'] += 1
+                self.drop_counter.inc()
+                logger.warning(f"⚠️ PIPELINE {self.name}: queue full, shedding {item.address[:10] or 'frame'}")
+                return False
+
+        self.stats['enqueued'] += 1
+        depth = self.queue.qsize()
+        if depth > self.stats['max_depth']:
+            self.stats['max_depth'] = depth
+        return True
+
+    def start(self):
+        for i in range(self.worker_count):
+            self.workers.append(asyncio.create_task(self._worker(f"{self.name}-{i}")))
+
+    async def _worker(self, worker_name: str):
+        recorder = get_trace_recorder()
+        while True:
+            item = await self.queue.get()
+            started = time.perf_counter()
+            wall_started = time.time()
+            waited = started - item.enqueued_at.pop(self.name, started)
+            self.wait_times.append(waited)
+            self.wait_histogram.observe(waited)
+            context = current_trace.set(item.trace)
+            try:
+                await self.handler(item)
+                self.stats['processed'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.error_counter.inc()
+                logger.error(f"❌ {worker_name}: {e}")
+            finally:
+                elapsed = time.perf_counter() - started
+                self.service_times.append(elapsed)
+                self.service_histogram.observe(elapsed)
+                item.stage_times[self.name] = elapsed
+                current_trace.reset(context)
+                item.open_stages -= 1
+                if item.trace is not None:
+                    item.trace.add_span(f'stage:{self.name}', wall_started,
+                                        wait_ms=round(waited * 1000, 2))
+                    # Last stage out (persist and notify are siblings - whichever ends second)
+                    if item.open_stages == 0:
+                        recorder.finish(item.trace, item.notified)
+                self.queue.task_done()
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    @staticmethod
+    def _percentiles(samples) -> Dict[str, float]:
+        ordered = sorted(samples)
+        if not ordered:
+            return {'p50_ms': 0.0, 'p99_ms': 0.0}
+        return {
+            'p50_ms': round(ordered[len(ordered) // 2] * 1000, 2),
+            'p99_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({
+            'depth': self.queue.qsize(),
+            'capacity': self.queue.maxsize,
+            'workers': self.worker_count,
+            'policy': self.policy.value,
+            'wait': self._percentiles(self.wait_times),
+            'service': self._percentiles(self.service_times)
+        })
+        return stats
+
+
+class TokenPipeline:
+    """
+    Staged processing for IntegratedTokenMonitor.
+
+    Ordering is only kept where it matters: ingest, dedupe and match run a single
+    worker each so tokens are deduplicated and matched in websocket order. Enrich,
+    persist and notify are I/O bound and run worker pools, so a slow DexScreener
+    call only occupies one enrich worker instead of stalling every token behind it.
+    Persist and notify are siblings after enrich - writing to the database never
+    delays a notification. Tokens that only need their name resolved go through
+    a separate resolve stage that sheds (DROP_NEWEST) when full, so a burst of
+    unnamed tokens never blocks matched tokens waiting for enrich.
+    """
+
+    def __init__(self, monitor, enrich_workers: int = 8, persist_workers: int = 2, notify_workers: int = 4,
+                 resolve_workers: int = 4):
+        self.monitor = monitor
+        self.stages: Dict[str, PipelineStage] = {}
+        self.running = False
+
+        self.ingest = self._add_stage('ingest', self._ingest, 1, 5000, BackpressurePolicy.BLOCK)
+        self.dedupe = self._add_stage('dedupe', self._dedupe, 1, 5000, BackpressurePolicy.BLOCK)
+        self.match = self._add_stage('match', self._match, 1, 5000, BackpressurePolicy.BLOCK)
+        self.resolve = self._add_stage('resolve', self._enrich, resolve_workers, 1000, BackpressurePolicy.DROP_NEWEST)
+        self.enrich = self._add_stage('enrich', self._enrich, enrich_workers, 1000, BackpressurePolicy.BLOCK)
+        self.persist = self._add_stage('persist', self._persist, persist_workers, 5000, BackpressurePolicy.BLOCK)
+        self.notify = self._add_stage('notify', self._notify, notify_workers, 500, BackpressurePolicy.BLOCK)
+
+        # Name-only tokens shed by the resolve stage are persisted under their websocket name
+        self.enrich_overflow = 0
+        self.duplicates = 0
+
+        # End-to-end latency from websocket receive (received_at is wall-clock time)
+        registry = get_metrics_registry()
+        self.detection_latency = registry.histogram(
+            'token_detection_to_notification_seconds', 'Websocket receive to Discord notification sent')
+        self.persist_latency = registry.histogram(
+            'token_detection_to_persist_seconds', 'Websocket receive to detected_tokens write queued')
+        self.tokens_counter = registry.counter('pipeline_tokens_total', 'Tokens leaving the pipeline', ('outcome',))
+        registry.register_collector('pipeline', self._collect_metrics)
+
+    def _add_stage(self, name, handler, workers, maxsize, policy) -> PipelineStage:
+        stage = PipelineStage(name, handler, workers=workers, maxsize=maxsize, policy=policy)
+        self.stages[name] = stage
+        return stage
+
+    async def start(self):
+        """Start every stage's workers on the running loop"""
+        if self.running:
+            return
+        for stage in self.stages.values():
+            stage.start()
+        self.running = True
+        logger.info("🚀 PIPELINE: ingest → dedupe → match → enrich → persist/notify workers started")
+
+    async def stop(self):
+        for stage in self.stages.values():
+            await stage.stop()
+        self.running = False
+        logger.info("🛑 PIPELINE: All workers stopped")
+
+    async def submit_frame(self, message: str, received_at: Optional[float] = None):
+        """Hand a raw websocket frame to the pipeline (the websocket loop only does this)"""
+        await self.ingest.put(TokenWorkItem(received_at=received_at or time.time(), raw=message))
+
+    async def submit_event(self, data: Dict, received_at: Optional[float] = None):
+        """Hand an already-parsed token event to the pipeline"""
+        await self.ingest.put(TokenWorkItem(received_at=received_at or time.time(), raw=data))
+
+    async def drain(self):
+        """Wait until every queued item has passed through all stages"""
+        for stage in self.stages.values():
+            await stage.queue.join()
+
+    # Stage handlers
+
+    async def _ingest(self, item: TokenWorkItem):
+        data = item.raw
+        if isinstance(data, (str, bytes)):
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError:
+                logger.warning(f"Invalid JSON: {str(item.raw)[:100]}")
+                return
+
+        if not isinstance(data, dict):
+            return
+        
+        # Trades for watched tokens only update local market state
+        if data.get('txType') in ('buy', 'sell'):
+            self.monitor.token_market_cache.apply_trade(data)
+            return
+        
+        # Check for new token events
+        if not (data.get('type') == 'new_token' or 'mint' in data):
+            return
+
+        item.raw = data
+        item.address = data.get('mint') or data.get('address') or ''
+        item.name = data.get('name', 'Unknown')
+        item.symbol = data.get('symbol', '')
+        if item.address:
+            if data.get('txType') in (None, 'create'):
+                # Creation signature (and slot/blockTime when present) for later timestamp lookups
+                get_token_timestamp_resolver().note_event(item.address, data.get('signature'), data.get('slot'),
+                                                          chain_time_of(data), source='pumpportal')
+            await self.dedupe.put(item)
+
+    async def _dedupe(self, item: TokenWorkItem):
+        monitor = self.monitor
+        if item.address in monitor.processed_tokens:
+            self.duplicates += 1
+            return
+        monitor.processed_tokens.add(item.address)
+
+        # Trace starts at websocket receive; the first span covers parse + queueing up to here
+        item.trace = get_trace_recorder().start(item.address, item.name, item.received_at,
+                                                chain_time_of(item.raw))
+        item.trace.add_span('receive', item.received_at)
+
+        logger.info(f"🆕 New token: {item.name} ({item.symbol}) - {item.address}")
+        await self.match.put(item)
+
+    async def _match(self, item: TokenWorkItem):
+        monitor = self.monitor
+        monitor.schedule_keyword_refresh()
+
+        if not monitor.has_usable_name(item.name):
+            # Name must be resolved before keywords can be checked
+            item.needs_name = True
+            if not await self.resolve.put(item):
+                self.enrich_overflow += 1
+                await self.persist.put(item)
+            return
+
+        item.matches = monitor.check_keyword_matches(item.name, item.address)
+        item.server_matches = monitor.server_dispatcher.match(item.name)
+        if item.matches or item.server_matches:
+            await monitor.watch_token_trades(item.address, item.raw)
+            await self.enrich.put(item)
+        else:
+            await self.persist.put(item)
+
+    async def _enrich(self, item: TokenWorkItem):
+        monitor = self.monitor
+        if item.needs_name:
+            item.name = await monitor.enhance_token_name(item.address, item.name)
+            if item.trace is not None:
+                item.trace.name = item.name
+            item.matches = monitor.check_keyword_matches(item.name, item.address)
+            item.server_matches = monitor.server_dispatcher.match(item.name)
+            if item.matches or item.server_matches:
+                await monitor.watch_token_trades(item.address, item.raw)
+
+        if item.matches or item.server_matches:
+            item.market_data = await monitor.get_market_data(item.address)
+            await self.notify.put(item)
+        await self.persist.put(item)
+
+    async def _persist(self, item: TokenWorkItem):
+        await self.monitor.insert_token_to_database(item.address, item.name, item.symbol)
+        self.persist_latency.observe(time.time() - item.received_at)
+        self.tokens_counter.labels('persisted').inc()
+
+    async def _notify(self, item: TokenWorkItem):
+        if item.matches:
+            logger.info(f"🎯 STRICT MATCH: Found {len(item.matches)} keyword matches for '{item.name}'")
+
+        # Matches for one token are sent in order; different tokens go out in parallel
+        for match in item.matches:
+            logger.info(f"✅ MATCH DETAILS: Token='{match['token_name']}' | Keyword='{match['keyword']}' | Type={match['match_type']}")
+            if await self.monitor.send_discord_notification(match, market_data=item.market_data):
+                item.notified = True
+
+        # One POST per matching server, all of its users mentioned together
+        if item.server_matches:
+            if await self.monitor.server_dispatcher.dispatch(item.name, item.address, item.server_matches,
+                                                             market_data=item.market_data):
+                item.notified = True
+
+        self.detection_latency.observe(time.time() - item.received_at)
+        self.tokens_counter.labels('notified').inc()
+
+    def _collect_metrics(self, registry):
+        depth = registry.gauge('token_stage_queue_depth', 'Tokens waiting in a stage queue', ('stage',))
+        for name, stage in self.stages.items():
+            depth.labels(name).set(stage.queue.qsize())
+        registry.gauge('pipeline_enrich_overflow', 'Name-only tokens shed by the resolve stage').set(self.enrich_overflow)
+
+        # Dedupe store: a "hit" is a token address seen before
+        lookups = self.dedupe.stats['processed']
+        registry.gauge('cache_requests', 'Lookups per cache', ('cache',)).labels('seen_tokens').set(lookups)
+        registry.gauge('cache_hit_ratio', 'Fraction of lookups served from cache', ('cache',)).labels(
+            'seen_tokens').set(self.duplicates / lookups if lookups else 0.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-stage queue depth and latency gauges"""
+        return {
+            'running': self.running,
+            'enrich_overflow': self.enrich_overflow,
+            'duplicates': self.duplicates,
+            'stages': {name: stage.get_stats() for name, stage in self.stages.items()}
+        }
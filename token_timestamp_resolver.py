@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Token Timestamp Resolver
+Creation time for a mint without scanning its whole signature history. Fresh
+mints are announced by an event (PumpPortal create, LetsBonk logs stream,
+fetched create transaction) that already carries the creation signature and
+usually its slot/blockTime - those are recorded with note_event() and answer
+later lookups with zero RPCs. A slot->blockTime LRU turns slot-only events
+into at most one getBlockTime call, and only mints nobody announced fall back
+to a bounded, paginated `before`-cursor getSignaturesForAddress search,
+behind a concurrency semaphore and single-flight per address.
+"""
+
+import asyncio
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from rpc_router import get_rpc_router
+
+logger = logging.getLogger(__name__)
+
+# How a creation time was established, best first
+EVENT = 'event'                # blockTime carried by the announcing event/transaction
+SLOT = 'slot'                  # event slot -> getBlockTime (LRU cached)
+SIGNATURE = 'signature'        # event signature -> getSignatureStatuses slot -> getBlockTime
+HISTORY = 'signature_history'  # paginated getSignaturesForAddress fallback
+
+
+def normalize_block_time(value: Any) -> Optional[float]:
+    """Epoch seconds from a seconds/milliseconds blockTime (None when missing/invalid)"""
+    if isinstance(value, (int, float)) and value > 0:
+        return value / 1000 if value > 1e12 else float(value)
+    return None
+
+
+def is_exact(record: Optional[Dict[str, Any]]) -> bool:
+    """True when the record pins the creation time (a capped history scan only bounds the age from below)"""
+    if not record:
+        return False
+    return record.get('method') in (EVENT, SLOT, SIGNATURE) or record.get('complete') is True
+
+
+class TokenTimestampResolver:
+    """Event-first token creation timestamps with a slot->blockTime cache and bounded history fallback"""
+
+    def __init__(self, max_tokens: int = 20000, max_slots: int = 4096, page_size: int = 100,
+                 max_pages: int = 10, max_concurrency: int = 4, timeout: float = 10):
+        self.max_tokens = max_tokens
+        self.max_slots = max_slots
+        self.page_size = page_size
+        self.max_pages = max_pages  # page_size * max_pages signatures at most per unknown mint
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+        self.tokens: OrderedDict = OrderedDict()      # mint -> creation record
+        self.pending: Dict[str, Dict[str, Any]] = {}  # mint -> {signature, slot} awaiting a blockTime
+        self.slot_times: OrderedDict = OrderedDict()  # slot -> blockTime
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.lock = threading.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stats = {
+            'events': 0, 'lookups': 0, 'cache_hits': 0, 'coalesced': 0,
+            'slot_hits': 0, 'slot_misses': 0, 'history_searches': 0, 'history_pages': 0,
+            'rpc_calls': 0, 'rpc_errors': 0, 'unresolved': 0
+        }
+
+    # Loop management
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            with self.lock:
+                if self.loop is None:
+                    ready = threading.Event()
+
+                    def run():
+                        loop = asyncio.new_event_loop()
+                        asyncio.set_event_loop(loop)
+                        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+                        self.loop = loop
+                        ready.set()
+                        loop.run_forever()
+
+                    self.thread = threading.Thread(target=run, name="timestamp-resolver", daemon=True)
+                    self.thread.start()
+                    ready.wait()
+                    logger.info("⏱️ Token timestamp resolver loop started")
+        return self.loop
+
+    # Event-carried data (any thread)
+
+    def note_slot(self, slot: Optional[int], block_time: Any):
+        """Remember a slot's blockTime (signature pages and transactions carry both)"""
+        block_time = normalize_block_time(block_time)
+        if not slot or block_time is None:
+            return
+        with self.lock:
+            self._store_slot(slot, block_time)
+
+    def _store_slot(self, slot: int, block_time: float):
+        self.slot_times[slot] = block_time
+        self.slot_times.move_to_end(slot)
+        while len(self.slot_times) > self.max_slots:
+            self.slot_times.popitem(last=False)
+
+    def note_event(self, mint: str, signature: Optional[str] = None, slot: Optional[int] = None,
+                   block_time: Any = None, source: str = 'event'):
+        """Record what the announcing event knows about a mint's creation - no RPC is made here"""
+        if not mint:
+            return
+        block_time = normalize_block_time(block_time)
+        with self.lock:
+            self.stats['events'] += 1
+            method = EVENT
+            if slot and block_time is not None:
+                self._store_slot(slot, block_time)
+            elif slot:
+                block_time = self.slot_times.get(slot)
+                method = SLOT
+
+            if block_time is not None:
+                self.pending.pop(mint, None)
+                known = self.tokens.get(mint)
+                # An earlier creation time wins (e.g. a later trade event must not move creation forward)
+                if known is None or block_time < known['creation_timestamp']:
+                    self._store_token(mint, self._record(mint, block_time, signature, slot, method, source=source))
+            elif mint not in self.tokens and (signature or slot):
+                self.pending[mint] = {'signature': signature, 'slot': slot, 'source': source}
+                while len(self.pending) > self.max_tokens:
+                    self.pending.pop(next(iter(self.pending)))
+
+    def note_transaction(self, mint: str, transaction: Dict[str, Any], signature: Optional[str] = None,
+                         source: str = 'transaction'):
+        """Record a fetched create transaction (getTransaction result carries slot and blockTime)"""
+        if not signature:
+            signatures = (transaction.get('transaction') or {}).get('signatures') or ['']
+            signature = signatures[0] if isinstance(signatures[0], str) else None
+        self.note_event(mint, signature, transaction.get('slot'), transaction.get('blockTime'), source)
+
+    def _record(self, mint: str, block_time: float, signature: Optional[str], slot: Optional[int],
+                method: str, **extra) -> Dict[str, Any]:
+        return {
+            'token_address': mint,
+            'creation_timestamp': block_time,
+            'creation_signature': signature,
+            'slot': slot,
+            'method': method,
+            'resolved_at': time.time(),
+            **extra
+        }
+
+    def _store_token(self, mint: str, record: Dict[str, Any]):
+        self.tokens[mint] = record
+        self.tokens.move_to_end(mint)
+        while len(self.tokens) > self.max_tokens:
+            self.tokens.popitem(last=False)
+
+    def lookup(self, mint: str) -> Optional[Dict[str, Any]]:
+        """Creation record already known locally (never makes an RPC call)"""
+        with self.lock:
+            record = self.tokens.get(mint)
+            if record is None:
+                pending = self.pending.get(mint)
+                block_time = self.slot_times.get(pending['slot']) if pending and pending.get('slot') else None
+                if block_time is None:
+                    return None
+                record = self._record(mint, block_time, pending['signature'], pending['slot'], SLOT,
+                                      source=pending.get('source'))
+                self.pending.pop(mint, None)
+                self._store_token(mint, record)
+            return dict(record)
+
+    # Resolution (service loop)
+
+    async def resolve(self, mint: str) -> Optional[Dict[str, Any]]:
+        """Creation record for a mint from any event loop"""
+        record = self.lookup(mint)
+        self.stats['lookups'] += 1
+        if record:
+            self.stats['cache_hits'] += 1
+            return record
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await self._resolve(mint)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._resolve(mint), loop))
+
+    def resolve_sync(self, mint: str, timeout: float = 30) -> Optional[Dict[str, Any]]:
+        """Creation record for a mint from a plain thread"""
+        record = self.lookup(mint)
+        self.stats['lookups'] += 1
+        if record:
+            self.stats['cache_hits'] += 1
+            return record
+        future = asyncio.run_coroutine_threadsafe(self._resolve(mint), self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            future.cancel()
+            logger.debug(f"Timestamp resolution failed for {mint[:10]}...: {e}")
+            return None
+
+    async def resolve_many(self, mints: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Records for many mints; RPC fallbacks share the resolver's concurrency limit"""
+        mints = list(dict.fromkeys(mints))
+        results = await asyncio.gather(*(self.resolve(mint) for mint in mints), return_exceptions=True)
+        resolved = {}
+        for mint, result in zip(mints, results):
+            if isinstance(result, dict):
+                resolved[mint] = result
+            elif isinstance(result, Exception):
+                logger.error(f"❌ Batch timestamp error for {mint[:10]}...: {result}")
+        return resolved
+
+    async def _resolve(self, mint: str) -> Optional[Dict[str, Any]]:
+        record = self.lookup(mint)
+        if record:
+            return record
+        inflight = self.inflight.get(mint)
+        if inflight is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(inflight)
+
+        future = self.loop.create_future()
+        self.inflight[mint] = future
+        try:
+            async with self.semaphore:
+                record = await self._resolve_uncached(mint)
+            if record:
+                with self.lock:
+                    self.pending.pop(mint, None)
+                    self._store_token(mint, record)
+                record = dict(record)
+            else:
+                self.stats['unresolved'] += 1
+            future.set_result(record)
+            return record
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved here so coalesced waiters alone surface it
+            raise
+        finally:
+            self.inflight.pop(mint, None)
+
+    async def _resolve_uncached(self, mint: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            pending = dict(self.pending.get(mint) or {})
+
+        signature, slot = pending.get('signature'), pending.get('slot')
+        if signature and not slot:
+            statuses = await self._rpc_call("getSignatureStatuses", [[signature]])
+            status = (statuses or {}).get('value') or [None]
+            slot = (status[0] or {}).get('slot')
+        if slot:
+            block_time = await self.block_time_for_slot(slot)
+            if block_time is not None:
+                method = SLOT if pending.get('slot') else SIGNATURE
+                return self._record(mint, block_time, signature, slot, method, source=pending.get('source'))
+
+        return await self._search_history(mint)
+
+    async def block_time_for_slot(self, slot: int) -> Optional[float]:
+        """blockTime for a slot, from the LRU or one getBlockTime call"""
+        with self.lock:
+            block_time = self.slot_times.get(slot)
+            if block_time is not None:
+                self.slot_times.move_to_end(slot)
+                self.stats['slot_hits'] += 1
+                return block_time
+            self.stats['slot_misses'] += 1
+        block_time = normalize_block_time(await self._rpc_call("getBlockTime", [slot]))
+        if block_time is not None:
+            self.note_slot(slot, block_time)
+        return block_time
+
+    async def _search_history(self, mint: str) -> Optional[Dict[str, Any]]:
+        """Walk getSignaturesForAddress back with the `before` cursor, page_size at a time, max_pages at most"""
+        self.stats['history_searches'] += 1
+        before = None
+        oldest = None
+        scanned = 0
+        complete = False
+
+        for _ in range(self.max_pages):
+            options = {"limit": self.page_size, "commitment": "confirmed"}
+            if before:
+                options["before"] = before
+            page = await self._rpc_call("getSignaturesForAddress", [mint, options])
+            if page is None:
+                break
+            self.stats['history_pages'] += 1
+            scanned += len(page)
+            for entry in page:
+                self.note_slot(entry.get('slot'), entry.get('blockTime'))
+            for entry in reversed(page):
+                if entry.get('blockTime'):
+                    oldest = entry
+                    break
+            if len(page) < self.page_size:
+                complete = True
+                break
+            before = page[-1].get('signature')
+
+        if not oldest:
+            logger.debug(f"❌ No signatures with a block time for {mint[:10]}...")
+            return None
+        return self._record(mint, normalize_block_time(oldest['blockTime']), oldest.get('signature'),
+                            oldest.get('slot'), HISTORY, total_signatures=scanned,
+                            complete=complete)  # complete=False: true creation is at least this old
+
+    async def _rpc_call(self, method: str, params: List[Any]) -> Any:
+        self.stats['rpc_calls'] += 1
+        try:
+            return await get_rpc_router().call(method, params, timeout=self.timeout)
+        except Exception as e:
+            self.stats['rpc_errors'] += 1
+            logger.debug(f"Timestamp RPC {method} failed: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['known_tokens'] = len(self.tokens)
+        stats['pending_tokens'] = len(self.pending)
+        stats['cached_slots'] = len(self.slot_times)
+        stats['inflight'] = len(self.inflight)
+        return stats
+
+
+# Global resolver instance
+token_timestamp_resolver = None
+_token_timestamp_resolver_lock = threading.Lock()
+
+
+def get_token_timestamp_resolver() -> TokenTimestampResolver:
+    """Get the process-wide token timestamp resolver"""
+    global token_timestamp_resolver
+    if token_timestamp_resolver is None:
+        with _token_timestamp_resolver_lock:
+            if token_timestamp_resolver is None:
+                token_timestamp_resolver = TokenTimestampResolver()
+    return token_timestamp_resolver
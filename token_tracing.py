@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Per-Token Latency Tracing
+Lightweight trace spans for every detected token: on-chain time (when the event
+carries one), websocket receive, each pipeline stage, name enhancement, market
+data, the Discord webhook accept and the notification write. The active trace
+travels with the pipeline worker in a ContextVar, so instrumented functions just
+open a span. Finished traces go to a bounded in-memory ring and, optionally, a
+compact JSON-lines file (TOKEN_TRACE_FILE).
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+current_trace: contextvars.ContextVar = contextvars.ContextVar('current_trace', default=None)
+
+
+@dataclass
+class Span:
+    """One timed step; offsets are milliseconds from the websocket receive"""
+    name: str
+    start_ms: float
+    duration_ms: float
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class TokenTrace:
+    """Timeline of one token from chain to Discord"""
+    address: str
+    name: str
+    received_at: float                   # Wall clock, websocket receive
+    chain_time: Optional[float] = None   # Wall clock, from the event's own timestamp
+    spans: List[Span] = field(default_factory=list)
+    marks: Dict[str, float] = field(default_factory=dict)  # event -> ms from receive
+    finished_ms: Optional[float] = None
+    notified: bool = False
+
+    def offset_ms(self, wall_time: Optional[float] = None) -> float:
+        return ((wall_time or time.time()) - self.received_at) * 1000
+
+    def add_span(self, name: str, started: float, ended: Optional[float] = None, **attrs):
+        """Record a span from wall-clock start/end times"""
+        ended = ended or time.time()
+        self.spans.append(Span(name, round(self.offset_ms(started), 2), round((ended - started) * 1000, 2), attrs))
+
+    def mark(self, event: str):
+        self.marks.setdefault(event, round(self.offset_ms(), 2))
+
+    @property
+    def total_ms(self) -> float:
+        return self.finished_ms if self.finished_ms is not None else self.offset_ms()
+
+    def slowest_span(self) -> Optional[Span]:
+        return max(self.spans, key=lambda span: span.duration_ms, default=None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        slowest = self.slowest_span()
+        return {
+            'address': self.address,
+            'name': self.name,
+            'received_at': self.received_at,
+            'chain_to_receive_ms': round((self.received_at - self.chain_time) * 1000, 2) if self.chain_time else None,
+            'total_ms': round(self.total_ms, 2),
+            'notified': self.notified,
+            'slowest_stage': slowest.name if slowest else None,
+            'spans': [{'name': s.name, 'start_ms': s.start_ms, 'duration_ms': s.duration_ms, **s.attrs}
+                      for s in self.spans],
+            'marks': dict(self.marks)
+        }
+
+    def to_record(self) -> str:
+        """Compact single-line form for the trace file"""
+        return json.dumps({
+            'a': self.address,
+            'n': self.name,
+            'r': round(self.received_at, 6),
+            'c': self.chain_time,
+            't': round(self.total_ms, 2),
+            'ok': int(self.notified),
+            's': [[s.name, s.start_ms, s.duration_ms] for s in self.spans],
+            'm': self.marks
+        }, separators=(',', ':'), ensure_ascii=False)
+
+
+def chain_time_of(data: Dict[str, Any]) -> Optional[float]:
+    """Block/creation time carried by an event, normalised to epoch seconds"""
+    for key in ('blockTime', 'block_time', 'timestamp', 'created_timestamp'):
+        value = data.get(key)
+        if isinstance(value, (int, float)) and value > 0:
+            return value / 1000 if value > 1e11 else float(value)
+    return None
+
+
+class _SpanContext:
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.trace: Optional[TokenTrace] = None
+
+    def __enter__(self):
+        self.trace = current_trace.get()
+        self.started = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is not None:
+            if exc_type is not None:
+                self.attrs['error'] = exc_type.__name__
+            self.trace.add_span(self.name, self.started, **self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def trace_span(name: str, **attrs) -> _SpanContext:
+    """with trace_span('enhance_token_name'): ... - a no-op when no token trace is active"""
+    return _SpanContext(name, attrs)
+
+
+def trace_mark(event: str):
+    """Mark an instant (e.g. 'discord_accepted') on the active trace, if any"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.mark(event)
+
+
+class TraceRecorder:
+    """Bounded ring of finished traces, optionally mirrored to an append-only file"""
+
+    def __init__(self, capacity: int = 2000, path: Optional[str] = None,
+                 max_file_bytes: int = 50 * 1024 * 1024, flush_interval: float = 1.0):
+        self.traces = deque(maxlen=capacity)
+        self.path = path
+        self.max_file_bytes = max_file_bytes
+        self.flush_interval = flush_interval
+        self.file = None
+        self.last_flush = 0.0
+        self.lock = threading.Lock()
+        self.stats = {'started': 0, 'finished': 0, 'written': 0, 'write_errors': 0}
+
+    def start(self, address: str, name: str, received_at: float, chain_time: Optional[float] = None) -> TokenTrace:
+        self.stats['started'] += 1
+        return TokenTrace(address=address, name=name, received_at=received_at, chain_time=chain_time)
+
+    def finish(self, trace: TokenTrace, notified: bool = False):
+        if trace.finished_ms is not None:
+            return
+        trace.finished_ms = trace.offset_ms()
+        trace.notified = notified
+        with self.lock:
+            self.traces.append(trace)
+            self.stats['finished'] += 1
+            if self.path:
+                self._write(trace)
+
+    def _write(self, trace: TokenTrace):
+        try:
+            if self.file is None:
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(trace.to_record() + '\n')
+            self.stats['written'] += 1
+            now = time.time()
+            if now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = now
+                if self.file.tell() > self.max_file_bytes:
+                    self.file.close()
+                    os.replace(self.path, self.path + '.1')
+                    self.file = None
+        except OSError as e:
+            self.stats['write_errors'] += 1
+            logger.warning(f"⚠️ Trace file write failed: {e}")
+            self.file = None
+
+    def slowest(self, limit: int = 20, window: Optional[float] = None,
+                notified_only: bool = False) -> List[Dict[str, Any]]:
+        """Slowest finished traces, optionally within the last window seconds / notified tokens only"""
+        cutoff = time.time() - window if window else 0.0
+        with self.lock:
+            candidates = [trace for trace in self.traces
+                          if trace.received_at >= cutoff and (trace.notified or not notified_only)]
+        candidates.sort(key=lambda trace: trace.total_ms, reverse=True)
+        return [trace.to_dict() for trace in candidates[:limit]]
+
+    def find(self, address: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            for trace in reversed(self.traces):
+                if trace.address == address:
+                    return trace.to_dict()
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({'buffered': len(self.traces), 'capacity': self.traces.maxlen, 'file': self.path})
+        return stats
+
+
+def slowest_traces_response(recorder: TraceRecorder, params: Dict[str, str]) -> Dict[str, Any]:
+    """Body for /debug/traces/slowest (?limit=, ?window=seconds, ?notified=1, ?address=)"""
+    if params.get('address'):
+        trace = recorder.find(params['address'])
+        return {'traces': [trace] if trace else []}
+    try:
+        limit = max(1, min(int(params.get('limit', 20)), 200))
+        window = float(params['window']) if params.get('window') else None
+    except ValueError:
+        limit, window = 20, None
+    notified_only = params.get('notified') in ('1', 'true', 'yes')
+    return {'traces': recorder.slowest(limit, window, notified_only), 'stats': recorder.get_stats()}
+
+
+# Global recorder instance
+trace_recorder = None
+_trace_recorder_lock = threading.Lock()
+
+
+def get_trace_recorder() -> TraceRecorder:
+    """Get the process-wide trace recorder (TOKEN_TRACE_FILE enables the file mirror)"""
+    global trace_recorder
+    if trace_recorder is None:
+        with _trace_recorder_lock:
+            if trace_recorder is None:
+                trace_recorder = TraceRecorder(
+                    capacity=int(os.getenv('TOKEN_TRACE_CAPACITY', '2000')),
+                    path=os.getenv('TOKEN_TRACE_FILE') or None
+                )
+    return trace_recorder
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Live Token Trade State
+Per-token market state maintained from PumpPortal trade events (subscribeTokenTrade)
+for keyword-matched tokens, so notifications render market cap / price / volume
+from local state instead of HTTP lookups
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+SOL_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd"
+
+
+class TokenTradeState:
+    """Compact per-token state (slots only - no per-instance dict)"""
+    __slots__ = ('market_cap_sol', 'price_sol', 'first_price_sol', 'volume_sol', 'buys', 'sells',
+                 'watched_at', 'updated_at')
+
+    def __init__(self, now: float):
+        self.market_cap_sol = 0.0
+        self.price_sol = 0.0
+        self.first_price_sol = 0.0
+        self.volume_sol = 0.0
+        self.buys = 0
+        self.sells = 0
+        self.watched_at = now
+        self.updated_at = now
+
+    def apply(self, event: Dict, now: float):
+        """Fold a PumpPortal create/buy/sell event into the state"""
+        v_sol = event.get('vSolInBondingCurve')
+        v_tokens = event.get('vTokensInBondingCurve')
+        if v_sol and v_tokens:
+            self.price_sol = float(v_sol) / float(v_tokens)
+            if not self.first_price_sol:
+                self.first_price_sol = self.price_sol
+        if event.get('marketCapSol'):
+            self.market_cap_sol = float(event['marketCapSol'])
+
+        tx_type = event.get('txType')
+        if tx_type in ('buy', 'sell', 'create'):
+            self.volume_sol += float(event.get('solAmount') or 0)
+            if tx_type == 'sell':
+                self.sells += 1
+            else:
+                self.buys += 1
+        self.updated_at = now
+
+
+class TokenTradeStateTable:
+    """
+    Bounded table of watched tokens. Entries are evicted when their watch window
+    ends or, least recently updated first, when the table is full; expire()
+    returns evicted addresses so the caller can unsubscribe them.
+    """
+
+    def __init__(self, max_tokens: int = 2000, watch_seconds: float = 1800):
+        self.max_tokens = max_tokens
+        self.watch_seconds = watch_seconds
+        self.states: 'OrderedDict[str, TokenTradeState]' = OrderedDict()
+        self.evicted: List[str] = []
+        self.stats = {'watched': 0, 'trades_applied': 0, 'trades_ignored': 0, 'evicted': 0, 'snapshots': 0}
+
+    def __contains__(self, token_address: str) -> bool:
+        return token_address in self.states
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def watch(self, token_address: str, seed_event: Optional[Dict] = None) -> bool:
+        """Start tracking a token (seeded from its create event); returns True if newly watched"""
+        if token_address in self.states:
+            return False
+        now = time.time()
+        state = TokenTradeState(now)
+        if seed_event:
+            state.apply(seed_event, now)
+        self.states[token_address] = state
+        self.stats['watched'] += 1
+
+        while len(self.states) > self.max_tokens:
+            evicted, _ = self.states.popitem(last=False)
+            self.evicted.append(evicted)
+            self.stats['evicted'] += 1
+        return True
+
+    def apply_trade(self, event: Dict) -> bool:
+        """Apply a trade event; trades for unwatched tokens are ignored"""
+        state = self.states.get(event.get('mint'))
+        if state is None:
+            self.stats['trades_ignored'] += 1
+            return False
+        state.apply(event, time.time())
+        self.states.move_to_end(event['mint'])
+        self.stats['trades_applied'] += 1
+        return True
+
+    def expire(self) -> List[str]:
+        """Drop tokens whose watch window ended; returns every address evicted since the last call"""
+        cutoff = time.time() - self.watch_seconds
+        for token_address in [a for a, s in self.states.items() if s.watched_at < cutoff]:
+            del self.states[token_address]
+            self.evicted.append(token_address)
+            self.stats['evicted'] += 1
+        evicted, self.evicted = self.evicted, []
+        return evicted
+
+    def addresses(self) -> List[str]:
+        return list(self.states)
+
+    def get_market_data(self, token_address: str, sol_usd: float) -> Optional[Dict[str, Any]]:
+        """Market data dict (same shape as the HTTP providers) rendered from local state"""
+        state = self.states.get(token_address)
+        if state is None or not sol_usd or not state.market_cap_sol:
+            return None
+        self.stats['snapshots'] += 1
+        change = (state.price_sol / state.first_price_sol - 1) * 100 if state.first_price_sol else 0.0
+        return {
+            'price': state.price_sol * sol_usd,
+            'market_cap': state.market_cap_sol * sol_usd,
+            'volume_24h': state.volume_sol * sol_usd,  # Volume since the token was watched
+            'liquidity': 0.0,
+            'price_change_24h': change,
+            'buys': state.buys,
+            'sells': state.sells,
+            'source': 'PumpPortal',
+            'timestamp': state.updated_at
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['tracked'] = len(self.states)
+        return stats
+
+
+class SolPriceTracker:
+    """SOL/USD reference price for converting bonding-curve SOL values (refreshed in the background)"""
+
+    def __init__(self, http, refresh_interval: float = 60):
+        self.http = http
+        self.refresh_interval = refresh_interval
+        self.usd = 0.0
+        self.updated_at = 0.0
+
+    def due(self) -> bool:
+        return time.time() - self.updated_at >= self.refresh_interval
+
+    async def refresh(self) -> float:
+        try:
+            response = await self.http.get(SOL_PRICE_URL, timeout=5)
+            if response.status == 200:
+                price = (response.json() or {}).get('solana', {}).get('usd')
+                if price:
+                    self.usd = float(price)
+                    self.updated_at = time.time()
+        except Exception as e:
+            logger.debug(f"SOL price refresh failed: {e}")
+        return self.usd
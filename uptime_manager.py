@@ -12,6 +12,8 @@ import signal
 import sys
 from datetime import datetime
 
+from seen_address_store import SeenAddressStore
+
 logger = logging.getLogger(__name__)
 
 class UptimeManager:
@@ -84,16 +86,22 @@ class UptimeManager:
         try:
             initial_memory = psutil.virtual_memory().percent
             
-            # Clear TTL caches if they exist in the server
-            if hasattr(self.server, 'seen_token_addresses') and self.server.seen_token_addresses:
-                cache_size = len(self.server.seen_token_addresses)
-                self.server.seen_token_addresses.clear()
-                logger.info(f"🧹 Cleared token address cache ({cache_size} entries)")
-                
-            if hasattr(self.server, 'processed_signatures') and self.server.processed_signatures:
-                cache_size = len(self.server.processed_signatures)
-                self.server.processed_signatures.clear()
-                logger.info(f"🧹 Cleared signature cache ({cache_size} entries)")
+            # Expire aged entries from the dedupe stores - never a full reset, which
+            # would let every recent token through again (duplicate storm)
+            for cache_name, label in (('seen_token_addresses', 'token address'), ('processed_signatures', 'signature')):
+                cache = getattr(self.server, cache_name, None)
+                if cache is None:
+                    continue
+                if isinstance(cache, SeenAddressStore):
+                    expired = cache.expire()
+                elif hasattr(cache, 'expire'):
+                    # TTLCache-style caches
+                    before = len(cache)
+                    cache.expire()
+                    expired = before - len(cache)
+                else:
+                    continue
+                logger.info(f"🧹 Expired {expired} stale {label} entries ({len(cache)} kept)")
                 
             # Force garbage collection
             collected = gc.collect()
@@ -5,10 +5,12 @@ Provides a dedicated web page for easy mobile address copying
 """
 
 from flask import Flask, render_template_string, jsonify, request
-import psycopg2
 import os
 import logging
 
+from db_pool import get_connection
+from recent_tokens import get_recent_token_feed, register_recent_token_routes
+
 logger = logging.getLogger(__name__)
 
 class WebCopyInterface:
@@ -27,40 +29,9 @@ class WebCopyInterface:
             """Main copy interface page"""
             return render_template_string(COPY_INTERFACE_HTML)
         
-        @self.app.route('/api/recent-tokens')
-        def get_recent_tokens():
-            """API endpoint for recent tokens"""
-            try:
-                conn = psycopg2.connect(self.database_url)
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT token_name, token_address, symbol, platform, created_at
-                    FROM detected_tokens 
-                    WHERE token_name IS NOT NULL 
-                    AND token_name != 'Unnamed Token'
-                    ORDER BY created_at DESC 
-                    LIMIT 20
-                """)
-                
-                tokens = []
-                for row in cursor.fetchall():
-                    tokens.append({
-                        'name': row[0],
-                        'address': row[1],
-                        'symbol': row[2],
-                        'platform': row[3] or 'Unknown',
-                        'created_at': row[4].isoformat() if row[4] else None
-                    })
-                
-                cursor.close()
-                conn.close()
-                
-                return jsonify({'tokens': tokens})
-                
-            except Exception as e:
-                logger.error(f"Error fetching recent tokens: {e}")
-                return jsonify({'error': 'Failed to fetch tokens'}), 500
+        # Ring buffer shared with the monitor in this process (database only for ?before= pages)
+        register_recent_token_routes(self.app, get_recent_token_feed(),
+                                     connection_factory=lambda: get_connection(self.database_url))
         
         @self.app.route('/api/copy-address', methods=['POST'])
         def copy_address_api():
@@ -208,34 +179,72 @@ COPY_INTERFACE_HTML = """
         
         <div id="loading" class="loading">Loading recent tokens...</div>
         <div id="tokens-container"></div>
+        <button id="load-more" class="copy-btn" style="display: none;" onclick="loadTokens()">⬇️ Load older tokens</button>
     </div>
 
     <script>
+        let nextCursor = null;
+        
+        function renderTokens(tokens, prepend) {
+            const container = document.getElementById('tokens-container');
+            const empty = document.getElementById('no-tokens');
+            if (empty && tokens.length) empty.remove();
+            tokens.forEach(token => {
+                if (document.getElementById('token-' + token.address)) return;
+                const tokenCard = createTokenCard(token);
+                tokenCard.id = 'token-' + token.address;
+                if (prepend) {
+                    container.insertBefore(tokenCard, container.firstChild);
+                } else {
+                    container.appendChild(tokenCard);
+                }
+            });
+        }
+        
         async function loadTokens() {
             try {
-                const response = await fetch('/api/recent-tokens');
+                // First page from the server's ring buffer, older pages via the keyset cursor
+                const url = nextCursor ? '/api/recent-tokens?before=' + encodeURIComponent(nextCursor) : '/api/recent-tokens';
+                const response = await fetch(url);
                 const data = await response.json();
-                
                 const container = document.getElementById('tokens-container');
                 const loading = document.getElementById('loading');
                 
                 loading.style.display = 'none';
                 
-                if (data.tokens && data.tokens.length > 0) {
-                    data.tokens.forEach(token => {
-                        const tokenCard = createTokenCard(token);
-                        container.appendChild(tokenCard);
-                    });
-                } else {
-                    container.innerHTML = '<p>No recent tokens found</p>';
+                renderTokens(data.tokens || [], false);
+                nextCursor = data.next_cursor;
+                document.getElementById('load-more').style.display = nextCursor ? 'block' : 'none';
+                if (!container.children.length) {
+                    container.innerHTML = '<p id="no-tokens">No recent tokens found</p>';
                 }
-                
             } catch (error) {
                 console.error('Error loading tokens:', error);
                 document.getElementById('loading').textContent = 'Error loading tokens';
             }
         }
         
+        async function refreshLatest() {
+            // Polling fallback for browsers without EventSource (ETag makes unchanged polls cheap)
+            const response = await fetch('/api/recent-tokens');
+            const data = await response.json();
+            renderTokens((data.tokens || []).reverse(), true);
+        }
+        
+        function streamTokens() {
+            if (!window.EventSource) {
+                setInterval(refreshLatest, 30000);
+                return;
+            }
+            // New tokens are pushed by the server; EventSource reconnects with Last-Event-ID
+            const source = new EventSource('/api/recent-tokens/stream');
+            source.addEventListener('token', event => renderTokens([JSON.parse(event.data)], true));
+            source.onerror = () => {
+                // Stream refused (server at its stream cap) - fall back to polling
+                if (source.readyState === EventSource.CLOSED) setInterval(refreshLatest, 30000);
+            };
+        }
+        
         function createTokenCard(token) {
             const card = document.createElement('div');
             card.className = 'token-card';
@@ -307,11 +316,11 @@ COPY_INTERFACE_HTML = """
             }
         }
         
-        // Load tokens when page loads
-        document.addEventListener('DOMContentLoaded', loadTokens);
-        
-        // Refresh every 30 seconds
-        setInterval(loadTokens, 30000);
+        // Load tokens when page loads, then receive new ones by push
+        document.addEventListener('DOMContentLoaded', () => {
+            loadTokens();
+            streamTokens();
+        });
     </script>
 </body>
 </html>
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Write-Behind Batcher for Token Persistence
+Buffers detected_tokens / fallback_processing_coins / notified_tokens rows and
+flushes them as multi-row INSERT ... ON CONFLICT statements on size or time,
+turning one round trip + commit per token into one per batch.
+"""
+
+import time
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, Any, Callable
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchTable:
+    """How rows for one logical table are written"""
+    name: str
+    sql: str                      # INSERT ... VALUES %s ON CONFLICT ... [RETURNING ...]
+    template: str                 # Row template for execute_values, e.g. "(%s, %s, NOW())"
+    key_columns: Tuple[int, ...]  # Row positions of the ON CONFLICT target
+    update_on_conflict: bool = False  # DO UPDATE (last write wins) vs DO NOTHING (first write wins)
+
+
+class WriteBehindBatcher:
+    """
+    Thread-safe write-behind buffer. Rows are coalesced per conflict key before
+    flushing, which keeps the ON CONFLICT semantics of the single-row inserts:
+    DO NOTHING keeps the first row seen, DO UPDATE keeps the latest one (a
+    multi-row DO UPDATE may not touch the same key twice in one statement).
+    """
+
+    def __init__(self, connection_factory: Callable = get_connection, max_batch: int = 500,
+                 flush_interval: float = 0.25, max_buffered: int = 50000):
+        self.connection_factory = connection_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+
+        self.tables: Dict[str, BatchTable] = {}
+        self.buffers: Dict[str, Dict[Tuple, tuple]] = {}
+        self.inflight: Dict[str, Dict[Tuple, tuple]] = {}  # swapped out, being written
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+
+        self.stats = {
+            'rows_queued': 0,
+            'rows_coalesced': 0,
+            'rows_flushed': 0,
+            'rows_inserted': 0,
+            'rows_dropped': 0,
+            'batches': 0,
+            'batch_errors': 0,
+            'last_flush_time': 0.0
+        }
+
+    def register(self, table: BatchTable):
+        """Register a table spec (idempotent by name)"""
+        with self.lock:
+            if table.name not in self.tables:
+                self.tables[table.name] = table
+                self.buffers[table.name] = {}
+
+    def add(self, table_name: str, row: tuple):
+        """Queue a row; never touches the database on the caller's thread"""
+        table = self.tables[table_name]
+        key = tuple(row[i] for i in table.key_columns)
+
+        with self.lock:
+            buffer = self.buffers[table_name]
+            if key in buffer:
+                self.stats['rows_coalesced'] += 1
+                if not table.update_on_conflict:
+                    return
+            elif sum(len(b) for b in self.buffers.values()) >= self.max_buffered:
+                self.stats['rows_dropped'] += 1
+                logger.error(f"❌ Write buffer full - dropping {table_name} row {key}")
+                return
+            buffer[key] = row
+            self.stats['rows_queued'] += 1
+            full = len(buffer) >= self.max_batch
+
+        if full:
+            self.wakeup.set()
+        self.start()
+
+    def is_pending(self, table_name: str, key: tuple) -> bool:
+        """Whether a row with this conflict key is buffered but not yet written"""
+        with self.lock:
+            return key in self.buffers.get(table_name, {}) or key in self.inflight.get(table_name, {})
+
+    def start(self):
+        """Start the background flusher (idempotent)"""
+        if self.running:
+            return
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.thread = threading.Thread(target=self._flush_loop, name="write-batcher", daemon=True)
+            self.thread.start()
+            atexit.register(self.stop)
+
+    def _flush_loop(self):
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Write batcher flush failed: {e}")
+
+    def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        self.running = False
+        self.wakeup.set()
+        self.flush()
+
+    def flush(self) -> int:
+        """Write every buffered row now; returns number of rows flushed"""
+        with self.flush_lock:
+            with self.lock:
+                pending = {name: buffer for name, buffer in self.buffers.items() if buffer}
+                for name in pending:
+                    self.buffers[name] = {}
+                self.inflight = pending
+
+            if not pending:
+                return 0
+
+            started = time.perf_counter()
+            flushed = 0
+            conn = None
+            try:
+                conn = self.connection_factory()
+                for name, buffer in pending.items():
+                    flushed += self._write_table(conn, self.tables[name], list(buffer.values()))
+            except Exception as e:
+                # ON CONFLICT makes re-writing an already committed chunk harmless
+                logger.error(f"❌ Write batcher flush failed, requeueing {sum(len(b) for b in pending.values())} rows: {e}")
+                self._requeue(pending)
+            finally:
+                if conn is not None:
+                    conn.close()
+                with self.lock:
+                    self.inflight = {}
+
+            self.stats['last_flush_time'] = time.perf_counter() - started
+            return flushed
+
+    def _write_table(self, conn, table: BatchTable, rows: List[tuple]) -> int:
+        cursor = conn.cursor()
+        try:
+            for start in range(0, len(rows), self.max_batch):
+                chunk = rows[start:start + self.max_batch]
+                try:
+                    inserted = self._execute(cursor, table, chunk)
+                    conn.commit()
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # Connection-level failure - the whole flush is requeued
+                    raise
+                except Exception as e:
+                    # Isolate bad rows so one failure doesn't lose the whole batch
+                    conn.rollback()
+                    self.stats['batch_errors'] += 1
+                    logger.warning(f"⚠️ Batch write to {table.name} failed ({e}) - retrying row by row")
+                    inserted = 0
+                    for row in chunk:
+                        try:
+                            inserted += self._execute(cursor, table, [row])
+                            conn.commit()
+                        except Exception as row_error:
+                            conn.rollback()
+                            self.stats['rows_dropped'] += 1
+                            logger.error(f"❌ Dropping {table.name} row {row[:2]}: {row_error}")
+
+                self.stats['batches'] += 1
+                self.stats['rows_flushed'] += len(chunk)
+                self.stats['rows_inserted'] += inserted
+                logger.info(f"💾 Flushed {len(chunk)} rows to {table.name} ({inserted} new/updated)")
+        finally:
+            cursor.close()
+        return len(rows)
+
+    def _execute(self, cursor, table: BatchTable, rows: List[tuple]) -> int:
+        if 'RETURNING' in table.sql.upper():
+            returned = execute_values(cursor, table.sql, rows, template=table.template,
+                                      page_size=self.max_batch, fetch=True)
+            return len(returned)
+        execute_values(cursor, table.sql, rows, template=table.template, page_size=self.max_batch)
+        return cursor.rowcount
+
+    def _requeue(self, pending: Dict[str, Dict[Tuple, tuple]]):
+        """Put rows back after a connection failure (newer buffered rows win)"""
+        with self.lock:
+            for name, buffer in pending.items():
+                merged = dict(buffer)
+                merged.update(self.buffers[name])
+                self.buffers[name] = merged
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            buffered = {name: len(buffer) for name, buffer in self.buffers.items()}
+        stats = dict(self.stats)
+        stats['buffered'] = buffered
+        return stats
+
+
+# Table specs used by the monitors
+
+# main.IntegratedTokenMonitor - named tokens
+DETECTED_TOKENS = BatchTable(
+    name='detected_tokens',
+    sql="""
+        INSERT INTO detected_tokens (address, name, symbol, created_at, name_status, status, data_source, platform)
+        VALUES %s
+        ON CONFLICT (address) DO NOTHING
+        RETURNING address
+    """,
+    template="(%s, %s, %s, %s, 'resolved', 'detected', 'pumpportal', %s)",
+    key_columns=(0,)
+)
+
+# main.IntegratedTokenMonitor - tokens still waiting for a real name
+FALLBACK_PROCESSING_COINS = BatchTable(
+    name='fallback_processing_coins',
+    sql="""
+        INSERT INTO fallback_processing_coins (contract_address, token_name, symbol, created_at, processing_status, platform)
+        VALUES %s
+        ON CONFLICT (contract_address) DO NOTHING
+        RETURNING contract_address
+    """,
+    template="(%s, %s, %s, %s, 'pending', %s)",
+    key_columns=(0,)
+)
+
+# main.IntegratedTokenMonitor - one row per (token, user, keyword)
+NOTIFIED_TOKENS = BatchTable(
+    name='notified_tokens',
+    sql="""
+        INSERT INTO notified_tokens (token_address, token_name, matched_keyword, user_id, notified_at, notification_type)
+        VALUES %s
+        ON CONFLICT (token_address, user_id, matched_keyword) DO NOTHING
+        RETURNING token_address
+    """,
+    template="(%s, %s, %s, %s, %s, %s)",
+    key_columns=(0, 3, 2)
+)
+
+# AlchemyMonitoringServer.store_detected_token_in_db - searchable token upsert
+DETECTED_TOKENS_UPSERT = BatchTable(
+    name='detected_tokens_upsert',
+    sql="""
+        INSERT INTO detected_tokens (address, name, symbol, platform, status, name_status, matched_keywords, social_links, detection_timestamp)
+        VALUES %s
+        ON CONFLICT (address) DO UPDATE SET
+            name = EXCLUDED.name,
+            symbol = EXCLUDED.symbol,
+            status = EXCLUDED.status,
+            name_status = EXCLUDED.name_status,
+            matched_keywords = EXCLUDED.matched_keywords,
+            social_links = EXCLUDED.social_links
+        RETURNING address
+    """,
+    template="(%s, %s, %s, %s, %s, %s, %s, %s, NOW())",
+    key_columns=(0,),
+    update_on_conflict=True
+)
+
+# AlchemyMonitoringServer.record_notification_in_db - one row per token
+NOTIFIED_TOKENS_BY_ADDRESS = BatchTable(
+    name='notified_tokens_by_address',
+    sql="""
+        INSERT INTO notified_tokens (token_address, token_name, notification_type)
+        VALUES %s
+        ON CONFLICT (token_address) DO NOTHING
+        RETURNING token_address
+    """,
+    template="(%s, %s, %s)",
+    key_columns=(0,)
+)
+
+# server_dispatcher.ServerFanoutDispatcher - one row per (server, token, user, keyword)
+SERVER_NOTIFICATIONS = BatchTable(
+    name='server_notifications',
+    sql="""
+        INSERT INTO server_notifications (server_id, token_address, token_name, matched_keyword, user_id, notified_at)
+        VALUES %s
+        ON CONFLICT DO NOTHING
+    """,
+    template="(%s, %s, %s, %s, %s, %s)",
+    key_columns=(0, 1, 4, 3)
+)
+
+ALL_TABLES = (DETECTED_TOKENS, FALLBACK_PROCESSING_COINS, NOTIFIED_TOKENS,
+              DETECTED_TOKENS_UPSERT, NOTIFIED_TOKENS_BY_ADDRESS, SERVER_NOTIFICATIONS)
+
+
+# Global batcher instance
+write_batcher = None
+_write_batcher_lock = threading.Lock()
+
+
+def get_write_batcher() -> WriteBehindBatcher:
+    """Get the process-wide write-behind batcher"""
+    global write_batcher
+    if write_batcher is None:
+        with _write_batcher_lock:
+            if write_batcher is None:
+                batcher = WriteBehindBatcher()
+                for table in ALL_TABLES:
+                    batcher.register(table)
+                write_batcher = batcher
+    return write_batcher
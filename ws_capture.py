@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Websocket Capture Files
+Record raw PumpPortal frames with their receive timestamps to a gzip file, and
+read them back for replay_benchmark.py. One line per frame:
+<epoch receive time>\\t<raw frame>.
+"""
+
+import gzip
+import time
+import logging
+from typing import Iterator, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureWriter:
+    """Append-only gzip capture; flushed periodically so a crash loses at most a second of frames"""
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.file = gzip.open(path, 'at', encoding='utf-8', compresslevel=6)
+        self.last_flush = time.time()
+        self.frames = 0
+        logger.info(f"📼 Recording websocket frames to {path}")
+
+    def write(self, received_at: float, frame: Union[str, bytes]):
+        if isinstance(frame, bytes):
+            frame = frame.decode('utf-8', errors='replace')
+        # Frames are single-line JSON; escape defensively so one frame is always one line
+        self.file.write(f"{received_at:.6f}\t{frame.replace(chr(10), ' ')}\n")
+        self.frames += 1
+        if received_at - self.last_flush >= self.flush_interval:
+            self.flush()
+            self.last_flush = received_at
+
+    def flush(self):
+        """Push buffered frames to disk (the gzip member stays open)"""
+        if self.file:
+            self.file.flush()
+
+    def close(self):
+        """Finish the gzip member (end-of-stream marker); reopening the path appends a new member"""
+        if self.file:
+            self.file.close()
+            self.file = None
+            logger.info(f"📼 Capture closed ({self.frames} frames)")
+
+
+def read_capture(path: str) -> Iterator[Tuple[float, str]]:
+    """(receive time, raw frame) for every frame in a capture file
+
+    A capture whose writer was killed has no end-of-stream marker; reading
+    stops at the last complete frame instead of failing the whole replay.
+    """
+    frames = 0
+    with gzip.open(path, 'rt', encoding='utf-8') as capture:
+        try:
+            for line in capture:
+                if not line.endswith('\n'):
+                    break  # Partial last line of a truncated capture
+                received_at, _, frame = line.rstrip('\n').partition('\t')
+                try:
+                    received_at = float(received_at)
+                except ValueError:
+                    continue
+                frames += 1
+                yield received_at, frame
+        except (EOFError, gzip.BadGzipFile) as e:
+            logger.warning(f"⚠️ Capture {path} is truncated ({e}) - replaying the {frames} complete frames")